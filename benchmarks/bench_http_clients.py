@@ -0,0 +1,151 @@
+"""Per-request httpx clients vs the shared pooled registry — turn latency.
+
+Starts a local stub HTTP/1.1 server (keep-alive capable) and replays
+"turns" shaped like a real Syne turn: one query embed, a chat completion,
+a tool call (web search) and a second chat completion, plus an
+evaluator embed in parallel. Each turn is run twice:
+
+    per-request: `async with httpx.AsyncClient(...)` around every call —
+                 the old pattern, a new TCP connection each time.
+    pooled:      syne.http_clients.pooled_client() — one warm pool per
+                 provider name, connections reused across calls and turns.
+
+Loopback TCP setup is nearly free, so the stub can add a delay to the
+first request on each new connection (--handshake-ms) to model the
+DNS + TCP + TLS round-trips a remote provider costs. With the default 0
+the numbers show only the local client construction/teardown overhead.
+
+Usage:
+    python benchmarks/bench_http_clients.py
+    python benchmarks/bench_http_clients.py --turns 200 --handshake-ms 40
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+from syne.http_clients import close_all_clients, pooled_client
+
+_BODY = b'{"ok": true, "embedding": [0.1, 0.2, 0.3]}'
+
+
+class StubServer:
+    """Minimal keep-alive HTTP/1.1 server that answers every request with _BODY."""
+
+    def __init__(self, handshake_ms: float, service_ms: float):
+        self.handshake = handshake_ms / 1000
+        self.service = service_ms / 1000
+        self.connections = 0
+        self._server: asyncio.AbstractServer | None = None
+        self.port = 0
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _handle(self, reader, writer) -> None:
+        self.connections += 1
+        first = True
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in head.split(b"\r\n"):
+                    if line.lower().startswith(b"content-length:"):
+                        length = int(line.split(b":", 1)[1])
+                if length:
+                    await reader.readexactly(length)
+                if first and self.handshake:
+                    await asyncio.sleep(self.handshake)
+                first = False
+                if self.service:
+                    await asyncio.sleep(self.service)
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    b"Content-Length: " + str(len(_BODY)).encode() + b"\r\n\r\n" + _BODY
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+async def _call_per_request(url: str, name: str) -> None:
+    async with httpx.AsyncClient(timeout=30) as client:
+        (await client.post(f"{url}/{name}", json={"input": "hello"})).raise_for_status()
+
+
+async def _call_pooled(url: str, name: str) -> None:
+    async with pooled_client(name, timeout=30) as client:
+        (await client.post(f"{url}/{name}", json={"input": "hello"})).raise_for_status()
+
+
+async def _turn(call, url: str) -> float:
+    started = time.perf_counter()
+    await call(url, "ollama")                       # query embedding
+    await call(url, "anthropic")                    # chat → tool call
+    await asyncio.gather(
+        call(url, "web_search"),                    # tool
+        call(url, "ollama"),                        # memory evaluator
+    )
+    await call(url, "anthropic")                    # final chat
+    return (time.perf_counter() - started) * 1000
+
+
+async def _run(mode: str, url: str, turns: int, server: StubServer) -> dict:
+    call = _call_per_request if mode == "per-request" else _call_pooled
+    conns_before = server.connections
+    await _turn(call, url)  # warm-up (pooled: opens its connections)
+    latencies = [await _turn(call, url) for _ in range(turns)]
+    if mode == "pooled":
+        await close_all_clients()
+    latencies.sort()
+    return {
+        "mode": mode,
+        "p50": statistics.median(latencies),
+        "p95": latencies[int(len(latencies) * 0.95) - 1],
+        "mean": statistics.fmean(latencies),
+        "connections": server.connections - conns_before,
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=100, help="Turns per mode")
+    parser.add_argument("--handshake-ms", type=float, default=0.0,
+                        help="Extra delay on each new connection's first request")
+    parser.add_argument("--service-ms", type=float, default=0.0,
+                        help="Server processing delay per request")
+    args = parser.parse_args()
+
+    server = StubServer(args.handshake_ms, args.service_ms)
+    await server.start()
+    url = f"http://127.0.0.1:{server.port}"
+    try:
+        results = [
+            await _run(mode, url, args.turns, server)
+            for mode in ("per-request", "pooled")
+        ]
+    finally:
+        await server.stop()
+
+    print(f"{args.turns} turns per mode, 5 requests per turn, "
+          f"handshake {args.handshake_ms:.0f} ms, service {args.service_ms:.0f} ms\n")
+    print(f"{'mode':>12}  {'p50 ms':>8}  {'p95 ms':>8}  {'mean ms':>8}  {'connections':>11}")
+    for r in results:
+        print(f"{r['mode']:>12}  {r['p50']:>8.2f}  {r['p95']:>8.2f}  "
+              f"{r['mean']:>8.2f}  {r['connections']:>11}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
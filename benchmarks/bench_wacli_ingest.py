@@ -0,0 +1,145 @@
+"""WhatsApp inbound pickup latency — 2 s SQLite polling vs the event-driven reader.
+
+Writes messages into a scratch wacli-shaped SQLite store (WAL mode, like
+wacli's) at random intervals from a separate thread — standing in for
+`wacli sync --follow` — and measures how long each row takes to reach the
+event loop:
+
+    poll:    what WhatsAppAbility._poll_loop did — every 2 s, a fresh
+             sqlite3.connect and a blocking query on the event loop
+    reader:  syne.abilities._wacli.WacliReader — one persistent read-only
+             connection in a thread woken by inotify (stat() polling where
+             inotify is unavailable)
+
+Also reports the worst event-loop stall seen by a 10 ms ticker during each
+run (how long the loop could not run other work).
+
+No database or WhatsApp account needed — the store lives in a temp dir.
+
+Usage:
+    python benchmarks/bench_wacli_ingest.py
+    python benchmarks/bench_wacli_ingest.py --messages 100 --gap-ms 150 --history 200000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+
+from syne.abilities._wacli import _INBOUND_SQL, WacliReader
+
+
+def _create_store(path: str, history: int) -> None:
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("""
+        CREATE TABLE messages (
+            chat_jid TEXT, sender_jid TEXT, sender_name TEXT, chat_name TEXT, text TEXT,
+            from_me INTEGER, media_type TEXT, mime_type TEXT, media_caption TEXT, msg_id TEXT
+        )
+    """)
+    conn.executemany(
+        "INSERT INTO messages (chat_jid, text, from_me) VALUES (?, ?, 0)",
+        ((f"{i % 50}@s.whatsapp.net", f"old message {i}") for i in range(history)),
+    )
+    conn.commit()
+    conn.close()
+
+
+def _writer(path: str, count: int, gap_s: float, sent: dict, seed: int) -> None:
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    # Keep fsync out of the measurement — the commit, not the disk, is
+    # what makes a row visible to readers.
+    conn.execute("PRAGMA synchronous=NORMAL")
+    for i in range(count):
+        time.sleep(rng.uniform(0, 2 * gap_s))
+        sent[f"bench {i}"] = time.perf_counter()
+        conn.execute("INSERT INTO messages (chat_jid, text, from_me) VALUES ('bench@s.whatsapp.net', ?, 0)", (f"bench {i}",))
+        conn.commit()
+    conn.close()
+
+
+async def _ticker(stalls: list, stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(0.01)
+        stalls.append(time.perf_counter() - started - 0.01)
+
+
+async def _poll(path: str, count: int, seen: dict) -> None:
+    conn = sqlite3.connect(path)
+    last = conn.execute("SELECT MAX(rowid) FROM messages").fetchone()[0] or 0
+    conn.close()
+    while len(seen) < count:
+        await asyncio.sleep(2)
+        conn = sqlite3.connect(path, timeout=5)
+        conn.row_factory = sqlite3.Row
+        rows = conn.execute(_INBOUND_SQL, (last,)).fetchall()
+        conn.close()
+        now = time.perf_counter()
+        for r in rows:
+            last = r["rowid"]
+            seen[r["text"]] = now
+
+
+async def _reader(path: str, count: int, seen: dict) -> None:
+    reader = WacliReader(path)
+    queue = await reader.start()
+    try:
+        while len(seen) < count:
+            rows = await queue.get()
+            now = time.perf_counter()
+            for r in rows:
+                seen[r["text"]] = now
+    finally:
+        await reader.stop()
+
+
+async def _run(mode: str, args) -> tuple[list[float], float]:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "wacli.db")
+        _create_store(path, args.history)
+        sent: dict = {}
+        seen: dict = {}
+        stalls: list = []
+        stop = asyncio.Event()
+        ticker = asyncio.create_task(_ticker(stalls, stop))
+        consumer = asyncio.create_task((_poll if mode == "poll" else _reader)(path, args.messages, seen))
+        await asyncio.sleep(0.1)  # consumer seeded its rowid
+        writer = threading.Thread(target=_writer, args=(path, args.messages, args.gap_ms / 1000, sent, args.seed))
+        writer.start()
+        await consumer
+        writer.join()
+        stop.set()
+        await ticker
+    latencies = [(seen[k] - sent[k]) * 1000 for k in sent]
+    return latencies, max(stalls) * 1000
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=60)
+    parser.add_argument("--gap-ms", type=float, default=200.0, help="Mean gap between inbound messages")
+    parser.add_argument("--history", type=int, default=50000, help="Rows already in the store")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    print(f"\n{args.messages} messages, mean gap {args.gap_ms:.0f} ms, {args.history:,} rows of history\n")
+    print(f"{'path':>7}  {'p50 ms':>8}  {'p95 ms':>8}  {'max ms':>8}  {'worst loop stall ms':>19}")
+    for mode in ("poll", "reader"):
+        latencies, stall = await _run(mode, args)
+        latencies.sort()
+        p95 = latencies[max(0, int(len(latencies) * 0.95) - 1)]
+        print(f"{mode:>7}  {statistics.median(latencies):>8.1f}  {p95:>8.1f}  {latencies[-1]:>8.1f}  {stall:>19.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,457 @@
+"""Off-loop document extraction — PDF/Office parsing in a worker process pool.
+
+PyMuPDF, python-docx, openpyxl and python-pptx are CPU-bound. Run on the
+event loop, a 300-page PDF stalls every chat, the scheduler and the
+gateway heartbeats for seconds. DocumentExtractor moves that work into a
+process pool:
+
+  - extraction.workers processes, spawned lazily and replaced when the
+    config changes
+  - each worker's address space is capped at extraction.max_memory_mb
+    (RLIMIT_AS); a job running past extraction.timeout seconds — timed
+    in the worker from when it starts, not while it waits in the queue —
+    raises ExtractionError. Only a worker that dies, or hangs where the
+    timer can't interrupt it, recycles the pool
+  - PDF pages are scanned in batches of PAGE_BATCH, at most `workers`
+    batches in flight, and yielded in order as batches finish, so the
+    caller can start vision OCR on early image pages while later pages
+    are still being parsed
+  - results are cached by sha256 of the file bytes (LRU of
+    extraction.cache_size entries), so re-uploads and memory_analyze_file
+    re-runs never reach the pool
+
+PDF workers get the path of a spooled temp file instead of the bytes, so
+each batch submission does not pickle the whole document again.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import hashlib
+import logging
+import multiprocessing
+import os
+import signal
+import tempfile
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Optional
+
+logger = logging.getLogger("syne.ability.extract")
+
+DEFAULT_WORKERS = 2
+DEFAULT_MAX_MEMORY_MB = 1024
+DEFAULT_TIMEOUT = 120.0
+DEFAULT_CACHE_SIZE = 32
+
+# Pages per PDF scan job — small enough that the first pages come back
+# quickly, large enough that per-job overhead (re-opening the file) is noise.
+PAGE_BATCH = 16
+
+# Re-read extraction.* config at most this often (seconds).
+_CONFIG_REFRESH = 60.0
+
+# How often the loop checks on a running job, and how long past its timeout
+# a job may keep running (its worker failed to stop it) before the pool is
+# killed.
+_POLL = 0.5
+_HANG_GRACE = 5.0
+
+
+class ExtractionError(RuntimeError):
+    """A job exceeded extraction.timeout, ran out of memory, or its worker died."""
+
+
+class _JobTimeout(Exception):
+    """Raised inside a worker when its job runs past extraction.timeout."""
+
+
+@dataclass(frozen=True)
+class PdfPage:
+    index: int
+    text: str
+    vectors: int  # vector drawing elements (get_drawings), 0 if unavailable
+
+
+# ─────────────────────────────────────────────────────────────────────────
+# Worker side — top-level functions so they pickle by reference
+# ─────────────────────────────────────────────────────────────────────────
+
+
+def _init_worker(max_memory_mb: int) -> None:
+    """Pool initializer: ignore Ctrl+C (the parent handles it), cap memory."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if max_memory_mb > 0:
+        try:
+            import resource
+            limit = max_memory_mb * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        except (ImportError, ValueError, OSError):
+            pass  # not supported on this platform — timeout still applies
+
+
+def _on_alarm(signum, frame) -> None:
+    raise _JobTimeout()
+
+
+def _timed_call(fn: Callable, timeout: float, *args) -> Any:
+    """fn(*args), stopped with _JobTimeout after `timeout` seconds of run time.
+
+    The timer starts here, when a worker picks the job up. It needs
+    SIGALRM in the worker's main thread; elsewhere (thread pools, Windows)
+    only the loop-side backstop in DocumentExtractor.run applies.
+    """
+    armed = (
+        timeout > 0
+        and hasattr(signal, "setitimer")
+        and threading.current_thread() is threading.main_thread()
+    )
+    if armed:
+        signal.signal(signal.SIGALRM, _on_alarm)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return fn(*args)
+    finally:
+        if armed:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+def _pdf_scan(path: str, start: int, end: int) -> tuple[int, list[tuple[str, int]]]:
+    """Text + vector count for pages [start, end). Returns (page_count, rows)."""
+    import fitz  # PyMuPDF
+
+    rows = []
+    with fitz.open(path) as doc:
+        count = doc.page_count
+        for i in range(start, min(end, count)):
+            page = doc.load_page(i)
+            text = page.get_text("text").strip()
+            try:
+                vectors = len(page.get_drawings())
+            except Exception:
+                vectors = 0
+            rows.append((text, vectors))
+    return count, rows
+
+
+def _pdf_render(path: str, index: int, dpi: int) -> bytes:
+    """Render one page as PNG bytes."""
+    import fitz  # PyMuPDF
+
+    with fitz.open(path) as doc:
+        zoom = dpi / 72.0
+        pix = doc.load_page(index).get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+        return pix.tobytes("png")
+
+
+def _office_read(kind: str, content: bytes, max_rows: int, max_cols: int) -> tuple[str, dict]:
+    from syne.abilities import office
+
+    if kind == "docx":
+        return office._read_docx_bytes(content)
+    if kind == "xlsx":
+        return office._read_xlsx_bytes(content, max_rows=max_rows, max_cols=max_cols)
+    if kind == "pptx":
+        return office._read_pptx_bytes(content)
+    raise ValueError(f"Unknown office kind: {kind}")
+
+
+# ─────────────────────────────────────────────────────────────────────────
+# Loop side
+# ─────────────────────────────────────────────────────────────────────────
+
+
+def file_hash(content: bytes) -> str:
+    """sha256 of the file bytes — the extraction cache key."""
+    return hashlib.sha256(content).hexdigest()
+
+
+class DocumentExtractor:
+    """Process pool + result cache shared by the pdf and office abilities."""
+
+    def __init__(
+        self,
+        workers: int = DEFAULT_WORKERS,
+        max_memory_mb: int = DEFAULT_MAX_MEMORY_MB,
+        timeout: float = DEFAULT_TIMEOUT,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+    ):
+        self.workers = workers
+        self.max_memory_mb = max_memory_mb
+        self.timeout = timeout
+        self.cache_size = cache_size
+        self._pool: Optional[concurrent.futures.Executor] = None
+        self._pool_key: Optional[tuple[int, int]] = None
+        self._generation = 0
+        self._cache: OrderedDict[tuple, Any] = OrderedDict()
+        self._config_loaded_at = 0.0
+        self.hits = 0
+        self.misses = 0
+
+    # ── config ─────────────────────────────────────────────────────────
+
+    async def refresh_config(self) -> None:
+        """Pick up extraction.* config; keeps defaults if the DB is unavailable."""
+        now = time.monotonic()
+        if self._config_loaded_at and now - self._config_loaded_at < _CONFIG_REFRESH:
+            return
+        self._config_loaded_at = now
+        try:
+            from ..db.models import get_config
+            self.workers = max(1, int(await get_config("extraction.workers", DEFAULT_WORKERS)))
+            self.max_memory_mb = max(0, int(await get_config("extraction.max_memory_mb", DEFAULT_MAX_MEMORY_MB)))
+            self.timeout = max(1.0, float(await get_config("extraction.timeout", DEFAULT_TIMEOUT)))
+            self.cache_size = max(0, int(await get_config("extraction.cache_size", DEFAULT_CACHE_SIZE)))
+        except Exception as e:
+            logger.debug(f"Extraction config unavailable, using defaults: {e}")
+        self._trim()
+
+    # ── pool ───────────────────────────────────────────────────────────
+
+    def _make_pool(self) -> concurrent.futures.Executor:
+        # spawn, not fork: the parent runs an event loop plus HTTP/DB
+        # client threads that must not be duplicated into workers.
+        return concurrent.futures.ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.max_memory_mb,),
+        )
+
+    def _get_pool(self) -> concurrent.futures.Executor:
+        key = (self.workers, self.max_memory_mb)
+        if self._pool is None or self._pool_key != key:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False)  # running jobs finish, then it exits
+            self._pool = self._make_pool()
+            self._pool_key = key
+            self._generation += 1
+        return self._pool
+
+    def _kill_pool(self) -> None:
+        """Terminate the workers now — a stuck job cannot be cancelled otherwise."""
+        pool, self._pool = self._pool, None
+        if pool is None:
+            return
+        for proc in list((getattr(pool, "_processes", None) or {}).values()):
+            try:
+                proc.terminate()
+            except Exception:
+                pass
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self) -> None:
+        self._kill_pool()
+
+    async def _wait(self, job: concurrent.futures.Future) -> Any:
+        """Result of a submitted job; asyncio.TimeoutError if it hangs.
+
+        The worker times the job itself (_timed_call). This is the backstop
+        for a job that keeps running _HANG_GRACE seconds past its timeout,
+        counted from when the pool reports it running — never from submission.
+        """
+        fut = asyncio.wrap_future(job)
+        started = None
+        try:
+            while True:
+                done, _ = await asyncio.wait({fut}, timeout=_POLL)
+                if done:
+                    return fut.result()
+                now = time.monotonic()
+                if started is None and job.running():
+                    started = now
+                if started is not None and now - started > self.timeout + _HANG_GRACE:
+                    raise asyncio.TimeoutError
+        except asyncio.CancelledError:
+            fut.cancel()
+            raise
+
+    async def run(self, fn: Callable, *args) -> Any:
+        """Run fn(*args) in a worker, bounded by extraction.timeout.
+
+        The timeout counts the job's own run time, not its wait for a free
+        worker. A timed-out job fails alone; the pool is only killed when a
+        job can't be stopped. If that recycled the pool under this job, it
+        is retried once on the fresh pool.
+        """
+        for attempt in range(2):
+            pool = self._get_pool()
+            generation = self._generation
+            try:
+                return await self._wait(pool.submit(_timed_call, fn, self.timeout, *args))
+            except _JobTimeout:
+                raise ExtractionError(f"{fn.__name__} exceeded {self.timeout:.0f}s") from None
+            except asyncio.TimeoutError:
+                if self._generation == generation:
+                    self._kill_pool()
+                raise ExtractionError(f"{fn.__name__} exceeded {self.timeout:.0f}s") from None
+            except MemoryError:
+                raise ExtractionError(
+                    f"{fn.__name__} exceeded the {self.max_memory_mb} MB worker memory limit"
+                ) from None
+            except BrokenProcessPool as e:
+                if self._generation != generation and attempt == 0:
+                    continue
+                self._kill_pool()
+                raise ExtractionError(f"extraction worker died during {fn.__name__}") from e
+        raise ExtractionError(f"{fn.__name__}: extraction pool unavailable")
+
+    # ── cache ──────────────────────────────────────────────────────────
+
+    def cache_get(self, key: tuple) -> Any:
+        value = self._cache.get(key)
+        if value is not None:
+            self._cache.move_to_end(key)
+        return value
+
+    def cache_put(self, key: tuple, value: Any) -> None:
+        if self.cache_size <= 0:
+            return
+        self._cache[key] = value
+        self._cache.move_to_end(key)
+        self._trim()
+
+    def _trim(self) -> None:
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    # ── documents ──────────────────────────────────────────────────────
+
+    @asynccontextmanager
+    async def open_pdf(self, content: bytes) -> AsyncIterator["PdfJob"]:
+        job = PdfJob(self, content)
+        try:
+            yield job
+        finally:
+            job.close()
+
+    async def pdf_pages(self, content: bytes) -> list[PdfPage]:
+        """All pages of a PDF (cached)."""
+        async with self.open_pdf(content) as job:
+            return [page async for page in job.pages()]
+
+    async def office_text(
+        self, kind: str, content: bytes, max_rows: int = 200, max_cols: int = 50,
+    ) -> tuple[str, dict]:
+        """(text, meta) of a docx/xlsx/pptx file (cached)."""
+        key = ("office", kind, file_hash(content), max_rows, max_cols)
+        cached = self.cache_get(key)
+        if cached is not None:
+            self.hits += 1
+            text, meta = cached
+            return text, dict(meta)
+        self.misses += 1
+        text, meta = await self.run(_office_read, kind, content, max_rows, max_cols)
+        self.cache_put(key, (text, dict(meta)))
+        return text, meta
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._cache),
+            "cache_size": self.cache_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "workers": self.workers,
+        }
+
+
+class PdfJob:
+    """One PDF being extracted: streams pages, renders pages on demand."""
+
+    def __init__(self, extractor: DocumentExtractor, content: bytes):
+        self._ex = extractor
+        self._content = content
+        self.digest = file_hash(content)
+        self.page_count: Optional[int] = None
+        self._path: Optional[str] = None
+
+    async def _spool(self) -> str:
+        if self._path is None:
+            def _write() -> str:
+                fd, path = tempfile.mkstemp(prefix="syne_extract_", suffix=".pdf")
+                with os.fdopen(fd, "wb") as f:
+                    f.write(self._content)
+                return path
+            self._path = await asyncio.to_thread(_write)
+        return self._path
+
+    async def pages(self) -> AsyncIterator[PdfPage]:
+        """Yield every page in order, as soon as its batch is parsed."""
+        key = ("pdf", self.digest)
+        cached = self._ex.cache_get(key)
+        if cached is not None:
+            self._ex.hits += 1
+            self.page_count = len(cached)
+            for page in cached:
+                yield page
+            return
+        self._ex.misses += 1
+
+        path = await self._spool()
+        count, rows = await self._ex.run(_pdf_scan, path, 0, PAGE_BATCH)
+        self.page_count = count
+        pages = [PdfPage(i, t, v) for i, (t, v) in enumerate(rows)]
+        for page in pages:
+            yield page
+
+        # Remaining batches run at most `workers` at a time, so page renders
+        # for vision OCR queue behind a few scans rather than the whole
+        # document, and are yielded in page order.
+        starts = iter(range(PAGE_BATCH, count, PAGE_BATCH))
+        in_flight: deque[tuple[int, asyncio.Future]] = deque()
+
+        def scan_next() -> None:
+            start = next(starts, None)
+            if start is not None:
+                in_flight.append((start, asyncio.ensure_future(
+                    self._ex.run(_pdf_scan, path, start, start + PAGE_BATCH)
+                )))
+
+        try:
+            for _ in range(max(1, self._ex.workers)):
+                scan_next()
+            while in_flight:
+                start, fut = in_flight.popleft()
+                _, rows = await fut
+                scan_next()
+                batch = [PdfPage(start + j, t, v) for j, (t, v) in enumerate(rows)]
+                pages.extend(batch)
+                for page in batch:
+                    yield page
+        finally:
+            for _, fut in in_flight:
+                if not fut.done():
+                    fut.cancel()
+                elif not fut.cancelled():
+                    fut.exception()  # mark retrieved — the first failure already raised
+        self._ex.cache_put(key, tuple(pages))
+
+    async def render(self, index: int, dpi: int) -> bytes:
+        """PNG of one page, rendered in a worker."""
+        return await self._ex.run(_pdf_render, await self._spool(), index, dpi)
+
+    def close(self) -> None:
+        if self._path is not None:
+            try:
+                os.unlink(self._path)
+            except OSError:
+                pass
+            self._path = None
+
+
+_extractor = DocumentExtractor()
+
+
+def get_extractor() -> DocumentExtractor:
+    """The process-wide document extractor."""
+    return _extractor
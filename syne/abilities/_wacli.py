@@ -0,0 +1,251 @@
+"""Event-driven reader for the wacli SQLite store.
+
+`wacli sync --follow` writes every inbound WhatsApp message into
+~/.wacli/wacli.db. The bridge used to poll that file every 2 seconds from
+the event loop — a fresh sqlite3.connect and a blocking query each time —
+so a message waited up to 2 s before the bridge saw it, and every poll
+stalled the loop for however long the query took.
+
+WacliReader moves this off the loop:
+
+  - one daemon thread holds one persistent read-only connection
+  - it sleeps until the store changes: inotify on the store's directory
+    (wacli.db and its -wal/-journal file, where writes actually land) on
+    Linux, a cheap stat() poll every STAT_INTERVAL seconds elsewhere
+  - on each wake it reads rows past the last seen rowid and hands them
+    to the event loop through an asyncio.Queue (call_soon_threadsafe)
+
+A wake is also forced every IDLE_RESCAN seconds, so a missed event costs
+at most that much latency, never a lost message.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import sqlite3
+import struct
+import threading
+from typing import Optional
+
+logger = logging.getLogger("syne.whatsapp.reader")
+
+STAT_INTERVAL = 0.25
+IDLE_RESCAN = 5.0
+_REOPEN_DELAY = 2.0
+
+_INBOUND_SQL = """
+    SELECT rowid, chat_jid, sender_jid, sender_name, chat_name, text,
+           from_me, media_type, mime_type, media_caption, msg_id
+    FROM messages
+    WHERE rowid > ?
+      AND ((text IS NOT NULL AND text != '') OR media_type IS NOT NULL)
+      AND chat_jid != 'status@broadcast'
+    ORDER BY rowid ASC
+"""
+
+# <sys/inotify.h>
+_IN_MODIFY = 0x002
+_IN_CLOSE_WRITE = 0x008
+_IN_MOVED_TO = 0x080
+_IN_CREATE = 0x100
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+
+
+def _store_files(db_path: str) -> set[str]:
+    name = os.path.basename(db_path)
+    return {name, f"{name}-wal", f"{name}-journal"}
+
+
+class _InotifyWatcher:
+    """Blocks until one of the store files is written (Linux only)."""
+
+    kind = "inotify"
+
+    def __init__(self, db_path: str):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        # Watch the directory, not the files: the -wal file comes and goes
+        # with checkpoints, and a watch on a deleted file goes dead.
+        directory = os.path.dirname(os.path.abspath(db_path)).encode()
+        mask = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE
+        if libc.inotify_add_watch(self._fd, directory, mask) < 0:
+            errno = ctypes.get_errno()
+            os.close(self._fd)
+            raise OSError(errno, "inotify_add_watch failed")
+        self._names = {n.encode() for n in _store_files(db_path)}
+        self._wake_r, self._wake_w = os.pipe()
+
+    def wait(self, timeout: float) -> bool:
+        """True if a store file changed (or wake() was called) within timeout."""
+        ready, _, _ = select.select([self._fd, self._wake_r], [], [], timeout)
+        if self._wake_r in ready:
+            os.read(self._wake_r, 64)
+            return True
+        if not ready:
+            return False
+        changed = False
+        try:
+            while True:
+                data = os.read(self._fd, 4096)
+                offset = 0
+                while offset + _EVENT_HEADER.size <= len(data):
+                    _, _, _, length = _EVENT_HEADER.unpack_from(data, offset)
+                    start = offset + _EVENT_HEADER.size
+                    name = data[start:start + length].rstrip(b"\0")
+                    changed = changed or name in self._names
+                    offset = start + length
+        except BlockingIOError:
+            pass
+        return changed
+
+    def wake(self) -> None:
+        os.write(self._wake_w, b"x")
+
+    def close(self) -> None:
+        for fd in (self._fd, self._wake_r, self._wake_w):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+
+class _StatWatcher:
+    """Fallback: compare (mtime, size) of the store files every STAT_INTERVAL."""
+
+    kind = "stat"
+
+    def __init__(self, db_path: str):
+        directory = os.path.dirname(os.path.abspath(db_path))
+        self._paths = [os.path.join(directory, n) for n in sorted(_store_files(db_path))]
+        self._last = self._snapshot()
+        self._woken = threading.Event()
+
+    def _snapshot(self) -> tuple:
+        out = []
+        for path in self._paths:
+            try:
+                st = os.stat(path)
+                out.append((st.st_mtime_ns, st.st_size))
+            except OSError:
+                out.append(None)
+        return tuple(out)
+
+    def wait(self, timeout: float) -> bool:
+        waited = 0.0
+        while waited < timeout:
+            if self._woken.wait(min(STAT_INTERVAL, timeout - waited)):
+                self._woken.clear()
+                return True
+            waited += STAT_INTERVAL
+            snapshot = self._snapshot()
+            if snapshot != self._last:
+                self._last = snapshot
+                return True
+        return False
+
+    def wake(self) -> None:
+        self._woken.set()
+
+    def close(self) -> None:
+        pass
+
+
+def _make_watcher(db_path: str):
+    try:
+        return _InotifyWatcher(db_path)
+    except (OSError, AttributeError) as e:
+        # AttributeError: libc without inotify_* (macOS).
+        logger.info(f"inotify unavailable ({e}); watching the wacli store by stat()")
+        return _StatWatcher(db_path)
+
+
+class WacliReader:
+    """Pushes new wacli message rows (as dicts) onto an asyncio.Queue."""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.last_rowid = 0
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._conn: Optional[sqlite3.Connection] = None
+        self._watcher = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, timeout=5, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _open(self) -> int:
+        self._conn = self._connect()
+        return self._conn.execute("SELECT MAX(rowid) FROM messages").fetchone()[0] or 0
+
+    async def start(self) -> asyncio.Queue:
+        """Open the store, skip existing rows, and start the reader thread.
+
+        Raises sqlite3.Error if the store can't be opened.
+        """
+        self._loop = asyncio.get_running_loop()
+        self.last_rowid = await asyncio.to_thread(self._open)
+        self._watcher = _make_watcher(self.db_path)
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="wacli-reader", daemon=True)
+        self._thread.start()
+        logger.info(
+            f"WhatsApp reader started (last_rowid={self.last_rowid}, db={self.db_path}, "
+            f"watch={self._watcher.kind})"
+        )
+        return self.queue
+
+    async def stop(self) -> None:
+        self._stopping.set()
+        if self._watcher:
+            self._watcher.wake()
+        if self._thread:
+            await asyncio.to_thread(self._thread.join, 10)
+            self._thread = None
+        if self._watcher:
+            self._watcher.close()
+            self._watcher = None
+
+    def _read_new(self) -> list[dict]:
+        rows = self._conn.execute(_INBOUND_SQL, (self.last_rowid,)).fetchall()
+        if rows:
+            self.last_rowid = rows[-1]["rowid"]
+        return [dict(r) for r in rows]
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            self._watcher.wait(IDLE_RESCAN)
+            if self._stopping.is_set():
+                break
+            try:
+                if self._conn is None:
+                    self._conn = self._connect()
+                rows = self._read_new()
+            except sqlite3.Error as e:
+                # Store replaced or locked past the timeout — reopen.
+                logger.warning(f"wacli store read failed, reopening: {e}")
+                if self._conn is not None:
+                    self._conn.close()
+                    self._conn = None
+                self._stopping.wait(_REOPEN_DELAY)
+                continue
+            if rows:
+                try:
+                    self._loop.call_soon_threadsafe(self.queue.put_nowait, rows)
+                except RuntimeError:  # event loop closed under us
+                    break
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
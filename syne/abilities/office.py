@@ -12,6 +12,7 @@ Read actions:
 
 Also auto-extracts uploaded docx/xlsx/pptx via pre_process — LLM sees
 the document content as plain text without needing to call any tool.
+Parsing runs in the extraction worker pool (_extract.py), off the event loop.
 
 Dependencies (lazy-installed via ensure_dependencies):
 - python-docx (Word)
@@ -32,6 +33,7 @@ from copy import deepcopy
 
 from syne.abilities.base import Ability
 from syne.abilities import _media
+from syne.abilities._extract import get_extractor
 
 logger = logging.getLogger("syne.ability.office")
 
@@ -169,18 +171,12 @@ class OfficeAbility(Ability):
             return None
 
         try:
+            text, meta = await self._extract(kind, content)
             if kind == "docx":
-                text, meta = _read_docx_bytes(content)
                 header = f"Word: {filename or 'document.docx'} ({meta['paragraphs']} paragraphs, {len(text)} chars)"
             elif kind == "xlsx":
-                text, meta = _read_xlsx_bytes(
-                    content,
-                    max_rows=self._MAX_XLSX_ROWS_PER_SHEET,
-                    max_cols=self._MAX_XLSX_COLS_PER_SHEET,
-                )
                 header = f"Excel: {filename or 'workbook.xlsx'} ({meta['sheets']} sheet(s), {len(text)} chars)"
             else:  # pptx
-                text, meta = _read_pptx_bytes(content)
                 header = f"PowerPoint: {filename or 'slides.pptx'} ({meta['slides']} slide(s), {len(text)} chars)"
         except Exception as e:
             logger.warning(f"Office pre_process: extraction failed ({kind}): {e}")
@@ -191,6 +187,16 @@ class OfficeAbility(Ability):
 
         return f"{header}\n\n{text}" if text.strip() else f"{header}\n\n[empty document]"
 
+    async def _extract(self, kind: str, content: bytes) -> tuple[str, dict]:
+        """Parse a docx/xlsx/pptx in the extraction worker pool (cached by file hash)."""
+        extractor = get_extractor()
+        await extractor.refresh_config()
+        return await extractor.office_text(
+            kind, content,
+            max_rows=self._MAX_XLSX_ROWS_PER_SHEET,
+            max_cols=self._MAX_XLSX_COLS_PER_SHEET,
+        )
+
     async def ensure_dependencies(self) -> tuple[bool, str]:
         """Install Office deps (python-docx, openpyxl, python-pptx)."""
         missing_pkgs = []
@@ -394,16 +400,7 @@ class OfficeAbility(Ability):
                     raise ValueError("file_base64 is required")
                 import base64 as _b64
                 content = _b64.b64decode(b64)
-                if action == "read_docx":
-                    text, meta = _read_docx_bytes(content)
-                elif action == "read_xlsx":
-                    text, meta = _read_xlsx_bytes(
-                        content,
-                        max_rows=self._MAX_XLSX_ROWS_PER_SHEET,
-                        max_cols=self._MAX_XLSX_COLS_PER_SHEET,
-                    )
-                else:  # read_pptx
-                    text, meta = _read_pptx_bytes(content)
+                text, meta = await self._extract(action[len("read_"):], content)
                 if len(text) > self._MAX_EXTRACTED_CHARS:
                     text = text[: self._MAX_EXTRACTED_CHARS]
                     meta["truncated"] = True
@@ -28,6 +28,7 @@ import httpx
 
 from syne.abilities.base import Ability
 from syne.abilities import _media
+from syne.abilities._extract import get_extractor
 
 logger = logging.getLogger("syne.ability.pdf")
 
@@ -782,6 +783,12 @@ class PdfAbility(Ability):
         Returns the extracted text (with page-count header) so the LLM can
         process the PDF content as plain text. Returns None on non-PDF or
         extraction failure → conversation falls back to native handling.
+
+        Parsing runs in the extraction worker pool (_extract.py) and pages
+        stream back in batches: vision OCR for an image/drawing page starts
+        as soon as its batch is parsed, so pages are taken for the vision
+        budget in document order. Page text and vision results are cached
+        by file hash.
         """
         mime = (input_data.get("mime_type") or "").lower()
         filename = input_data.get("filename") or ""
@@ -804,62 +811,66 @@ class PdfAbility(Ability):
             return f"[PDF too large: {len(content) / 1024 / 1024:.1f} MB, max {self._MAX_PDF_BYTES // 1024 // 1024} MB]"
 
         try:
-            import fitz  # PyMuPDF
+            import fitz  # noqa: F401 — PyMuPDF, used by the extraction workers
         except ImportError:
             logger.warning("PDF pre_process: PyMuPDF (fitz) not installed")
             return None
 
+        extractor = get_extractor()
+        await extractor.refresh_config()
+        vision_tasks: dict[int, asyncio.Task] = {}
         try:
-            doc = fitz.open(stream=content, filetype="pdf")
-            pages = doc.page_count
-
-            # Phase 1: extract text + classify each page
-            # Page modes: "text" (text-only), "image" (no text, vision OCR),
-            # "drawing" (has text + many vectors → text + vision drawing prompt)
-            per_page_text: list[str] = []
-            per_page_mode: list[str] = []
-            per_page_vector_count: list[int] = []
-            for i in range(pages):
-                page = doc.load_page(i)
-                t = page.get_text("text").strip()
-                per_page_text.append(t)
-
-                # Count vector drawing elements (cheap call)
-                vec_count = 0
-                try:
-                    vec_count = len(page.get_drawings())
-                except Exception:
-                    pass
-                per_page_vector_count.append(vec_count)
-
-                # Classify
-                if len(t) < self._VISION_MIN_TEXT_CHARS:
-                    per_page_mode.append("image")  # image-only → OCR
-                elif vec_count >= self._DRAWING_MIN_VECTORS and len(t) < self._DRAWING_MAX_TEXT_CHARS:
-                    per_page_mode.append("drawing")  # technical drawing → text + vision
-                else:
-                    per_page_mode.append("text")  # regular text page
-
-            # Phase 2: vision processing for image + drawing pages (within budget)
-            # Prioritize: drawing pages by vector count desc, then image pages
-            drawing_idx = [i for i, m in enumerate(per_page_mode) if m == "drawing"]
-            image_idx = [i for i, m in enumerate(per_page_mode) if m == "image"]
-            drawing_idx.sort(key=lambda i: per_page_vector_count[i], reverse=True)
-            vision_queue: list[tuple[int, str]] = [(i, "drawing") for i in drawing_idx] + \
-                                                  [(i, "image") for i in image_idx]
-            vision_budget = vision_queue[: self._VISION_MAX_PAGES]
-            vision_skipped = len(vision_queue) - len(vision_budget)
-
-            per_page_vision: dict[int, str] = {}
-            vision_used = 0
-            if vision_budget:
-                try:
-                    per_page_vision = await self._describe_pages_via_vision(doc, vision_budget)
-                    vision_used = sum(1 for v in per_page_vision.values() if v)
-                except Exception as e:
-                    logger.warning(f"PDF vision fallback failed: {e}")
-
-            doc.close()
+            async with extractor.open_pdf(content) as job:
+                vision_key = ("pdf-vision", job.digest)
+                per_page_vision: dict[int, str] = dict(extractor.cache_get(vision_key) or {})
+                vision_sem = asyncio.Semaphore(self._VISION_CONCURRENCY)
+                vision_started = 0.0
+
+                # Phase 1: stream page text + classify each page
+                # Page modes: "text" (text-only), "image" (no text, vision OCR),
+                # "drawing" (has text + many vectors → text + vision drawing prompt)
+                per_page_text: list[str] = []
+                per_page_mode: list[str] = []
+                vision_wanted = 0
+                async for page in job.pages():
+                    t = page.text
+                    per_page_text.append(t)
+                    if len(t) < self._VISION_MIN_TEXT_CHARS:
+                        mode = "image"  # image-only → OCR
+                    elif page.vectors >= self._DRAWING_MIN_VECTORS and len(t) < self._DRAWING_MAX_TEXT_CHARS:
+                        mode = "drawing"  # technical drawing → text + vision
+                    else:
+                        mode = "text"  # regular text page
+                    per_page_mode.append(mode)
+                    if mode == "text":
+                        continue
+
+                    # Phase 2 starts while later pages are still parsing:
+                    # vision for image + drawing pages, within budget.
+                    vision_wanted += 1
+                    if page.index in per_page_vision or vision_wanted > self._VISION_MAX_PAGES:
+                        continue
+                    if not vision_tasks:
+                        vision_started = time.monotonic()
+                    vision_tasks[page.index] = asyncio.create_task(
+                        self._describe_page_via_vision(job, page.index, mode, vision_sem)
+                    )
+                pages = job.page_count or len(per_page_text)
+
+                if vision_tasks:
+                    remaining = self._VISION_OVERALL_TIMEOUT - (time.monotonic() - vision_started)
+                    done, pending = await asyncio.wait(vision_tasks.values(), timeout=max(0.0, remaining))
+                    if pending:
+                        logger.warning(
+                            f"PDF vision overall timeout ({self._VISION_OVERALL_TIMEOUT}s) — "
+                            f"partial results: {len(done)}/{len(vision_tasks)} pages"
+                        )
+                    for idx, task in vision_tasks.items():
+                        if task in done and task.result():
+                            per_page_vision[idx] = task.result()
+                    extractor.cache_put(vision_key, dict(per_page_vision))
+            vision_skipped = max(0, vision_wanted - self._VISION_MAX_PAGES)
+            vision_used = sum(1 for v in per_page_vision.values() if v)
 
             # Build final text: text + [Drawing/Vision] block per page
             parts = []
@@ -879,6 +890,9 @@ class PdfAbility(Ability):
         except Exception as e:
             logger.warning(f"PDF pre_process: extraction failed: {e}")
             return None
+        finally:
+            for task in vision_tasks.values():
+                task.cancel()
 
         if not full_text.strip():
             return f"[PDF '{filename or 'document.pdf'}' ({pages} pages): no extractable text and vision fallback unavailable]"
@@ -906,75 +920,42 @@ class PdfAbility(Ability):
         header = f"PDF: {filename or 'document.pdf'} ({', '.join(stats)})"
         return f"{header}\n\n{full_text}{truncated}"
 
-    async def _describe_pages_via_vision(self, doc, page_jobs: list[tuple[int, str]]) -> dict[int, str]:
-        """Render PDF pages as images and send to image_analysis ability in parallel.
+    async def _describe_page_via_vision(self, job, idx: int, mode: str, sem: asyncio.Semaphore) -> str | None:
+        """Render one PDF page in a worker and send it to the image_analysis ability.
 
         Args:
-            doc: open fitz Document
-            page_jobs: list of (page_index, mode) where mode is "drawing" or "image"
-                       (selects the vision prompt).
+            job: the PdfJob the page belongs to
+            idx: page index
+            mode: "drawing" or "image" (selects the vision prompt)
+            sem: shared semaphore bounding parallel vision calls
 
-        Returns dict {page_index: description}. Pages that fail are omitted.
-        Bounded by _VISION_CONCURRENCY (parallelism) + _VISION_OVERALL_TIMEOUT.
+        Returns the description, or None if rendering or vision failed.
         """
         import base64 as _b64
         from .image_analysis import ImageAnalysisAbility
 
-        ia = ImageAnalysisAbility()
-
-        # Pre-render all images sequentially (CPU-bound, fast)
-        import fitz
-        rendered: list[tuple[int, str, str]] = []  # (page_index, mode, image_b64)
-        for idx, mode in page_jobs:
+        prompt = self._PROMPT_DRAWING if mode == "drawing" else self._PROMPT_OCR
+        async with sem:
             try:
-                page = doc.load_page(idx)
-                zoom = self._VISION_DPI / 72.0
-                mat = fitz.Matrix(zoom, zoom)
-                pix = page.get_pixmap(matrix=mat, alpha=False)
-                img_bytes = pix.tobytes("png")
-                img_b64 = _b64.b64encode(img_bytes).decode("ascii")
-                rendered.append((idx, mode, img_b64))
+                img_bytes = await job.render(idx, self._VISION_DPI)
             except Exception as e:
                 logger.warning(f"PDF page {idx + 1} render failed: {e}")
-
-        # Parallel vision calls with concurrency cap
-        sem = asyncio.Semaphore(self._VISION_CONCURRENCY)
-
-        async def _one(idx: int, mode: str, img_b64: str) -> tuple[int, str | None]:
-            prompt = self._PROMPT_DRAWING if mode == "drawing" else self._PROMPT_OCR
-            async with sem:
-                try:
-                    result = await ia.execute(
-                        params={
-                            "image_base64": img_b64,
-                            "mime_type": "image/png",
-                            "prompt": prompt,
-                        },
-                        context={},
-                    )
-                    if result.get("success") and result.get("result"):
-                        return idx, str(result["result"]).strip()
-                    logger.warning(f"Vision page {idx + 1} ({mode}) failed: {result.get('error', 'unknown')}")
-                except Exception as e:
-                    logger.warning(f"Vision page {idx + 1} ({mode}) exception: {e}")
-                return idx, None
-
-        results: dict[int, str] = {}
-        try:
-            tasks = [_one(idx, mode, b64) for idx, mode, b64 in rendered]
-            outputs = await asyncio.wait_for(
-                asyncio.gather(*tasks, return_exceptions=False),
-                timeout=self._VISION_OVERALL_TIMEOUT,
-            )
-            for idx, desc in outputs:
-                if desc:
-                    results[idx] = desc
-        except asyncio.TimeoutError:
-            logger.warning(
-                f"PDF vision overall timeout ({self._VISION_OVERALL_TIMEOUT}s) — "
-                f"partial results: {len(results)}/{len(rendered)} pages"
-            )
-        return results
+                return None
+            try:
+                result = await ImageAnalysisAbility().execute(
+                    params={
+                        "image_base64": _b64.b64encode(img_bytes).decode("ascii"),
+                        "mime_type": "image/png",
+                        "prompt": prompt,
+                    },
+                    context={},
+                )
+                if result.get("success") and result.get("result"):
+                    return str(result["result"]).strip()
+                logger.warning(f"Vision page {idx + 1} ({mode}) failed: {result.get('error', 'unknown')}")
+            except Exception as e:
+                logger.warning(f"Vision page {idx + 1} ({mode}) exception: {e}")
+        return None
 
     # pip package name → import name mapping
     _DEPS = {
@@ -1155,20 +1136,16 @@ class PdfAbility(Ability):
                 if not (ctype == "application/pdf" or url.lower().endswith(".pdf")):
                     raise ValueError(f"URL does not look like a PDF (content-type={ctype})")
 
-                # Extract text
-                import fitz  # PyMuPDF
-
-                doc = fitz.open(stream=content, filetype="pdf")
-                texts = []
-                for i in range(doc.page_count):
-                    page = doc.load_page(i)
-                    texts.append(page.get_text("text").strip())
-                full_text = "\n\n".join([t for t in texts if t])
+                # Extract text (worker pool, cached by file hash)
+                extractor = get_extractor()
+                await extractor.refresh_config()
+                pdf_pages = await extractor.pdf_pages(content)
+                full_text = "\n\n".join([p.text for p in pdf_pages if p.text])
 
                 return {
                     "success": True,
                     "result": {
-                        "page_count": doc.page_count,
+                        "page_count": len(pdf_pages),
                         "text": full_text,
                     },
                 }
@@ -1182,15 +1159,11 @@ class PdfAbility(Ability):
                 if len(content) > self._MAX_PDF_BYTES:
                     raise ValueError(f"PDF too large: {len(content)} bytes")
 
-                import fitz  # PyMuPDF
-                doc = fitz.open(stream=content, filetype="pdf")
-                texts = []
-                for i in range(doc.page_count):
-                    page = doc.load_page(i)
-                    texts.append(page.get_text("text").strip())
-                full_text = "\n\n".join([t for t in texts if t])
-                pages = doc.page_count
-                doc.close()
+                extractor = get_extractor()
+                await extractor.refresh_config()
+                pdf_pages = await extractor.pdf_pages(content)
+                full_text = "\n\n".join([p.text for p in pdf_pages if p.text])
+                pages = len(pdf_pages)
 
                 return {
                     "success": True,
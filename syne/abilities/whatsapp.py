@@ -24,10 +24,12 @@ import sqlite3
 import stat
 import tempfile
 import time
+from dataclasses import dataclass
 from pathlib import Path
 from typing import Optional
 
 from .base import Ability
+from ._wacli import WacliReader
 from ..communication.inbound import InboundContext
 from ..communication.outbound import extract_media, extract_all_media, process_outbound, split_message
 
@@ -43,10 +45,22 @@ _ECHO_TTL = 20          # 20 seconds
 _DEBOUNCE_DELAY = 2.0   # 2 seconds — batch rapid messages
 _DEDUP_MAX = 5000       # max cache entries before prune
 
+# Pause between chunks / files of one reply (WhatsApp flood limits)
+_SEND_GAP = 0.3
+
 # Module-level reference so main.py can access the running bridge
 _bridge_instance: Optional["WhatsAppAbility"] = None
 
 
+@dataclass
+class _Outgoing:
+    """One _send_text() call waiting in a chat's outbox."""
+
+    text: Optional[str]      # WhatsApp-formatted; caption when media is set
+    media: list[str]
+    done: asyncio.Future
+
+
 class WhatsAppAbility(Ability):
     """WhatsApp bridge using wacli subprocess."""
 
@@ -64,10 +78,14 @@ class WhatsAppAbility(Ability):
         self._wacli_db: Optional[str] = None
         self._process: Optional[asyncio.subprocess.Process] = None
         self._monitor_task: Optional[asyncio.Task] = None
-        self._poll_task: Optional[asyncio.Task] = None
-        self._last_rowid: int = 0
+        self._reader: Optional[WacliReader] = None
+        self._ingest_task: Optional[asyncio.Task] = None
         self._running = False
         self._send_lock = asyncio.Lock()
+        # Outbound: per-chat outboxes drained by one sender task
+        self._outbox: dict[str, list[_Outgoing]] = {}
+        self._outbox_ready = asyncio.Event()
+        self._sender_task: Optional[asyncio.Task] = None
         self._session_db: Optional[str] = None
         self._lid_to_pn_cache = {}  # lid digits -> phone digits
         # Dedup / echo / debounce state
@@ -344,7 +362,7 @@ class WhatsAppAbility(Ability):
 
         This keeps the wacli WebSocket connection alive and syncs new
         messages into the local SQLite DB.  Inbound messages are picked
-        up by the separate _poll_loop (DB poller).
+        up by the separate store reader (_ingest_loop).
         """
         # Make sure old process is not running
         await self._stop_sync()
@@ -411,7 +429,7 @@ class WhatsAppAbility(Ability):
         session_db = os.path.expanduser("~/.wacli/session.db")
         self._session_db = session_db if os.path.isfile(session_db) else None
 
-        # Resolve wacli DB path for the inbound poller
+        # Resolve wacli DB path for the inbound reader
         self._wacli_db = self._resolve_wacli_db()
         if not self._wacli_db:
             logger.error("wacli database not found — inbound messages will not work")
@@ -426,9 +444,16 @@ class WhatsAppAbility(Ability):
             self._running = False
             return False
 
-        # Start DB poller for inbound messages (independent of sync process)
+        # Start the store reader for inbound messages (independent of sync process)
         if self._wacli_db:
-            self._poll_task = asyncio.create_task(self._poll_loop())
+            reader = WacliReader(self._wacli_db)
+            try:
+                queue = await reader.start()
+            except Exception as e:
+                logger.error(f"Failed to read wacli DB: {e}")
+            else:
+                self._reader = reader
+                self._ingest_task = asyncio.create_task(self._ingest_loop(queue))
 
         _bridge_instance = self
         logger.info("WhatsApp bridge started.")
@@ -444,14 +469,20 @@ class WhatsAppAbility(Ability):
             self._agent.conversations.remove_delivery_callback(self._deliver_subagent_result)
             self._agent.conversations.remove_status_callback(self._send_status_message)
 
-        # Stop poller
-        if self._poll_task and not self._poll_task.done():
-            self._poll_task.cancel()
-            try:
-                await self._poll_task
-            except asyncio.CancelledError:
-                pass
-        self._poll_task = None
+        # Stop inbound reader and outbound sender
+        if self._reader:
+            await self._reader.stop()
+            self._reader = None
+        for task in (self._ingest_task, self._sender_task):
+            if task and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._ingest_task = None
+        self._sender_task = None
+        self._fail_outbox()  # a sender cancelled before it ever ran left these
 
         await self._stop_sync()
         _bridge_instance = None
@@ -470,7 +501,7 @@ class WhatsAppAbility(Ability):
         except asyncio.CancelledError:
             pass
 
-    # ── Inbound DB poller ─────────────────────────────────────
+    # ── Inbound store reader ──────────────────────────────────
 
     def _resolve_wacli_db(self) -> Optional[str]:
         """Find the wacli SQLite database file.
@@ -483,95 +514,63 @@ class WhatsAppAbility(Ability):
             return default
         return None
 
-    async def _poll_loop(self):
-        """Poll wacli SQLite DB for new inbound messages.
+    async def _ingest_loop(self, queue: asyncio.Queue):
+        """Feed rows from the store reader (syne/abilities/_wacli.py) to debounce.
 
-        Runs independently of the sync process.  SQLite read is safe
-        even while wacli sync writes (WAL mode / shared cache).
+        The reader thread wakes on changes to the wacli store and pushes
+        each batch of new rows here, so nothing on the event loop touches
+        SQLite.
         """
-        db_path = self._wacli_db
-        if not db_path:
-            return
-
-        # Seed last_rowid to current max so we only process NEW messages
-        try:
-            conn = sqlite3.connect(db_path, timeout=5)
-            cur = conn.execute("SELECT MAX(rowid) FROM messages")
-            self._last_rowid = cur.fetchone()[0] or 0
-            conn.close()
-            logger.info(f"WhatsApp poller started (last_rowid={self._last_rowid}, db={db_path})")
-        except Exception as e:
-            logger.error(f"Failed to read wacli DB: {e}")
-            return
-
         while self._running:
             try:
-                await asyncio.sleep(2)
-                if not self._running:
-                    break
-
-                # Read new inbound messages (text or media)
-                conn = sqlite3.connect(db_path, timeout=5)
-                conn.row_factory = sqlite3.Row
-                cur = conn.execute("""
-                    SELECT rowid, chat_jid, sender_jid, sender_name, chat_name, text,
-                           from_me, media_type, mime_type, media_caption, msg_id
-                    FROM messages
-                    WHERE rowid > ?
-                      AND ((text IS NOT NULL AND text != '') OR media_type IS NOT NULL)
-                      AND chat_jid != 'status@broadcast'
-                    ORDER BY rowid ASC
-                """, (self._last_rowid,))
-                rows = cur.fetchall()
-                conn.close()
-
+                rows = await queue.get()
                 if rows:
-                    logger.info(f'[whatsapp] poll: {len(rows)} new row(s) after rowid {self._last_rowid}')
-
-                now = time.time()
-                if now - self._last_prune > 60:
-                    self._prune_caches()
+                    logger.info(f'[whatsapp] reader: {len(rows)} new row(s) up to rowid {rows[-1]["rowid"]}')
+                self._ingest_rows(rows)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error in WhatsApp ingest loop: {e}", exc_info=True)
 
-                for row in rows:
-                    rowid = row["rowid"]
-                    self._last_rowid = rowid
+    def _ingest_rows(self, rows: list[dict]):
+        """Dedup new store rows and hand them to the per-chat debounce."""
+        now = time.time()
+        if now - self._last_prune > 60:
+            self._prune_caches()
 
-                    # Dedup: skip already-seen rowids
-                    if rowid in self._seen_rowids:
-                        continue
+        for row in rows:
+            rowid = row["rowid"]
 
-                    text = (row["text"] or "").strip()
-                    chat_jid = row["chat_jid"] or ""
+            # Dedup: skip already-seen rowids
+            if rowid in self._seen_rowids:
+                continue
 
-                    # Dedup: skip duplicate content within TTL
-                    if text and chat_jid:
-                        h = self._content_hash(chat_jid, text)
-                        if h in self._seen_hashes and (now - self._seen_hashes[h]) < _DEDUP_TTL:
-                            self._seen_rowids.add(rowid)
-                            continue
-                        self._seen_hashes[h] = now
+            text = (row["text"] or "").strip()
+            chat_jid = row["chat_jid"] or ""
 
+            # Dedup: skip duplicate content within TTL
+            if text and chat_jid:
+                h = self._content_hash(chat_jid, text)
+                if h in self._seen_hashes and (now - self._seen_hashes[h]) < _DEDUP_TTL:
                     self._seen_rowids.add(rowid)
-
-                    msg = {
-                        "ChatJID": chat_jid,
-                        "SenderJID": row["sender_jid"] or chat_jid,
-                        "PushName": row["sender_name"] or "",
-                        "ChatName": row["chat_name"] or "",
-                        "Text": row["text"],
-                        "FromMe": bool(row["from_me"]),
-                        "MediaType": row["media_type"],
-                        "MimeType": row["mime_type"],
-                        "MediaCaption": row["media_caption"],
-                        "MsgID": row["msg_id"],
-                    }
-                    self._enqueue_debounce(msg)
-
-            except asyncio.CancelledError:
-                break
-            except Exception as e:
-                logger.error(f"Error in WhatsApp poll loop: {e}", exc_info=True)
-                await asyncio.sleep(5)
+                    continue
+                self._seen_hashes[h] = now
+
+            self._seen_rowids.add(rowid)
+
+            msg = {
+                "ChatJID": chat_jid,
+                "SenderJID": row["sender_jid"] or chat_jid,
+                "PushName": row["sender_name"] or "",
+                "ChatName": row["chat_name"] or "",
+                "Text": row["text"],
+                "FromMe": bool(row["from_me"]),
+                "MediaType": row["media_type"],
+                "MimeType": row["mime_type"],
+                "MediaCaption": row["media_caption"],
+                "MsgID": row["msg_id"],
+            }
+            self._enqueue_debounce(msg)
 
     # ── Debounce ──────────────────────────────────────────────
 
@@ -961,59 +960,126 @@ class WhatsAppAbility(Ability):
         If the response contains a MEDIA: path, the image is sent via
         `wacli send file` and the remaining text as a follow-up.
 
-        `wacli sync --follow` holds an exclusive lock on the store. Running
-        `wacli send ...` concurrently fails with "store is locked".
-
-        Workaround: pause sync, send, then resume sync.
+        The message joins the chat's outbox and this waits until the sender
+        task has delivered it (raising if wacli failed). Sending needs
+        `wacli sync --follow` paused — it holds an exclusive lock on the
+        store — so the sender pauses it once per burst and drains every
+        outbox meanwhile, instead of a stop/start per message.
         """
         # Extract MEDIA: paths BEFORE process_outbound (which strips server paths).
         # A turn may carry several files; the first takes the caption, the
         # rest follow it.
         text, _all_media = extract_all_media(text)
-        media_path = _all_media[0] if _all_media else None
-        _extra_media = _all_media[1:]
 
         text = process_outbound(text)
-        if not text and not media_path:
+        if not text and not _all_media:
             return
 
         # Convert markdown to WhatsApp format (tables → code blocks, **bold** → *bold*)
         from ..communication.formatting import markdown_to_whatsapp
         text = markdown_to_whatsapp(text)
 
-        async with self._send_lock:
-            was_syncing = self._process is not None
-            if was_syncing:
-                await self._stop_sync()
+        done = asyncio.get_running_loop().create_future()
+        self._outbox.setdefault(jid, []).append(_Outgoing(text, _all_media, done))
+        self._outbox_ready.set()
+        if self._sender_task is None or self._sender_task.done():
+            self._sender_task = asyncio.create_task(self._sender_loop())
+        await done
 
-            try:
-                # Send image first if present
-                if media_path:
-                    await self._send_file_locked(jid, media_path, caption=text)
-                    text = None  # caption already sent with image
-
-                # Remaining attachments go bare — the caption already went
-                # out with the first file. One failure must not sink the rest.
-                for _extra in _extra_media:
+    async def _sender_loop(self):
+        """Drain the outboxes: one sync pause per burst, chats in arrival order."""
+        batch: dict[str, list[_Outgoing]] = {}
+        try:
+            while True:
+                await self._outbox_ready.wait()
+                self._outbox_ready.clear()
+                if not self._outbox:
+                    continue
+                async with self._send_lock:
+                    was_syncing = self._process is not None
+                    if was_syncing:
+                        await self._stop_sync()
                     try:
-                        await self._send_file_locked(jid, _extra)
-                        await asyncio.sleep(0.3)
-                    except Exception as _ee:
-                        logger.error(f'Failed to send extra media {_extra}: {_ee}')
-
-                # Send remaining text (if any)
-                if text:
-                    for chunk in split_message(text, max_length=4096):
-                        await self._wacli_send_text(jid, chunk)
-                        await asyncio.sleep(0.3)
-            finally:
-                if self._running and was_syncing:
-                    ok = await self._start_sync()
-                    if not ok:
-                        logger.error('Failed to restart wacli sync after sending message')
+                        # Replies queued while we send go out in the same pause.
+                        while self._outbox:
+                            batch, self._outbox = self._outbox, {}
+                            for jid, items in batch.items():
+                                await self._flush_chat(jid, items)
+                            batch = {}
+                        self._outbox_ready.clear()
+                    finally:
+                        if self._running and was_syncing:
+                            ok = await self._start_sync()
+                            if not ok:
+                                logger.error('Failed to restart wacli sync after sending message')
+        except asyncio.CancelledError:
+            self._outbox = {jid: batch.get(jid, []) + self._outbox.get(jid, []) for jid in {**batch, **self._outbox}}
+            self._fail_outbox()
+            raise
+
+    def _fail_outbox(self):
+        """Fail every queued send — the sender is gone (bridge stopping)."""
+        stopped = RuntimeError("WhatsApp bridge stopped before the message was sent")
+        for items in self._outbox.values():
+            for item in items:
+                if not item.done.done():
+                    item.done.set_exception(stopped)
+        self._outbox = {}
+
+    async def _flush_chat(self, jid: str, items: list[_Outgoing]):
+        """Send one chat's queued messages in order. Caller holds _send_lock.
+
+        Consecutive text-only messages are merged and split again only at
+        WhatsApp's 4096-char limit — a status line and the reply behind it
+        cost one `wacli send`, not two.
+        """
+        i = 0
+        while i < len(items):
+            if items[i].media:
+                run = [items[i]]
+                i += 1
+                send = self._send_media_item(jid, run[0])
+            else:
+                start = i
+                while i < len(items) and not items[i].media:
+                    i += 1
+                run = items[start:i]
+                send = self._send_merged_text(jid, "\n\n".join(it.text for it in run if it.text))
+            try:
+                await send
+            except Exception as e:
+                logger.error(f'[whatsapp] send to {jid} failed: {e}')
+                for item in run:
+                    if not item.done.done():
+                        item.done.set_exception(e)
+            else:
+                for item in run:
+                    if not item.done.done():
+                        item.done.set_result(None)
+
+    async def _send_media_item(self, jid: str, item: _Outgoing):
+        """First file with the text as caption, then the rest bare."""
+        await self._send_file_locked(jid, item.media[0], caption=item.text)
+
+        # One failure among the extra attachments must not sink the rest.
+        for _extra in item.media[1:]:
+            try:
+                await asyncio.sleep(_SEND_GAP)
+                await self._send_file_locked(jid, _extra)
+            except Exception as _ee:
+                logger.error(f'Failed to send extra media {_extra}: {_ee}')
+
+    async def _send_merged_text(self, jid: str, text: str):
+        for chunk in split_message(text, max_length=4096):
+            await self._wacli_send_text(jid, chunk)
+            await asyncio.sleep(_SEND_GAP)
 
     async def _wacli_send_text(self, jid: str, text: str):
-        """Low-level: send a single text chunk. Caller must hold _send_lock."""
+        """Low-level: send a single text chunk. Caller must hold _send_lock.
+
+        wacli has no long-running send mode (only `sync --follow` stays up,
+        and it holds the store lock), so each chunk is one `wacli send`.
+        """
         proc = await asyncio.create_subprocess_exec(
             self._wacli_path, 'send', 'text',
             '--to', jid,
@@ -1085,15 +1151,19 @@ class WhatsAppAbility(Ability):
                     if not ok:
                         logger.error('Failed to restart wacli sync after media download')
 
-        # Query DB for the local_path after download
-        try:
+        # Query DB for the local_path after download (off the event loop)
+        def _local_path():
             conn = sqlite3.connect(self._wacli_db, timeout=5)
-            cur = conn.execute(
-                "SELECT local_path FROM messages WHERE msg_id = ? LIMIT 1",
-                (msg_id,),
-            )
-            row = cur.fetchone()
-            conn.close()
+            try:
+                return conn.execute(
+                    "SELECT local_path FROM messages WHERE msg_id = ? LIMIT 1",
+                    (msg_id,),
+                ).fetchone()
+            finally:
+                conn.close()
+
+        try:
+            row = await asyncio.to_thread(_local_path)
             if row and row[0] and os.path.isfile(row[0]):
                 return row[0]
             logger.warning(f"Media downloaded but local_path not found for msg_id={msg_id}")
@@ -3,12 +3,16 @@
 import asyncio
 import logging
 import os
+import time
+from contextlib import contextmanager
 from pathlib import Path
 from typing import Optional
 
 from .config import SyneSettings
 from .db.connection import init_db, close_db
+from .db.config_cache import get_config_cache, start_config_cache, stop_config_cache
 from .db.models import get_config, set_config, get_or_create_user, migrate_access_levels
+from .http_clients import configure_from_config as configure_http_clients, close_all_clients
 from .llm.provider import LLMProvider
 from .llm.google import GoogleProvider
 from .llm.openai import OpenAIProvider
@@ -24,7 +28,8 @@ from .memory.engine import MemoryEngine
 from .tools.registry import ToolRegistry
 from .abilities import AbilityRegistry
 from .abilities.loader import load_all_abilities
-from .context import ContextManager
+from .abilities._extract import get_extractor
+from .context import ContextManager, set_tokenizer
 from .conversation import ConversationManager
 from .subagent import SubAgentManager
 from .security import check_rule_removal
@@ -32,6 +37,41 @@ from .consent import ConsentStore, make_key, content_hash, DEFAULT_TTL_SECONDS,
 
 logger = logging.getLogger("syne.agent")
 
+# After an embedding switch, when to look again for rows other agents wrote
+# with the old model before they reloaded.
+_STRAGGLER_RECHECK_SECONDS = 60
+
+
+@contextmanager
+def _stage(timings: dict, name: str):
+    """Record the wall time of a startup stage in timings[name] (ms)."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = (time.perf_counter() - started) * 1000
+
+
+async def _timed(timings: dict, name: str, awaitable):
+    with _stage(timings, name):
+        return await awaitable
+
+
+async def _gather_stages(*awaitables) -> list:
+    """gather() that cancels the remaining stages when one fails.
+
+    Re-raises the first failure as-is, so a broken provider still aborts
+    start() with the same exception as when the stages ran in sequence.
+    """
+    tasks = [asyncio.ensure_future(a) for a in awaitables]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
 
 class SyneAgent:
     """The main Syne agent. Initializes all components and handles messages."""
@@ -45,6 +85,8 @@ class SyneAgent:
         self.context_mgr: Optional[ContextManager] = None
         self.conversations: Optional[ConversationManager] = None
         self.subagents: Optional[SubAgentManager] = None
+        self._embedding_key: Optional[str] = None  # provider.active_embedding the provider was built with
+        self.startup_timings: dict[str, float] = {}  # stage → ms, filled by start()
         self._running = False
         self._pending_sudo_command: Optional[str] = None
         self._pending_sudo_at: float = 0.0  # timestamp when pending was set
@@ -66,39 +108,70 @@ class SyneAgent:
         set_workspace(self.workspace)
 
     async def start(self):
-        """Start the agent — initialize DB, provider, memory, tools."""
+        """Start the agent — initialize DB, provider, memory, tools.
+
+        Stages that don't depend on each other (provider, abilities,
+        sub-agent prompt, stale-run cleanup) run concurrently; a per-stage
+        timing report is logged at the end (self.startup_timings, ms).
+        """
         logger.info("Starting Syne agent...")
+        timings = self.startup_timings = {}
+        boot_started = time.perf_counter()
 
         # 1. Database
-        await init_db(self.settings.database_url)
+        with _stage(timings, "db"):
+            await init_db(self.settings.database_url)
         logger.info("Database connected.")
 
         # 1.2. Schema migration — apply any pending ALTER TABLE / new columns.
         # Runs on EVERY service start so schema is guaranteed up to date,
-        # independent of whether `syne update` triggered it.
-        await self._run_startup_migration()
-
-        # 1.5. Migrate old access levels (admin→owner, friend/pending→public)
-        await migrate_access_levels()
-
-        # 2. LLM Provider
-        self.provider = await self._init_provider()
-        logger.info(f"LLM provider: {self.provider.name}")
-
-        # 2.5. Proactive OAuth token refresh (before first API call)
-        await self._ensure_token_fresh()
+        # independent of whether `syne update` triggered it. Skips the
+        # schema.sql replay while its fingerprint matches the DB's.
+        with _stage(timings, "schema"):
+            await self._run_startup_migration()
+
+        # 1.3. Config cache — bulk-load the config table once and keep it in
+        # sync via LISTEN/NOTIFY, so per-turn get_config() reads never hit
+        # the DB. Non-fatal: without it get_config() reads the DB directly.
+        with _stage(timings, "config_cache"):
+            try:
+                await start_config_cache(self.settings.database_url)
+                # An embedding migration finished by another process switches
+                # provider.active_embedding; pick the new model up without a restart.
+                get_config_cache().watch("provider.active_embedding", self._on_embedding_switched)
+            except Exception as e:
+                logger.warning(f"Config cache unavailable, reading config from DB: {e}")
 
-        # 3. Memory
-        self.memory = MemoryEngine(self.provider)
-        logger.info("Memory engine ready.")
+        # 1.4. Shared HTTP pool limits (http.* config) — must be applied
+        # before any provider opens its pooled client.
+        try:
+            await configure_http_clients()
+        except Exception as e:
+            logger.warning(f"HTTP client config unavailable, using defaults: {e}")
 
-        # 4. Built-in Tools (memory, subagent)
-        self._register_default_tools()
-        logger.info(f"Built-in tools registered: {len(self.tools.list_tools('owner'))}")
+        # 1.5. Migrate old access levels (admin→owner, friend/pending→public)
+        with _stage(timings, "access_levels"):
+            await migrate_access_levels()
 
-        # 5. Abilities (modular capabilities)
-        ability_count = await load_all_abilities(self.abilities)
+        # 2–7. Independent stages, concurrently. The sub-agent manager is
+        # built up front (no I/O) so stale-run cleanup needn't wait for the
+        # provider; provider and prompt are filled in once both are ready.
+        from .boot import build_subagent_prompt
+        self.subagents = SubAgentManager(provider=None, system_prompt="")
+        self.subagents.tools = self.tools
+        self.subagents.abilities = self.abilities
+        self.subagents.provider_factory = self.create_provider_for_model
+        _, ability_count, system_prompt, _ = await _gather_stages(
+            _timed(timings, "provider", self._start_provider()),
+            _timed(timings, "abilities", load_all_abilities(self.abilities)),
+            # Lightweight prompt — identity + rules only (avoids token limit errors)
+            _timed(timings, "subagent_prompt", build_subagent_prompt()),
+            _timed(timings, "stale_runs", self.subagents.cleanup_stale_runs()),
+        )
         logger.info(f"Abilities loaded: {ability_count}")
+        self.subagents.provider = self.provider
+        self.subagents.system_prompt = system_prompt
+        logger.info("Sub-agent manager ready (with tool access).")
 
         # 6. Context Manager — read context_window from active model entry, fallback to provider default
         models = await get_config("provider.models", None)
@@ -115,25 +188,13 @@ class SyneAgent:
         reserved = self.provider.reserved_output_tokens
         from .context import DEFAULT_CHARS_PER_TOKEN
         _cpt = float(_cpt) if _cpt else DEFAULT_CHARS_PER_TOKEN
+        _tokenizer = set_tokenizer(await get_config("session.tokenizer", "heuristic"))
         self.context_mgr = ContextManager(max_context_tokens=ctx_window, reserved_output_tokens=reserved, chars_per_token=_cpt)
-        logger.info(f"Context window: {ctx_window} tokens (reserved output: {reserved}, chars_per_token: {_cpt})")
+        logger.info(f"Context window: {ctx_window} tokens (reserved output: {reserved}, chars_per_token: {_cpt}, tokenizer: {_tokenizer})")
 
         # 6.5. Rate Limiter
         logger.info("Rate limiter initialized.")
 
-        # 7. Sub-agent Manager
-        from .boot import build_subagent_prompt
-        # Lightweight prompt — identity + rules only (avoids token limit errors)
-        system_prompt = await build_subagent_prompt()
-        self.subagents = SubAgentManager(
-            provider=self.provider,
-            system_prompt=system_prompt,
-        )
-        self.subagents.tools = self.tools
-        self.subagents.abilities = self.abilities
-        await self.subagents.cleanup_stale_runs()
-        logger.info("Sub-agent manager ready (with tool access).")
-
         # 8. Conversation Manager
         self.conversations = ConversationManager(
             provider=self.provider,
@@ -155,7 +216,31 @@ class SyneAgent:
         # Can still be triggered manually via /memory dedup
         # self._dedup_task = asyncio.create_task(self._periodic_memory_dedup())
 
-        logger.info("Syne agent started.")
+        timings["total"] = (time.perf_counter() - boot_started) * 1000
+        logger.info(
+            "Syne agent started. Startup timings: "
+            + ", ".join(f"{stage} {ms:.0f}ms" for stage, ms in timings.items())
+        )
+
+    async def _start_provider(self) -> None:
+        """LLM provider, token refresh, memory engine and built-in tools."""
+        # 2. LLM Provider. The embed key is read first: if it changes while
+        # the provider is built, the watcher reloads and a stale key only
+        # makes vector writes skip (see MemoryEngine.embed_key).
+        self._embedding_key = await get_config("provider.active_embedding", None)
+        self.provider = await self._init_provider()
+        logger.info(f"LLM provider: {self.provider.name}")
+
+        # 2.5. Proactive OAuth token refresh (before first API call)
+        await self._ensure_token_fresh()
+
+        # 3. Memory
+        self.memory = MemoryEngine(self.provider, embed_key=self._embedding_key or "")
+        logger.info("Memory engine ready.")
+
+        # 4. Built-in Tools (memory, subagent)
+        self._register_default_tools()
+        logger.info(f"Built-in tools registered: {len(self.tools.list_tools('owner'))}")
 
     async def _run_startup_migration(self):
         """Apply schema migrations at service start.
@@ -164,11 +249,17 @@ class SyneAgent:
         ADD COLUMN statements are applied. Idempotent — uses IF NOT EXISTS
         / CREATE IF NOT EXISTS patterns. Safe to run on every start.
 
+        The replay is skipped while the schema fingerprint stored by the
+        last clean run matches this schema.sql and schema version
+        (migrations.schema_is_current); only the month partitions are
+        topped up then.
+
         Failures are logged but non-fatal — the service still starts even
         if migration partially fails, since most ALTERs are additive.
         """
         import os as _os
         from .db.connection import get_connection
+        from .db.migrations import record_schema_fingerprint, schema_fingerprint, schema_is_current
 
         syne_dir = _os.path.dirname(_os.path.dirname(_os.path.abspath(__file__)))
         schema_path = _os.path.join(syne_dir, "syne", "db", "schema.sql")
@@ -182,9 +273,23 @@ class SyneAgent:
             logger.warning(f"Could not import SQL splitter: {e}")
             return
 
+        with open(schema_path) as f:
+            schema = f.read()
+        fingerprint = schema_fingerprint(schema)
+        async with get_connection() as conn:
+            current = await schema_is_current(conn, fingerprint)
+        if current:
+            logger.info("Schema unchanged since last clean migration — skipping schema.sql replay.")
+            try:
+                async with get_connection() as conn:
+                    # Normally part of the replay (last statement of schema.sql).
+                    await conn.fetchval("SELECT ensure_messages_partitions()")
+            except Exception as e:
+                logger.warning(f"Partition maintenance failed: {e}")
+            return
+
+        clean = True
         try:
-            with open(schema_path) as f:
-                schema = f.read()
             statements = _split_sql_statements(schema)
             applied = 0
             errors = 0
@@ -202,7 +307,9 @@ class SyneAgent:
                         errors += 1
                         logger.warning(f"Migration statement failed: {str(e)[:120]} | stmt={stmt[:80]}")
             logger.info(f"Startup migration complete: {applied} ALTER TABLE applied, {errors} errors")
+            clean = not errors
         except Exception as e:
+            clean = False
             logger.error(f"Startup migration failed: {e}", exc_info=True)
 
         # ── Versioned migrations (syne/db/migrations.py) ──
@@ -213,6 +320,9 @@ class SyneAgent:
             from .db.migrations import run_migrations
             async with get_connection() as conn:
                 result = await run_migrations(conn)
+                # Only a clean run may let the next start skip the replay.
+                if clean:
+                    await record_schema_fingerprint(conn, fingerprint)
             if result["applied"]:
                 logger.info(
                     f"Versioned migrations applied: {result['applied']} "
@@ -223,6 +333,11 @@ class SyneAgent:
         except Exception as e:
             logger.error(f"Versioned migrations failed: {e}", exc_info=True)
 
+        # Connections opened before schema.sql created the pgvector extension
+        # (fresh install) have no binary vector codec — recycle them.
+        from .db.connection import refresh_vector_codec
+        await refresh_vector_codec()
+
     async def stop(self):
         """Stop the agent gracefully."""
         self._running = False
@@ -238,6 +353,9 @@ class SyneAgent:
                 await self._token_refresh_task
             except asyncio.CancelledError:
                 pass
+        get_extractor().shutdown()
+        await close_all_clients()
+        await stop_config_cache()
         await close_db()
         logger.info("Syne agent stopped.")
 
@@ -247,12 +365,13 @@ class SyneAgent:
         Called after /model switch to apply the new provider without restart.
         Updates: self.provider, memory engine, context manager, conversation manager, sub-agents.
         """
+        self._embedding_key = await get_config("provider.active_embedding", None)
         new_provider = await self._init_provider()
         self.provider = new_provider
         logger.info(f"Provider reloaded: {new_provider.name}")
 
         # Update memory engine
-        self.memory = MemoryEngine(new_provider)
+        self.memory = MemoryEngine(new_provider, embed_key=self._embedding_key or "")
 
         # Re-wire the history_search embedding provider slot so the tool
         # keeps working after the owner switches embedding models via
@@ -303,6 +422,31 @@ class SyneAgent:
         if self.subagents:
             self.subagents.provider = new_provider
 
+    def _on_embedding_switched(self, key: str) -> None:
+        """Config watcher for provider.active_embedding (see memory/shadow.py)."""
+        if self._running:
+            asyncio.get_running_loop().create_task(self._reload_for_embedding())
+
+    async def _reload_for_embedding(self) -> None:
+        try:
+            active = await get_config("provider.active_embedding", None)
+            if active != self._embedding_key:
+                logger.info(f"Active embedding changed to {active} — reloading provider")
+                await self.reload_provider()
+        except Exception as e:
+            logger.error(f"Provider reload after embedding switch failed: {e}", exc_info=True)
+            return
+        # Writes other agents had in flight on the old model land as NULL
+        # vectors until they reload too — sweep now and once more later.
+        from .memory import shadow
+        for delay in (0, _STRAGGLER_RECHECK_SECONDS):
+            await asyncio.sleep(delay)
+            try:
+                max_chars = int(await get_config("history_search.max_content_chars", 4000))
+                await shadow.embed_stragglers(self.provider, self._embedding_key or "", max_chars)
+            except Exception as e:
+                logger.warning(f"Embedding rows written during the switch failed: {e}")
+
     async def create_provider_for_model(self, model_key: str):
         """Create a provider for a specific model key from the registry.
         
@@ -1527,7 +1671,7 @@ class SyneAgent:
         
         lines = [f"**Active sub-agents ({len(active)}):**"]
         for run in active:
-            lines.append(f"- {str(run['run_id'])[:8]}: {run['task'][:60]}")
+            lines.append(f"- {str(run['run_id'])[:8]} [{run['status']}]: {run['task'][:60]}")
         return "\n".join(lines)
 
     def _get_active_conversation(self):
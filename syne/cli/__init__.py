@@ -32,6 +32,7 @@ def _show_help():
             ("stop", "Stop running Syne process"),
             ("restart", "Restart Syne (stop + start)"),
             ("status", "Show agent status"),
+            ("worker", "Run queued sub-agents (separate process/host)"),
         ],
         "Usage": [
             ("cli", "Interactive CLI chat (resumes per-directory, -n for fresh)"),
@@ -142,3 +142,60 @@ def db_query(sql):
         await close_db()
 
     asyncio.run(_query())
+
+
+@db.command("rebalance")
+@click.option("--months-ahead", type=int, default=None,
+              help="Monthly partitions to create ahead (default: config messages.partition_months_ahead)")
+@click.option("--yes", is_flag=True, help="Skip the confirmation before converting a legacy table")
+def db_rebalance(months_ahead, yes):
+    """Partition the messages table and tidy its partitions.
+
+    Converts a legacy single-table messages (writes pause during the copy),
+    creates missing monthly partitions, moves rows out of the hot default
+    partition, and applies messages.archive_index. Safe to re-run.
+    """
+    async def _rebalance():
+        from rich.table import Table
+        from syne.config import load_settings
+        from syne.db.connection import init_db, close_db
+        from syne.db import partitions
+
+        settings = load_settings()
+        pool = await init_db(settings.database_url)
+        try:
+            async with pool.acquire() as conn:
+                if not await partitions.is_partitioned(conn):
+                    rows = await partitions.estimate_rows(conn)
+                    console.print(
+                        f"messages is not partitioned (~{rows:,} rows). Converting copies every row; "
+                        f"new messages wait until it finishes."
+                    )
+                    if not yes and not click.confirm("Convert now?", default=True):
+                        return
+                result = await partitions.rebalance(
+                    conn, months_ahead,
+                    progress=lambda msg: console.print(f"[dim]  {msg}[/dim]"),
+                )
+        finally:
+            await close_db()
+
+        table = Table(show_lines=False)
+        for col in ("partition", "range", "rows", "size", "hnsw"):
+            table.add_column(col)
+        for p in result["partitions"]:
+            table.add_row(
+                p["name"],
+                (p["bounds"] or "").replace("FOR VALUES ", ""),
+                f"{p['rows']:,}",
+                f"{p['bytes'] / 1_048_576:,.1f} MB",
+                "✓" if p["hnsw"] else "",
+            )
+        console.print(table)
+        console.print(
+            f"[green]✓ messages rebalanced: {result['converted']:,} row(s) converted, "
+            f"{result['moved']:,} moved out of the default partition, "
+            f"{result['created']} partition(s) created[/green]"
+        )
+
+    asyncio.run(_rebalance())
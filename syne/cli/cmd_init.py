@@ -187,9 +187,9 @@ def init():
     tier_name, tier_embed, tier_dims, tier_embed_size, tier_eval, tier_eval_size = _detect_server_tier(sys_cpu, sys_ram_gb)
     ollama_available = tier_name != "cloud"
 
-    # Permanent warning
-    console.print("  [bold yellow]Warning:[/bold yellow] Your embedding model choice is [bold]permanent[/bold] for this installation.")
-    console.print("  [dim]Changing it later requires resetting ALL memories (re-embedding is not yet supported).[/dim]")
+    # Switching later re-embeds everything — worth choosing well up front
+    console.print("  [bold yellow]Note:[/bold yellow] Every memory and message is embedded with this model.")
+    console.print("  [dim]Switching later (`syne memory migrate-embedding <key>`) re-embeds them all in the background.[/dim]")
     console.print("  [dim]Choose based on your server's long-term capacity.[/dim]")
     console.print()
 
@@ -227,11 +227,116 @@ def memory_prune(pattern, yes):
     asyncio.run(_prune())
 
 
+@memory.command("dedup")
+@click.option("--threshold", "-t", default=0.95, type=float, help="Cosine similarity at or above which two memories are duplicates (default 0.95)")
+@click.option("--method", "-m", default="auto", type=click.Choice(["auto", "matrix", "hnsw"]), help="matrix = exact NumPy tiles, hnsw = approximate pgvector self-join, auto = matrix if NumPy is installed")
+@click.option("--dry-run", is_flag=True, help="Only report duplicates, delete nothing")
+@click.option("--yes", "-y", is_flag=True, help="Skip confirmation prompt")
+def memory_dedup(threshold, method, dry_run, yes):
+    """Find and remove near-duplicate memories.
+
+    Keeps the memory with the higher importance, or the older one if equal.
+    Always previews first; deletes only after confirmation (or --yes).
+    """
+    async def _dedup():
+        from syne.config import load_settings
+        from syne.db.connection import init_db, close_db
+        from syne.memory.engine import MemoryEngine
+
+        settings = load_settings()
+        pool = await init_db(settings.database_url)
+
+        # dedup() never embeds — no provider needed.
+        engine = MemoryEngine(provider=None)
+
+        with console.status("Comparing memories..."):
+            report = await engine.dedup(
+                similarity_threshold=threshold, dry_run=True, method=method,
+            )
+
+        if not report["duplicates_found"]:
+            console.print(f"[green]No duplicates at similarity >= {threshold}.[/green]")
+            await close_db()
+            return
+
+        t = Table(title=f"Duplicates (similarity >= {threshold}): {report['duplicates_found']}")
+        t.add_column("Keep", justify="right")
+        t.add_column("Remove", justify="right")
+        t.add_column("Sim", justify="right")
+        t.add_column("Removed content")
+        for d in report["details"]:
+            t.add_row(str(d["keep_id"]), str(d["remove_id"]), f"{d['similarity']:.3f}", d["remove_preview"])
+        console.print(t)
+
+        if dry_run:
+            console.print("[yellow]Dry run — no memories deleted.[/yellow]")
+            await close_db()
+            return
+
+        if not yes:
+            confirm = click.confirm(
+                f"\nDelete these {len(report['deleted_ids'])} memories? This cannot be undone.",
+                default=False,
+            )
+            if not confirm:
+                console.print("[yellow]Aborted — no memories deleted.[/yellow]")
+                await close_db()
+                return
+
+        ids = report["deleted_ids"]
+        async with pool.acquire() as conn:
+            await conn.execute("DELETE FROM memory WHERE id = ANY($1::int[])", ids)
+        console.print(f"[green]✓ Deleted {len(ids)} duplicate memories.[/green]")
+
+        await close_db()
+
+    asyncio.run(_dedup())
+
+
+async def _backfill_embeddings(pool, provider, table, where, target, batch, max_batch, sleep, max_chars=None):
+    """Embed up to `target` rows of `table` matching `where` into its embedding column.
+
+    Runs the pipelined engine in syne.memory.backfill: the next page is
+    fetched and the previous one written (one UPDATE ... FROM unnest per
+    page) while the current page embeds, and the page size follows embed
+    latency between `batch` and `max_batch`. Progress and ETA go to a
+    console status line.
+    """
+    from syne.memory.backfill import BatchSizer, run
+
+    async def fetch(after_id, limit):
+        async with pool.acquire() as conn:
+            return await conn.fetch(
+                f"SELECT id, content FROM {table} WHERE {where} AND id > $1 ORDER BY id ASC LIMIT $2",
+                after_id, limit,
+            )
+
+    async def write(ids, vectors, last_id, failed):
+        if not ids:
+            return
+        async with pool.acquire() as conn:
+            await conn.execute(f"""
+                UPDATE {table} t SET embedding = u.vec
+                FROM unnest($1::int[], $2::vector[]) AS u(id, vec)
+                WHERE t.id = u.id
+            """, ids, vectors)
+
+    with console.status("Embedding batch...") as status:
+        return await run(
+            fetch, write, provider,
+            limit=target, total=target,
+            sizer=BatchSizer(initial=int(batch), maximum=max(int(batch), int(max_batch))),
+            max_chars=max_chars, sleep=sleep,
+            on_progress=lambda stats: status.update(f"{table}: {stats.describe()}"),
+        )
+
+
 @memory.command("reembed-history")
-@click.option("--batch", "-b", default=50, help="Rows to embed per batch (default 50)")
+@click.option("--batch", "-b", default=64, help="Starting rows per embed_batch call; adapts to embed latency (default 64)")
+@click.option("--max-batch", default=512, help="Upper bound for the adaptive batch size (default 512; = --batch for a fixed size)")
 @click.option("--limit", "-l", default=None, type=int, help="Cap total rows processed (default: no cap — process until done)")
-@click.option("--sleep", "-s", default=0.0, type=float, help="Seconds to sleep between batches (throttle if Ollama shared)")
-def memory_reembed_history(batch, limit, sleep):
+@click.option("--sleep", "-s", default=0.0, type=float, help="Seconds to sleep after each embed call (throttle if Ollama shared)")
+def memory_reembed_history(batch, max_batch, limit, sleep):
     """Backfill embeddings for user messages that don't have one yet.
 
     Only user-role rows are embedded (assistant/tool/system are anchors' context,
@@ -284,54 +389,14 @@ def memory_reembed_history(batch, limit, sleep):
         target = min(int(total_pending), int(limit)) if limit else int(total_pending)
         console.print(
             f"[cyan]Backfill target: {target} user messages "
-            f"(batch={batch}, sleep={sleep}s between batches).[/cyan]"
+            f"(batch={batch}..{max(batch, max_batch)}, sleep={sleep}s between batches).[/cyan]"
         )
 
-        done = 0
-        failed = 0
-        with console.status(f"Embedding batch...") as status:
-            while done < target:
-                remaining = target - done
-                take = min(int(batch), remaining)
-
-                async with pool.acquire() as conn:
-                    rows = await conn.fetch(
-                        "SELECT id, content FROM messages "
-                        "WHERE role = 'user' AND embedding IS NULL AND content <> '' "
-                        "ORDER BY id ASC LIMIT $1",
-                        take,
-                    )
-                if not rows:
-                    break
-
-                # Embed serially — Ollama semaphore keeps parallelism sane
-                # inside the driver already, and small batch sizes make
-                # concurrent DB writes noisy for tiny wins.
-                import asyncio as _asyncio
-                for r in rows:
-                    try:
-                        body = r["content"]
-                        if len(body) > max_chars:
-                            body = body[:max_chars]
-                        resp = await provider.embed(body)
-                        vec = getattr(resp, "vector", None)
-                        if not vec:
-                            failed += 1
-                            continue
-                        async with pool.acquire() as conn:
-                            await conn.execute(
-                                "UPDATE messages SET embedding = $1::vector WHERE id = $2",
-                                str(vec), r["id"],
-                            )
-                        done += 1
-                    except Exception as e:
-                        failed += 1
-                        console.print(f"[yellow]row id={r['id']} failed: {e}[/yellow]")
-
-                status.update(f"Embedded {done}/{target} (failed {failed})")
-
-                if sleep > 0:
-                    await _asyncio.sleep(sleep)
+        stats = await _backfill_embeddings(
+            pool, provider, "messages", "role = 'user' AND embedding IS NULL AND content <> ''",
+            target, batch, max_batch, sleep, max_chars,
+        )
+        done, failed = stats.done, stats.failed
 
         # Try to build HNSW after backfill so subsequent searches are fast.
         # ensure_messages_hnsw_index() no-ops if no embeddings exist yet, so
@@ -352,11 +417,12 @@ def memory_reembed_history(batch, limit, sleep):
 
 
 @memory.command("reembed-memory")
-@click.option("--batch", "-b", default=50, help="Rows to embed per batch (default 50)")
+@click.option("--batch", "-b", default=64, help="Starting rows per embed_batch call; adapts to embed latency (default 64)")
+@click.option("--max-batch", default=512, help="Upper bound for the adaptive batch size (default 512; = --batch for a fixed size)")
 @click.option("--limit", "-l", default=None, type=int, help="Cap total rows processed (default: no cap)")
-@click.option("--sleep", "-s", default=0.0, type=float, help="Seconds to sleep between batches (throttle if Ollama shared)")
+@click.option("--sleep", "-s", default=0.0, type=float, help="Seconds to sleep after each embed call (throttle if Ollama shared)")
 @click.option("--force", "-f", is_flag=True, help="Re-embed EVERY memory row, not just rows with NULL embedding. Use this when switching embedding models with a different vector dimension.")
-def memory_reembed_memory(batch, limit, sleep, force):
+def memory_reembed_memory(batch, max_batch, limit, sleep, force):
     """Backfill (or re-embed) embeddings for rows in the memory table.
 
     By default only rows whose embedding is NULL are processed. Pass --force
@@ -412,69 +478,16 @@ def memory_reembed_memory(batch, limit, sleep, force):
         mode = "re-embed ALL" if force else "backfill NULL"
         console.print(
             f"[cyan]Memory {mode}: target {target} rows "
-            f"(batch={batch}, sleep={sleep}s between batches).[/cyan]"
+            f"(batch={batch}..{max(batch, max_batch)}, sleep={sleep}s between batches).[/cyan]"
         )
 
-        done = 0
-        failed = 0
-        # For --force we walk id ASC and remember the last processed id so a
-        # freshly-embedded row doesn't get picked up again by the next
-        # `LIMIT` batch (the WHERE clause would still match it because it
-        # has content). For backfill mode, once we UPDATE embedding it stops
-        # matching the WHERE, so the natural pagination just works.
-        last_id = 0
-
-        import asyncio as _asyncio
-        with console.status("Embedding batch...") as status:
-            while done < target:
-                remaining = target - done
-                take = min(int(batch), remaining)
-
-                if force:
-                    sql = (
-                        f"SELECT id, content FROM memory "
-                        f"WHERE {where} AND id > $1 "
-                        f"ORDER BY id ASC LIMIT $2"
-                    )
-                    params = (last_id, take)
-                else:
-                    sql = (
-                        f"SELECT id, content FROM memory "
-                        f"WHERE {where} "
-                        f"ORDER BY id ASC LIMIT $1"
-                    )
-                    params = (take,)
-
-                async with pool.acquire() as conn:
-                    rows = await conn.fetch(sql, *params)
-                if not rows:
-                    break
-
-                for r in rows:
-                    try:
-                        body = r["content"] or ""
-                        # Memory rows tend to be short (<1KB) — no truncation
-                        # needed like in messages backfill.
-                        resp = await provider.embed(body)
-                        vec = getattr(resp, "vector", None)
-                        if not vec:
-                            failed += 1
-                            continue
-                        async with pool.acquire() as conn:
-                            await conn.execute(
-                                "UPDATE memory SET embedding = $1::vector WHERE id = $2",
-                                str(vec), r["id"],
-                            )
-                        done += 1
-                        last_id = r["id"]
-                    except Exception as e:
-                        failed += 1
-                        console.print(f"[yellow]memory row id={r['id']} failed: {e}[/yellow]")
-
-                status.update(f"Embedded {done}/{target} (failed {failed})")
-
-                if sleep > 0:
-                    await _asyncio.sleep(sleep)
+        # Rows are paged by id, so a --force re-embed doesn't pick up rows
+        # it already rewrote (they still match the WHERE) and a row the
+        # model keeps failing on is tried once per run, not once per batch.
+        stats = await _backfill_embeddings(
+            pool, provider, "memory", where, target, batch, max_batch, sleep,
+        )
+        done, failed = stats.done, stats.failed
 
         # Refresh HNSW so recall benefits from the new embeddings immediately.
         try:
@@ -490,3 +503,89 @@ def memory_reembed_memory(batch, limit, sleep, force):
         await close_db()
 
     asyncio.run(_run())
+
+
+@memory.command("migrate-embedding")
+@click.argument("embed_key", required=False)
+@click.option("--batch", "-b", default=None, type=int, help="Starting rows per embed_batch call; adapts to embed latency (default: embedding.migration_batch_size)")
+@click.option("--no-switch", is_flag=True, help="Backfill and index, but don't switch over yet (re-run without it to switch)")
+@click.option("--status", "show_status", is_flag=True, help="Show migration progress and exit")
+@click.option("--cancel", is_flag=True, help="Abandon the unfinished migration (drops the shadow columns)")
+def memory_migrate_embedding(embed_key, batch, no_switch, show_status, cancel):
+    """Move memory + messages to another embedding model without downtime.
+
+    EMBED_KEY is a key from provider.embedding_models. New vectors are
+    written to a shadow column next to the live one while recall keeps
+    using the current model; once every row has one and the HNSW indexes
+    are built, both tables and provider.active_embedding switch in one
+    transaction and the running agent reloads its provider. Resumable:
+    safe to Ctrl-C and re-run with the same key.
+    """
+    async def _run():
+        from syne.config import load_settings
+        from syne.db.connection import init_db, close_db
+        from syne.db.models import get_config
+        from syne.llm.drivers import create_embedding_provider, get_model_from_list
+        from syne.memory import shadow
+
+        settings = load_settings()
+        pool = await init_db(settings.database_url)
+        try:
+            if show_status or cancel:
+                async with pool.acquire() as conn:
+                    if cancel:
+                        for table in shadow.TABLES:
+                            if await shadow.cancel(conn, table):
+                                console.print(f"[yellow]Cancelled {table} migration — shadow column dropped.[/yellow]")
+                    rows = await shadow.status(conn)
+                if not rows:
+                    console.print("No embedding migration has run.")
+                    return
+                t = Table(title="Embedding migrations")
+                for col in ("table", "model", "dims", "status", "embedded", "failed", "pending", "updated"):
+                    t.add_column(col)
+                for r in rows:
+                    t.add_row(
+                        r["table_name"], r["embed_key"], str(r["dimensions"]), r["status"],
+                        f"{r['embedded']:,}", f"{r['failed']:,}", f"{r['pending']:,}",
+                        r["updated_at"].strftime("%Y-%m-%d %H:%M"),
+                    )
+                console.print(t)
+                return
+
+            if not embed_key:
+                console.print("[red]Give the embedding key to migrate to (see /embedding), or --status / --cancel.[/red]")
+                return
+            entry = get_model_from_list(await get_config("provider.embedding_models", []), embed_key)
+            if not entry:
+                console.print(f"[red]Embedding '{embed_key}' not in provider.embedding_models.[/red]")
+                return
+            if embed_key == await get_config("provider.active_embedding", None):
+                console.print(f"[yellow]{embed_key} is already the active embedding.[/yellow]")
+                return
+            provider = await create_embedding_provider(entry)
+            if provider is None:
+                console.print(f"[red]Could not build the embedding provider for {embed_key}.[/red]")
+                return
+
+            batch_size = batch or int(await get_config("embedding.migration_batch_size", shadow.DEFAULT_BATCH_SIZE))
+            max_chars = int(await get_config("history_search.max_content_chars", 4000))
+            console.print(f"[cyan]Migrating memory + messages to {entry.get('label', embed_key)} (batch={batch_size}).[/cyan]")
+            result = await shadow.migrate(
+                entry, provider, batch_size=max(1, batch_size), max_chars=max_chars,
+                progress=lambda msg: console.print(f"[dim]  {msg}[/dim]"),
+                switch_over=not no_switch,
+            )
+            if result["switched"]:
+                console.print(
+                    f"[green]✓ Switched to {embed_key} ({result['dimensions']} dims). "
+                    f"Old vectors dropped; the agent reloads its provider on its own.[/green]"
+                )
+            elif no_switch:
+                console.print("[green]✓ Shadow columns backfilled and indexed. Re-run without --no-switch to switch.[/green]")
+            else:
+                console.print("[yellow]Not switched — see above. Re-run to resume; `--status` shows progress.[/yellow]")
+        finally:
+            await close_db()
+
+    asyncio.run(_run())
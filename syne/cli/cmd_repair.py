@@ -281,14 +281,15 @@ def repair(fix):
 
             # Both HNSW indexes are checked/fixed the same way: presence
             # tested, missing → try ensure_*_hnsw_index() which no-ops if
-            # no embedded rows exist yet.
+            # no embedded rows exist yet. The messages pattern matches the
+            # legacy whole-table index and the partitioned hot-tier one.
             for table, index_name, ensure_fn in (
                 ("memory",   "idx_memory_embedding_hnsw",   "ensure_memory_hnsw_index"),
-                ("messages", "idx_messages_embedding_hnsw", "ensure_messages_hnsw_index"),
+                ("messages", "idx_messages%embedding_hnsw", "ensure_messages_hnsw_index"),
             ):
                 async with get_connection() as conn:
                     idx = await conn.fetchval(
-                        "SELECT indexname FROM pg_indexes WHERE indexname = $1",
+                        "SELECT indexname FROM pg_indexes WHERE indexname LIKE $1",
                         index_name,
                     )
                 if idx:
@@ -303,7 +304,7 @@ def repair(fix):
                         await conn.execute(f"SELECT {ensure_fn}()")
                     async with get_connection() as conn:
                         idx2 = await conn.fetchval(
-                            "SELECT indexname FROM pg_indexes WHERE indexname = $1",
+                            "SELECT indexname FROM pg_indexes WHERE indexname LIKE $1",
                             index_name,
                         )
                     if idx2:
@@ -360,7 +361,7 @@ def repair(fix):
                                 async with get_connection() as conn:
                                     await conn.execute(
                                         "UPDATE memory SET embedding = $1::vector WHERE id = $2",
-                                        str(emb.vector), z["id"],
+                                        emb.vector, z["id"],
                                     )
                                 repaired += 1
                             except Exception as e:
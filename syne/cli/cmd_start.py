@@ -37,6 +37,29 @@ def start(debug):
     asyncio.run(run())
 
 
+@cli.command()
+@click.option("--concurrency", "-c", type=int, default=None,
+              help="Sub-agents run at once by this worker (default: subagents.max_concurrent)")
+@click.option("--debug", is_flag=True, help="Enable debug logging")
+def worker(concurrency, debug):
+    """Run queued sub-agents in this process (any host sharing the database).
+
+    Pair with `syne config set subagents.executor worker` so the bot
+    process leaves sub-agents to workers.
+    """
+    import logging
+    logging.basicConfig(
+        level=logging.DEBUG if debug else logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+    )
+    from syne.worker import run_worker
+    console.print("[bold blue]Starting Syne sub-agent worker...[/bold blue]")
+    try:
+        asyncio.run(run_worker(concurrency=concurrency))
+    except KeyboardInterrupt:
+        pass
+
+
 @cli.command(name="cli")
 @click.option("--debug", is_flag=True, help="Enable debug logging")
 @click.option("--yolo", is_flag=True, help="Skip file write approvals (auto-yes)")
@@ -902,11 +902,13 @@ def _run_schema_migration(syne_dir: str):
                 console.print(f"[yellow]⚠️ Schema migration: {len(errors)} warning(s)[/yellow]")
                 for err in errors[:5]:
                     console.print(f"[dim]  {err}[/dim]")
+            return not errors
         finally:
             await conn.close()
 
+    clean = False
     try:
-        asyncio.run(_migrate())
+        clean = asyncio.run(_migrate())
         console.print("[green]✅ Schema up to date[/green]")
     except Exception as e:
         console.print(f"[yellow]⚠️ Schema migration: {e}[/yellow]")
@@ -915,10 +917,14 @@ def _run_schema_migration(syne_dir: str):
     # above can't express — backfill, rename, type change, ADD NOT NULL).
     async def _versioned():
         import asyncpg
-        from syne.db.migrations import run_migrations
+        from syne.db.migrations import record_schema_fingerprint, run_migrations, schema_fingerprint
         conn = await asyncpg.connect(db_url)
         try:
-            return await run_migrations(conn)
+            result = await run_migrations(conn)
+            # Lets the service restart that follows skip the schema replay.
+            if clean:
+                await record_schema_fingerprint(conn, schema_fingerprint(schema))
+            return result
         finally:
             await conn.close()
 
@@ -0,0 +1,176 @@
+"""Per-chat work queue — serialized turns, a global cap, backpressure, coalescing.
+
+Inbound messages used to start a turn each as soon as they arrived, so a
+burst in a busy group could launch hundreds of LLM turns at once, all
+competing for the same DB pool and conversation lock. ChatWorkQueue sits
+between the channel and the agent:
+
+  * one lane per chat — jobs for a chat run strictly one after another
+  * at most `max_running` jobs run at a time across all chats
+  * `max_pending` / `max_pending_per_chat` bound what may wait; submit()
+    returns False beyond that and the caller drops (or pushes back on) it
+  * a job submitted with a coalesce key merges into the lane's last
+    waiting job when that has the same key — messages a user sends while
+    their previous turn is still running become ONE next turn. A lane
+    head with a key also waits `coalesce_window` seconds after it arrived
+    so a quick burst of lines lands in the same turn.
+
+Items are opaque to the queue: `runner(items)` receives the list of items
+merged into a job (one, unless coalesced) and `discard(item)` is called for
+items dropped at shutdown. stats() reports depth, wait times and counters.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import statistics
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+logger = logging.getLogger("syne.chat_queue")
+
+# Recent waits kept for the p50/p95 in stats().
+_WAIT_SAMPLES = 500
+
+
+class _Job:
+    __slots__ = ("items", "key", "enqueued_at")
+
+    def __init__(self, item: Any, key: Optional[Hashable]):
+        self.items = [item]
+        self.key = key
+        self.enqueued_at = time.monotonic()
+
+
+class ChatWorkQueue:
+    """Serialize work per chat under a global concurrency cap."""
+
+    def __init__(
+        self,
+        runner: Callable[[list], Awaitable[None]],
+        *,
+        discard: Optional[Callable[[Any], None]] = None,
+        max_running: int = 8,
+        max_pending: int = 500,
+        max_pending_per_chat: int = 20,
+        coalesce_window: float = 1.0,
+        coalesce_max: int = 10,
+    ):
+        self._runner = runner
+        self._discard = discard
+        self.max_running = max(1, max_running)
+        self.max_pending = max(1, max_pending)
+        self.max_pending_per_chat = max(1, max_pending_per_chat)
+        self.coalesce_window = max(0.0, coalesce_window)
+        self.coalesce_max = max(1, coalesce_max)
+        self._slots = asyncio.Semaphore(self.max_running)
+        self._lanes: dict[Hashable, deque[_Job]] = {}
+        self._workers: dict[Hashable, asyncio.Task] = {}
+        self._running: set[asyncio.Task] = set()
+        self._pending = 0
+        self._waits: deque[float] = deque(maxlen=_WAIT_SAMPLES)
+        self._counters = {"processed": 0, "coalesced": 0, "rejected": 0, "failed": 0}
+        self._closed = False
+
+    # ── submit ───────────────────────────────────────────────────────
+
+    def submit(self, chat: Hashable, item: Any, coalesce_key: Optional[Hashable] = None) -> bool:
+        """Queue `item` for `chat`. False when the queue is full or closed."""
+        if self._closed:
+            return False
+        lane = self._lanes.get(chat)
+        if lane and coalesce_key is not None:
+            tail = lane[-1]
+            if tail.key == coalesce_key and len(tail.items) < self.coalesce_max:
+                tail.items.append(item)
+                self._counters["coalesced"] += 1
+                return True
+        if self._pending >= self.max_pending or (lane and len(lane) >= self.max_pending_per_chat):
+            self._counters["rejected"] += 1
+            return False
+        if lane is None:
+            lane = self._lanes[chat] = deque()
+        lane.append(_Job(item, coalesce_key))
+        self._pending += 1
+        if chat not in self._workers:
+            self._workers[chat] = asyncio.create_task(self._drain(chat))
+        return True
+
+    @property
+    def saturated(self) -> bool:
+        """True when no further job can be queued (global limit reached)."""
+        return self._pending >= self.max_pending
+
+    # ── workers ──────────────────────────────────────────────────────
+
+    async def _drain(self, chat: Hashable) -> None:
+        lane = self._lanes[chat]
+        try:
+            while lane:
+                job = lane[0]
+                if job.key is not None and self.coalesce_window:
+                    delay = job.enqueued_at + self.coalesce_window - time.monotonic()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                # The job stays in the lane while waiting for a slot, so
+                # messages arriving meanwhile can still merge into it.
+                async with self._slots:
+                    lane.popleft()
+                    self._pending -= 1
+                    self._waits.append(time.monotonic() - job.enqueued_at)
+                    await self._run(job)
+        finally:
+            self._workers.pop(chat, None)
+            if not lane:
+                self._lanes.pop(chat, None)
+
+    async def _run(self, job: _Job) -> None:
+        # Own task per job: a handler that cancels its current task
+        # (e.g. /cancel) must not take the lane worker down with it.
+        task = asyncio.ensure_future(self._runner(job.items))
+        self._running.add(task)
+        try:
+            await asyncio.wait([task])
+        finally:
+            self._running.discard(task)
+        self._counters["processed"] += 1
+        if not task.cancelled() and task.exception() is not None:
+            self._counters["failed"] += 1
+            logger.error("Queued job failed", exc_info=task.exception())
+
+    # ── metrics / lifecycle ──────────────────────────────────────────
+
+    def stats(self) -> dict:
+        """Queue depth, wait times (ms, recent jobs) and lifetime counters."""
+        waits = sorted(self._waits)
+        depths = [len(lane) for lane in self._lanes.values()]
+        now = time.monotonic()
+        oldest = min((lane[0].enqueued_at for lane in self._lanes.values() if lane), default=None)
+        return {
+            "pending": self._pending,
+            "running": len(self._running),
+            "chats": len(depths),
+            "max_chat_depth": max(depths, default=0),
+            "oldest_wait_ms": round((now - oldest) * 1000) if oldest is not None else 0,
+            "wait_p50_ms": round(statistics.median(waits) * 1000) if waits else 0,
+            "wait_p95_ms": round(waits[max(0, int(len(waits) * 0.95) - 1)] * 1000) if waits else 0,
+            **self._counters,
+        }
+
+    async def close(self) -> None:
+        """Stop accepting work, cancel workers and running jobs, discard the rest."""
+        self._closed = True
+        tasks = list(self._workers.values()) + list(self._running)
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        for lane in self._lanes.values():
+            for job in lane:
+                for item in job.items:
+                    if self._discard:
+                        self._discard(item)
+        self._lanes.clear()
+        self._pending = 0
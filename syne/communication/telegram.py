@@ -1,6 +1,7 @@
 """Telegram channel adapter."""
 
 import asyncio
+import functools
 import httpx
 import json
 import logging
@@ -22,6 +23,9 @@ from telegram.ext import (
 from ..agent import SyneAgent
 from .tags import parse_reply_tag, parse_react_tags
 from .outbound import strip_server_paths, extract_media, extract_all_media, split_message, process_outbound
+from .telegram_stream import DEFAULT_INTERVAL, GROUP_MIN_INTERVAL, TelegramDraftStream
+from .telegram_ingest import ChatUpdateProcessor, TelegramWebhookServer, webhook_secret
+from ..rule_checker import DeferredCheck, VerdictState, record_retraction, stats as rule_checker_stats
 from ..llm.provider import LLMRateLimitError, LLMAuthError, LLMBadRequestError, LLMEmptyResponseError
 from ..db.models import (
     get_group,
@@ -29,6 +33,7 @@ from ..db.models import (
     get_or_create_user,
     get_config,
     get_identity,
+    get_rules,
     get_user_alias,
     set_config,
     update_user,
@@ -186,6 +191,11 @@ class TelegramChannel:
         # Per-group lock so concurrent _handle_photo invocations for the same
         # media_group_id don't race on the buffer state.
         self._media_group_locks: dict[str, asyncio.Lock] = {}
+        # Inbound dispatch (per-chat lanes) and, in webhook mode, the HTTP receiver
+        self._processor: Optional[ChatUpdateProcessor] = None
+        self._webhook: Optional[TelegramWebhookServer] = None
+        # Background blue/green embedding migration started from /embedding
+        self._embedding_migration: Optional[asyncio.Task] = None
 
     async def _build_inbound(self, update: Update, is_group: bool) -> "InboundContext":
         """Build InboundContext from a Telegram Update. Used by ALL handlers.
@@ -286,14 +296,23 @@ class TelegramChannel:
             write_timeout=180.0,
             pool_timeout=10.0,
         )
+        # Turn-starting updates are serialized per chat with a global cap;
+        # commands and button callbacks bypass the lanes.
+        self._processor = ChatUpdateProcessor(
+            max_running=int(await get_config("telegram.max_concurrent_turns", 8)),
+            max_pending=int(await get_config("telegram.queue_max_pending", 500)),
+            max_pending_per_chat=int(await get_config("telegram.queue_max_per_chat", 20)),
+            coalesce_window=float(await get_config("telegram.coalesce_window", 1.0)),
+        )
         self.app = (
             Application.builder()
             .token(self.bot_token)
-            .concurrent_updates(256)
+            .concurrent_updates(self._processor)
             .request(_req)
             .get_updates_request(_req)
             .build()
         )
+        self._processor.application = self.app
         # Use the larger-timeout HTTPXRequest for media uploads
         self._media_req = _media_req
 
@@ -313,13 +332,35 @@ class TelegramChannel:
                 else:
                     raise
         await self.app.start()
-        await self.app.updater.start_polling(
-            drop_pending_updates=True,
-            allowed_updates=[
-                "message", "edited_message", "callback_query",
-                "my_chat_member", "message_reaction",
-            ],
-        )
+        allowed_updates = [
+            "message", "edited_message", "callback_query",
+            "my_chat_member", "message_reaction",
+        ]
+        webhook_url = await get_config("telegram.webhook_url", "")
+        if await get_config("telegram.mode", "polling") == "webhook" and webhook_url:
+            from urllib.parse import urlparse
+            secret = webhook_secret(self.bot_token)
+            self._webhook = TelegramWebhookServer(
+                self.app, self._processor,
+                secret=secret,
+                path=urlparse(webhook_url).path or "/telegram",
+                host=await get_config("telegram.webhook_host", "127.0.0.1"),
+                port=int(await get_config("telegram.webhook_port", 8081)),
+            )
+            await self._webhook.start()
+            await self.app.bot.set_webhook(
+                webhook_url,
+                secret_token=secret,
+                allowed_updates=allowed_updates,
+                drop_pending_updates=True,
+                max_connections=40,
+            )
+        else:
+            # start_polling removes a webhook left over from webhook mode.
+            await self.app.updater.start_polling(
+                drop_pending_updates=True,
+                allowed_updates=allowed_updates,
+            )
 
         # Register bot commands menu (the "/" button in Telegram)
         from telegram import BotCommand, BotCommandScopeDefault, BotCommandScopeAllPrivateChats, BotCommandScopeAllGroupChats
@@ -414,7 +455,13 @@ class TelegramChannel:
     async def stop(self):
         """Stop the Telegram bot."""
         if self.app:
-            await self.app.updater.stop()
+            # The webhook stays registered: Telegram holds updates until
+            # the next start instead of dropping them.
+            if self._webhook:
+                await self._webhook.stop()
+                self._webhook = None
+            if self.app.updater and self.app.updater.running:
+                await self.app.updater.stop()
             await self.app.stop()
             await self.app.shutdown()
             logger.info("Telegram bot stopped.")
@@ -599,6 +646,12 @@ class TelegramChannel:
 
         # Track this as an active task for /cancel support
         self._active_tasks[chat.id] = asyncio.current_task()
+        # Draft message edited as the reply streams in (telegram.stream_replies)
+        stream = await self._new_draft_stream(context.bot, chat.id, is_group)
+        # Rule check after delivery (security.rule_checker_mode = retract);
+        # unused — and the check blocking as usual — in the default mode.
+        deferred_check = DeferredCheck()
+        sent_log: list = []
         # Keep typing indicator alive throughout the entire processing
         async with _TypingIndicator(context.bot, chat.id):
             try:
@@ -609,7 +662,10 @@ class TelegramChannel:
                     "inbound": inbound,  # Single source of truth for all context
                     "original_text": original_text,  # Without context prefix, for evaluator
                     "has_credential": _has_credential,  # Redact in history, not in LLM
+                    "deferred_rule_check": deferred_check,
                 }
+                if stream:
+                    metadata["stream_callbacks"] = stream.callbacks()
 
                 # Download media from replied message (photo/document) so LLM can see it
                 reply_media = await self._download_reply_media(update)
@@ -677,6 +733,8 @@ class TelegramChannel:
 
                 if response is None:
                     # Silent drop (e.g. lock timeout while previous request is processing)
+                    if stream:
+                        await stream.discard()
                     return
 
                 if not response:
@@ -713,16 +771,29 @@ class TelegramChannel:
                     for emoji in react_emojis:
                         await self.send_reaction(chat.id, message_id, emoji)
 
-                    sent = await self._send_response_with_media(chat.id, response, context, reply_to_message_id=reply_to)
+                    if stream and stream.started:
+                        sent = await self._finish_draft_stream(stream, chat.id, response, context, reply_to,
+                                                               sent_log=sent_log)
+                    else:
+                        sent = await self._send_response_with_media(chat.id, response, context,
+                                                                    reply_to_message_id=reply_to, sent_log=sent_log)
                     # Track bot's response for reaction context
                     if sent:
                         self._track_message(chat.id, sent.message_id, response[:100])
 
             except asyncio.CancelledError:
                 logger.info(f"Processing cancelled by user for chat {chat.id}")
+                if stream:
+                    await stream.discard()
+                if deferred_check.started:
+                    deferred_check.cancel()
                 return
             except Exception as e:
                 logger.error(f"Error handling message: {e}", exc_info=True)
+                if stream:
+                    await stream.discard()
+                if deferred_check.started:
+                    deferred_check.cancel()
                 _model = ""
                 try:
                     _key = f"telegram:{chat.id}"
@@ -735,6 +806,48 @@ class TelegramChannel:
             finally:
                 self._active_tasks.pop(chat.id, None)
 
+        # Retract mode: the reply is out; settle its rule check outside the
+        # typing indicator. The chat lane stays busy until then, so the next
+        # turn already sees the retraction note.
+        if deferred_check.started:
+            await self._retract_if_violated(context.bot, chat.id, deferred_check, sent_log)
+
+    async def _retract_if_violated(self, bot, chat_id: int, deferred: DeferredCheck, sent_messages: list):
+        """Wait for a deferred rule check; undo the delivered reply if it was VIOLATED.
+
+        The first message of the reply is edited into a short notice and the
+        rest are deleted. A message that cannot be edited (media caption,
+        too old) is deleted and the notice sent fresh.
+        """
+        verdict = await deferred.verdict()
+        if not verdict or verdict.state != VerdictState.VIOLATED or not sent_messages:
+            return
+        record_retraction()
+        notice = (
+            f"⚠️ Reply retracted by the rule checker (violates {', '.join(verdict.violated)}). "
+            "Ask again if you still need it."
+        )
+        logger.warning(f"Retracting reply in chat {chat_id}: {verdict.violated} — {verdict.reason}")
+        first, rest = sent_messages[0], sent_messages[1:]
+        for msg in rest:
+            try:
+                await bot.delete_message(chat_id=chat_id, message_id=msg.message_id)
+            except Exception as e:
+                logger.debug(f"Could not delete retracted message {msg.message_id}: {e}")
+        try:
+            await bot.edit_message_text(chat_id=chat_id, message_id=first.message_id, text=notice)
+            return
+        except Exception as e:
+            logger.info(f"Retraction edit failed in chat {chat_id} ({e}) — deleting instead")
+        try:
+            await bot.delete_message(chat_id=chat_id, message_id=first.message_id)
+        except Exception as e:
+            logger.warning(f"Could not delete retracted message {first.message_id}: {e}")
+        try:
+            await bot.send_message(chat_id=chat_id, text=notice)
+        except Exception as e:
+            logger.error(f"Retraction notice failed in chat {chat_id}: {e}")
+
     async def _process_group_message(
         self, update: Update, context: ContextTypes.DEFAULT_TYPE, text: str
     ) -> Optional[str]:
@@ -2197,6 +2310,10 @@ Or just send me a message!"""
         active_embed_key = await get_config("provider.active_embedding", None)
         active_embed_entry = next((m for m in embed_models if m.get("key") == active_embed_key), None) if embed_models and active_embed_key else None
         embed_label = active_embed_entry.get("label", "Together AI") if active_embed_entry else "Together AI"
+        from ..llm.embed_cache import get_embedding_cache
+        ec = get_embedding_cache().stats()
+        if ec["hits"] + ec["persistent_hits"] + ec["misses"]:
+            embed_label += f" (cache {ec['hit_rate']:.0%} of {ec['hits'] + ec['persistent_hits'] + ec['misses']})"
         
         # Tools & abilities
         tool_count = len(self.agent.tools.list_tools("owner"))
@@ -2268,6 +2385,30 @@ Or just send me a message!"""
         eval_label = active_eval_entry.get("label", active_eval_key or "?") if active_eval_entry else (active_eval_key or "none")
         status_lines.append(f"🔬 Evaluator: {eval_label}")
 
+        # Inbound queue (per-chat lanes)
+        if self._processor:
+            q = self._processor.queue.stats()
+            inbound_line = (
+                f"📥 Inbound ({'webhook' if self._webhook else 'polling'}): "
+                f"{q['running']} running, {q['pending']} queued · "
+                f"wait p50 {q['wait_p50_ms']}ms p95 {q['wait_p95_ms']}ms"
+            )
+            if q["rejected"]:
+                inbound_line += f" · {q['rejected']} dropped"
+            status_lines.append(inbound_line)
+
+        # Rule checker latency (per turn, since start)
+        rc = rule_checker_stats()
+        if rc["turns"]:
+            checker_line = (
+                f"🛡 Rule checker: p50 {rc['checker_p50_ms']}ms p95 {rc['checker_p95_ms']}ms · "
+                f"user waited p50 {rc['blocked_p50_ms']}ms p95 {rc['blocked_p95_ms']}ms · "
+                f"{rc['cache_hits']}/{rc['checks']} cached"
+            )
+            if rc["deferred"]:
+                checker_line += f" · {rc['deferred']} deferred, {rc['retracted']} retracted"
+            status_lines.append(checker_line)
+
         # Credential summary
         try:
             cred_parts = []
@@ -4679,10 +4820,11 @@ Or just send me a message!"""
         count = len(models)
         text = (
             f"🧬 <b>Embedding</b> — {count} registered\n\n"
-            f"⚠️ <b>Warning:</b> Changing the active embedding model may "
-            f"require resetting ALL memories (re-embedding is not yet supported). "
-            f"Only switch if you understand the consequences."
+            f"Switching the active model re-embeds memories and messages in the "
+            f"background; recall keeps using the current model until every row is done."
         )
+        if self._embedding_migration and not self._embedding_migration.done():
+            text += "\n\n🔄 A migration is running — <code>syne memory migrate-embedding --status</code>"
         markup = InlineKeyboardMarkup(buttons)
 
         if hasattr(update_or_query, 'message') and update_or_query.message:
@@ -4745,27 +4887,20 @@ Or just send me a message!"""
             if embed_key == active_key:
                 await query.answer("Already active", show_alert=True)
                 return
-            # Check dimension change — warn about memory loss
-            current_dims = await get_config("provider.embedding_dimensions", 768)
-            new_dims = entry.get("dimensions", 768)
-            if current_dims != new_dims:
-                from ..db.connection import get_connection
-                async with get_connection() as conn:
-                    row = await conn.fetchrow("SELECT COUNT(*) as cnt FROM memory WHERE embedding IS NOT NULL")
-                    mem_count = row["cnt"] if row else 0
+            # Vectors from different models are incompatible (even at the
+            # same dimension) — existing ones are migrated, not kept.
+            mem_count, msg_count = await self._count_embedded()
+            if mem_count or msg_count:
                 warn = (
-                    f"⚠️ <b>Warning: This will DELETE all memories!</b>\n\n"
-                    f"Dimension change: {current_dims} → {new_dims}\n"
-                    f"Memories affected: <b>{mem_count}</b>\n\n"
-                    f"Vectors from different embedding models are incompatible. "
-                    f"Re-embedding is not yet supported — all existing memories "
-                    f"will be permanently deleted.\n\n"
-                    f"Are you sure?"
+                    f"Switch active embedding to <b>{entry.get('label', embed_key)}</b>?\n\n"
+                    f"<b>{mem_count}</b> memories and <b>{msg_count}</b> messages will be "
+                    f"re-embedded in the background. Recall keeps using the current model "
+                    f"until every row is done, then both switch at once."
                 )
             else:
                 warn = (
                     f"Switch active embedding to <b>{entry.get('label', embed_key)}</b>?\n\n"
-                    f"Same dimensions ({new_dims}), memories will be preserved."
+                    f"Nothing is embedded yet — the switch is immediate."
                 )
             await query.edit_message_text(
                 warn,
@@ -4788,7 +4923,9 @@ Or just send me a message!"""
             chat_id = query.message.chat_id
             bot = query._bot or self.app.bot
             success, result = await self._apply_embedding(embed_key, chat_id, bot)
-            if success:
+            if success and result.endswith("(migrating)"):
+                await query.answer(f"Migrating → {entry.get('label', embed_key)}")
+            elif success:
                 await query.answer(f"Active → {entry.get('label', embed_key)}")
             else:
                 await query.answer(f"Failed: {result[:50]}", show_alert=True)
@@ -4899,11 +5036,62 @@ Or just send me a message!"""
                 parse_mode="HTML",
             )
 
+    async def _count_embedded(self) -> tuple[int, int]:
+        """(memories, messages) that carry an embedding vector."""
+        from ..db.connection import get_connection
+        async with get_connection() as conn:
+            mem = await conn.fetchval("SELECT count(*) FROM memory WHERE embedding IS NOT NULL")
+            msg = await conn.fetchval(
+                "SELECT count(*) FROM messages WHERE role = 'user' AND embedding IS NOT NULL"
+            )
+        return int(mem or 0), int(msg or 0)
+
+    async def _run_embedding_migration(self, embed_entry: dict, chat_id: int, bot) -> None:
+        """Background task: blue/green migration to embed_entry (memory/shadow.py)."""
+        from ..llm.drivers import create_embedding_provider
+        from ..memory import shadow
+
+        label = embed_entry.get("label", embed_entry.get("key"))
+        try:
+            provider = await create_embedding_provider(embed_entry)
+            if provider is None:
+                raise RuntimeError("could not build the embedding provider")
+            result = await shadow.migrate(
+                embed_entry, provider,
+                batch_size=max(1, int(await get_config("embedding.migration_batch_size", shadow.DEFAULT_BATCH_SIZE))),
+                max_chars=int(await get_config("history_search.max_content_chars", 4000)),
+            )
+            if result["switched"]:
+                # The config watcher also reloads; this covers a degraded
+                # (non-listening) config cache and is a no-op after it.
+                await self.agent._reload_for_embedding()
+                text = f"✅ Embedding switched to {label} ({result['dimensions']} dims). All memories and messages re-embedded."
+            else:
+                why = {
+                    "failed": "the new model could not embed some rows",
+                    "busy": "the memory/messages tables stayed locked by other work",
+                }.get(result.get("reason"), "new rows kept arriving faster than they were re-embedded")
+                text = (
+                    f"⚠️ Embedding migration to {label} stopped before the switch — {why}. "
+                    f"Recall still uses the current model. "
+                    f"Resume with <code>syne memory migrate-embedding {embed_entry.get('key')}</code>."
+                )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Embedding migration to {label} failed: {e}", exc_info=True)
+            text = f"❌ Embedding migration to {label} failed: {str(e)[:200]}. Recall still uses the current model."
+        try:
+            await bot.send_message(chat_id=chat_id, text=text, parse_mode="HTML")
+        except Exception as e:
+            logger.warning(f"Could not report embedding migration result: {e}")
+
     async def _apply_embedding(self, embed_key: str, chat_id: int, bot) -> tuple[bool, str]:
         """Apply an embedding model from registry — test before switching.
 
-        If the new model has different dimensions, all existing memories are
-        deleted (incompatible vector spaces cannot be mixed).
+        When memories or messages are already embedded, the switch runs as a
+        background blue/green migration (memory/shadow.py) that re-embeds them
+        and activates the model once every row is covered.
 
         Args:
             embed_key: Key of embedding model to switch to
@@ -4914,7 +5102,6 @@ Or just send me a message!"""
             Tuple of (success, message)
         """
         from ..llm.drivers import test_embedding, get_model_from_list
-        from ..db.connection import get_connection
 
         # Get embedding registry
         models = await get_config("provider.embedding_models", [])
@@ -4923,14 +5110,8 @@ Or just send me a message!"""
         if not embed_entry:
             return False, f"Embedding '{embed_key}' not found in registry"
 
-        # Save current for rollback
-        previous_key = await get_config("provider.active_embedding", "together-bge")
-        await set_config("provider.previous_embedding", previous_key)
-
-        # Check if dimensions will change (requires memory reset)
-        current_dims = await get_config("provider.embedding_dimensions", 768)
-        new_dims = embed_entry.get("dimensions", 768)
-        dims_changed = (current_dims != new_dims)
+        if self._embedding_migration and not self._embedding_migration.done():
+            return False, "An embedding migration is already running"
 
         # Send "testing" message
         await bot.send_message(
@@ -4942,20 +5123,27 @@ Or just send me a message!"""
             success, error = await test_embedding(embed_entry, timeout=15)
 
             if success:
-                # Reset memory if dimensions changed
-                if dims_changed:
-                    async with get_connection() as conn:
-                        row = await conn.fetchrow("SELECT COUNT(*) as cnt FROM memory WHERE embedding IS NOT NULL")
-                        mem_count = row["cnt"] if row else 0
-                        await conn.execute("DELETE FROM memory WHERE embedding IS NOT NULL")
+                mem_count, msg_count = await self._count_embedded()
+                if mem_count or msg_count:
+                    self._embedding_migration = asyncio.create_task(
+                        self._run_embedding_migration(embed_entry, chat_id, bot)
+                    )
                     await bot.send_message(
                         chat_id=chat_id,
-                        text=f"🗑️ {mem_count} memories cleared (incompatible vector dimensions).",
+                        text=(
+                            f"🔄 Re-embedding {mem_count} memories and {msg_count} messages with "
+                            f"{embed_entry.get('label', embed_key)} in the background. "
+                            f"I'll switch over and tell you when it's done."
+                        ),
                     )
+                    return True, f"{embed_entry.get('label', embed_key)} (migrating)"
 
+                # Save current for rollback
+                previous_key = await get_config("provider.active_embedding", "together-bge")
+                await set_config("provider.previous_embedding", previous_key)
                 await set_config("provider.active_embedding", embed_key)
                 await set_config("provider.embedding_model", embed_entry.get("model_id", ""))
-                await set_config("provider.embedding_dimensions", new_dims)
+                await set_config("provider.embedding_dimensions", embed_entry.get("dimensions", 768))
                 await set_config("provider.embedding_driver", embed_entry.get("driver", ""))
 
                 # Hot-reload provider (picks up new embedding)
@@ -9388,7 +9576,8 @@ Or just send me a message!"""
         if last_exc:
             raise last_exc
 
-    async def _send_response_with_media(self, chat_id: int, text: str, context: ContextTypes.DEFAULT_TYPE = None, reply_to_message_id: int | None = None):
+    async def _send_response_with_media(self, chat_id: int, text: str, context: ContextTypes.DEFAULT_TYPE = None, reply_to_message_id: int | None = None,
+                                        sent_log: list | None = None):
         """Send a response, handling MEDIA: paths as photos/documents.
         
         If response contains 'MEDIA: /path/to/file', send the file as a photo
@@ -9399,6 +9588,7 @@ Or just send me a message!"""
             text: Response text (may contain MEDIA: path)
             context: Telegram context (optional — uses self.app.bot if None)
             reply_to_message_id: Optional message ID to reply/quote to
+            sent_log: If given, every Message sent is appended to it
         
         Returns:
             The sent Message object, or None if send failed.
@@ -9518,6 +9708,8 @@ Or just send me a message!"""
                         logger.info(f"Sent extra media: {_extra} to {chat_id}")
                     except Exception as _ee:
                         logger.error(f"Failed to send extra media {_extra}: {_ee}")
+                if sent_log is not None and sent_msg:
+                    sent_log.append(sent_msg)
                 return sent_msg
             except Exception as e:
                 logger.error(f"Failed to send media {media_path}: {e}")
@@ -9525,7 +9717,79 @@ Or just send me a message!"""
                 caption_text = text  # Send full text as fallback
 
         # No media or media send failed — send as text
-        return await self._send_response(chat_id, caption_text, context, reply_to_message_id=reply_to_message_id)
+        return await self._send_response(chat_id, caption_text, context, reply_to_message_id=reply_to_message_id,
+                                         sent_log=sent_log)
+
+    async def _new_draft_stream(self, bot, chat_id: int, is_group: bool) -> Optional[TelegramDraftStream]:
+        """Draft stream for one reply, or None when it must not stream.
+
+        Off when telegram.stream_replies is off, and while the blocking
+        rule checker guards hard rules: drafts would show the model's text
+        before the check could rewrite it. Drafts get the same
+        process_outbound pass as the final reply (server paths stripped
+        outside the owner's DM). Groups share Telegram's ~20 messages/min
+        budget, so their edit interval is never below GROUP_MIN_INTERVAL.
+        """
+        if not await get_config("telegram.stream_replies", True):
+            return None
+        if await self._rule_check_blocks_streaming():
+            return None
+        interval = float(await get_config("telegram.stream_edit_interval", DEFAULT_INTERVAL))
+        if is_group:
+            interval = max(interval, GROUP_MIN_INTERVAL)
+        outbound = functools.partial(process_outbound, strip_paths=not await self._is_owner_dm(chat_id))
+        return TelegramDraftStream(bot, chat_id, interval=interval, outbound=outbound)
+
+    async def _rule_check_blocks_streaming(self) -> bool:
+        """True when replies are held for the blocking hard-rule check.
+
+        Retract mode checks after delivery, so it can stream. Fails closed:
+        if the settings can't be read, don't stream.
+        """
+        try:
+            enabled_raw = await get_config("security.rule_checker_enabled", True)
+            if isinstance(enabled_raw, str):
+                enabled = enabled_raw.strip().lower() in ("1", "true", "yes", "on")
+            else:
+                enabled = bool(enabled_raw)
+            if not enabled:
+                return False
+            if await get_config("security.rule_checker_mode", "blocking") == "retract":
+                return False
+            return any(r.get("severity") == "hard" for r in await get_rules())
+        except Exception as e:
+            logger.warning(f"Rule checker settings unavailable, not streaming: {e}")
+            return True
+
+    async def _finish_draft_stream(self, stream: TelegramDraftStream, chat_id: int, text: str,
+                                   context: ContextTypes.DEFAULT_TYPE = None, reply_to_message_id: int | None = None,
+                                   sent_log: list | None = None):
+        """Turn the streamed drafts into the final reply.
+
+        Plain replies are rendered in place: the drafts are edited to the
+        final HTML chunks (same outbound pipeline as _send_response). Replies
+        that carry media, consent buttons or a reply-to target need a fresh
+        send, so the drafts are deleted and _send_response_with_media runs.
+        """
+        from .formatting import markdown_to_telegram_html
+
+        _, media = extract_all_media(text)
+        if stream.failed or media or reply_to_message_id or "[[CONSENT_BUTTONS:hash=" in text:
+            await stream.discard()
+            return await self._send_response_with_media(chat_id, text, context, reply_to_message_id=reply_to_message_id,
+                                                        sent_log=sent_log)
+
+        text = process_outbound(text, strip_paths=not await self._is_owner_dm(chat_id))
+        if not text or not text.strip():
+            await stream.discard()
+            return None
+        chunks = split_message(markdown_to_telegram_html(text), max_length=4096)
+        logger.info(f"Streamed reply for chat {chat_id}: {len(stream.messages)} draft(s), "
+                    f"{stream.edits} edit(s) → {len(chunks)} final chunk(s)")
+        last = await stream.finish(chunks)
+        if sent_log is not None:
+            sent_log.extend(stream.delivered)
+        return last
 
     async def _is_owner_dm(self, chat_id: int) -> bool:
         """True only for the owner's private chat (positive chat_id that
@@ -9544,7 +9808,8 @@ Or just send me a message!"""
                 return False
         return bool(self._owner_tg_id_cache) and str(chat_id) == self._owner_tg_id_cache
 
-    async def _send_response(self, chat_id: int, text: str, context: ContextTypes.DEFAULT_TYPE = None, reply_to_message_id: int | None = None):
+    async def _send_response(self, chat_id: int, text: str, context: ContextTypes.DEFAULT_TYPE = None, reply_to_message_id: int | None = None,
+                             sent_log: list | None = None):
         """Send a response, splitting if too long for Telegram.
 
         Converts LLM markdown to Telegram HTML for reliable rendering.
@@ -9555,6 +9820,7 @@ Or just send me a message!"""
             text: Response text (markdown from LLM)
             context: Telegram context (optional — uses self.app.bot if None)
             reply_to_message_id: Optional message ID to reply/quote to
+            sent_log: If given, every chunk's Message is appended to it
 
         Returns:
             The last sent Message object, or None if send failed.
@@ -9645,6 +9911,7 @@ Or just send me a message!"""
         logger.info(f"_send_response splitting into {len(chunks)} chunk(s) for chat {chat_id}")
         for i, chunk in enumerate(chunks):
             rp = reply_params if i == 0 else None
+            prev_msg = last_msg
 
             async def _send_html(_chunk=chunk, _rp=rp):
                 return await bot.send_message(
@@ -9689,6 +9956,8 @@ Or just send me a message!"""
                             f"_send_response chunk {i+1}/{len(chunks)} truncated send FAILED for chat {chat_id}: "
                             f"{type(trunc_exc).__name__}: {trunc_exc} — GIVING UP, user will see nothing"
                         )
+            if sent_log is not None and last_msg is not None and last_msg is not prev_msg:
+                sent_log.append(last_msg)
 
         return last_msg
 
@@ -0,0 +1,192 @@
+"""Telegram update intake — per-chat dispatch and the optional webhook receiver.
+
+ChatUpdateProcessor replaces python-telegram-bot's default
+`concurrent_updates(256)` processor. Message updates (text, media, voice,
+documents, locations — anything that starts a turn) go through a
+ChatWorkQueue: one at a time per chat, at most `max_running` across chats,
+bounded waiting room. Plain text lines a user sends in quick succession
+(or while their previous turn runs) are merged into one update, so the
+agent answers the burst once. Everything else — commands, button
+callbacks, reactions, membership changes — runs immediately as before:
+/cancel and consent buttons must reach a chat whose turn is in progress.
+
+TelegramWebhookServer is the push alternative to long polling: a minimal
+HTTP/1.1 listener (stdlib asyncio, no extra dependency) meant to sit behind
+a TLS-terminating reverse proxy. It checks Telegram's secret-token header,
+answers 503 while the queue is saturated — Telegram then redelivers later,
+which is the backpressure polling cannot apply — and hands accepted
+updates to the Application's update_queue.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import hmac
+import json
+import logging
+from typing import Any, Optional
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+from .chat_queue import ChatWorkQueue
+
+logger = logging.getLogger("syne.telegram.ingest")
+
+# Headroom for updates that bypass the chat lanes (commands, callbacks).
+_BYPASS_CONCURRENCY = 64
+# Telegram updates are small; anything bigger is not from Telegram.
+MAX_BODY_BYTES = 1 << 20
+_HEADER_TIMEOUT = 10.0
+
+SECRET_HEADER = "x-telegram-bot-api-secret-token"
+
+
+def webhook_secret(bot_token: str) -> str:
+    """Secret token for setWebhook, derived from the bot token (stable across restarts)."""
+    return hashlib.sha256(f"syne-webhook:{bot_token}".encode()).hexdigest()
+
+
+def _queued(update: Any) -> bool:
+    """Whether an update starts a turn (goes through the chat lanes)."""
+    if not isinstance(update, Update) or not update.message or not update.effective_chat:
+        return False
+    text = update.message.text or ""
+    return not text.startswith("/")
+
+
+def _coalesce_key(update: Update) -> Optional[tuple]:
+    """Same key → may merge. Only plain, non-reply text lines from one sender."""
+    msg = update.message
+    if not msg.text or msg.reply_to_message or msg.media_group_id or not msg.from_user:
+        return None
+    return ("text", msg.from_user.id)
+
+
+def merge_text_updates(updates: list[Update], bot) -> Update:
+    """One update carrying the text of several; the first message is the base.
+
+    Entities are dropped — their offsets refer to a single message's text.
+    """
+    data = updates[0].to_dict()
+    data["message"]["text"] = "\n".join(u.message.text for u in updates)
+    data["message"].pop("entities", None)
+    return Update.de_json(data, bot)
+
+
+class ChatUpdateProcessor(BaseUpdateProcessor):
+    """python-telegram-bot update processor backed by a ChatWorkQueue.
+
+    `application` must be set before updates arrive — merged updates are
+    re-dispatched through application.process_update().
+    """
+
+    def __init__(self, *, max_running: int = 8, max_pending: int = 500,
+                 max_pending_per_chat: int = 20, coalesce_window: float = 1.0):
+        super().__init__(max_running + _BYPASS_CONCURRENCY)
+        self.application = None
+        self.queue = ChatWorkQueue(
+            self._run,
+            discard=lambda item: item[1].close(),
+            max_running=max_running,
+            max_pending=max_pending,
+            max_pending_per_chat=max_pending_per_chat,
+            coalesce_window=coalesce_window,
+        )
+
+    async def do_process_update(self, update: object, coroutine) -> None:
+        if not _queued(update):
+            await coroutine
+            return
+        if not self.queue.submit(update.effective_chat.id, (update, coroutine), _coalesce_key(update)):
+            coroutine.close()
+            logger.warning(
+                f"Dropped update {update.update_id} for chat {update.effective_chat.id}: "
+                f"queue full ({self.queue.stats()['pending']} pending)"
+            )
+
+    async def _run(self, items: list) -> None:
+        if len(items) == 1:
+            await items[0][1]
+            return
+        for _, coroutine in items:
+            coroutine.close()
+        merged = merge_text_updates([u for u, _ in items], self.application.bot)
+        logger.info(f"Coalesced {len(items)} messages in chat {merged.effective_chat.id} into one turn")
+        await self.application.process_update(merged)
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        await self.queue.close()
+
+
+class TelegramWebhookServer:
+    """Receive Telegram updates over HTTP POST and feed them to the Application."""
+
+    def __init__(self, application, processor: Optional[ChatUpdateProcessor], *,
+                 secret: str, path: str = "/telegram", host: str = "127.0.0.1", port: int = 8081):
+        self.application = application
+        self.processor = processor
+        self.secret = secret
+        self.path = path if path.startswith("/") else f"/{path}"
+        self.host = host
+        self.port = port
+        self._server: Optional[asyncio.base_events.Server] = None
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        logger.info(f"Telegram webhook listening on http://{self.host}:{self.port}{self.path}")
+
+    async def stop(self) -> None:
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            status, extra = await self._respond(reader)
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError,
+                KeyError, TypeError, ValueError):
+            status, extra = 400, {}
+        try:
+            reason = {200: "OK", 400: "Bad Request", 403: "Forbidden", 404: "Not Found",
+                      405: "Method Not Allowed", 413: "Payload Too Large",
+                      503: "Service Unavailable"}[status]
+            head = [f"HTTP/1.1 {status} {reason}", "Content-Length: 0", "Connection: close"]
+            head += [f"{k}: {v}" for k, v in extra.items()]
+            writer.write(("\r\n".join(head) + "\r\n\r\n").encode())
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, reader: asyncio.StreamReader) -> tuple[int, dict]:
+        raw = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), _HEADER_TIMEOUT)
+        request_line, *header_lines = raw.decode("latin-1").split("\r\n")
+        method, target, _ = request_line.split(" ", 2)
+        headers = {}
+        for line in header_lines:
+            if ":" in line:
+                k, v = line.split(":", 1)
+                headers[k.strip().lower()] = v.strip()
+
+        if target.split("?", 1)[0] != self.path:
+            return 404, {}
+        if method != "POST":
+            return 405, {"Allow": "POST"}
+        if not hmac.compare_digest(headers.get(SECRET_HEADER, ""), self.secret):
+            return 403, {}
+        length = int(headers.get("content-length", "0"))
+        if length > MAX_BODY_BYTES:
+            return 413, {}
+        if self.processor and self.processor.queue.saturated:
+            return 503, {"Retry-After": "5"}
+        body = await asyncio.wait_for(reader.readexactly(length), _HEADER_TIMEOUT)
+        update = Update.de_json(json.loads(body), self.application.bot)
+        await self.application.update_queue.put(update)
+        return 200, {}
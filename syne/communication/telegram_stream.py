@@ -0,0 +1,276 @@
+"""Streaming Telegram replies — a draft message edited as text arrives.
+
+Without streaming, a Telegram user sees only the typing indicator until
+agent.handle_message() returns (20–60 s for long answers). With it:
+
+  1. the first text delta is sent as a plain-text draft message (~1 s)
+  2. a background loop edits the draft with the accumulated text, at most
+     once per `interval` seconds (Telegram allows ~1 edit/s per chat and
+     ~20 messages/min in groups; RetryAfter is honoured)
+  3. when the draft would pass `max_length` it is frozen at a newline/space
+     boundary and the rest continues in a new draft message
+  4. finish() replaces the drafts with the final HTML chunks (same
+     pipeline as _send_response), sending extra messages or deleting
+     leftover drafts when the chunk count differs
+
+Drafts are sent without parse_mode, so half-written markdown can never
+make Telegram reject an edit. Each draft goes through the channel's
+`outbound` filter first (process_outbound — server paths, narration), and
+a trailing word that may be an unfinished path is held back until it is
+complete, so a draft never shows what the final reply would strip. Any unexpected Telegram error disables the
+stream; the channel then deletes the drafts and falls back to a normal
+send.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import html
+import logging
+import re
+import time
+from typing import Callable, Optional
+
+from ..llm.provider import StreamCallbacks
+
+logger = logging.getLogger("syne.telegram.stream")
+
+DEFAULT_INTERVAL = 1.0
+GROUP_MIN_INTERVAL = 3.0
+# A little under Telegram's 4096 so the frozen chunk never hits the limit.
+DRAFT_MAX_LENGTH = 4000
+
+try:
+    import telegram.error as _tg_err
+except ImportError:  # pragma: no cover — python-telegram-bot is a core dependency
+    _tg_err = None
+
+
+def _retry_after(e: Exception) -> Optional[float]:
+    if _tg_err is not None and isinstance(e, _tg_err.RetryAfter):
+        ra = e.retry_after
+        return ra.total_seconds() if hasattr(ra, "total_seconds") else float(ra)
+    return None
+
+
+def _not_modified(e: Exception) -> bool:
+    return "message is not modified" in str(e).lower()
+
+
+def _split_point(text: str, max_length: int) -> int:
+    """Where to freeze an overlong draft: last newline, else last space, else hard cut."""
+    cut = text.rfind("\n", 0, max_length)
+    if cut <= 0:
+        cut = text.rfind(" ", 0, max_length)
+    return cut if cut > 0 else max_length
+
+
+class TelegramDraftStream:
+    """Progressive delivery of one reply via send_message + edit_message_text.
+
+    Usage:
+        stream = TelegramDraftStream(bot, chat_id)
+        async with stream:
+            response = await agent.handle_message(..., message_metadata={
+                ..., "stream_callbacks": stream.callbacks()})
+            await stream.finish(html_chunks)
+
+    Leaving the block with an exception deletes the drafts.
+    """
+
+    def __init__(
+        self,
+        bot,
+        chat_id: int,
+        interval: float = DEFAULT_INTERVAL,
+        max_length: int = DRAFT_MAX_LENGTH,
+        outbound: Optional[Callable[[str], str]] = None,
+    ):
+        self._bot = bot
+        self._chat_id = chat_id
+        self.interval = max(0.0, interval)
+        self.max_length = max_length
+        self.outbound = outbound
+        self._buffer: list[str] = []
+        self._text = ""
+        self._offset = 0            # start of the current draft within _text
+        self._shown = ""            # what the current draft displays
+        self.messages: list = []    # draft Message objects, in order
+        self.delivered: list = []   # Message objects of the final reply (after finish())
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._closed = False
+        self.failed = False
+        self.edits = 0
+
+    # ── producer side (called from the provider's stream loop) ─────────
+
+    def callbacks(self) -> StreamCallbacks:
+        return StreamCallbacks(on_text=self.feed)
+
+    def feed(self, chunk: str) -> None:
+        """Text delta from the LLM. Sync and cheap — the edit loop does the I/O."""
+        if not chunk or self._closed or self.failed:
+            return
+        self._buffer.append(chunk)
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        self._wake.set()
+
+    # ── edit loop ──────────────────────────────────────────────────────
+
+    async def _run(self) -> None:
+        while not self._closed and not self.failed:
+            await self._wake.wait()
+            self._wake.clear()
+            if self._closed:
+                break
+            started = time.monotonic()
+            try:
+                await self._flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                delay = _retry_after(e)
+                if delay is None:
+                    logger.warning(f"Draft stream for chat {self._chat_id} disabled: {type(e).__name__}: {e}")
+                    self.failed = True
+                    break
+                logger.info(f"Draft stream for chat {self._chat_id}: RetryAfter {delay:.0f}s")
+                self._wake.set()
+                await asyncio.sleep(min(delay, 30.0))
+                continue
+            # Throttle: at most one Telegram call per interval.
+            await asyncio.sleep(max(0.0, self.interval - (time.monotonic() - started)))
+
+    async def _flush(self) -> None:
+        if self._buffer:
+            self._text += "".join(self._buffer)
+            self._buffer.clear()
+        draft = self._text[self._offset:]
+        while len(draft) > self.max_length:
+            cut = _split_point(draft, self.max_length)
+            await self._show(draft[:cut])
+            # Freeze this draft; the remainder starts a new message.
+            rest = draft[cut:]
+            self._offset = len(self._text) - len(rest.lstrip())
+            self._shown = ""
+            draft = self._text[self._offset:]
+        if self.outbound is not None and draft and not draft[-1].isspace():
+            # The filter can't recognise a path that is still being typed.
+            last = draft.split()[-1]
+            if "/" in last:
+                draft = draft[:-len(last)]
+        await self._show(draft)
+
+    async def _show(self, text: str) -> None:
+        if self.outbound is not None:
+            text = self.outbound(text)
+        text = text.rstrip()
+        if not text or text == self._shown:
+            return
+        if not self._shown:
+            msg = await self._bot.send_message(chat_id=self._chat_id, text=text)
+            self.messages.append(msg)
+        else:
+            try:
+                await self._bot.edit_message_text(
+                    chat_id=self._chat_id, message_id=self.messages[-1].message_id, text=text,
+                )
+            except Exception as e:
+                if not _not_modified(e):
+                    raise
+            self.edits += 1
+        self._shown = text
+
+    async def _stop(self) -> None:
+        self._closed = True
+        self._wake.set()
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+
+    # ── completion ─────────────────────────────────────────────────────
+
+    @property
+    def started(self) -> bool:
+        return bool(self.messages)
+
+    async def finish(self, html_chunks: list[str]):
+        """Replace the drafts with the final HTML chunks.
+
+        Returns the last message of the reply (for reaction tracking), or
+        None if nothing could be delivered. All of the reply's messages are
+        left in `delivered`.
+        """
+        await self._stop()
+        last = None
+        for i, chunk in enumerate(html_chunks):
+            if i < len(self.messages):
+                last = await self._edit_final(self.messages[i], chunk)
+            else:
+                last = await self._send_final(chunk)
+            if last is not None:
+                self.delivered.append(last)
+        for msg in self.messages[len(html_chunks):]:
+            await self._delete(msg)
+        return last
+
+    async def discard(self) -> None:
+        """Stop streaming and delete every draft (caller sends the reply itself)."""
+        await self._stop()
+        for msg in self.messages:
+            await self._delete(msg)
+        self.messages = []
+
+    async def _edit_final(self, msg, chunk: str):
+        try:
+            await self._bot.edit_message_text(
+                chat_id=self._chat_id, message_id=msg.message_id, text=chunk, parse_mode="HTML",
+            )
+            return msg
+        except Exception as e:
+            if _not_modified(e):
+                return msg
+            logger.warning(f"Final HTML edit failed for chat {self._chat_id}: {e} — trying plain text")
+        try:
+            await self._bot.edit_message_text(
+                chat_id=self._chat_id, message_id=msg.message_id, text=_plain(chunk),
+            )
+        except Exception as e:
+            if not _not_modified(e):
+                logger.error(f"Final plain edit failed for chat {self._chat_id}: {e}")
+        return msg
+
+    async def _send_final(self, chunk: str):
+        try:
+            return await self._bot.send_message(chat_id=self._chat_id, text=chunk, parse_mode="HTML")
+        except Exception as e:
+            logger.warning(f"Final HTML send failed for chat {self._chat_id}: {e} — trying plain text")
+        try:
+            return await self._bot.send_message(chat_id=self._chat_id, text=_plain(chunk))
+        except Exception as e:
+            logger.error(f"Final plain send failed for chat {self._chat_id}: {e}")
+            return None
+
+    async def _delete(self, msg) -> None:
+        try:
+            await self._bot.delete_message(chat_id=self._chat_id, message_id=msg.message_id)
+        except Exception as e:
+            logger.debug(f"Could not delete draft {msg.message_id} in chat {self._chat_id}: {e}")
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self._stop()
+        if exc_type is not None and self.messages:
+            await self.discard()
+
+
+def _plain(chunk: str) -> str:
+    """HTML chunk → plain text (same fallback as _send_response)."""
+    return html.unescape(re.sub(r"<[^>]+>", "", chunk))
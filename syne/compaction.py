@@ -4,6 +4,7 @@ Modeled after OpenClaw's compaction system: structured summaries with
 iterative updates and anti-hallucination rules.
 """
 
+import asyncio
 import logging
 import re
 from typing import Optional
@@ -16,6 +17,8 @@ logger = logging.getLogger("syne.compaction")
 
 PROMPT_OVERHEAD_TOKENS = 4_096  # space for compaction prompt template + tags
 OUTPUT_TOKENS = 16_384  # max_tokens for summary output
+CHUNK_OUTPUT_TOKENS = 4_096  # max_tokens for each partial (map) summary
+DEFAULT_MAX_PARALLEL = 3  # concurrent chunk summaries (compaction.max_parallel)
 # Compaction uses a hardcoded conservative ratio (not the user-configurable one)
 # because tokenizer efficiency varies wildly: English ~4 chars/token, but mixed
 # Indonesian/code/JSON can be as low as 2.5. Using 3.0 as safe middle ground.
@@ -132,37 +135,123 @@ Use this format:
 Be DETAILED. A longer summary that preserves context is better than a short one that loses it."""
 
 
-def _serialize_messages(rows: list) -> str:
-    """Serialize message rows into text for summarization.
-    
+# ── Map-reduce prompts (transcript larger than one context window) ──
+
+CHUNK_NOTE = """NOTE: This transcript is part {part} of {total} of one long conversation, in chronological order. The other parts are summarized separately and merged afterwards — summarize ONLY this part and do not guess what happened before or after it."""
+
+MERGE_PROMPT = """The <partial-summary> blocks above summarize consecutive parts of ONE conversation, oldest first. If a <previous-summary> is present, it covers everything before the first part. Merge them into a single summary that another LLM will use to continue the conversation seamlessly.
+
+RULES:
+- PRESERVE all specific details from every part: names, numbers, dates, data, preferences, facts.
+- Later parts win: if a later part updates, fixes or contradicts an earlier one, keep the later state.
+- An issue that is open in an earlier part but fixed, verified working or abandoned in a later one belongs in `## Resolved Issues`, never in `## Open Issues`.
+- Do NOT attribute assistant suggestions as user preferences — only include what the user actually said or confirmed.
+
+Use this format:
+
+## Conversation Summary
+[Merged narrative of all parts, in chronological order.]
+
+## Key Facts & Data
+- [ALL facts from all parts]
+
+## Decisions Made
+- [All decisions with context]
+
+## Current State
+- What was completed
+- What is in progress
+- What needs to be done next
+
+## Resolved Issues
+- [Everything resolved or abandoned in any part]
+
+## Open Issues
+- [ONLY issues still active at the end of the LAST part. Empty section is fine and expected.]
+
+## Important Context
+- [Anything needed to continue naturally]
+
+Be DETAILED. A longer summary that preserves context is better than a short one that loses it."""
+
+def _serialize_row(row) -> Optional[str]:
+    """Serialize one message row for summarization (None = skipped).
+
     Wraps in [User]/[Assistant]/[Tool]/[System] labels so the model
     treats it as a transcript, not a conversation to continue.
     """
-    parts = []
-    for row in rows:
-        role = row["role"]
-        content = row["content"]
-
-        if role == "tool":
-            # Strip base64 blobs — waste of summarizer tokens
-            content = _BASE64_PATTERN.sub("[base64 data removed]", content)
-            # Base64 already stripped above — no additional truncation
-
-        if role == "user":
-            parts.append(f"[User]: {content}")
-        elif role == "assistant":
-            parts.append(f"[Assistant]: {content}")
-        elif role == "tool":
-            parts.append(f"[Tool result]: {content}")
-        elif role == "system":
-            # Skip system prompts, but include compaction summaries
-            if "compaction_summary" in str(row.get("metadata", "")):
-                parts.append(f"[Previous summary]: {content}")
-            # Otherwise skip (system prompt is noise for summarization)
-        else:
-            parts.append(f"[{role}]: {content}")
+    role = row["role"]
+    content = row["content"]
+
+    if role == "tool":
+        # Strip base64 blobs — waste of summarizer tokens
+        content = _BASE64_PATTERN.sub("[base64 data removed]", content)
+        # Base64 already stripped above — no additional truncation
+
+    if role == "user":
+        return f"[User]: {content}"
+    elif role == "assistant":
+        return f"[Assistant]: {content}"
+    elif role == "tool":
+        return f"[Tool result]: {content}"
+    elif role == "system":
+        # Skip system prompts, but include compaction summaries
+        if "compaction_summary" in str(row.get("metadata", "")):
+            return f"[Previous summary]: {content}"
+        # Otherwise skip (system prompt is noise for summarization)
+        return None
+    else:
+        return f"[{role}]: {content}"
+
+
+def _serialize_messages(rows: list) -> str:
+    """Serialize message rows into one transcript text."""
+    return "\n\n".join(t for t in map(_serialize_row, rows) if t is not None)
 
-    return "\n\n".join(parts)
+
+def _chunk_transcript(rows: list, max_chars: int) -> list[str]:
+    """Serialize rows into transcript chunks of at most max_chars each.
+
+    Each row is serialized exactly once and appended to the current chunk
+    while it fits. A single row larger than max_chars is cut to its head
+    and tail so it still fits one chunk.
+    """
+    chunks: list[str] = []
+    parts: list[str] = []
+    size = 0
+    for row in rows:
+        text = _serialize_row(row)
+        if text is None:
+            continue
+        if len(text) > max_chars:
+            half = max(1, (max_chars - 40) // 2)
+            text = f"{text[:half]}\n[... {len(text) - 2 * half} chars omitted ...]\n{text[-half:]}"
+        if parts and size + 2 + len(text) > max_chars:
+            chunks.append("\n\n".join(parts))
+            parts, size = [], 0
+        size += len(text) + (2 if parts else 0)
+        parts.append(text)
+    if parts:
+        chunks.append("\n\n".join(parts))
+    return chunks
+
+
+async def _session_stats(conn, session_id: int) -> dict:
+    row = await conn.fetchrow("""
+        SELECT 
+            COUNT(*) as message_count,
+            COALESCE(SUM(LENGTH(content)), 0) as total_chars,
+            MIN(created_at) as oldest_message,
+            MAX(created_at) as newest_message
+        FROM messages
+        WHERE session_id = $1 AND status = 'active'
+    """, session_id)
+    return {
+        "message_count": row["message_count"],
+        "total_chars": row["total_chars"],
+        "oldest_message": row["oldest_message"],
+        "newest_message": row["newest_message"],
+    }
 
 
 async def get_session_stats(session_id: int) -> dict:
@@ -172,21 +261,7 @@ async def get_session_stats(session_id: int) -> dict:
         Dict with message_count, total_chars, oldest_message, newest_message
     """
     async with get_connection() as conn:
-        row = await conn.fetchrow("""
-            SELECT 
-                COUNT(*) as message_count,
-                COALESCE(SUM(LENGTH(content)), 0) as total_chars,
-                MIN(created_at) as oldest_message,
-                MAX(created_at) as newest_message
-            FROM messages
-            WHERE session_id = $1 AND status = 'active'
-        """, session_id)
-        return {
-            "message_count": row["message_count"],
-            "total_chars": row["total_chars"],
-            "oldest_message": row["oldest_message"],
-            "newest_message": row["newest_message"],
-        }
+        return await _session_stats(conn, session_id)
 
 
 def _build_preservation_context(messages: list) -> str:
@@ -236,6 +311,82 @@ def _build_preservation_context(messages: list) -> str:
     return result[:500]
 
 
+class _CompactionConflict(Exception):
+    """The batch changed between read and apply (another compaction won)."""
+
+
+async def _summarize(provider: LLMProvider, prompt_text: str, max_tokens: int) -> str:
+    response = await provider.chat(
+        messages=[
+            ChatMessage(role="user", content=prompt_text),
+        ],
+        temperature=0.1,
+        max_tokens=max_tokens,
+        thinking_budget=0,  # No thinking needed for summarization
+    )
+    return response.content
+
+
+async def _map_reduce_summary(
+    provider: LLMProvider,
+    chunks: list[str],
+    previous_summary: Optional[str],
+    preservation_block: str,
+    max_input_chars: int,
+    max_parallel: int,
+) -> str:
+    """Summarize each chunk concurrently, then merge the partial summaries.
+
+    Partials that together exceed max_input_chars are merged in groups
+    first (tree reduction), so the final merge always fits the window.
+    """
+    slots = asyncio.Semaphore(max(1, max_parallel))
+
+    async def _bounded(prompt_text: str, max_tokens: int) -> str:
+        async with slots:
+            return await _summarize(provider, prompt_text, max_tokens)
+
+    total = len(chunks)
+    partials = list(await asyncio.gather(*(
+        _bounded(
+            f"<conversation>\n{chunk}\n</conversation>\n\n"
+            f"{COMPACTION_PROMPT}\n\n{CHUNK_NOTE.format(part=i, total=total)}",
+            CHUNK_OUTPUT_TOKENS,
+        )
+        for i, chunk in enumerate(chunks, 1)
+    )))
+    logger.info(f"Compaction map: {total} chunks → {sum(len(p) for p in partials)} chars of partial summaries")
+
+    def _merge_prompt(parts: list[str], previous: Optional[str], tail: str) -> str:
+        blocks = "\n\n".join(f"<partial-summary>\n{p}\n</partial-summary>" for p in parts)
+        prev = f"<previous-summary>\n{previous}\n</previous-summary>\n\n" if previous else ""
+        return f"{prev}{blocks}\n\n{MERGE_PROMPT}{tail}"
+
+    budget = max_input_chars - (len(previous_summary) + 100 if previous_summary else 0)
+    while len(partials) > 1 and sum(len(p) + 40 for p in partials) > budget:
+        # Group consecutive partials (at least two per group, so each
+        # round makes progress) and merge the groups concurrently.
+        groups: list[list[str]] = [[]]
+        size = 0
+        for p in partials:
+            if len(groups[-1]) >= 2 and size + len(p) + 40 > max_input_chars:
+                groups.append([])
+                size = 0
+            groups[-1].append(p)
+            size += len(p) + 40
+        partials = list(await asyncio.gather(*(
+            _bounded(_merge_prompt(g, None, ""), CHUNK_OUTPUT_TOKENS) if len(g) > 1 else _passthrough(g[0])
+            for g in groups
+        )))
+        logger.info(f"Compaction reduce: merged into {len(partials)} partial summaries")
+
+    return await _summarize(provider, _merge_prompt(partials, previous_summary, preservation_block), OUTPUT_TOKENS)
+
+
+async def _passthrough(text: str) -> str:
+    return text
+
+
 async def compact_session(
     session_id: int,
     provider: LLMProvider,
@@ -255,86 +406,94 @@ async def compact_session(
         injected into the summarization prompt so the summarizer
         prioritizes context relevant to ongoing activity.
     Returns dict with summary and stats, or None if no compaction needed.
+
+    Three phases, and no DB connection is held across an LLM call:
+      1. read — one short transaction: stats, previous summary, old rows
+      2. summarize — the transcript is serialized once into chunks that fit
+         the provider's window; one chunk is summarized in a single call,
+         more are summarized concurrently (compaction.max_parallel) and the
+         partial summaries merged (map-reduce). Nothing is dropped.
+      3. apply — one short transaction: archive, insert summary, update
+         session. If another compaction archived any of the rows meanwhile,
+         this one is discarded.
     """
     if keep_recent is None:
         keep_recent = await get_config("session.compaction_keep_recent", 40)
+
+    # ── Phase 1: read ──────────────────────────────────────────────────
     async with get_connection() as conn:
-        # Get pre-compaction stats
-        pre_stats = await get_session_stats(session_id)
-        total = pre_stats["message_count"]
-
-        if total <= keep_recent + 5:
-            return None  # Not enough to compact
-
-        # Check for previous compaction summary
-        prev_summary_row = await conn.fetchrow("""
-            SELECT content FROM messages
-            WHERE session_id = $1 AND metadata @> '{"type": "compaction_summary"}'::jsonb
-            ORDER BY created_at DESC LIMIT 1
-        """, session_id)
-
-        previous_summary = None
-        if prev_summary_row:
-            content = prev_summary_row["content"]
-            # Strip the "# Previous Conversation Summary\n" header if present
-            if content.startswith("# Previous Conversation Summary\n"):
-                previous_summary = content[len("# Previous Conversation Summary\n"):]
-            else:
-                previous_summary = content
-
-        # Get messages to summarize (everything except recent)
-        to_summarize = total - keep_recent
-        old_rows = await conn.fetch("""
-            SELECT id, role, content, metadata FROM messages
-            WHERE session_id = $1 AND status = 'active'
-            ORDER BY created_at ASC
-            LIMIT $2
-        """, session_id, to_summarize)
-
-        if not old_rows:
-            return None
-
-        # Calculate max input chars from provider's context window
-        cpt = COMPACTION_CHARS_PER_TOKEN
-        available_tokens = provider.context_window - PROMPT_OVERHEAD_TOKENS - OUTPUT_TOKENS
-
-        # Subtract space used by previous_summary + preservation context
-        extra_chars = 0
-        if previous_summary:
-            extra_chars += len(previous_summary) + 100  # tags + header
-        if recent_context:
-            extra_chars += len(recent_context) + 200  # tags + note text
-        available_tokens -= int(extra_chars / cpt)
-
-        max_input_chars = max(1000, int(available_tokens * cpt))
-
-        # Adaptive reduction: if messages exceed context, reduce by 4 from
-        # oldest until they fit. Remaining messages stay in DB for next compact.
-        while len(old_rows) > 4:
-            conv_text = _serialize_messages(old_rows)
-            if len(conv_text) <= max_input_chars:
-                break
-            old_rows = old_rows[4:]  # drop 4 oldest
-            logger.info(f"Compact adaptive reduction: {len(old_rows)} msgs, {len(conv_text)} chars (max {max_input_chars})")
+        async with conn.transaction():
+            # Get pre-compaction stats
+            pre_stats = await _session_stats(conn, session_id)
+            total = pre_stats["message_count"]
+
+            if total <= keep_recent + 5:
+                return None  # Not enough to compact
+
+            # Check for previous compaction summary
+            prev_summary_row = await conn.fetchrow("""
+                SELECT content FROM messages
+                WHERE session_id = $1 AND metadata @> '{"type": "compaction_summary"}'::jsonb
+                ORDER BY created_at DESC LIMIT 1
+            """, session_id)
+
+            # Get messages to summarize (everything except recent)
+            to_summarize = total - keep_recent
+            old_rows = await conn.fetch("""
+                SELECT id, role, content, metadata FROM messages
+                WHERE session_id = $1 AND status = 'active'
+                ORDER BY created_at ASC
+                LIMIT $2
+            """, session_id, to_summarize)
+
+    if not old_rows:
+        return None
+
+    previous_summary = None
+    if prev_summary_row:
+        content = prev_summary_row["content"]
+        # Strip the "# Previous Conversation Summary\n" header if present
+        if content.startswith("# Previous Conversation Summary\n"):
+            previous_summary = content[len("# Previous Conversation Summary\n"):]
         else:
-            conv_text = _serialize_messages(old_rows)
-
-        summarized_chars = sum(len(r["content"]) for r in old_rows)
-
-        logger.info(
-            f"Compacting session {session_id}: {to_summarize} messages ({summarized_chars} chars) → summary"
-            f"{' (iterative update)' if previous_summary else ' (initial)'}"
+            previous_summary = content
+
+    # ── Phase 2: summarize (no connection held) ────────────────────────
+    # Calculate max input chars from provider's context window
+    cpt = COMPACTION_CHARS_PER_TOKEN
+    available_tokens = provider.context_window - PROMPT_OVERHEAD_TOKENS - OUTPUT_TOKENS
+
+    # Subtract space used by previous_summary + preservation context
+    extra_chars = 0
+    if previous_summary:
+        extra_chars += len(previous_summary) + 100  # tags + header
+    if recent_context:
+        extra_chars += len(recent_context) + 200  # tags + note text
+    max_input_chars = max(1000, int((available_tokens - int(extra_chars / cpt)) * cpt))
+    # Chunks are summarized without the previous summary, so they may use
+    # the whole window.
+    max_chunk_chars = max(1000, int(available_tokens * cpt))
+
+    chunks = _chunk_transcript(old_rows, max_chunk_chars)
+    summarized_chars = sum(len(r["content"]) for r in old_rows)
+
+    logger.info(
+        f"Compacting session {session_id}: {len(old_rows)} messages ({summarized_chars} chars, "
+        f"{len(chunks)} chunk(s)) → summary"
+        f"{' (iterative update)' if previous_summary else ' (initial)'}"
+    )
+
+    # Build summarization prompt
+    preservation_block = ""
+    if recent_context:
+        preservation_block = (
+            f"\n\n<recent-activity>\n{recent_context}\n</recent-activity>\n\n"
+            "Note: The above shows what is currently active in the conversation. "
+            "Prioritize preserving context relevant to these ongoing activities."
         )
 
-        # Build summarization prompt
-        preservation_block = ""
-        if recent_context:
-            preservation_block = (
-                f"\n\n<recent-activity>\n{recent_context}\n</recent-activity>\n\n"
-                "Note: The above shows what is currently active in the conversation. "
-                "Prioritize preserving context relevant to these ongoing activities."
-            )
-
+    if len(chunks) == 1 and len(chunks[0]) <= max_input_chars:
+        conv_text = chunks[0]
         if previous_summary:
             prompt_text = (
                 f"<conversation>\n{conv_text}\n</conversation>\n\n"
@@ -346,91 +505,100 @@ async def compact_session(
                 f"<conversation>\n{conv_text}\n</conversation>\n\n"
                 f"{COMPACTION_PROMPT}{preservation_block}"
             )
-
-        summary_response = await provider.chat(
-            messages=[
-                ChatMessage(role="user", content=prompt_text),
-            ],
-            temperature=0.1,
-            max_tokens=16384,
-            thinking_budget=0,  # No thinking needed for summarization
-        )
-
-        summary = summary_response.content
-
-        # Overlap band: keep the last N% of the summarized batch ALSO as raw
-        # (active) messages, so the window transitions smoothly from the
-        # condensed summary into verbatim pre-compaction context before the
-        # kept recent tail. These overlap messages are ALSO covered by the
-        # summary (dual presence = the bridge). Percentage-based, not a fixed
-        # count. Default 0% = legacy behavior (archive the entire batch).
-        overlap_pct = await get_config("session.compaction_overlap_percent", 0)
+        summary = await _summarize(provider, prompt_text, OUTPUT_TOKENS)
+    else:
+        max_parallel = await get_config("compaction.max_parallel", DEFAULT_MAX_PARALLEL)
         try:
-            overlap_pct = float(overlap_pct)
+            max_parallel = int(max_parallel)
         except (TypeError, ValueError):
-            overlap_pct = 0.0
-        overlap_pct = max(0.0, min(100.0, overlap_pct))
-
-        overlap_n = int(len(old_rows) * overlap_pct / 100)
-        # Never retain the whole batch — at least 1 message must be archived,
-        # otherwise nothing is actually compacted.
-        overlap_n = min(overlap_n, len(old_rows) - 1)
-
-        # Char-budget guard: the retained raw overlap must never exceed half the
-        # summarizer input budget. If the tail is heavy (long messages), shrink
-        # overlap_n from the oldest side until it fits. This guarantees the
-        # overlap can't blow past the context window regardless of the % chosen.
-        if overlap_n > 0:
-            budget = max_input_chars * 0.5
-            while overlap_n > 0:
-                tail = old_rows[len(old_rows) - overlap_n:]
-                if sum(len(r["content"]) for r in tail) <= budget:
-                    break
-                overlap_n -= 1
-
-        archive_rows = old_rows[:len(old_rows) - overlap_n] if overlap_n else old_rows
-
-        # Soft-archive old messages (NEVER delete — retained in DB for semantic
-        # search & recovery). They are excluded from context (load_history filters
-        # status='active') and from future compaction (queries above filter active).
-        # The last `overlap_n` messages are intentionally left active as the bridge.
-        old_ids = [r["id"] for r in archive_rows]
-        if old_ids:
-            await conn.execute(
-                "UPDATE messages SET status = 'compacted' WHERE id = ANY($1)", old_ids
-            )
-
-        # Insert summary as first message in the session
-        await conn.execute("""
-            INSERT INTO messages (session_id, role, content, metadata, created_at)
-            VALUES ($1, 'system', $2, '{"type": "compaction_summary"}'::jsonb, 
-                    (SELECT COALESCE(MIN(created_at), NOW()) FROM messages WHERE session_id = $1))
-        """, session_id, f"# Previous Conversation Summary\n{summary}")
-
-        # Update session record
-        new_count = keep_recent + 1 + overlap_n  # recent + summary + overlap bridge
-        await conn.execute("""
-            UPDATE sessions
-            SET summary = $2, message_count = $3, updated_at = NOW()
-            WHERE id = $1
-        """, session_id, summary, new_count)
-
-        # Post-compaction stats
-        post_stats = await get_session_stats(session_id)
-
-        result = {
-            "summary": summary,
-            "messages_before": total,
-            "messages_after": new_count,
-            "messages_summarized": to_summarize,
-            "chars_before": pre_stats["total_chars"],
-            "chars_after": post_stats["total_chars"],
-            "summary_length": len(summary),
-            "is_update": previous_summary is not None,
-        }
-
-        logger.info(
-            f"Compaction done: {to_summarize} messages ({summarized_chars} chars) → "
-            f"{len(summary)} char summary. Session: {total} → {new_count} messages"
+            max_parallel = DEFAULT_MAX_PARALLEL
+        summary = await _map_reduce_summary(
+            provider, chunks, previous_summary, preservation_block, max_input_chars, max_parallel,
         )
-        return result
+
+    # Overlap band: keep the last N% of the summarized batch ALSO as raw
+    # (active) messages, so the window transitions smoothly from the
+    # condensed summary into verbatim pre-compaction context before the
+    # kept recent tail. These overlap messages are ALSO covered by the
+    # summary (dual presence = the bridge). Percentage-based, not a fixed
+    # count. Default 0% = legacy behavior (archive the entire batch).
+    overlap_pct = await get_config("session.compaction_overlap_percent", 0)
+    try:
+        overlap_pct = float(overlap_pct)
+    except (TypeError, ValueError):
+        overlap_pct = 0.0
+    overlap_pct = max(0.0, min(100.0, overlap_pct))
+
+    overlap_n = int(len(old_rows) * overlap_pct / 100)
+    # Never retain the whole batch — at least 1 message must be archived,
+    # otherwise nothing is actually compacted.
+    overlap_n = min(overlap_n, len(old_rows) - 1)
+
+    # Char-budget guard: the retained raw overlap must never exceed half the
+    # summarizer input budget. If the tail is heavy (long messages), shrink
+    # overlap_n from the oldest side until it fits. This guarantees the
+    # overlap can't blow past the context window regardless of the % chosen.
+    if overlap_n > 0:
+        budget = max_input_chars * 0.5
+        tail_chars = sum(len(r["content"]) for r in old_rows[len(old_rows) - overlap_n:])
+        while overlap_n > 0 and tail_chars > budget:
+            tail_chars -= len(old_rows[len(old_rows) - overlap_n]["content"])
+            overlap_n -= 1
+
+    archive_rows = old_rows[:len(old_rows) - overlap_n] if overlap_n else old_rows
+
+    # ── Phase 3: apply ─────────────────────────────────────────────────
+    # Soft-archive old messages (NEVER delete — retained in DB for semantic
+    # search & recovery). They are excluded from context (load_history filters
+    # status='active') and from future compaction (queries above filter active).
+    # The last `overlap_n` messages are intentionally left active as the bridge.
+    old_ids = [r["id"] for r in archive_rows]
+    try:
+        async with get_connection() as conn:
+            async with conn.transaction():
+                if old_ids:
+                    status = await conn.execute(
+                        "UPDATE messages SET status = 'compacted' WHERE id = ANY($1) AND status = 'active'",
+                        old_ids,
+                    )
+                    if status != f"UPDATE {len(old_ids)}":
+                        raise _CompactionConflict(status)
+
+                # Insert summary as first message in the session
+                await conn.execute("""
+                    INSERT INTO messages (session_id, role, content, metadata, created_at)
+                    VALUES ($1, 'system', $2, '{"type": "compaction_summary"}'::jsonb, 
+                            (SELECT COALESCE(MIN(created_at), NOW()) FROM messages WHERE session_id = $1))
+                """, session_id, f"# Previous Conversation Summary\n{summary}")
+
+                # Post-compaction stats (includes messages saved while summarizing)
+                post_stats = await _session_stats(conn, session_id)
+                new_count = post_stats["message_count"]
+
+                # Update session record
+                await conn.execute("""
+                    UPDATE sessions
+                    SET summary = $2, message_count = $3, updated_at = NOW()
+                    WHERE id = $1
+                """, session_id, summary, new_count)
+    except _CompactionConflict as e:
+        logger.warning(f"Compaction of session {session_id} discarded: rows changed meanwhile ({e})")
+        return None
+
+    result = {
+        "summary": summary,
+        "messages_before": total,
+        "messages_after": new_count,
+        "messages_summarized": len(old_rows),
+        "chars_before": pre_stats["total_chars"],
+        "chars_after": post_stats["total_chars"],
+        "summary_length": len(summary),
+        "is_update": previous_summary is not None,
+        "chunks": len(chunks),
+    }
+
+    logger.info(
+        f"Compaction done: {len(old_rows)} messages ({summarized_chars} chars) → "
+        f"{len(summary)} char summary. Session: {total} → {new_count} messages"
+    )
+    return result
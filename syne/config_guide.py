@@ -122,6 +122,39 @@ Maps trigger keywords to target categories. Empty object = disabled (original be
 - **Caveat**: a topical question phrased without any trigger keyword misses its
   corpus. Keep keyword lists generous. The memory_search tool bypasses routing.
 
+### History Search
+| Key | Default | Type |
+|-----|---------|------|
+| `history_search.mode` | `"hybrid"` | string |
+| `history_search.candidates` | `100` | integer |
+| `history_search.rrf_k` | `60` | integer |
+
+How the `history_search` tool finds past user messages.
+- `mode` — `"hybrid"` combines meaning (embedding similarity) with exact words (full-text
+  match), so names, numbers and rare terms are found even when the embedding misses them,
+  and messages not embedded yet are still searchable. `"semantic"` = embedding only.
+- `candidates` — rows taken from each retriever before the two lists are merged (max 1000).
+  A search keeps the same lists on every page, so paging stops after that many results
+  (up to twice as many in hybrid mode); raise it to page deeper.
+- `rrf_k` — rank-fusion constant. Lower values favour rows ranked at the very top of
+  either list; higher values favour rows that appear in both.
+- **Switch to semantic when**: queries are mostly paraphrases and keyword hits add noise.
+
+### Message Partitions
+| Key | Default | Type |
+|-----|---------|------|
+| `messages.partition_months_ahead` | `2` | integer |
+| `messages.archive_index` | `true` | boolean |
+
+The messages table is split into a hot tier (active rows, one partition per month) and an
+archive (rows compaction has summarized). Loading history only touches the hot tier.
+- `partition_months_ahead` — monthly partitions created in advance (checked daily).
+- `archive_index` — keep a vector index on the archive too. The archive holds most rows and
+  `history_search` ranks across both tiers, so `false` makes every search scan and sort the
+  whole archive; it only saves the index's RAM and disk. Applied by `syne db rebalance` or the
+  next index check.
+- Older installs with a large table stay unpartitioned until `syne db rebalance` is run.
+
 ## Session & Compaction
 
 ### Compaction Threshold
@@ -130,6 +163,9 @@ Maps trigger keywords to target categories. Empty object = disabled (original be
 | `compaction.trigger_percent` | `40` | integer (1-100, %) |
 | `session.compaction_keep_recent` | `40` | integer (messages) |
 | `session.history_limit` | `100` | integer (messages) |
+| `session.tokenizer` | `"heuristic"` | string |
+| `compaction.background` | `true` | boolean |
+| `compaction.max_parallel` | `3` | integer |
 
 Controls when conversation history is compacted (summarized) to save context.
 - `compaction.trigger_percent` — **single token-based trigger** (1-100). Compaction runs
@@ -140,6 +176,15 @@ Controls when conversation history is compacted (summarized) to save context.
 - `history_limit` — max messages loaded into context per turn. Only the last N messages
   are loaded from DB. If they exceed context, oldest are dropped 4 at a time. Compaction
   operates on full session in DB — not affected by this limit.
+- `tokenizer` — how context usage is counted. `"heuristic"` uses the model's
+  `chars_per_token` param; `"tiktoken"` (or `"tiktoken:<encoding>"`) counts real tokens
+  if the optional `tiktoken` package is installed. Applied at startup (restart needed).
+- `compaction.background` — when a turn ends above the trigger, compact in the background
+  so the next turn doesn't wait for the summarizer. `false` = compact inline at the start
+  of the next turn.
+- `compaction.max_parallel` — when the history to summarize is larger than the model's
+  window, it is split into chunks summarized concurrently (at most this many at once)
+  and then merged. Lower it if the provider rate-limits.
 - **Increase threshold when**: Owner wants longer uncompacted conversations (needs large context model).
 - **Decrease threshold when**: Running into context limits, responses slowing down.
 - **Increase keep_recent when**: Bot loses too much recent context after compaction.
@@ -246,6 +291,47 @@ Controls which groups the bot responds in.
 - **Warning**: Disabling require_mention in active groups will cause the bot to respond
   to every message, which is expensive and potentially annoying.
 
+### Streaming Replies
+| Key | Default | Type |
+|-----|---------|------|
+| `telegram.stream_replies` | `true` | boolean |
+| `telegram.stream_edit_interval` | `1.0` | float (seconds) |
+
+- `stream_replies` — send a draft message as soon as the model starts writing and
+  edit it as text arrives; the final reply replaces the draft with formatted HTML.
+  `false` = wait for the whole reply (typing indicator only). Not used while the
+  rule checker is on in `"blocking"` mode with hard rules defined — the reply must
+  pass the check before anyone sees it (`"retract"` mode streams). Drafts get the
+  same server-path stripping as the final reply.
+- `stream_edit_interval` — minimum seconds between draft edits in one chat. Telegram
+  allows about one edit per second per chat; groups always use at least 3 seconds.
+
+### Inbound Queue & Webhook
+| Key | Default | Type |
+|-----|---------|------|
+| `telegram.mode` | `"polling"` | string (`polling` / `webhook`) |
+| `telegram.webhook_url` | `""` | string (https URL) |
+| `telegram.webhook_host` | `"127.0.0.1"` | string |
+| `telegram.webhook_port` | `8081` | integer |
+| `telegram.max_concurrent_turns` | `8` | integer |
+| `telegram.queue_max_pending` | `500` | integer |
+| `telegram.queue_max_per_chat` | `20` | integer |
+| `telegram.coalesce_window` | `1.0` | float (seconds) |
+
+Messages are answered one at a time per chat; commands and buttons (`/cancel`, consent)
+are never queued. All keys are read at startup — restart after changing them.
+- `mode` — `"webhook"` makes Telegram push updates to `webhook_url` instead of the bot
+  polling for them. Put a reverse proxy (nginx, Caddy) with HTTPS in front and forward
+  that URL's path to `webhook_host:webhook_port`. Switching back to `"polling"` removes
+  the webhook automatically.
+- `max_concurrent_turns` — turns running at once across all chats. Keep well under the
+  database pool size (50).
+- `queue_max_pending` / `queue_max_per_chat` — how many messages may wait. Past the limit
+  new messages are dropped; in webhook mode Telegram is told to retry later instead.
+- `coalesce_window` — several quick lines from the same user become one turn.
+  Messages sent while the previous reply is still being written are always merged.
+- `/status` shows running and queued turns and the recent wait times.
+
 ## Execution & Tools
 
 ### Exec Limits
@@ -287,6 +373,26 @@ Maximum file size the bot can read via the `read_file` tool (default 100KB).
 - **Decrease when**: Want to limit memory usage from large file reads.
 - **Warning**: Very large values may cause context window overflow or slow responses.
 
+### Document Extraction
+| Key | Default | Type |
+|-----|---------|------|
+| `extraction.workers` | `2` | integer (processes) |
+| `extraction.max_memory_mb` | `1024` | integer (MB) |
+| `extraction.timeout` | `120` | integer (seconds) |
+| `extraction.cache_size` | `32` | integer (documents) |
+
+Uploaded PDF/Word/Excel/PowerPoint files are parsed in a pool of worker processes,
+so a large document never blocks other chats. PDF pages stream back in batches —
+vision OCR for scanned pages starts before the whole file is parsed.
+- `workers` — parallel extraction processes. Each idle worker costs ~50 MB.
+- `max_memory_mb` — address-space cap per worker; a document that needs more fails
+  instead of swapping the host. `0` = unlimited.
+- `timeout` — a job running longer is killed (the pool is restarted).
+- `cache_size` — extracted documents kept in memory by file hash; re-uploads and
+  `memory_analyze_file` re-runs skip extraction. `0` disables the cache.
+- **Increase workers when**: several users upload documents at the same time.
+- **Decrease max_memory_mb when**: running on a small VPS.
+
 ### Voice / Speech-to-Text
 | Key | Default | Type |
 |-----|---------|------|
@@ -317,6 +423,26 @@ bound to the specific action (op+target+content) and reusable within the TTL.
 - `consent_mode` — `"sliding"` (reuse refreshes clock) or `"fixed"` (expires from grant time).
 - **Warning**: grants are same-actor + in-memory; a restart clears all (fail-safe).
 
+### Rule Checker Latency
+| Key | Default | Type |
+|-----|---------|------|
+| `security.rule_checker_mode` | `"blocking"` | string (`"blocking"` / `"retract"`) |
+| `security.rule_checker_cache_ttl` | `300` | integer (seconds, 0 = off) |
+| `security.rule_checker_speculative` | `false` | boolean |
+
+The hard-rule checker is an extra LLM call on every final reply (switched with `/checker`).
+- `rule_checker_mode` — `"blocking"` checks before sending and rewrites violations.
+  `"retract"` (Telegram text messages; everything else stays blocking) sends at once, checks
+  afterwards, and replaces or deletes the sent reply if it was VIOLATED. No rewrite
+  happens; the next turn is told the reply was retracted. Checker errors then leave
+  the reply as sent, without the warning tag.
+- `rule_checker_cache_ttl` — CLEAN verdicts are reused for an identical draft under
+  the same hard rules. Editing any hard rule invalidates the cache. Keep it short:
+  the cache ignores the time block, so a date claim stays "verified" for this long.
+- `rule_checker_speculative` — check text sent alongside a tool round while the tools
+  run. Costs a checker call per such round; helps when that text becomes the answer.
+- `/status` shows checker p50/p95, how long users actually waited, and cache hits.
+
 ## Sub-Agents
 
 | Key | Default | Type |
@@ -324,11 +450,21 @@ bound to the specific action (op+target+content) and reusable within the TTL.
 | `subagents.enabled` | `true` | boolean |
 | `subagents.max_concurrent` | `2` | integer |
 | `subagents.timeout_seconds` | `172800` | integer (48 hours) |
+| `subagents.executor` | `"inline"` | string (`"inline"` / `"worker"`) |
+| `subagents.lease_seconds` | `300` | integer |
+| `subagents.max_attempts` | `3` | integer |
 
 Controls background task delegation.
 - **Disable when**: Not using sub-agents, want to save resources.
 - **Increase max_concurrent when**: Multiple background tasks needed simultaneously.
+  It is per process: each `syne worker` runs this many (or its `--concurrency`).
 - **Decrease timeout when**: Sub-agents should fail faster if stuck.
+- `executor` — `"inline"` runs sub-agents in the bot process; `"worker"` only queues
+  them for `syne worker` processes (same or other hosts, same DB), keeping long
+  tool-heavy runs off the chat event loop. With no worker running, runs stay queued.
+- Runs checkpoint after every tool round. A run whose process dies is re-claimed once
+  its heartbeat is `lease_seconds` old and resumes from the checkpoint; a clean
+  restart hands runs back immediately. After `max_attempts` claims it is failed.
 - **Warning**: Each sub-agent uses its own LLM calls. More concurrent = more API cost.
 
 ## Scheduler
@@ -336,6 +472,7 @@ Controls background task delegation.
 | Key | Default | Type |
 |-----|---------|------|
 | `scheduler.misfire_grace_seconds` | `300` | integer |
+| `scheduler.max_concurrent` | `3` | integer |
 
 Grace period for scheduled tasks that run late (e.g., bot was offline).
 - **Increase when**: Bot may be offline for extended periods but tasks should still run.
@@ -343,6 +480,11 @@ Grace period for scheduled tasks that run late (e.g., bot was offline).
 - **Warning**: A large grace period means old tasks execute when the bot comes back online,
   which might surprise the user if the context has changed.
 
+`max_concurrent` bounds how many due tasks run at once (each is a full LLM turn).
+Read at startup.
+- **Increase when**: Many tasks fire at the same minute and should not queue behind each other.
+- **Decrease when**: Concurrent tasks hit provider rate limits.
+
 ## Provider & Model
 
 ### Active Models
@@ -374,6 +516,33 @@ and reasoning_visible.
 - Each model has its own `thinking_budget` and `reasoning_visible` per-model settings.
 - **Warning**: Invalid JSON in these registries will break model selection.
 
+### Embedding Cache
+| Key | Default | Type |
+|-----|---------|------|
+| `embedding.cache_size` | `4096` | integer (entries) |
+| `embedding.cache_persistent` | `true` | boolean |
+| `embedding.cache_ttl_days` | `30` | integer (days) |
+
+Identical text is embedded once per model — recall queries, background message embeds,
+dedup checks and reembed commands reuse the cached vector instead of calling the provider.
+- `cache_size` — in-memory LRU entries (~3 KB each at 768 dims). `0` disables the memory tier.
+- `cache_persistent` — also keep vectors in the `embedding_cache` table, shared across restarts and processes.
+- `cache_ttl_days` — persistent rows older than this are ignored and pruned.
+- **Safe to change anytime** — entries are keyed by model, so switching embedding model never reuses stale vectors.
+
+### Embedding Migration
+| Key | Default | Type |
+|-----|---------|------|
+| `embedding.migration_batch_size` | `64` | integer (rows) |
+
+Switching embedding model (`/embedding`, `syne memory migrate-embedding <key>`) no longer
+rewrites or deletes vectors in place. Memories and user messages are embedded with the new
+model into a shadow column in the background, its HNSW index is built concurrently, and both
+tables plus `provider.active_embedding` switch in one transaction once every row is covered
+(rows the bot saved since the last pass are embedded first, outside the lock).
+Recall keeps using the old model until then; progress is checkpointed (`--status`, `--cancel`).
+- `migration_batch_size` — starting rows per `embed_batch` call. The page size then follows embed latency (aiming for ~2s per call, up to 512 rows), growing on a fast server and halving when a batch fails. Lower it if a shared local Ollama lags.
+
 ### Legacy Provider Keys
 | Key | Default | Type |
 |-----|---------|------|
@@ -5,7 +5,7 @@ whatever space they need, history gets the rest. No fixed percentage splits.
 """
 
 import logging
-from typing import Optional
+from typing import Callable, Optional
 from .llm.provider import ChatMessage
 
 logger = logging.getLogger("syne.context")
@@ -21,18 +21,73 @@ DEFAULT_CHARS_PER_TOKEN = 4.0
 SAFETY_MARGIN = 1.2
 
 
+# Optional real tokenizer (session.tokenizer). None → chars-per-token heuristic.
+_tokenizer: Optional[Callable[[str], int]] = None
+_tokenizer_name = "heuristic"
+
+
+def set_tokenizer(name: Optional[str]) -> str:
+    """Select the token counting backend; returns the name actually in use.
+
+    "heuristic" (default) — len(text) / chars_per_token.
+    "tiktoken" or "tiktoken:<encoding>" — real BPE counts (o200k_base by
+    default). Needs the optional `tiktoken` package; falls back to the
+    heuristic with a warning if it is missing.
+    """
+    global _tokenizer, _tokenizer_name
+    name = (name or "heuristic").strip().lower()
+    if name.startswith("tiktoken"):
+        encoding = name.split(":", 1)[1] if ":" in name else "o200k_base"
+        try:
+            import tiktoken
+            enc = tiktoken.get_encoding(encoding)
+        except Exception as e:
+            logger.warning(f"Tokenizer {name!r} unavailable ({e}), using chars-per-token heuristic")
+        else:
+            def _count(text: str) -> int:
+                return len(enc.encode(text, disallowed_special=()))
+
+            _tokenizer = _count
+            _tokenizer_name = f"tiktoken:{encoding}"
+            return _tokenizer_name
+    elif name != "heuristic":
+        logger.warning(f"Unknown tokenizer {name!r}, using chars-per-token heuristic")
+    _tokenizer = None
+    _tokenizer_name = "heuristic"
+    return _tokenizer_name
+
+
+def get_tokenizer_name() -> str:
+    return _tokenizer_name
+
+
 def estimate_tokens(text: str, chars_per_token: float = DEFAULT_CHARS_PER_TOKEN) -> int:
-    """Rough token count estimation."""
+    """Token count — real tokenizer if configured, else chars-per-token estimate."""
+    if _tokenizer is not None:
+        return _tokenizer(text)
     return int(len(text) / chars_per_token)
 
 
+def message_tokens(msg: ChatMessage, chars_per_token: float = DEFAULT_CHARS_PER_TOKEN) -> int:
+    """Tokens for one message incl. per-message overhead, cached on the message.
+
+    The cache is keyed on the content object (identity) and the counting
+    backend, so reassigning msg.content or switching chars_per_token /
+    tokenizer recomputes; an unchanged message is counted once for its
+    whole life in _message_cache instead of on every scan.
+    """
+    key = _tokenizer_name if _tokenizer is not None else chars_per_token
+    cached = msg._tokens
+    if cached is not None and cached[0] is msg.content and cached[1] == key:
+        return cached[2]
+    tokens = estimate_tokens(msg.content, chars_per_token) + 4  # role, formatting
+    msg._tokens = (msg.content, key, tokens)
+    return tokens
+
+
 def estimate_messages_tokens(messages: list[ChatMessage], chars_per_token: float = DEFAULT_CHARS_PER_TOKEN) -> int:
     """Estimate total tokens for a list of messages."""
-    total = 0
-    for msg in messages:
-        total += estimate_tokens(msg.content, chars_per_token)
-        total += 4  # overhead per message (role, formatting)
-    return total
+    return sum(message_tokens(msg, chars_per_token) for msg in messages)
 
 
 class ContextManager:
@@ -59,6 +114,38 @@ class ContextManager:
         # Apply safety margin: effective capacity accounts for estimation inaccuracy
         self.available = int((max_context_tokens - reserved_output_tokens) / SAFETY_MARGIN)
 
+    def count(self, messages: list[ChatMessage]) -> int:
+        """Total tokens for messages (per-message counts are cached)."""
+        return estimate_messages_tokens(messages, self.chars_per_token)
+
+    def reduce_to_fit(self, messages: list[ChatMessage], step: int = 4) -> list[ChatMessage]:
+        """Adaptive history reduction — drop the oldest non-system messages until it fits.
+
+        Drops in groups of `step` (gentler than trim_context's emergency
+        drop, no context notice). Single pass: the running total tells how
+        far the cut has to go, so the list is never re-scanned.
+        """
+        total = self.count(messages)
+        excess = total - self.available
+        if excess <= 0:
+            return messages
+
+        drop: set[int] = set()
+        freed = 0
+        for i, m in enumerate(messages):
+            if m.role == "system":
+                continue
+            drop.add(i)
+            freed += message_tokens(m, self.chars_per_token)
+            if freed >= excess and len(drop) % step == 0:
+                break
+        if not drop:
+            return messages  # nothing left to drop
+
+        result = [m for i, m in enumerate(messages) if i not in drop]
+        logger.info(f"Adaptive reduction: {len(result)} msgs, ~{total - freed} tokens")
+        return result
+
     def trim_context(self, messages: list[ChatMessage]) -> list[ChatMessage]:
         """Trim messages to fit within context window.
 
@@ -71,7 +158,7 @@ class ContextManager:
         if not messages:
             return messages
 
-        total_tokens = estimate_messages_tokens(messages, self.chars_per_token)
+        total_tokens = self.count(messages)
 
         if total_tokens <= self.available:
             return messages  # Fits fine
@@ -92,9 +179,9 @@ class ContextManager:
                 history_msgs.append(msg)
 
         # System + current are non-negotiable — they use what they need
-        fixed_tokens = estimate_messages_tokens(system_msgs, self.chars_per_token)
+        fixed_tokens = self.count(system_msgs)
         if current_msg:
-            fixed_tokens += estimate_tokens(current_msg.content, self.chars_per_token) + 4
+            fixed_tokens += message_tokens(current_msg, self.chars_per_token)
 
         # History gets ALL remaining space
         history_allowed = self.available - fixed_tokens
@@ -113,11 +200,12 @@ class ContextManager:
         running_tokens = 0
 
         for msg in reversed(history_msgs):
-            msg_tokens = estimate_tokens(msg.content, self.chars_per_token) + 4
+            msg_tokens = message_tokens(msg, self.chars_per_token)
             if running_tokens + msg_tokens > history_allowed:
                 break
-            trimmed_history.insert(0, msg)
+            trimmed_history.append(msg)
             running_tokens += msg_tokens
+        trimmed_history.reverse()
 
         dropped = len(history_msgs) - len(trimmed_history)
         if dropped > 0:
@@ -148,8 +236,7 @@ class ContextManager:
 
     def should_compact(self, messages: list[ChatMessage], threshold: float = 0.8) -> bool:
         """Check if context is getting too full and compaction should be triggered."""
-        total = estimate_messages_tokens(messages, self.chars_per_token)
-        return total >= (self.available * threshold)
+        return self.count(messages) >= (self.available * threshold)
 
     def prune_tool_results(self, messages: list[ChatMessage]) -> list[ChatMessage]:
         """Prune oversized tool results to fit context — OpenClaw 2-tier approach.
@@ -163,7 +250,8 @@ class ContextManager:
         Never touches: user messages, assistant messages, system messages,
         last 3 tool results (recent context protected).
         """
-        total_tokens = estimate_messages_tokens(messages, self.chars_per_token)
+        counts = [message_tokens(m, self.chars_per_token) for m in messages]
+        original_tokens = total_tokens = sum(counts)
         ratio = total_tokens / self.available if self.available > 0 else 0
 
         if ratio <= 0.3:
@@ -185,48 +273,44 @@ class ContextManager:
 
         result = list(messages)
 
+        def _replace(idx: int, content: str) -> None:
+            # Swap in a pruned copy and keep the running total in step.
+            nonlocal total_tokens
+            msg = result[idx]
+            result[idx] = ChatMessage(role=msg.role, content=content, metadata=msg.metadata)
+            new_count = message_tokens(result[idx], self.chars_per_token)
+            total_tokens += new_count - counts[idx]
+            counts[idx] = new_count
+
         # Tier 1: soft trim — keep head + tail
-        if ratio > 0.3:
-            for idx in prunable:
-                msg = result[idx]
-                if len(msg.content) > SOFT_THRESHOLD:
-                    head = msg.content[:HEAD_CHARS]
-                    tail = msg.content[-TAIL_CHARS:]
-                    original_len = len(msg.content)
-                    trimmed = f"{head}\n\n... [{original_len - HEAD_CHARS - TAIL_CHARS} chars trimmed] ...\n\n{tail}"
-                    result[idx] = ChatMessage(
-                        role=msg.role, content=trimmed, metadata=msg.metadata,
-                    )
-
-        # Re-estimate after soft trim
-        total_tokens = estimate_messages_tokens(result, self.chars_per_token)
+        for idx in prunable:
+            content = result[idx].content
+            if len(content) > SOFT_THRESHOLD:
+                head = content[:HEAD_CHARS]
+                tail = content[-TAIL_CHARS:]
+                original_len = len(content)
+                _replace(idx, f"{head}\n\n... [{original_len - HEAD_CHARS - TAIL_CHARS} chars trimmed] ...\n\n{tail}")
+
         ratio = total_tokens / self.available if self.available > 0 else 0
 
         # Tier 2: hard clear — replace oldest tool results entirely
         if ratio > 0.5:
             for idx in prunable:
-                msg = result[idx]
-                if msg.content and not msg.content.startswith("[Tool result cleared"):
-                    result[idx] = ChatMessage(
-                        role=msg.role,
-                        content="[Tool result cleared — older content removed to fit context]",
-                        metadata=msg.metadata,
-                    )
-                    # Re-check ratio after each clear
-                    total_tokens = estimate_messages_tokens(result, self.chars_per_token)
+                content = result[idx].content
+                if content and not content.startswith("[Tool result cleared"):
+                    _replace(idx, "[Tool result cleared — older content removed to fit context]")
                     ratio = total_tokens / self.available if self.available > 0 else 0
                     if ratio <= 0.5:
                         break
 
-        pruned_tokens = estimate_messages_tokens(result, self.chars_per_token)
-        if pruned_tokens < total_tokens:
-            logger.info(f"Pruned tool results: {total_tokens} → {pruned_tokens} tokens ({ratio:.0%} of context)")
+        if total_tokens < original_tokens:
+            logger.info(f"Pruned tool results: {original_tokens} → {total_tokens} tokens ({ratio:.0%} of context)")
 
         return result
 
     def get_usage(self, messages: list[ChatMessage]) -> dict:
         """Get context window usage stats."""
-        total = estimate_messages_tokens(messages, self.chars_per_token)
+        total = self.count(messages)
         return {
             "used_tokens": total,
             "max_tokens": self.available,
@@ -5,6 +5,7 @@ from datetime import datetime, timedelta, timezone
 import hashlib
 import json
 import logging
+import time
 from typing import Optional
 
 
@@ -15,8 +16,12 @@ except Exception:  # pragma: no cover
     ZoneInfo = None
 
 from .db.connection import get_connection
-from .llm.provider import LLMProvider, ChatMessage, ChatResponse, UsageAccumulator, StreamCallbacks, LLMContextWindowError, LLMBadRequestError
+from .llm.provider import (
+    LLMProvider, ChatMessage, ChatResponse, UsageAccumulator, StreamCallbacks, LLMContextWindowError, LLMBadRequestError,
+    EMBED_PRIORITY_BACKGROUND, embed_priority, track_turn_usage,
+)
 from .memory.engine import MemoryEngine
+from .memory.shadow import active_embedding_is
 from .memory.evaluator import evaluate_and_store
 from .context import ContextManager, estimate_messages_tokens, DEFAULT_CHARS_PER_TOKEN
 from .compaction import compact_session, _build_preservation_context
@@ -167,6 +172,58 @@ async def _load_time_config() -> dict:
     return result
 
 
+async def _compaction_threshold() -> float:
+    """compaction.trigger_percent (1-100, default 40) as a fraction of the context window."""
+    from .db.models import get_config as _gc_cp
+    pct = await _gc_cp("compaction.trigger_percent", 40)
+    try:
+        pct = float(pct)
+    except (TypeError, ValueError):
+        pct = 40.0
+    return max(1.0, min(100.0, pct)) / 100.0
+
+
+class _TurnPrefetch:
+    """Recall work started at the top of a turn and consumed by build_context().
+
+    The query embedding is the longest pole of context building. Starting
+    it (and graph recall and the time config read) as soon as the inbound
+    message arrives lets it run alongside message persistence and the
+    compaction check instead of after them. Each task records its own
+    duration into `timings` (ms) for the turn's stage breakdown.
+    """
+
+    def __init__(self, query: str, timings: dict):
+        self.query = query
+        self.timings = timings
+        self.embed: Optional[asyncio.Task] = None
+        self.graph: Optional[asyncio.Task] = None
+        self.time_cfg: Optional[asyncio.Task] = None
+
+    def start(self, coro, stage: str) -> asyncio.Task:
+        async def _timed():
+            t0 = time.perf_counter()
+            try:
+                return await coro
+            finally:
+                self.timings[stage] = (time.perf_counter() - t0) * 1000
+        task = asyncio.create_task(_timed())
+        # A turn that fails before build_context never awaits these.
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        return task
+
+    async def query_vector(self) -> Optional[list[float]]:
+        """Prefetched embedding, or None to let recall() embed (errors included)."""
+        if self.embed is None:
+            return None
+        try:
+            resp = await self.embed
+            return getattr(resp, "vector", None) or None
+        except Exception as e:
+            logger.debug(f"Speculative recall embed failed, recall will retry: {e}")
+            return None
+
+
 class Conversation:
     """Manages a single conversation session."""
 
@@ -197,10 +254,21 @@ class Conversation:
         self.chat_id: Optional[str] = inbound.chat_id if inbound else None
         self.model_params: dict = {}  # Per-model LLM params (all 8: temperature, max_tokens, thinking_budget, top_p, top_k, frequency_penalty, presence_penalty, chars_per_token)
         self.reasoning_visible: bool = False  # Per-model reasoning visibility
-        self.stream_callbacks: Optional[StreamCallbacks] = None  # Set by ConversationManager for CLI streaming
+        self.stream_callbacks: Optional[StreamCallbacks] = None  # This turn's, from message_metadata (set in chat())
         self._message_cache: list[ChatMessage] = []
+        # Per-stage timings (ms) of the last turn up to the first LLM call —
+        # see _chat_inner / _TurnPrefetch.
+        self.last_turn_timings: dict[str, float] = {}
+        # Token usage of the last turn across all its LLM calls, incl. prompt
+        # cache reads/writes (see build_context's volatile blocks).
+        self.last_turn_usage = UsageAccumulator()
         self._processing: bool = False
         self._lock = asyncio.Lock()  # Prevent concurrent chat() on same session
+        # Compaction: one run at a time per session; background runs set
+        # _history_stale instead of swapping the cache mid-turn.
+        self._compact_lock = asyncio.Lock()
+        self._compact_task: Optional[asyncio.Task] = None
+        self._history_stale = False
         self._last_saved_hash: str = ""  # Dedup consecutive save_message calls
         # System-prompt hot-reload versioning. _sys_epoch is bumped by
         # ConversationManager.refresh_system_prompts() whenever identity/soul/
@@ -217,6 +285,9 @@ class Conversation:
         # see the block the rule tells it to read, so a CORRECT date reads
         # as unverified and every retry re-fails on a compliant draft.
         self._last_time_context: str = ""
+        # User message of the current turn, for speculative rule checks
+        # started from inside the tool loop (see _prefetch_rule_check).
+        self._rule_check_user_message: str = ""
         # Consent-system pending state — populated by consent.check_and_hold
         # when a tool/ability call is held pending confirmation. The
         # deterministic bypass at the top of chat() checks these on every turn
@@ -262,11 +333,24 @@ class Conversation:
             return True
         return False
 
-    async def run_compact(self) -> Optional[dict]:
-        """Single compact implementation — used by auto-compact, manual /compact, and emergency compact.
+    async def run_compact(self, reload_history: bool = True) -> Optional[dict]:
+        """Single compact implementation — used by auto-compact, manual /compact, emergency
+        and background compaction.
 
-        Uses the conversation's own provider (same model as chat).
+        Uses the conversation's own provider (same model as chat). Calls are
+        serialized per conversation. reload_history=False leaves the message
+        cache alone and marks it stale; chat() reloads it under the turn lock.
         """
+        async with self._compact_lock:
+            result = await self._run_compact()
+        if result:
+            if reload_history:
+                await self.load_history()
+            else:
+                self._history_stale = True
+        return result
+
+    async def _run_compact(self) -> Optional[dict]:
         _ctx_tokens = self.context_mgr.available
         from .db.models import get_config as _gc_hl
         _history_limit = await _gc_hl("session.history_limit", 100)
@@ -286,10 +370,40 @@ class Conversation:
             recent_context=_preservation,
             chars_per_token=self.context_mgr.chars_per_token,
         )
-        if result:
-            await self.load_history()
         return result
 
+    async def _maybe_compact_in_background(self) -> None:
+        """After a turn, start compaction in the background if the context crossed the trigger.
+
+        The next turn then usually starts from an already-compacted history
+        instead of waiting for the summarizer in the pre-flight check, which
+        remains the fallback (compaction.background = false, or the
+        background run failed).
+        """
+        if self._compact_task and not self._compact_task.done():
+            return
+        from .db.models import get_config as _gc_bg
+        if not await _gc_bg("compaction.background", True):
+            return
+        if not self._message_cache or not self.context_mgr.should_compact(
+            self._message_cache, threshold=await _compaction_threshold(),
+        ):
+            return
+        logger.info(f"Session {self.session_id}: starting background compaction")
+        self._compact_task = asyncio.create_task(self._background_compact())
+
+    async def _background_compact(self) -> None:
+        try:
+            result = await self.run_compact(reload_history=False)
+        except Exception as e:
+            logger.error(f"Background compaction failed for session {self.session_id}: {e}")
+            return
+        if result:
+            logger.info(
+                f"Background-compacted session {self.session_id}: "
+                f"{result['messages_before']} → {result['messages_after']} messages"
+            )
+
     async def load_history(self) -> list[ChatMessage]:
         """Load recent message history from database for this session.
 
@@ -505,7 +619,9 @@ class Conversation:
 
             max_chars = int(await get_config("history_search.max_content_chars", 4000))
             body = content if len(content) <= max_chars else content[:max_chars]
-            resp = await self.memory.provider.embed(body)
+            # Background — queue behind interactive recall embeds.
+            with embed_priority(EMBED_PRIORITY_BACKGROUND):
+                resp = await self.memory.provider.embed(body)
             vector = getattr(resp, "vector", None)
             if not vector:
                 logger.warning(
@@ -513,11 +629,21 @@ class Conversation:
                 )
                 return
 
+            # Only while the model that made it is still active: after an
+            # embedding switch this row is left for shadow.embed_stragglers().
+            embed_key = getattr(self.memory, "embed_key", None)
             async with get_connection() as conn:
-                await conn.execute(
-                    "UPDATE messages SET embedding = $1::vector WHERE id = $2",
-                    str(vector), message_id,
-                )
+                if embed_key is None:
+                    await conn.execute(
+                        "UPDATE messages SET embedding = $1::vector WHERE id = $2",
+                        vector, message_id,
+                    )
+                else:
+                    await conn.execute(
+                        "UPDATE messages SET embedding = $1::vector "
+                        f"WHERE id = $2 AND {active_embedding_is('$3')}",
+                        vector, message_id, embed_key,
+                    )
             logger.debug(
                 f"_embed_message_row id={message_id}: embedded ({len(vector)} dims)"
             )
@@ -582,13 +708,69 @@ class Conversation:
         )
         return True
 
-    async def build_context(self, user_message: str, recall_query: Optional[str] = None) -> list[ChatMessage]:
+    @staticmethod
+    async def _graph_recall(query: str) -> list[str]:
+        from .memory.graph import recall_graph as _recall_graph
+        try:
+            return await _recall_graph(query)
+        except Exception as e:
+            logger.debug(f"Graph recall skipped: {e}")
+            return []
+
+    def _start_prefetch(self, recall_query: str, timings: dict) -> _TurnPrefetch:
+        """Start the recall embedding, graph recall and time config read now.
+
+        The embedding is only speculated for requesters whose recall is not
+        gated by the public-category list (owner/family) and for queries
+        recall() would actually search, so no provider call is wasted.
+        """
+        prefetch = _TurnPrefetch(recall_query, timings)
+        access_level = self.user.get("access_level", "public")
+        if self.is_group and self.inbound and self.inbound.sender_access:
+            access_level = self.inbound.sender_access
+        provider = getattr(self.memory, "provider", None) if self.memory else None
+        if (
+            provider is not None
+            and access_level in ("owner", "family")
+            and MemoryEngine.is_recallable_query(recall_query)
+        ):
+            prefetch.embed = prefetch.start(provider.embed(recall_query), "recall_embed")
+        prefetch.graph = prefetch.start(self._graph_recall(recall_query), "graph_recall")
+        prefetch.time_cfg = prefetch.start(_load_time_config(), "time_config")
+        return prefetch
+
+    @staticmethod
+    def _place_volatile_blocks(messages: list[ChatMessage], volatile: list[ChatMessage]) -> None:
+        """Insert per-turn blocks right before the current (last) user message.
+
+        Everything before them — system prompt and history — is then the
+        same from one turn to the next, which is what provider prompt
+        caches key on.
+        """
+        if not volatile:
+            return
+        for i in range(len(messages) - 1, 0, -1):
+            if messages[i].role == "user":
+                messages[i:i] = volatile
+                return
+        messages.extend(volatile)
+
+    async def build_context(
+        self,
+        user_message: str,
+        recall_query: Optional[str] = None,
+        prefetch: Optional[_TurnPrefetch] = None,
+    ) -> list[ChatMessage]:
         """Build full context: system prompt + memories + history + current message.
 
         Args:
             user_message: Full message (may include context prefix) for history.
             recall_query: Clean text (without prefix) for memory recall. Falls back to user_message.
+            prefetch: Speculative recall started by _chat_inner (see
+                _start_prefetch). Used only if it was started for the same query.
         """
+        if prefetch is not None and prefetch.query != (recall_query or user_message):
+            prefetch = None
         messages = []
         access_level = self.user.get("access_level", "public")
         # In group chats, the effective access level for memory is the SENDER (who asked),
@@ -604,11 +786,20 @@ class Conversation:
 
         messages.append(ChatMessage(role="system", content=prompt))
 
+        # Per-turn blocks (time, memories, graph). They change every turn, so
+        # they are kept out of the cacheable prefix: placed right before the
+        # current user message and marked volatile so providers with prompt
+        # caching (Anthropic) can keep system prompt + older history
+        # byte-identical across turns. See _place_volatile_blocks().
+        volatile: list[ChatMessage] = []
 
         # 1b. Runtime time context (ground truth, compact format)
         # Policy: default=SYNE (no tz label), 'server'→SERVER, 'UTC'→UTC
         try:
-            cfg = await _load_time_config()
+            if prefetch is not None and prefetch.time_cfg is not None:
+                cfg = await prefetch.time_cfg
+            else:
+                cfg = await _load_time_config()
             syne_tz, syne_tz_name = _resolve_tz(cfg['system.timezone'])
             locale = cfg['time.locale']
             fmt_full = cfg['time.format.full']
@@ -644,7 +835,7 @@ class Conversation:
             time_lines.append("Time policy: default=SYNE (no tz label), 'server'=SERVER+' (Server)', 'UTC'=UTC+' UTC', multiple=answer all")
 
             _time_block = '\n'.join(time_lines)
-            messages.append(ChatMessage(role='system', content=_time_block))
+            volatile.append(ChatMessage(role='system', content=_time_block, metadata={"volatile": True}))
             # Same string the checker will judge against — see _last_time_context.
             self._last_time_context = _time_block
         except Exception as e:
@@ -673,7 +864,6 @@ class Conversation:
             logger.debug(f"Memory routing skipped: {e}")
 
         # 2b. Run memory recall + graph recall IN PARALLEL (saves ~400ms)
-        from .memory.graph import recall_graph as _recall_graph
 
         async def _do_memory_recall():
             return await self.memory.recall(
@@ -683,14 +873,13 @@ class Conversation:
                 exclude_categories=_route_exclude,
                 user_id=self.user.get("id"),
                 requester_access_level=access_level,
+                query_vector=await prefetch.query_vector() if prefetch else None,
             )
 
         async def _do_graph_recall():
-            try:
-                return await _recall_graph(recall_query or user_message)
-            except Exception as e:
-                logger.debug(f"Graph recall skipped: {e}")
-                return []
+            if prefetch is not None and prefetch.graph is not None:
+                return await prefetch.graph
+            return await self._graph_recall(recall_query or user_message)
 
         memories, graph_lines = await asyncio.gather(
             _do_memory_recall(), _do_graph_recall()
@@ -704,13 +893,17 @@ class Conversation:
         # 4. Inject recalled memories AFTER history, close to the user message.
         #    This positioning ensures the LLM "sees" memories near the question,
         #    preventing long conversation history from drowning out memory context.
+        #    (Collected into `volatile`, placed by _place_volatile_blocks.)
         if memories:
             from .memory.engine import format_relative_time
             # Pick locale from time.locale config (same source as the time context
             # block above). Falls back to 'id' to keep prior behavior intact when
             # config is unreachable.
             try:
-                _mem_locale = (await _load_time_config())['time.locale']
+                if prefetch is not None and prefetch.time_cfg is not None:
+                    _mem_locale = (await prefetch.time_cfg)['time.locale']
+                else:
+                    _mem_locale = (await _load_time_config())['time.locale']
             except Exception:
                 _mem_locale = 'id'
             memory_lines = [
@@ -733,7 +926,9 @@ class Conversation:
                 else:
                     flag = ""
                 memory_lines.append(f"- [{mem['category']}]{when} {mem['content']} {score}{flag}")
-            messages.append(ChatMessage(role="system", content="\n".join(memory_lines)))
+            volatile.append(ChatMessage(
+                role="system", content="\n".join(memory_lines), metadata={"volatile": True},
+            ))
             # Log recalled memories for debugging
             _actual_query = recall_query or user_message
             logger.info(f"Recalled {len(memories)} memories for query: {_actual_query[:80]}")
@@ -750,31 +945,19 @@ class Conversation:
                 "Related entities and relationships from stored knowledge.",
                 "",
             ] + graph_lines)
-            messages.append(ChatMessage(role="system", content=graph_block))
+            volatile.append(ChatMessage(role="system", content=graph_block, metadata={"volatile": True}))
             logger.info(f"Graph: injected {len(graph_lines)} relations")
 
+        self._place_volatile_blocks(messages, volatile)
+
         # 5. Prune oversized tool results
         # NOTE: user message is already in _message_cache (added by save_message in _chat_inner)
         # Do NOT append it again here — that caused the LLM to see duplicate user messages.
         messages = self.context_mgr.prune_tool_results(messages)
 
-        # 6. Adaptive history reduction — drop oldest 4 non-system messages per
-        # iteration until context fits. Gentler than trim_context's emergency drop.
-        from .context import estimate_messages_tokens
-        _est = estimate_messages_tokens(messages, self.context_mgr.chars_per_token)
-        while _est > self.context_mgr.available:
-            _new = []
-            _skip = 4
-            for m in messages:
-                if m.role == "system" or _skip <= 0:
-                    _new.append(m)
-                else:
-                    _skip -= 1
-            if len(_new) == len(messages):
-                break  # nothing left to drop
-            messages = _new
-            _est = estimate_messages_tokens(messages, self.context_mgr.chars_per_token)
-            logger.info(f"Adaptive reduction: {len(messages)} msgs, ~{_est} tokens")
+        # 6. Adaptive history reduction — drop oldest non-system messages (4 at
+        # a time) until context fits. Gentler than trim_context's emergency drop.
+        messages = self.context_mgr.reduce_to_fit(messages)
 
         # Safety net — should rarely trigger after adaptive reduction
         messages = self.context_mgr.trim_context(messages)
@@ -1223,6 +1406,9 @@ class Conversation:
             # without providing pixels itself. Reset each turn (this line).
             self._cached_input_data: dict = {}
             self._message_metadata = message_metadata
+            # Streaming callbacks belong to the turn that brought them — set
+            # under the lock so a queued turn can't stream into this one's draft.
+            self.stream_callbacks = (message_metadata or {}).get("stream_callbacks")
             # Provenance taint: seed from this turn's INPUT (image / uploaded
             # file / URL). May also flip True later if an untrusted tool runs
             # mid-turn (see taint-set after tool/ability dispatch). The consent
@@ -1243,8 +1429,19 @@ class Conversation:
                 _bypass_response = await self._maybe_execute_pending_consent(user_message)
                 if _bypass_response is not None:
                     return _bypass_response
+                if self._history_stale:
+                    # A background compaction finished since the last turn.
+                    self._history_stale = False
+                    await self.load_history()
+                usage = UsageAccumulator()
                 try:
-                    return await self._chat_inner(user_message, message_metadata)
+                    with track_turn_usage(usage):
+                        response = await self._chat_inner(user_message, message_metadata)
+                    try:
+                        await self._maybe_compact_in_background()
+                    except Exception as e:
+                        logger.warning(f"Background compaction not started for session {self.session_id}: {e}")
+                    return response
                 except LLMBadRequestError:
                     # Provider rejected the request — most likely a safety
                     # refusal triggered by the just-saved user message.
@@ -1259,6 +1456,10 @@ class Conversation:
                             "and try again."
                         )
                     raise
+                finally:
+                    self.last_turn_usage = usage
+                    if usage.rounds:
+                        logger.info(f"Turn LLM usage: {usage}")
             finally:
                 self._processing = False
                 # Cleanup transient upload files (Option B from design discussion).
@@ -1293,17 +1494,34 @@ class Conversation:
         #   3. If ability fails → fallback to native LLM capability
         # This applies to ALL abilities (bundled + self-created).
         # ═══════════════════════════════════════════════════════════════
+        _turn_t0 = time.perf_counter()
+        _timings: dict[str, float] = {}
+
+        def _ms_since(t: float) -> float:
+            return (time.perf_counter() - t) * 1000
+
         if message_metadata:
             user_message, message_metadata = await self._ability_first_preprocess(
                 user_message, message_metadata
             )
+            _timings["preprocess"] = _ms_since(_turn_t0)
+
+        # Speculative recall: start the query embedding, graph recall and
+        # time config read NOW so they overlap message persistence and the
+        # compaction check; build_context() picks up the results.
+        # Use original text (without context prefix) for memory recall.
+        recall_query = (message_metadata or {}).get("original_text", user_message)
+        _prefetch_t0 = time.perf_counter()
+        prefetch = self._start_prefetch(recall_query, _timings)
 
         # Save user message (redact credentials from history if flagged)
+        _t = time.perf_counter()
         if message_metadata and message_metadata.get("has_credential"):
             from .security import redact_content_output
             await self.save_message("user", redact_content_output(user_message))
         else:
             await self.save_message("user", user_message)
+        _timings["save_message"] = _ms_since(_t)
 
         # Attach media metadata (image/audio/doc) to the cached message for LLM context.
         # This is NOT persisted to DB — only needed for the current turn.
@@ -1329,21 +1547,20 @@ class Conversation:
         # Compaction gate: SINGLE token-based trigger, configurable via
         # config `compaction.trigger_percent` (1-100, default 40). Compact when
         # the context the LLM will see reaches that % of the model's context window.
-        from .db.models import get_config as _gc_cp
-        _trig_pct = await _gc_cp("compaction.trigger_percent", 40)
-        try:
-            _trig_pct = float(_trig_pct)
-        except (TypeError, ValueError):
-            _trig_pct = 40.0
-        _trig_pct = max(1.0, min(100.0, _trig_pct))
-        _threshold = _trig_pct / 100.0
+        _t = time.perf_counter()
+        _threshold = await _compaction_threshold()
+        _trig_pct = _threshold * 100
 
         context_full = bool(self._message_cache) and self.context_mgr.should_compact(
             self._message_cache,
             threshold=_threshold,
         )
 
-        if context_full:
+        if context_full and self._compact_task and not self._compact_task.done():
+            # Started in the background after the previous turn — don't make
+            # the user wait for it; its result is picked up next turn.
+            logger.info(f"Session {self.session_id}: background compaction in progress, not blocking this turn")
+        elif context_full:
             logger.info(f"Compaction triggered for session {self.session_id}: context usage >= {_trig_pct:.0f}% of model context window")
             if self._mgr and self._mgr._status_callbacks:
                 for cb in self._mgr._status_callbacks:
@@ -1380,9 +1597,13 @@ class Conversation:
                         except Exception as e:
                             logger.debug(f"Status callback failed: {e}")
 
-        # Build context — use original text (without context prefix) for memory recall
-        recall_query = (message_metadata or {}).get("original_text", user_message)
-        context = await self.build_context(user_message, recall_query=recall_query)
+        _timings["compaction_check"] = _ms_since(_t)
+
+        # Build context — consumes the speculative recall started above
+        _head_start = _ms_since(_prefetch_t0)
+        _t = time.perf_counter()
+        context = await self.build_context(user_message, recall_query=recall_query, prefetch=prefetch)
+        _timings["build_context"] = _ms_since(_t)
 
         # Log context usage
         usage = self.context_mgr.get_usage(context)
@@ -1432,6 +1653,15 @@ class Conversation:
         chat_kwargs = self._build_chat_kwargs()
         response = None
         max_attempts = 1 if self.provider.name in ("google", "vertex") else 3
+
+        # Per-stage breakdown up to the first LLM call. overlap_saved is the
+        # part of the recall embedding that ran during save/compaction rather
+        # than inside build_context.
+        _timings["first_llm_call"] = _ms_since(_turn_t0)
+        if "recall_embed" in _timings:
+            _timings["overlap_saved"] = min(_timings["recall_embed"], _head_start)
+        self.last_turn_timings = _timings
+        logger.info("Turn timings (ms): " + " ".join(f"{k}={v:.0f}" for k, v in _timings.items()))
         for attempt in range(max_attempts):
             try:
                 # Auto-retry on vague 400 errors (e.g. concurrent KG extraction)
@@ -1466,7 +1696,7 @@ class Conversation:
                 if result:
                     logger.info(f"Emergency compaction: {result['messages_before']} → {result['messages_after']} messages")
                     # Rebuild context after compaction
-                    context = await self.build_context(user_message, recall_query=recall_query)
+                    context = await self.build_context(user_message, recall_query=recall_query, prefetch=prefetch)
                     tool_schemas = self.tools.to_openai_schema(effective_access_level)
                     if self.abilities:
                         tool_schemas = tool_schemas + self.abilities.to_openai_schema(effective_access_level)
@@ -1539,6 +1769,7 @@ class Conversation:
         _bypass_ran = getattr(self, "_tool_ran_via_bypass", False)
         self._tool_ran_via_bypass = False
         tools_ran_this_turn = bool(response.tool_calls) or _bypass_ran
+        self._rule_check_user_message = user_message
         if response.tool_calls:
             logger.info(f"Tool calls: {[tc.get('name') for tc in response.tool_calls]}")
             response = await self._handle_tool_calls(response, context, access_level, tool_schemas)
@@ -1579,7 +1810,24 @@ class Conversation:
         _draft_text_for_check = (response.content or "").strip()
         _has_pending_consent = bool(getattr(self, "_pending_consent_hash", ""))
 
-        if (
+        # Retract mode: a channel that can edit what it sent passes a
+        # DeferredCheck in the metadata. The check then runs after delivery
+        # and the draft goes out now; see rule_checker.DeferredCheck.
+        _deferred_check = None
+        if _rule_check_enabled and _draft_text_for_check and not _has_pending_consent:
+            try:
+                from .db.models import get_config as _gc_mode
+                _deferred = (self._message_metadata or {}).get("deferred_rule_check")
+                if _deferred is not None and await _gc_mode("security.rule_checker_mode", "blocking") == "retract":
+                    _deferred_check = _deferred
+            except Exception:
+                _deferred_check = None
+
+        if _deferred_check is not None:
+            _deferred_check.start(self._deferred_rule_check(
+                _draft_text_for_check, user_message, tools_ran_this_turn,
+            ))
+        elif (
             _rule_check_enabled
             and _draft_text_for_check
             and not _has_pending_consent
@@ -1693,15 +1941,16 @@ class Conversation:
             eval_text = (message_metadata or {}).get("original_text", user_message)
             async def _deferred_evaluate():
                 try:
-                    result = await evaluate_and_store(
-                        provider=self.provider,
-                        memory_engine=self.memory,
-                        user_message=eval_text,
-                        user_id=self.user.get("id"),
-                        evaluator_driver=eval_driver,
-                        evaluator_model=eval_model,
-                        speaker_name=self.user.get("display_name") or self.user.get("name", ""),
-                    )
+                    with embed_priority(EMBED_PRIORITY_BACKGROUND):
+                        result = await evaluate_and_store(
+                            provider=self.provider,
+                            memory_engine=self.memory,
+                            user_message=eval_text,
+                            user_id=self.user.get("id"),
+                            evaluator_driver=eval_driver,
+                            evaluator_model=eval_model,
+                            speaker_name=self.user.get("display_name") or self.user.get("name", ""),
+                        )
                     logger.debug(f"Evaluator done: {'stored #' + str(result) if result else 'skipped'}")
                 except Exception as e:
                     logger.warning(f"Deferred memory evaluation failed: {type(e).__name__}: {e}")
@@ -1926,33 +2175,23 @@ class Conversation:
             return ToolResult(prompt or "", ok=True)
         return None
 
-    async def _rule_check_and_maybe_regenerate(
-        self,
-        response: ChatResponse,
-        context: list[ChatMessage],
-        tool_schemas: Optional[list[dict]],
-        access_level: str,
-        chat_kwargs: dict,
-        user_message: str,
-        tools_ran: bool = True,
-    ) -> ChatResponse:
-        """Run the hard-rule checker against a draft; regenerate on violation.
+    async def _rule_check_settings(self) -> Optional[dict]:
+        """Everything a rule check needs, or None when there are no hard rules.
 
-        Returns the possibly-modified response. Never raises — the caller
-        wraps the whole call in its own try/except that fails-open on any
-        unexpected exception with a logged traceback.
+        Shared by the blocking check, the deferred (retract-mode) check and
+        the speculative prefetch from the tool loop, so all three judge with
+        the same rules, driver and model — and therefore share cache keys.
         """
-        from .rule_checker import check_response as _rc, VerdictState as _RCState
         from .db.models import get_rules as _get_rules, get_config
 
         try:
             hard_rules = [r for r in await _get_rules() if r.get("severity") == "hard"]
         except Exception as e:
             logger.warning(f"Rule checker setup failed: {type(e).__name__}: {e}")
-            return response
+            return None
 
         if not hard_rules:
-            return response
+            return None
 
         try:
             max_retries = int(await get_config("security.rule_checker_max_retries", 2))
@@ -1973,6 +2212,13 @@ class Conversation:
             checker_timeout = 120.0
         checker_timeout = max(5.0, min(120.0, checker_timeout))
 
+        # CLEAN verdicts for an identical draft under the same rule set are
+        # reused for this long (0 = always call the checker).
+        try:
+            cache_ttl = max(0.0, float(await get_config("security.rule_checker_cache_ttl", 300)))
+        except Exception:
+            cache_ttl = 0.0
+
         # Driver selection: /checker lets the owner pin the checker to
         # either the evaluator (default: local qwen3:0.6b via Ollama —
         # cheap) OR the main provider (main chat model — more accurate,
@@ -2003,6 +2249,112 @@ class Conversation:
             # conversation provider rather than passing None, which the
             # checker would report as ERROR and fail-open on every turn.
             checker_provider = self.provider
+
+        return {
+            "hard_rules": hard_rules,
+            "max_retries": max_retries,
+            "timeout": checker_timeout,
+            "cache_ttl": cache_ttl,
+            "evaluator_driver": eval_driver,
+            "evaluator_model": eval_model,
+            "provider": checker_provider,
+        }
+
+    async def _prefetch_rule_check(self, draft: str, tools_ran: bool = True) -> None:
+        """Start judging a likely final draft while the tool loop keeps going.
+
+        Only with security.rule_checker_speculative: text that accompanies a
+        tool round often comes back as the turn's answer (consent gate held,
+        loop stopped, or the model repeats itself), and its verdict is then
+        already cached or in flight. Costs a checker call per such round.
+        """
+        if not (draft or "").strip() or getattr(self, "_pending_consent_hash", ""):
+            return
+        try:
+            from .db.models import get_config
+            from .rule_checker import prefetch_check
+            if not await get_config("security.rule_checker_enabled", True):
+                return
+            if not await get_config("security.rule_checker_speculative", False):
+                return
+            settings = await self._rule_check_settings()
+            if not settings:
+                return
+            prefetch_check(
+                draft, settings["hard_rules"], settings["cache_ttl"],
+                user_message=self._rule_check_user_message,
+                evaluator_driver=settings["evaluator_driver"],
+                evaluator_model=settings["evaluator_model"],
+                provider=settings["provider"],
+                tools_ran=tools_ran,
+                time_context=self._last_time_context,
+                timeout=settings["timeout"],
+            )
+        except Exception as e:
+            logger.debug(f"Speculative rule check not started: {e}")
+
+    async def _deferred_rule_check(self, draft: str, user_message: str, tools_ran: bool):
+        """Judge a draft that was already delivered ("retract" mode).
+
+        No rewrite happens — the reply is out. On VIOLATED a system note is
+        saved so the next turn knows its previous reply was retracted and
+        why; the channel edits or deletes the sent message.
+        """
+        from .rule_checker import check_response as _rc, record_turn, VerdictState as _RCState
+
+        settings = await self._rule_check_settings()
+        if not settings:
+            return None
+        started = time.monotonic()
+        verdict = await _rc(
+            draft=draft,
+            user_message=user_message,
+            hard_rules=settings["hard_rules"],
+            evaluator_driver=settings["evaluator_driver"],
+            evaluator_model=settings["evaluator_model"],
+            provider=settings["provider"],
+            tools_ran=tools_ran,
+            time_context=self._last_time_context,
+            timeout=settings["timeout"],
+            cache_ttl=settings["cache_ttl"],
+        )
+        record_turn(time.monotonic() - started, 0.0, checks=1,
+                    cache_hits=int(verdict.cached), deferred=True)
+        if verdict.state == _RCState.VIOLATED:
+            logger.warning(f"Rule checker (deferred): VIOLATED {verdict.violated} — {verdict.reason}")
+            await self.save_message("system", (
+                "[Your previous reply was retracted after delivery: it violated hard rule(s) "
+                f"{', '.join(verdict.violated)}. Reason: {verdict.reason}]"
+            ))
+        elif verdict.state == _RCState.ERROR:
+            logger.warning(f"Rule checker (deferred) ERROR: {verdict.reason} — reply stays unevaluated")
+        return verdict
+
+    async def _rule_check_and_maybe_regenerate(
+        self,
+        response: ChatResponse,
+        context: list[ChatMessage],
+        tool_schemas: Optional[list[dict]],
+        access_level: str,
+        chat_kwargs: dict,
+        user_message: str,
+        tools_ran: bool = True,
+    ) -> ChatResponse:
+        """Run the hard-rule checker against a draft; regenerate on violation.
+
+        Returns the possibly-modified response. Never raises — the caller
+        wraps the whole call in its own try/except that fails-open on any
+        unexpected exception with a logged traceback.
+        """
+        from .rule_checker import check_response as _rc, record_turn, VerdictState as _RCState
+
+        settings = await self._rule_check_settings()
+        if not settings:
+            return response
+        hard_rules = settings["hard_rules"]
+        max_retries = settings["max_retries"]
+        eval_driver = settings["evaluator_driver"]
+        checker_provider = settings["provider"]
         if eval_driver == "provider":
             logger.info(
                 "Rule checker driver=provider model="
@@ -2010,21 +2362,28 @@ class Conversation:
                 f"(chat model={getattr(self.provider, 'chat_model', '?')})"
             )
 
+        checker_seconds = 0.0
+        checks = cache_hits = 0
         current = response
         checker_warning = None
 
         for attempt in range(max_retries + 1):
+            _check_started = time.monotonic()
             verdict = await _rc(
                 draft=current.content or "",
                 user_message=user_message,
                 hard_rules=hard_rules,
                 evaluator_driver=eval_driver,
-                evaluator_model=eval_model,
+                evaluator_model=settings["evaluator_model"],
                 provider=checker_provider,
                 tools_ran=tools_ran,
                 time_context=self._last_time_context,
-                timeout=checker_timeout,
+                timeout=settings["timeout"],
+                cache_ttl=settings["cache_ttl"],
             )
+            checker_seconds += time.monotonic() - _check_started
+            checks += 1
+            cache_hits += int(verdict.cached)
             if verdict.state == _RCState.CLEAN:
                 logger.info(
                     f"Rule checker: CLEAN (attempt {attempt + 1}/{max_retries + 1})"
@@ -2096,6 +2455,9 @@ class Conversation:
                 )
                 break
 
+        # Blocking mode: the user waited for every check.
+        record_turn(checker_seconds, checker_seconds, checks=checks, cache_hits=cache_hits)
+
         if checker_warning:
             current = ChatResponse(
                 content=f"{checker_warning}\n\n{current.content or ''}",
@@ -2166,6 +2528,11 @@ class Conversation:
 
         while current.tool_calls and _time.monotonic() < _loop_deadline:
 
+            # Text that rides along with a tool round may end up as the
+            # turn's answer; get its rule check going while the tools run.
+            if current.content:
+                await self._prefetch_rule_check(current.content)
+
             # Persist the assistant tool_use turn — NOT just add to context.
             # Skipping save_message here was the source of every "output tidak
             # sampai ke LLM" bug: without a persisted assistant(tool_use), the
@@ -3287,8 +3654,11 @@ class ConversationManager:
                 conv.context_mgr = ContextManager(max_context_tokens=_ctx, reserved_output_tokens=_reserved, chars_per_token=_cpt_node)
                 logger.info(f"Node model override for {chat_id}: {node_override} (ctx={_ctx}, cpt={_cpt_node})")
 
-        # Apply streaming callbacks (CLI only — None for Telegram/WA)
-        conv.stream_callbacks = self._stream_callbacks
+        # Streaming callbacks: per-message (Telegram draft stream) or
+        # manager-wide (CLI). None for WA and non-streaming Telegram. They
+        # travel with the message; chat() applies them once it holds the lock.
+        if self._stream_callbacks and not (message_metadata or {}).get("stream_callbacks"):
+            message_metadata = {**(message_metadata or {}), "stream_callbacks": self._stream_callbacks}
 
         response = await conv.chat(message, message_metadata=message_metadata)
 
@@ -0,0 +1,225 @@
+"""Process-wide cache for the `config` table.
+
+get_config() is called hundreds of times across the codebase and a single
+chat turn reads a dozen keys. Without a cache each read checks out a pooled
+connection and runs its own SELECT. With the cache running:
+
+  * the whole table is loaded in ONE query at boot (start_config_cache)
+  * reads are served from memory — zero DB round-trips per turn
+  * set_config / delete_config invalidate the key in this process
+    immediately
+  * a trigger on `config` sends NOTIFY syne_config (payload = key) on every
+    INSERT/UPDATE/DELETE, from any process or any raw SQL; a dedicated
+    LISTEN connection invalidates the key here
+  * a TTL forces a full reload as a safety net for missed notifications
+    (short while the LISTEN connection is down, long while it is up)
+  * watch(key, callback) lets a component react when another process
+    changes a key (e.g. the agent reloading its embedding provider)
+
+Invalidated keys are re-read individually on the next get_config. The
+cache is only active once start_config_cache() has run — short-lived CLI
+processes never start it and keep reading straight from the DB.
+
+Values are cached as the raw JSON text and parsed on every read, so a
+caller mutating a returned list/dict can never corrupt the cache.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Callable, Optional
+
+import asyncpg
+
+from .connection import get_connection
+
+logger = logging.getLogger("syne.db.config_cache")
+
+# NOTIFY channel fired by the notify_config_change() trigger.
+CHANNEL = "syne_config"
+
+# Full-reload interval while the LISTEN connection is healthy. Notifications
+# do the real work; this only bounds staleness if one is ever lost.
+TTL_LISTENING = 300.0
+
+# Full-reload interval while the LISTEN connection is down — cross-process
+# changes can only be picked up by polling, so poll often.
+TTL_DEGRADED = 5.0
+
+# Backoff between LISTEN reconnect attempts.
+_RECONNECT_DELAYS = [1, 2, 5, 10, 30]
+
+_MISSING = object()
+
+
+class ConfigCache:
+    """In-memory mirror of the config table with key-level invalidation."""
+
+    def __init__(self):
+        self._values: dict[str, str] = {}   # key -> raw JSON text
+        self._stale: set[str] = set()       # keys to re-read before serving
+        self._generation: dict[str, int] = {}
+        self._loaded_at: float = 0.0
+        self._enabled = False
+        self._listening = False
+        self._reload_lock = asyncio.Lock()
+        self._dsn: Optional[str] = None
+        self._listener_task: Optional[asyncio.Task] = None
+        self._listen_conn: Optional[asyncpg.Connection] = None
+        self._watchers: dict[str, list[Callable[[str], None]]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled
+
+    @property
+    def listening(self) -> bool:
+        return self._listening
+
+    # ── reads ──────────────────────────────────────────────────────────
+
+    async def get_raw(self, key: str):
+        """Return the raw JSON text for key, None if absent from the table.
+
+        Caller must check `enabled` first.
+        """
+        ttl = TTL_LISTENING if self._listening else TTL_DEGRADED
+        if time.monotonic() - self._loaded_at > ttl:
+            await self.reload()
+
+        if key not in self._stale:
+            raw = self._values.get(key, _MISSING)
+            self.hits += 1
+            # The bulk load is complete, so an absent key is absent in the DB.
+            return None if raw is _MISSING else raw
+
+        self.misses += 1
+        gen = self._generation.get(key, 0)
+        async with get_connection() as conn:
+            row = await conn.fetchrow("SELECT value FROM config WHERE key = $1", key)
+        raw = row["value"] if row else None
+        # Only cache if no invalidation raced with the read above.
+        if self._generation.get(key, 0) == gen:
+            self._stale.discard(key)
+            if raw is None:
+                self._values.pop(key, None)
+            else:
+                self._values[key] = raw
+        return raw
+
+    async def reload(self) -> None:
+        """Bulk-load the whole config table in a single query."""
+        async with self._reload_lock:
+            ttl = TTL_LISTENING if self._listening else TTL_DEGRADED
+            if self._loaded_at and time.monotonic() - self._loaded_at <= ttl:
+                return  # another waiter already reloaded
+            started = dict(self._generation)
+            async with get_connection() as conn:
+                rows = await conn.fetch("SELECT key, value FROM config")
+            self._values = {r["key"]: r["value"] for r in rows}
+            # A key invalidated while the SELECT was in flight stays stale.
+            self._stale = {
+                k for k in self._stale if self._generation.get(k, 0) != started.get(k, 0)
+            }
+            self._loaded_at = time.monotonic()
+
+    # ── invalidation ───────────────────────────────────────────────────
+
+    def invalidate(self, key: str) -> None:
+        """Mark key stale; the next read goes to the DB."""
+        self._generation[key] = self._generation.get(key, 0) + 1
+        self._stale.add(key)
+
+    def watch(self, key: str, callback: Callable[[str], None]) -> None:
+        """Call callback(key) whenever a NOTIFY reports key changed.
+
+        Runs inside the LISTEN callback, so it must not block; schedule a
+        task for async work. Fires for changes from this process too.
+        """
+        self._watchers.setdefault(key, []).append(callback)
+
+    def _on_notify(self, conn, pid, channel, payload) -> None:
+        if payload:
+            self.invalidate(payload)
+            for callback in self._watchers.get(payload, ()):
+                try:
+                    callback(payload)
+                except Exception as e:
+                    logger.warning(f"Config watcher for {payload} failed: {e}")
+
+    # ── lifecycle ──────────────────────────────────────────────────────
+
+    async def start(self, dsn: str) -> None:
+        """Load the table and start the LISTEN supervisor."""
+        self._dsn = dsn
+        self._loaded_at = 0.0
+        await self.reload()
+        self._enabled = True
+        self._listener_task = asyncio.create_task(self._listen_loop())
+        logger.info(f"Config cache loaded: {len(self._values)} keys")
+
+    async def stop(self) -> None:
+        """Stop listening and fall back to direct reads."""
+        self._enabled = False
+        self._listening = False
+        if self._listener_task:
+            self._listener_task.cancel()
+            try:
+                await self._listener_task
+            except asyncio.CancelledError:
+                pass
+            self._listener_task = None
+        if self._listen_conn is not None and not self._listen_conn.is_closed():
+            await self._listen_conn.close()
+        self._listen_conn = None
+
+    async def _listen_loop(self) -> None:
+        """Hold a dedicated LISTEN connection; reconnect if it drops."""
+        attempt = 0
+        while True:
+            try:
+                conn = await asyncpg.connect(self._dsn)
+                self._listen_conn = conn
+                lost = asyncio.get_running_loop().create_future()
+                conn.add_termination_listener(
+                    lambda _c: lost.done() or lost.set_result(None)
+                )
+                await conn.add_listener(CHANNEL, self._on_notify)
+                # Anything may have changed while we were not listening.
+                self._listening = True
+                self._loaded_at = 0.0
+                attempt = 0
+                logger.debug("Config cache: LISTEN connection established")
+                await lost
+                logger.warning("Config cache: LISTEN connection lost — polling until reconnected")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Config cache: LISTEN connect failed: {e}")
+            self._listening = False
+            self._listen_conn = None
+            delay = _RECONNECT_DELAYS[min(attempt, len(_RECONNECT_DELAYS) - 1)]
+            attempt += 1
+            await asyncio.sleep(delay)
+
+
+_cache = ConfigCache()
+
+
+def get_config_cache() -> ConfigCache:
+    """The process-wide config cache."""
+    return _cache
+
+
+async def start_config_cache(dsn: str) -> None:
+    """Bulk-load config and start cross-process invalidation. Call after init_db()."""
+    await _cache.start(dsn)
+
+
+async def stop_config_cache() -> None:
+    """Stop the cache. Call before close_db()."""
+    await _cache.stop()
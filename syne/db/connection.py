@@ -12,11 +12,64 @@ logger = logging.getLogger("syne.db")
 _pool: Optional[asyncpg.Pool] = None
 
 
+async def _init_connection(conn: asyncpg.Connection) -> None:
+    """Pool ``init`` hook — register pgvector's binary codec on each connection.
+
+    With the codec, vector parameters are sent as lists / NumPy arrays in
+    pgvector's binary format (4 bytes per dimension) instead of being
+    formatted as decimal text in Python and parsed again by Postgres.
+    Vector columns come back as pgvector.Vector objects (pgvector >= 0.4;
+    float32 NumPy arrays on older releases) — not lists, so readers convert
+    them with vector_to_list() or, for matrices, dedup.parse_embeddings().
+
+    On a fresh database the ``vector`` type doesn't exist until schema.sql
+    has run; the connection then keeps the text codec and picks up the
+    binary one after refresh_vector_codec() recycles it.
+    """
+    try:
+        from pgvector.asyncpg import register_vector
+    except ImportError:
+        return
+    try:
+        await register_vector(conn)
+    except ValueError as e:
+        # asyncpg: "unknown type: public.vector" — extension not created yet
+        if not str(e).startswith("unknown type"):
+            raise
+        logger.debug("pgvector type not found; vector codec not registered on this connection")
+
+
+def vector_to_list(value) -> list[float]:
+    """Turn a decoded vector column into a list of floats.
+
+    Accepts whatever the connection's codec produced: pgvector.Vector,
+    a NumPy array, or the text form "[0.1,0.2,...]" without the codec.
+    """
+    if isinstance(value, str):
+        return [float(x) for x in value.strip()[1:-1].split(",") if x]
+    if hasattr(value, "to_list"):
+        return value.to_list()
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    return list(value)
+
+
+async def refresh_vector_codec() -> None:
+    """Recycle pooled connections so new ones register the vector codec.
+
+    Call after schema.sql may have created the pgvector extension. Idle
+    connections are replaced on next acquire; busy ones when released.
+    """
+    if _pool is not None:
+        await _pool.expire_connections()
+
+
 async def init_db(dsn: str, min_size: int = 2, max_size: int = 50) -> asyncpg.Pool:
     """Initialize the database connection pool with retry.
     
     Retries up to 5 times with exponential backoff (2, 4, 8, 8, 8 seconds).
     This handles the case where the DB container isn't ready yet at boot.
+    Every pooled connection gets the pgvector binary codec (_init_connection).
     """
     global _pool
     max_retries = 5
@@ -24,7 +77,9 @@ async def init_db(dsn: str, min_size: int = 2, max_size: int = 50) -> asyncpg.Po
 
     for attempt in range(max_retries):
         try:
-            _pool = await asyncpg.create_pool(dsn, min_size=min_size, max_size=max_size)
+            _pool = await asyncpg.create_pool(
+                dsn, min_size=min_size, max_size=max_size, init=_init_connection,
+            )
             if attempt > 0:
                 logger.info(f"Database connected after {attempt + 1} attempts")
             return _pool
@@ -666,6 +666,629 @@ async def _m24_rule_checker_timeout(conn) -> None:
     """)
 
 
+async def _m25_decay_v3_event_clock(conn) -> None:
+    """Decay v3: lazy, clock-based decay instead of table-wide UPDATEs.
+
+    Decay v2 answered every store and every recall with an UPDATE across all
+    non-permanent memory rows. v3 replaces that with a global event clock
+    (the memory_event_clock sequence, ticked once per event) and a per-row
+    touched_tick; effective recall is computed on read as
+    recall_count - (clock_now - touched_tick). See MemoryEngine.run_decay().
+
+    Existing rows are stamped with the current clock value, so their
+    effective recall starts out equal to their stored recall_count — ordering
+    is preserved across the switch. The ADD COLUMN rewrites the table once
+    (the default is not a constant). Fresh installs get the same objects from
+    schema.sql. Idempotent.
+    """
+    await conn.execute("CREATE SEQUENCE IF NOT EXISTS memory_event_clock")
+    await conn.execute("""CREATE OR REPLACE FUNCTION memory_event_clock_now() RETURNS bigint AS $$
+BEGIN
+    RETURN (SELECT CASE WHEN is_called THEN last_value ELSE last_value - 1 END
+              FROM memory_event_clock);
+END;
+$$ LANGUAGE plpgsql;""")
+    await conn.execute(
+        "ALTER TABLE memory ADD COLUMN IF NOT EXISTS touched_tick BIGINT "
+        "NOT NULL DEFAULT memory_event_clock_now()"
+    )
+
+
+async def _m26_config_notify_trigger(conn) -> None:
+    """NOTIFY syne_config on every config write, for the config cache.
+
+    The process-wide config cache (syne/db/config_cache.py) serves
+    get_config() from memory and LISTENs on syne_config to drop keys that
+    another process — the CLI, a second Syne instance, a raw UPDATE through
+    db_query — changed. Row-level AFTER trigger, payload = the key.
+    Fresh installs get the same trigger from schema.sql. Idempotent.
+    """
+    await conn.execute("""CREATE OR REPLACE FUNCTION notify_config_change() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('syne_config', COALESCE(NEW.key, OLD.key));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;""")
+    await conn.execute("""
+        CREATE OR REPLACE TRIGGER trg_config_notify
+            AFTER INSERT OR UPDATE OR DELETE ON config
+            FOR EACH ROW EXECUTE FUNCTION notify_config_change()
+    """)
+
+
+async def _m27_http_client_config(conn) -> None:
+    """Seed http.* pool limits for the shared HTTP client registry.
+
+    Providers and tools used to open a fresh httpx.AsyncClient per request,
+    paying DNS + TCP + TLS on every embed, turn and web search.
+    syne/http_clients.py now keeps one pooled client per provider/tool;
+    these keys bound each pool and toggle HTTP/2. Read once at agent
+    start. Seed-only — the keys are new. Fresh installs get the same keys
+    from schema.sql.
+    """
+    await conn.execute("""
+        INSERT INTO config (key, value, description) VALUES
+            ('http.max_connections', '100',
+             'Max open connections per shared HTTP client (one client per provider/tool). Applied at startup.'),
+            ('http.max_keepalive_connections', '20',
+             'Max idle keep-alive connections kept per shared HTTP client. Applied at startup.'),
+            ('http.keepalive_expiry', '30',
+             'Seconds an idle pooled HTTP connection is kept before closing. Applied at startup.'),
+            ('http.http2', 'true',
+             'Negotiate HTTP/2 on shared HTTP clients where the server supports it. Applied at startup.')
+        ON CONFLICT (key) DO NOTHING
+    """)
+
+
+async def _m28_embedding_cache(conn) -> None:
+    """embedding_cache table + embedding.cache_* config seeds.
+
+    Persistent tier of the embedding cache (syne/llm/embed_cache.py). Rows
+    are keyed by (model namespace, sha256 of the text) and hold the vector
+    as REAL[] — no pgvector typmod, so one table serves every embedding
+    model and dimension. Nothing is ever searched here; it is a pure
+    key-value store that lets recall, save_message, store_if_new and the
+    reembed commands skip provider calls for text already embedded.
+    Seed-only config, fresh installs get the same from schema.sql.
+    Idempotent.
+    """
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS embedding_cache (
+            model         TEXT NOT NULL,
+            content_hash  BYTEA NOT NULL,
+            embedding     REAL[] NOT NULL,
+            created_at    TIMESTAMPTZ NOT NULL DEFAULT now(),
+            PRIMARY KEY (model, content_hash)
+        )
+    """)
+    await conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_embedding_cache_created ON embedding_cache (created_at)"
+    )
+    await conn.execute("""
+        INSERT INTO config (key, value, description) VALUES
+            ('embedding.cache_size', '4096',
+             'In-memory embedding cache entries (LRU). 0 disables the memory tier.'),
+            ('embedding.cache_persistent', 'true',
+             'Also cache embeddings in the embedding_cache table (shared across restarts/processes).'),
+            ('embedding.cache_ttl_days', '30',
+             'Persistent embedding cache rows older than this are ignored and pruned.')
+        ON CONFLICT (key) DO NOTHING
+    """)
+
+
+async def _m29_seed_session_tokenizer(conn) -> None:
+    """Seed session.tokenizer — token counting backend for the context manager.
+
+    ContextManager budgets the window with a chars-per-token estimate
+    (model params chars_per_token, default 4.0) plus a 20% safety margin.
+    'tiktoken' / 'tiktoken:<encoding>' switches to real BPE counts when the
+    optional tiktoken package is installed (pip install syne[tokenizer]);
+    without it the heuristic stays in use. Read at agent startup.
+    """
+    await conn.execute("""
+        INSERT INTO config (key, value, description) VALUES
+            ('session.tokenizer', '"heuristic"',
+             'Context token counting: "heuristic" (chars_per_token) or "tiktoken[:encoding]" (needs tiktoken). Applied at startup.')
+        ON CONFLICT (key) DO NOTHING
+    """)
+
+
+async def _m30_kg_entity_fulltext(conn) -> None:
+    """Full-text index over KG entity names + aliases, graph.recall_hops seed.
+
+    recall_graph() used to OR one LOWER(name) LIKE '%word%' per query word
+    with a CASE score per word — for long messages a wide OR the trigram
+    index serves poorly, and aliases were never searched. It now matches
+    kg_entity_tsv(name, aliases) against a prefix tsquery (GIN index below)
+    OR-ed with trigram similarity on the name (existing
+    idx_kg_entities_name_trgm), ranked by ts_rank + word_similarity.
+
+    kg_entity_tsv is declared IMMUTABLE so it can back an expression index
+    (array_to_string itself is only STABLE). graph.recall_hops > 1 enables
+    multi-hop expansion from the matched entities (capped at 3).
+    """
+    await conn.execute("""
+        CREATE OR REPLACE FUNCTION kg_entity_tsv(name TEXT, aliases TEXT[]) RETURNS tsvector IMMUTABLE AS $$
+        BEGIN
+            RETURN to_tsvector('simple', COALESCE(name, '') || ' ' || COALESCE(array_to_string(aliases, ' '), ''));
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    await conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_kg_entities_tsv "
+        "ON kg_entities USING gin (kg_entity_tsv(name, aliases))"
+    )
+    await conn.execute("""
+        INSERT INTO config (key, value, description) VALUES
+            ('graph.recall_hops', '1',
+             'Knowledge graph recall depth: 1 = relations of matched entities; 2-3 also follow their neighbours.')
+        ON CONFLICT (key) DO NOTHING
+    """)
+
+
+async def _m31_kg_alias_index(conn) -> None:
+    """GIN index for KG alias resolution.
+
+    Entity resolution matched aliases with
+    LOWER($name) = ANY(SELECT LOWER(unnest(aliases))), which scans every
+    entity of the type. The bulk graph writer (_resolve_entities) now asks
+    kg_lower_aliases(aliases) @> ARRAY[LOWER(name)], served by this
+    expression index. kg_lower_aliases is IMMUTABLE so it can be indexed.
+    """
+    await conn.execute("""
+        CREATE OR REPLACE FUNCTION kg_lower_aliases(aliases TEXT[]) RETURNS TEXT[] IMMUTABLE AS $$
+        BEGIN
+            RETURN (SELECT COALESCE(array_agg(LOWER(a)), '{}') FROM unnest(aliases) AS a);
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    await conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_kg_entities_aliases_lower "
+        "ON kg_entities USING gin (kg_lower_aliases(aliases))"
+    )
+
+
+async def _m32_seed_telegram_streaming(conn) -> None:
+    """Seed telegram.stream_replies / telegram.stream_edit_interval.
+
+    Telegram replies used to be sent only once agent.handle_message()
+    returned, so users saw a typing indicator for the whole generation.
+    The channel now sends a draft on the first text delta and edits it
+    (TelegramDraftStream), at most once per stream_edit_interval seconds
+    — Telegram's per-chat edit budget is about one per second; groups are
+    clamped to 3 s. The final reply replaces the draft with HTML.
+    """
+    await conn.execute("""
+        INSERT INTO config (key, value, description) VALUES
+            ('telegram.stream_replies', 'true',
+             'Stream Telegram replies into a draft message edited as text arrives'),
+            ('telegram.stream_edit_interval', '1.0',
+             'Minimum seconds between draft edits per chat (groups: at least 3)')
+        ON CONFLICT (key) DO NOTHING
+    """)
+
+
+async def _m33_scheduler_notify(conn) -> None:
+    """NOTIFY syne_scheduler on scheduled_tasks changes, scheduler.max_concurrent.
+
+    The scheduler used to poll scheduled_tasks every 30 s and run due tasks
+    one after another inside a single pooled connection. It now keeps an
+    in-memory timer heap and LISTENs on syne_scheduler so a task created,
+    enabled, rescheduled or deleted by any process (tools, CLI, a second
+    Syne) re-arms its timer at once. Row-level AFTER trigger, payload = task
+    id; restricted to enabled/next_run updates so last_run/run_count
+    bookkeeping alone stays quiet. Due tasks run concurrently, bounded by
+    scheduler.max_concurrent. Fresh installs get the same objects from
+    schema.sql. Idempotent.
+    """
+    await conn.execute("""CREATE OR REPLACE FUNCTION notify_scheduled_task_change() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('syne_scheduler', COALESCE(NEW.id, OLD.id)::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;""")
+    await conn.execute("""
+        CREATE OR REPLACE TRIGGER trg_scheduled_tasks_notify
+            AFTER INSERT OR DELETE OR UPDATE OF enabled, next_run ON scheduled_tasks
+            FOR EACH ROW EXECUTE FUNCTION notify_scheduled_task_change()
+    """)
+    await conn.execute("""
+        INSERT INTO config (key, value, description) VALUES
+            ('scheduler.max_concurrent', '3',
+             'Maximum scheduled tasks executing at the same time (read at startup)')
+        ON CONFLICT (key) DO NOTHING
+    """)
+
+
+async def _m34_seed_compaction_pipeline(conn) -> None:
+    """Seed compaction.background / compaction.max_parallel.
+
+    compact_session() used to hold a pooled connection across a 16k-token
+    summarizer call and dropped whatever did not fit the window. It now
+    reads and applies in two short transactions, and splits oversized
+    transcripts into chunks summarized concurrently (bounded by
+    compaction.max_parallel) and merged. compaction.background lets a turn
+    that crosses compaction.trigger_percent start compaction in the
+    background instead of blocking the next turn. Seed-only — the keys are
+    new. Fresh installs get the same keys from schema.sql.
+    """
+    await conn.execute("""
+        INSERT INTO config (key, value, description) VALUES
+            ('compaction.background', 'true',
+             'Start compaction in the background after a turn crosses compaction.trigger_percent'),
+            ('compaction.max_parallel', '3',
+             'Concurrent chunk summaries when a transcript exceeds the model window')
+        ON CONFLICT (key) DO NOTHING
+    """)
+
+
+async def _m35_seed_extraction_pool(conn) -> None:
+    """Seed extraction.* — the off-loop document extraction worker pool.
+
+    The pdf and office abilities used to parse uploads (PyMuPDF get_text /
+    get_drawings / get_pixmap, python-docx, openpyxl, python-pptx) directly
+    on the event loop, freezing every chat for the length of a large PDF.
+    Parsing now runs in a process pool (syne/abilities/_extract.py) sized by
+    extraction.workers, with a per-worker memory cap and a per-job timeout,
+    and results are cached by file hash (extraction.cache_size entries).
+    Seed-only — the keys are new. Fresh installs get the same keys from
+    schema.sql.
+    """
+    await conn.execute("""
+        INSERT INTO config (key, value, description) VALUES
+            ('extraction.workers', '2',
+             'Worker processes for PDF/Office extraction'),
+            ('extraction.max_memory_mb', '1024',
+             'Address-space limit per extraction worker in MB (0 = unlimited)'),
+            ('extraction.timeout', '120',
+             'Seconds before an extraction job is killed'),
+            ('extraction.cache_size', '32',
+             'Extracted documents kept in memory, keyed by file hash (0 = off)')
+        ON CONFLICT (key) DO NOTHING
+    """)
+
+
+async def _m36_messages_lexical_indexes(conn) -> None:
+    """Lexical indexes on user messages for hybrid history_search.
+
+    history_search used to order by embedding <=> query and post-filter
+    also_contains keywords with ILIKE, which either seq-scanned messages or
+    returned too few rows once the filter removed the ANN candidates. It now
+    fuses a vector candidate list with a lexical one (to_tsvector('simple',
+    content) @@ query words, ranked by ts_rank_cd) by reciprocal rank, and
+    applies keyword filters inside both candidate queries. The lexical list
+    needs a full-text GIN index; ILIKE '%kw%' filters use the trigram one.
+    Both are partial on role = 'user' — only user rows are anchors.
+
+    non_transactional: messages is the largest table, so the indexes are
+    built CONCURRENTLY to keep writes flowing (schema.sql only creates them
+    on an empty table, so a replay before this step doesn't block). A build interrupted by a
+    crash leaves an INVALID index behind; it is dropped and rebuilt on the
+    next boot, which makes this step safe to re-run.
+    """
+    indexes = {
+        "idx_messages_content_tsv":
+            "ON messages USING gin (to_tsvector('simple', content)) WHERE role = 'user'",
+        "idx_messages_content_trgm":
+            "ON messages USING gin (content gin_trgm_ops) WHERE role = 'user'",
+    }
+    for name, definition in indexes.items():
+        invalid = await conn.fetchval("""
+            SELECT NOT i.indisvalid
+            FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+            WHERE c.relname = $1
+        """, name)
+        if invalid:
+            await conn.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+        await conn.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} {definition}")
+    await conn.execute("""
+        INSERT INTO config (key, value, description) VALUES
+            ('history_search.mode', '"hybrid"',
+             'history_search retrieval: "hybrid" (vector + full text, rank-fused) or "semantic" (vector only)'),
+            ('history_search.candidates', '100',
+             'Candidates taken from each retriever before fusion (fixed for a whole pagination; bounds how deep it goes, max 1000)'),
+            ('history_search.rrf_k', '60',
+             'Reciprocal-rank fusion constant: higher flattens the weight of top ranks')
+        ON CONFLICT (key) DO NOTHING
+    """)
+
+
+async def _m37_partition_messages(conn) -> None:
+    """Time-partitioned messages table with an archive tier.
+
+    messages grows without bound — compaction archives rows but never
+    deletes them — and every hot-path query (load_history, compaction,
+    the embed backfill) only wants active rows of recent sessions, while
+    rebuilding the single whole-table HNSW index took ~90s. messages is now
+    LIST-partitioned on status: active rows in messages_hot (monthly RANGE
+    partitions on created_at, with an inherited per-partition HNSW index),
+    compacted rows in messages_archive (HNSW only if messages.archive_index).
+    Compaction's status UPDATE moves rows between tiers by itself.
+
+    This migration installs ensure_messages_partitions(), the partition-aware
+    ensure_messages_hnsw_index() and the config seeds, then converts the
+    table in place when it is small (syne.db.partitions.AUTO_CONVERT_MAX_ROWS).
+    Larger tables would block the boot and every writer for the whole copy,
+    so they keep the legacy layout — everything works on it unchanged —
+    until the owner runs `syne db rebalance`. Idempotent: conversion is
+    skipped once messages is partitioned.
+    """
+    from . import partitions
+
+    await conn.execute("""CREATE OR REPLACE FUNCTION ensure_messages_partitions(months_ahead INT DEFAULT NULL, since DATE DEFAULT NULL)
+RETURNS INT AS $$
+DECLARE
+    first_month DATE;
+    last_month DATE;
+    m DATE;
+    part TEXT;
+    created INT := 0;
+BEGIN
+    IF (SELECT relkind FROM pg_class WHERE oid = 'messages'::regclass) <> 'p' THEN
+        RETURN 0;
+    END IF;
+    IF to_regclass('messages_hot') IS NULL THEN
+        CREATE TABLE messages_hot PARTITION OF messages
+            FOR VALUES IN ('active') PARTITION BY RANGE (created_at);
+        created := created + 1;
+    END IF;
+    IF to_regclass('messages_archive') IS NULL THEN
+        CREATE TABLE messages_archive PARTITION OF messages DEFAULT;
+        created := created + 1;
+    END IF;
+    IF to_regclass('messages_hot_default') IS NULL THEN
+        CREATE TABLE messages_hot_default PARTITION OF messages_hot DEFAULT;
+        created := created + 1;
+    END IF;
+    months_ahead := COALESCE(
+        months_ahead,
+        (SELECT (value #>> '{}')::int FROM config WHERE key = 'messages.partition_months_ahead'),
+        2);
+    first_month := date_trunc('month', COALESCE(since, CURRENT_DATE))::date;
+    last_month := (date_trunc('month', CURRENT_DATE) + make_interval(months => months_ahead))::date;
+    m := first_month;
+    WHILE m <= last_month LOOP
+        part := 'messages_hot_' || to_char(m, 'YYYY_MM');
+        IF to_regclass(part) IS NULL AND NOT EXISTS (
+            SELECT 1 FROM messages_hot_default
+             WHERE created_at >= m AND created_at < (m + interval '1 month')
+        ) THEN
+            EXECUTE format('CREATE TABLE %I PARTITION OF messages_hot FOR VALUES FROM (%L) TO (%L)',
+                           part, m, (m + interval '1 month')::date);
+            created := created + 1;
+        END IF;
+        m := (m + interval '1 month')::date;
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;""")
+    await conn.execute("""CREATE OR REPLACE FUNCTION ensure_messages_hnsw_index() RETURNS void AS $$
+DECLARE
+    dim INT;
+    cur_typmod INT;
+    idx_exists BOOL;
+    archive_index BOOL;
+BEGIN
+    SELECT vector_dims(embedding) INTO dim FROM messages WHERE embedding IS NOT NULL LIMIT 1;
+    IF dim IS NULL THEN RETURN; END IF;
+    -- Smart guard: pgvector stores dimension directly in atttypmod. If the
+    -- column is already typed vector(dim) AND the HNSW index exists, skip the
+    -- expensive DROP+CREATE (rebuilding a large index can take ~90s).
+    SELECT a.atttypmod INTO cur_typmod
+      FROM pg_attribute a JOIN pg_class c ON c.oid = a.attrelid
+     WHERE c.relname = 'messages' AND a.attname = 'embedding';
+    IF (SELECT relkind FROM pg_class WHERE oid = 'messages'::regclass) <> 'p' THEN
+        -- Legacy single table, not converted yet.
+        SELECT EXISTS(SELECT 1 FROM pg_indexes WHERE indexname = 'idx_messages_embedding_hnsw') INTO idx_exists;
+        IF cur_typmod = dim AND idx_exists THEN RETURN; END IF;
+        EXECUTE format('ALTER TABLE messages ALTER COLUMN embedding TYPE vector(%s)', dim);
+        DROP INDEX IF EXISTS idx_messages_embedding_hnsw;
+        EXECUTE 'CREATE INDEX idx_messages_embedding_hnsw '
+                'ON messages USING hnsw (embedding vector_cosine_ops) '
+                'WITH (m = 24, ef_construction = 200)';
+        RETURN;
+    END IF;
+    IF cur_typmod <> dim THEN
+        DROP INDEX IF EXISTS idx_messages_hot_embedding_hnsw;
+        DROP INDEX IF EXISTS idx_messages_archive_embedding_hnsw;
+        EXECUTE format('ALTER TABLE messages ALTER COLUMN embedding TYPE vector(%s)', dim);
+    END IF;
+    EXECUTE 'CREATE INDEX IF NOT EXISTS idx_messages_hot_embedding_hnsw '
+            'ON messages_hot USING hnsw (embedding vector_cosine_ops) '
+            'WITH (m = 24, ef_construction = 200)';
+    SELECT COALESCE((SELECT value #>> '{}' = 'true' FROM config WHERE key = 'messages.archive_index'), true)
+      INTO archive_index;
+    IF archive_index THEN
+        EXECUTE 'CREATE INDEX IF NOT EXISTS idx_messages_archive_embedding_hnsw '
+                'ON messages_archive USING hnsw (embedding vector_cosine_ops) '
+                'WITH (m = 24, ef_construction = 200)';
+    ELSE
+        DROP INDEX IF EXISTS idx_messages_archive_embedding_hnsw;
+    END IF;
+END;
+$$ LANGUAGE plpgsql;""")
+    await conn.execute("""
+        INSERT INTO config (key, value, description) VALUES
+            ('messages.partition_months_ahead', '2',
+             'Monthly messages partitions created ahead of the current month'),
+            ('messages.archive_index', 'true',
+             'Keep an HNSW index on archived (compacted) messages; off saves RAM but history_search then scans the archive')
+        ON CONFLICT (key) DO NOTHING
+    """)
+    if await partitions.is_partitioned(conn):
+        return
+    rows = await partitions.estimate_rows(conn)
+    if rows > partitions.AUTO_CONVERT_MAX_ROWS:
+        logger.warning(
+            f"messages has ~{rows:,} rows — left unpartitioned. "
+            f"Run `syne db rebalance` to convert it (writes pause during the copy)."
+        )
+        return
+    await partitions.convert(conn)
+    await conn.execute("SELECT ensure_messages_hnsw_index()")
+
+
+async def _m38_seed_telegram_ingest(conn) -> None:
+    """Seed telegram.mode / webhook_* and the inbound queue limits.
+
+    Every Telegram update used to start its own handler (concurrent_updates
+    256), so a burst in a busy group could launch hundreds of LLM turns and
+    drain the DB pool. Turn-starting updates now run one at a time per chat
+    with a global cap (max_concurrent_turns), a bounded waiting room
+    (queue_max_pending / queue_max_per_chat), and quick consecutive lines
+    from one user merged into a single turn (coalesce_window). Optional
+    webhook mode replaces long polling with a local HTTP receiver behind a
+    reverse proxy; polling stays the default.
+    """
+    await conn.execute("""
+        INSERT INTO config (key, value, description) VALUES
+            ('telegram.mode', '"polling"',
+             'How Telegram updates arrive: "polling" (getUpdates) or "webhook" (needs telegram.webhook_url)'),
+            ('telegram.webhook_url', '""',
+             'Public HTTPS URL Telegram posts updates to; the reverse proxy forwards it to webhook_host:webhook_port'),
+            ('telegram.webhook_host', '"127.0.0.1"',
+             'Address the webhook receiver listens on'),
+            ('telegram.webhook_port', '8081',
+             'Port the webhook receiver listens on'),
+            ('telegram.max_concurrent_turns', '8',
+             'Telegram turns processed at the same time across all chats (read at startup)'),
+            ('telegram.queue_max_pending', '500',
+             'Telegram messages allowed to wait for a turn; beyond this they are dropped (webhook: 503)'),
+            ('telegram.queue_max_per_chat', '20',
+             'Messages allowed to wait in one chat'),
+            ('telegram.coalesce_window', '1.0',
+             'Seconds to wait for more lines from the same user before starting a turn (0 = only merge while busy)')
+        ON CONFLICT (key) DO NOTHING
+    """)
+
+
+async def _m39_subagent_job_queue(conn) -> None:
+    """Turn subagent_runs into a durable job queue; seed subagents.executor etc.
+
+    Sub-agents ran as asyncio tasks inside the bot process: long tool-heavy
+    runs shared the event loop with live chats, and a restart marked every
+    in-flight run failed. Runs are now claimed (claimed_by, attempts) with
+    FOR UPDATE SKIP LOCKED, keep a lease alive (heartbeat_at), and write
+    their tool-loop state to `checkpoint` after each round, so a run whose
+    process died is claimed again and resumes. subagents.executor = "worker"
+    moves execution to `syne worker` processes. A trigger NOTIFYs
+    syne_subagents on status changes; delivered_at makes result delivery
+    exactly-once.
+
+    Runs already finished are marked delivered (they were, by the old code)
+    so they are not announced again. Runs left 'running' by the old code
+    have no context or checkpoint to resume from and are failed as before.
+    Fresh installs get the same objects from schema.sql. Idempotent.
+    """
+    for column in (
+        "context TEXT",
+        "claimed_by TEXT",
+        "heartbeat_at TIMESTAMPTZ",
+        "attempts INTEGER NOT NULL DEFAULT 0",
+        "checkpoint JSONB",
+        "delivered_at TIMESTAMPTZ",
+    ):
+        await conn.execute(f"ALTER TABLE subagent_runs ADD COLUMN IF NOT EXISTS {column}")
+    await conn.execute("ALTER TABLE subagent_runs ALTER COLUMN status SET DEFAULT 'queued'")
+    await conn.execute("""
+        UPDATE subagent_runs
+        SET status = 'failed', error = 'Bot restarted', completed_at = NOW()
+        WHERE status = 'running' AND claimed_by IS NULL
+    """)
+    await conn.execute("""
+        UPDATE subagent_runs SET delivered_at = COALESCE(completed_at, NOW())
+        WHERE delivered_at IS NULL
+          AND status IN ('completed', 'incomplete', 'failed', 'cancelled')
+    """)
+    await conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_subagent_runs_queue ON subagent_runs (id)
+            WHERE status IN ('queued', 'running')
+    """)
+    await conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_subagent_runs_undelivered ON subagent_runs (completed_at)
+            WHERE delivered_at IS NULL
+    """)
+    await conn.execute("""CREATE OR REPLACE FUNCTION notify_subagent_run_change() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('syne_subagents', NEW.status || ':' || NEW.run_id::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;""")
+    await conn.execute("""
+        CREATE OR REPLACE TRIGGER trg_subagent_runs_notify
+            AFTER INSERT OR UPDATE OF status ON subagent_runs
+            FOR EACH ROW EXECUTE FUNCTION notify_subagent_run_change()
+    """)
+    await conn.execute("""
+        INSERT INTO config (key, value, description) VALUES
+            ('subagents.executor', '"inline"',
+             'Who runs sub-agents: "inline" (the bot process) or "worker" (separate `syne worker` processes)'),
+            ('subagents.lease_seconds', '300',
+             'Seconds without a heartbeat before a running sub-agent is re-claimed and resumed from its checkpoint'),
+            ('subagents.max_attempts', '3',
+             'Claims per sub-agent run before one whose worker keeps dying is marked failed')
+        ON CONFLICT (key) DO NOTHING
+    """)
+
+
+async def _m40_seed_rule_checker_latency(conn) -> None:
+    """Seed security.rule_checker_mode / cache_ttl / speculative.
+
+    The rule checker was a blocking LLM call on every final draft. CLEAN
+    verdicts are now cached per draft hash + rule-set version, tool-round
+    text can be checked speculatively, and Telegram can deliver first and
+    retract on VIOLATED ("retract" mode). Defaults keep the old blocking
+    behaviour. Idempotent.
+    """
+    await conn.execute("""
+        INSERT INTO config (key, value, description) VALUES
+            ('security.rule_checker_mode', '"blocking"',
+             '"blocking" = check before sending (rewrite on violation); "retract" = Telegram sends first, then edits/deletes the reply if the check finds a violation'),
+            ('security.rule_checker_cache_ttl', '300',
+             'Seconds a CLEAN verdict for an identical draft under the same hard rules is reused without a checker call (0 = off)'),
+            ('security.rule_checker_speculative', 'false',
+             'Check text that accompanies a tool round while the tools run, so a final draft equal to it is already judged (extra checker calls)')
+        ON CONFLICT (key) DO NOTHING
+    """)
+
+
+async def _m41_embedding_migrations(conn) -> None:
+    """Create embedding_migrations + reset_embedding_next(); seed batch size.
+
+    Switching embedding model rewrote memory.embedding in place (or deleted
+    every memory on a dimension change) while recall mixed vectors from
+    both models. syne/memory/shadow.py now backfills a shadow column per
+    table, indexes it concurrently and swaps it in atomically; this table
+    holds each migration's state and checkpoint. Idempotent.
+    """
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS embedding_migrations (
+            table_name   TEXT PRIMARY KEY,
+            embed_key    TEXT NOT NULL,
+            dimensions   INT NOT NULL,
+            status       VARCHAR(20) NOT NULL DEFAULT 'backfilling',
+            last_id      BIGINT NOT NULL DEFAULT 0,
+            embedded     BIGINT NOT NULL DEFAULT 0,
+            failed       BIGINT NOT NULL DEFAULT 0,
+            started_at   TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+            updated_at   TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+            switched_at  TIMESTAMPTZ
+        )
+    """)
+    await conn.execute("""CREATE OR REPLACE FUNCTION reset_embedding_next() RETURNS trigger AS $$
+BEGIN
+    NEW.embedding_next := NULL;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;""")
+    await conn.execute("""
+        INSERT INTO config (key, value, description) VALUES
+            ('embedding.migration_batch_size', '64',
+             'Rows per embed_batch call while migrating memories/messages to a new embedding model')
+        ON CONFLICT (key) DO NOTHING
+    """)
+
+
 MIGRATIONS: list[tuple[int, Callable[..., Awaitable[None]], str]] = [
     (1, _m1_messages_status, "transactional"),
     (2, _m2_drop_legacy_compaction_config, "transactional"),
@@ -691,6 +1314,23 @@ MIGRATIONS: list[tuple[int, Callable[..., Awaitable[None]], str]] = [
     (22, _m22_fk_index_and_autovacuum, "transactional"),
     (23, _m23_fetch_url_config, "transactional"),
     (24, _m24_rule_checker_timeout, "transactional"),
+    (25, _m25_decay_v3_event_clock, "transactional"),
+    (26, _m26_config_notify_trigger, "transactional"),
+    (27, _m27_http_client_config, "transactional"),
+    (28, _m28_embedding_cache, "transactional"),
+    (29, _m29_seed_session_tokenizer, "transactional"),
+    (30, _m30_kg_entity_fulltext, "transactional"),
+    (31, _m31_kg_alias_index, "transactional"),
+    (32, _m32_seed_telegram_streaming, "transactional"),
+    (33, _m33_scheduler_notify, "transactional"),
+    (34, _m34_seed_compaction_pipeline, "transactional"),
+    (35, _m35_seed_extraction_pool, "transactional"),
+    (36, _m36_messages_lexical_indexes, "non_transactional"),
+    (37, _m37_partition_messages, "transactional"),
+    (38, _m38_seed_telegram_ingest, "transactional"),
+    (39, _m39_subagent_job_queue, "transactional"),
+    (40, _m40_seed_rule_checker_latency, "transactional"),
+    (41, _m41_embedding_migrations, "transactional"),
 ]
 
 
@@ -811,3 +1451,50 @@ async def _get_or_init_schema_version(conn) -> int:
     except (json.JSONDecodeError, ValueError, TypeError):
         logger.warning(f"Unparseable schema_version: {raw!r}, treating as 0")
         return 0
+
+
+# ─────────────────────────────────────────────────────────────────────────
+# Schema fingerprint — fast boot
+# ─────────────────────────────────────────────────────────────────────────
+# Replaying every schema.sql statement on each start costs seconds of
+# round trips for a schema that almost never changed. After a clean
+# replay + migration run, the hash of schema.sql and the schema version
+# are stored under `schema_fingerprint`; the next start skips the replay
+# while both still match (SyneAgent._run_startup_migration). A new
+# release changes schema.sql or CURRENT_SCHEMA_VERSION, which forces a
+# full replay. Delete the row to force one by hand.
+
+
+def schema_fingerprint(schema_sql: str) -> str:
+    """sha256 of schema.sql together with CURRENT_SCHEMA_VERSION."""
+    import hashlib
+    return hashlib.sha256(f"v{CURRENT_SCHEMA_VERSION}\n{schema_sql}".encode()).hexdigest()
+
+
+async def schema_is_current(conn, fingerprint: str) -> bool:
+    """True if the DB was last fully migrated with this exact schema.sql."""
+    try:
+        row = await conn.fetchrow("""
+            SELECT (SELECT value #>> '{}' FROM config WHERE key = 'schema_fingerprint') AS fingerprint,
+                   (SELECT value #>> '{}' FROM config WHERE key = 'schema_version') AS version
+        """)
+    except Exception:
+        return False  # fresh database — no config table yet
+    return (
+        row is not None
+        and row["fingerprint"] == fingerprint
+        and row["version"] == str(CURRENT_SCHEMA_VERSION)
+    )
+
+
+async def record_schema_fingerprint(conn, fingerprint: str) -> None:
+    """Store the fingerprint of a clean schema.sql replay + migration run."""
+    await conn.execute(
+        """
+        INSERT INTO config (key, value, description)
+        VALUES ('schema_fingerprint', to_jsonb($1::text),
+                'Hash of the schema.sql last replayed cleanly — startup skips the replay while it matches')
+        ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value, updated_at = NOW()
+        """,
+        fingerprint,
+    )
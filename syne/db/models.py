@@ -2,6 +2,7 @@
 
 from typing import Optional
 from .connection import get_connection
+from .config_cache import get_config_cache
 
 
 # ============================================================
@@ -574,11 +575,19 @@ async def get_first_owner(platform: str = "telegram") -> Optional[dict]:
 # ============================================================
 
 async def get_config(key: str, default=None):
-    """Get a config value by key."""
+    """Get a config value by key.
+
+    Served from the process-wide config cache once it has been started
+    (see db/config_cache.py); otherwise read straight from the DB.
+    """
+    import json
+    cache = get_config_cache()
+    if cache.enabled:
+        raw = await cache.get_raw(key)
+        return json.loads(raw) if raw is not None else default
     async with get_connection() as conn:
         row = await conn.fetchrow("SELECT value FROM config WHERE key = $1", key)
         if row:
-            import json
             return json.loads(row["value"])
         return default
 
@@ -598,14 +607,16 @@ async def set_config(key: str, value, description: Optional[str] = None):
                 INSERT INTO config (key, value) VALUES ($1, $2::jsonb)
                 ON CONFLICT (key) DO UPDATE SET value = $2::jsonb, updated_at = NOW()
             """, key, json_value)
+    get_config_cache().invalidate(key)
 
 
 async def delete_config(key: str) -> bool:
     """Remove a config key. Returns True if a row was deleted."""
     async with get_connection() as conn:
         result = await conn.execute("DELETE FROM config WHERE key = $1", key)
-        # asyncpg returns e.g. "DELETE 1" or "DELETE 0"
-        return result.split()[-1] != "0"
+    get_config_cache().invalidate(key)
+    # asyncpg returns e.g. "DELETE 1" or "DELETE 0"
+    return result.split()[-1] != "0"
 
 
 async def list_config(prefix: Optional[str] = None) -> list[dict]:
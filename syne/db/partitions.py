@@ -0,0 +1,244 @@
+"""Time-partitioned messages table — conversion, rebalancing, inspection.
+
+Layout (schema.sql): messages is LIST-partitioned on status.
+
+    messages_hot          'active' rows, RANGE-partitioned on created_at,
+                          one messages_hot_YYYY_MM partition per month plus
+                          messages_hot_default for months nobody created
+    messages_archive      DEFAULT — rows compaction has marked 'compacted'
+
+Compaction's `UPDATE messages SET status = 'compacted'` moves rows from the
+hot tier to the archive (row movement), so every reader keeps querying
+`messages` unchanged. Queries filtered on status = 'active' — history
+loading, compaction — never touch the archive, and the HNSW index is a
+partitioned index on messages_hot: each monthly partition carries its own
+small graph, new partitions inherit it, and a rebuild is per partition
+instead of one whole-table rebuild. The archive gets an HNSW index only
+while config messages.archive_index is true (the default).
+
+Installs that predate schema v37 have a plain table. Migration 37 converts
+it inline when it is small; larger ones stay as they are (the SQL helpers
+no-op on them) until `syne db rebalance` runs `rebalance()` here.
+"""
+
+import logging
+from datetime import date
+from typing import Callable, Optional
+
+logger = logging.getLogger("syne.db.partitions")
+
+# Migration 37 converts tables up to this many rows inline; larger ones
+# would hold the boot (and every writer) for the whole copy.
+AUTO_CONVERT_MAX_ROWS = 200_000
+
+# Rows copied per INSERT ... SELECT while converting.
+COPY_BATCH = 50_000
+
+# Secondary indexes on messages. Must match schema.sql — the converted
+# table is rebuilt from these, not from the legacy table's definitions.
+MESSAGE_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_messages_session ON messages (session_id, created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_messages_status ON messages (session_id, status, created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_messages_embedding_pending ON messages (session_id, id) "
+    "WHERE role = 'user' AND embedding IS NULL",
+    "CREATE INDEX IF NOT EXISTS idx_messages_content_tsv ON messages USING gin (to_tsvector('simple', content)) "
+    "WHERE role = 'user'",
+    "CREATE INDEX IF NOT EXISTS idx_messages_content_trgm ON messages USING gin (content gin_trgm_ops) "
+    "WHERE role = 'user'",
+)
+
+
+def _ident(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _next_month(m: date) -> date:
+    return date(m.year + m.month // 12, m.month % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    """Name of the hot partition holding `month` (any day in it)."""
+    return f"messages_hot_{month:%Y_%m}"
+
+
+async def is_partitioned(conn) -> bool:
+    """True once messages has been converted to the partitioned layout."""
+    return bool(await conn.fetchval(
+        "SELECT relkind = 'p' FROM pg_class WHERE oid = 'messages'::regclass"
+    ))
+
+
+async def estimate_rows(conn) -> int:
+    """Planner row estimate for messages; exact count if never analyzed."""
+    n = await conn.fetchval(
+        "SELECT reltuples::bigint FROM pg_class WHERE oid = 'messages'::regclass"
+    )
+    if n is None or n < 0:
+        n = await conn.fetchval("SELECT count(*) FROM messages")
+    return int(n or 0)
+
+
+async def convert(conn, batch_size: int = COPY_BATCH,
+                  progress: Optional[Callable[[str], None]] = None) -> int:
+    """Rebuild a legacy single-table messages as the partitioned layout.
+
+    One transaction under an EXCLUSIVE lock: reads keep working, writers
+    wait until commit. The legacy table is renamed, a partitioned copy is
+    created with the same columns, and rows are copied in id order with
+    monthly partitions back to the oldest row. The id sequence is handed
+    to the new table before the legacy one is dropped. The HNSW index is
+    NOT built here — call ensure_messages_hnsw_index() after commit so
+    writers are not held for it.
+
+    Returns the number of rows copied (0 if already partitioned).
+    """
+    note = progress or logger.info
+    async with conn.transaction():
+        if await is_partitioned(conn):
+            return 0
+        await conn.execute("LOCK TABLE messages IN EXCLUSIVE MODE")
+        seq = await conn.fetchval("SELECT pg_get_serial_sequence('messages', 'id')")
+        oldest = await conn.fetchval("SELECT min(created_at)::date FROM messages")
+        columns = [r["attname"] for r in await conn.fetch("""
+            SELECT attname FROM pg_attribute
+            WHERE attrelid = 'messages'::regclass AND attnum > 0 AND NOT attisdropped
+            ORDER BY attnum
+        """)]
+
+        await conn.execute("ALTER TABLE messages RENAME TO messages_legacy")
+        await conn.execute("""
+            CREATE TABLE messages (
+                LIKE messages_legacy
+                INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING STORAGE INCLUDING COMMENTS
+            ) PARTITION BY LIST (status)
+        """)
+        await conn.execute("ALTER TABLE messages ALTER COLUMN status SET NOT NULL")
+        await conn.execute("ALTER TABLE messages ALTER COLUMN created_at SET NOT NULL")
+        await conn.fetchval("SELECT ensure_messages_partitions(NULL, $1::date)", oldest)
+
+        # Pre-v1 rows may have NULL status / created_at; the partition keys
+        # can't be NULL.
+        select = ", ".join(
+            "COALESCE(status, 'active')" if c == "status"
+            else "COALESCE(created_at, NOW())" if c == "created_at"
+            else _ident(c)
+            for c in columns
+        )
+        cols = ", ".join(_ident(c) for c in columns)
+        copied, last_id = 0, 0
+        while True:
+            row = await conn.fetchrow(f"""
+                WITH batch AS (
+                    SELECT {select} FROM messages_legacy
+                    WHERE id > $1 ORDER BY id LIMIT $2
+                ), ins AS (
+                    INSERT INTO messages ({cols}) SELECT * FROM batch RETURNING id
+                )
+                SELECT count(*) AS n, max(id) AS last_id FROM ins
+            """, last_id, batch_size)
+            if not row["n"]:
+                break
+            copied += row["n"]
+            last_id = row["last_id"]
+            note(f"copied {copied:,} messages")
+
+        if seq:
+            await conn.execute(f"ALTER SEQUENCE {seq} OWNED BY messages.id")
+        await conn.execute("DROP TABLE messages_legacy")
+        await conn.execute("ALTER TABLE messages ADD PRIMARY KEY (id, status, created_at)")
+        await conn.execute(
+            "ALTER TABLE messages ADD FOREIGN KEY (session_id) "
+            "REFERENCES sessions(id) ON DELETE CASCADE"
+        )
+        for sql in MESSAGE_INDEXES:
+            await conn.execute(sql)
+    note(f"messages partitioned ({copied:,} rows)")
+    return copied
+
+
+async def drain_default(conn, progress: Optional[Callable[[str], None]] = None) -> int:
+    """Move rows out of messages_hot_default into proper monthly partitions.
+
+    Rows land in the default partition when their month had no partition
+    yet (an agent down across a month boundary, backdated inserts). That
+    month's partition can't be created while the default holds its rows,
+    so each month is moved into a standalone table which is then attached —
+    attaching builds that partition's share of the partitioned indexes.
+    One transaction per month. Returns the number of rows moved.
+    """
+    note = progress or logger.info
+    months = await conn.fetch("""
+        SELECT date_trunc('month', created_at)::date AS month, count(*) AS n
+        FROM messages_hot_default GROUP BY 1 ORDER BY 1
+    """)
+    moved = 0
+    for r in months:
+        month, end = r["month"], _next_month(r["month"])
+        name = partition_name(month)
+        async with conn.transaction():
+            await conn.execute(
+                f"CREATE TABLE {name} (LIKE messages_hot INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+            )
+            await conn.execute(f"""
+                WITH moved AS (
+                    DELETE FROM messages_hot_default
+                    WHERE created_at >= $1::date AND created_at < $2::date
+                    RETURNING *
+                )
+                INSERT INTO {name} SELECT * FROM moved
+            """, month, end)
+            await conn.execute(
+                f"ALTER TABLE messages_hot ATTACH PARTITION {name} "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{end.isoformat()}')"
+            )
+        moved += r["n"]
+        note(f"moved {r['n']:,} rows into {name}")
+    return moved
+
+
+async def partition_stats(conn) -> list[dict]:
+    """Leaf partitions of messages with estimated rows, size and HNSW presence."""
+    rows = await conn.fetch("""
+        SELECT c.relname AS name,
+               pg_get_expr(c.relpartbound, c.oid) AS bounds,
+               GREATEST(c.reltuples, 0)::bigint AS rows,
+               pg_total_relation_size(c.oid) AS bytes,
+               EXISTS (
+                   SELECT 1 FROM pg_index i
+                   JOIN pg_class ic ON ic.oid = i.indexrelid
+                   JOIN pg_am am ON am.oid = ic.relam
+                   WHERE i.indrelid = c.oid AND am.amname = 'hnsw'
+               ) AS hnsw
+        FROM pg_partition_tree('messages') t
+        JOIN pg_class c ON c.oid = t.relid
+        WHERE t.isleaf
+        ORDER BY c.relname
+    """)
+    return [dict(r) for r in rows]
+
+
+async def rebalance(conn, months_ahead: Optional[int] = None,
+                    progress: Optional[Callable[[str], None]] = None) -> dict:
+    """Bring messages to the partitioned layout and tidy it.
+
+    Converts a legacy table, creates missing monthly partitions, drains the
+    hot default partition, then applies messages.archive_index and builds
+    any missing HNSW index (per partition). Idempotent.
+    """
+    note = progress or logger.info
+    converted = 0
+    if not await is_partitioned(conn):
+        note("converting messages to partitioned layout")
+        converted = await convert(conn, progress=progress)
+    moved = await drain_default(conn, progress=progress)
+    created = await conn.fetchval("SELECT ensure_messages_partitions($1)", months_ahead)
+    note("checking HNSW indexes")
+    await conn.execute("SELECT ensure_messages_hnsw_index()")
+    if converted or moved:
+        await conn.execute("ANALYZE messages")
+    return {
+        "converted": converted,
+        "moved": moved,
+        "created": created,
+        "partitions": await partition_stats(conn),
+    }
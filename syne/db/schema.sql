@@ -65,6 +65,22 @@ CREATE TABLE IF NOT EXISTS users (
 -- ============================================================
 -- MEMORY: Semantic memory with embeddings
 -- ============================================================
+-- Decay v3 event clock. Every non-permanent store and every recall ticks it
+-- once (nextval); memory.touched_tick records the tick at which a row's
+-- recall_count was last materialised, and effective recall is
+-- recall_count - (clock_now - touched_tick). See MemoryEngine.run_decay().
+CREATE SEQUENCE IF NOT EXISTS memory_event_clock;
+
+-- Current clock value without ticking it. Before the first nextval the
+-- sequence reports its start value with is_called = false, i.e. no event
+-- has happened yet.
+CREATE OR REPLACE FUNCTION memory_event_clock_now() RETURNS bigint AS $$
+BEGIN
+    RETURN (SELECT CASE WHEN is_called THEN last_value ELSE last_value - 1 END
+              FROM memory_event_clock);
+END;
+$$ LANGUAGE plpgsql;
+
 CREATE TABLE IF NOT EXISTS memory (
     id SERIAL PRIMARY KEY,
     content TEXT NOT NULL,
@@ -80,7 +96,8 @@ CREATE TABLE IF NOT EXISTS memory (
     expires_at TIMESTAMPTZ,               -- NULL = never expires
     permanent BOOLEAN DEFAULT false,      -- true = never decays (explicit "remember this")
     recall_count INTEGER DEFAULT 1,       -- conversation-based decay counter
-    kg_processed BOOLEAN DEFAULT false    -- true = KG extraction has been attempted
+    kg_processed BOOLEAN DEFAULT false,   -- true = KG extraction has been attempted
+    touched_tick BIGINT NOT NULL DEFAULT memory_event_clock_now()  -- decay v3: event clock at last recall_count write
 );
 
 -- HNSW vector index — created dynamically because embedding dimensions vary per provider.
@@ -145,17 +162,82 @@ CREATE INDEX IF NOT EXISTS idx_sessions_status ON sessions (status);
 -- ============================================================
 -- MESSAGES: Individual messages in sessions
 -- ============================================================
+-- Partitioned in two tiers (syne/db/partitions.py):
+--   messages                     LIST (status)
+--   ├── messages_hot             'active' rows, RANGE (created_at), one partition per month
+--   │   ├── messages_hot_YYYY_MM
+--   │   └── messages_hot_default rows no monthly partition covers (drained by `syne db rebalance`)
+--   └── messages_archive         DEFAULT: compacted rows, HNSW only if messages.archive_index
+-- Compaction's UPDATE ... SET status = 'compacted' moves rows into the archive.
+-- Installs older than schema v37 keep a plain table until they are converted
+-- (migration 37 for small tables, `syne db rebalance` for the rest).
 CREATE TABLE IF NOT EXISTS messages (
-    id SERIAL PRIMARY KEY,
+    id SERIAL,
     session_id INT REFERENCES sessions(id) ON DELETE CASCADE,
     role VARCHAR(20) NOT NULL,            -- 'user', 'assistant', 'system', 'tool'
     content TEXT NOT NULL,
     metadata JSONB DEFAULT '{}',          -- tool calls, attachments, etc.
     token_count INT DEFAULT 0,
-    status VARCHAR(20) DEFAULT 'active',  -- 'active' | 'compacted' (archived, retained for search — NEVER deleted)
+    status VARCHAR(20) NOT NULL DEFAULT 'active',  -- 'active' | 'compacted' (archived, retained for search — NEVER deleted)
     embedding vector,                     -- user rows only: anchor for history_search (dim set by embedding provider)
-    created_at TIMESTAMPTZ DEFAULT NOW()
-);
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (id, status, created_at)  -- partition keys must be in the PK; id alone stays unique via the sequence
+) PARTITION BY LIST (status);
+
+-- Creates the tier partitions and the monthly hot partitions from `since`
+-- (default: this month) through months_ahead months from now (default:
+-- config messages.partition_months_ahead, else 2). No-op on a legacy
+-- unpartitioned table. A month whose rows already sit in the hot default
+-- partition is skipped — creating it would fail; rebalance moves them.
+-- Returns the number of partitions created. Called on every schema replay
+-- and daily by the scheduler.
+CREATE OR REPLACE FUNCTION ensure_messages_partitions(months_ahead INT DEFAULT NULL, since DATE DEFAULT NULL)
+RETURNS INT AS $$
+DECLARE
+    first_month DATE;
+    last_month DATE;
+    m DATE;
+    part TEXT;
+    created INT := 0;
+BEGIN
+    IF (SELECT relkind FROM pg_class WHERE oid = 'messages'::regclass) <> 'p' THEN
+        RETURN 0;
+    END IF;
+    IF to_regclass('messages_hot') IS NULL THEN
+        CREATE TABLE messages_hot PARTITION OF messages
+            FOR VALUES IN ('active') PARTITION BY RANGE (created_at);
+        created := created + 1;
+    END IF;
+    IF to_regclass('messages_archive') IS NULL THEN
+        CREATE TABLE messages_archive PARTITION OF messages DEFAULT;
+        created := created + 1;
+    END IF;
+    IF to_regclass('messages_hot_default') IS NULL THEN
+        CREATE TABLE messages_hot_default PARTITION OF messages_hot DEFAULT;
+        created := created + 1;
+    END IF;
+    months_ahead := COALESCE(
+        months_ahead,
+        (SELECT (value #>> '{}')::int FROM config WHERE key = 'messages.partition_months_ahead'),
+        2);
+    first_month := date_trunc('month', COALESCE(since, CURRENT_DATE))::date;
+    last_month := (date_trunc('month', CURRENT_DATE) + make_interval(months => months_ahead))::date;
+    m := first_month;
+    WHILE m <= last_month LOOP
+        part := 'messages_hot_' || to_char(m, 'YYYY_MM');
+        IF to_regclass(part) IS NULL AND NOT EXISTS (
+            SELECT 1 FROM messages_hot_default
+             WHERE created_at >= m AND created_at < (m + interval '1 month')
+        ) THEN
+            EXECUTE format('CREATE TABLE %I PARTITION OF messages_hot FOR VALUES FROM (%L) TO (%L)',
+                           part, m, (m + interval '1 month')::date);
+            created := created + 1;
+        END IF;
+        m := (m + interval '1 month')::date;
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
 
 CREATE INDEX IF NOT EXISTS idx_messages_session ON messages (session_id, created_at);
 CREATE INDEX IF NOT EXISTS idx_messages_status ON messages (session_id, status, created_at);
@@ -164,15 +246,36 @@ CREATE INDEX IF NOT EXISTS idx_messages_status ON messages (session_id, status,
 CREATE INDEX IF NOT EXISTS idx_messages_embedding_pending
     ON messages (session_id, id)
     WHERE role = 'user' AND embedding IS NULL;
+-- Lexical side of hybrid history_search (syne/tools/history.py): full text
+-- for the ranked candidate list, trigram for also_contains ILIKE filters.
+-- Partial like the anchors themselves (user rows only). Only built here
+-- while messages is empty (fresh install): on an existing table a plain
+-- CREATE INDEX would block writes for the whole GIN build, so upgrades get
+-- them from migration 36, CONCURRENTLY.
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM messages LIMIT 1) THEN
+        CREATE INDEX IF NOT EXISTS idx_messages_content_tsv
+            ON messages USING gin (to_tsvector('simple', content))
+            WHERE role = 'user';
+        CREATE INDEX IF NOT EXISTS idx_messages_content_trgm
+            ON messages USING gin (content gin_trgm_ops)
+            WHERE role = 'user';
+    END IF;
+END $$;
 
 -- HNSW builder for messages.embedding, same shape as ensure_memory_hnsw_index.
 -- Call after user messages have been embedded so the column can be typed to
--- the actual provider dimension and indexed.
+-- the actual provider dimension and indexed. On the partitioned table the
+-- hot tier gets one partitioned index — built per monthly partition and
+-- inherited by partitions created later — and the archive gets its own
+-- only while messages.archive_index is true.
 CREATE OR REPLACE FUNCTION ensure_messages_hnsw_index() RETURNS void AS $$
 DECLARE
     dim INT;
     cur_typmod INT;
     idx_exists BOOL;
+    archive_index BOOL;
 BEGIN
     SELECT vector_dims(embedding) INTO dim FROM messages WHERE embedding IS NOT NULL LIMIT 1;
     IF dim IS NULL THEN RETURN; END IF;
@@ -182,13 +285,34 @@ BEGIN
     SELECT a.atttypmod INTO cur_typmod
       FROM pg_attribute a JOIN pg_class c ON c.oid = a.attrelid
      WHERE c.relname = 'messages' AND a.attname = 'embedding';
-    SELECT EXISTS(SELECT 1 FROM pg_indexes WHERE indexname = 'idx_messages_embedding_hnsw') INTO idx_exists;
-    IF cur_typmod = dim AND idx_exists THEN RETURN; END IF;
-    EXECUTE format('ALTER TABLE messages ALTER COLUMN embedding TYPE vector(%s)', dim);
-    DROP INDEX IF EXISTS idx_messages_embedding_hnsw;
-    EXECUTE 'CREATE INDEX idx_messages_embedding_hnsw '
-            'ON messages USING hnsw (embedding vector_cosine_ops) '
+    IF (SELECT relkind FROM pg_class WHERE oid = 'messages'::regclass) <> 'p' THEN
+        -- Legacy single table, not converted yet.
+        SELECT EXISTS(SELECT 1 FROM pg_indexes WHERE indexname = 'idx_messages_embedding_hnsw') INTO idx_exists;
+        IF cur_typmod = dim AND idx_exists THEN RETURN; END IF;
+        EXECUTE format('ALTER TABLE messages ALTER COLUMN embedding TYPE vector(%s)', dim);
+        DROP INDEX IF EXISTS idx_messages_embedding_hnsw;
+        EXECUTE 'CREATE INDEX idx_messages_embedding_hnsw '
+                'ON messages USING hnsw (embedding vector_cosine_ops) '
+                'WITH (m = 24, ef_construction = 200)';
+        RETURN;
+    END IF;
+    IF cur_typmod <> dim THEN
+        DROP INDEX IF EXISTS idx_messages_hot_embedding_hnsw;
+        DROP INDEX IF EXISTS idx_messages_archive_embedding_hnsw;
+        EXECUTE format('ALTER TABLE messages ALTER COLUMN embedding TYPE vector(%s)', dim);
+    END IF;
+    EXECUTE 'CREATE INDEX IF NOT EXISTS idx_messages_hot_embedding_hnsw '
+            'ON messages_hot USING hnsw (embedding vector_cosine_ops) '
             'WITH (m = 24, ef_construction = 200)';
+    SELECT COALESCE((SELECT value #>> '{}' = 'true' FROM config WHERE key = 'messages.archive_index'), true)
+      INTO archive_index;
+    IF archive_index THEN
+        EXECUTE 'CREATE INDEX IF NOT EXISTS idx_messages_archive_embedding_hnsw '
+                'ON messages_archive USING hnsw (embedding vector_cosine_ops) '
+                'WITH (m = 24, ef_construction = 200)';
+    ELSE
+        DROP INDEX IF EXISTS idx_messages_archive_embedding_hnsw;
+    END IF;
 END;
 $$ LANGUAGE plpgsql;
 
@@ -200,18 +324,49 @@ CREATE TABLE IF NOT EXISTS subagent_runs (
     run_id UUID NOT NULL DEFAULT gen_random_uuid(),
     parent_session_id INTEGER REFERENCES sessions(id),
     task TEXT NOT NULL,
-    status VARCHAR(20) DEFAULT 'running',  -- running, completed, incomplete (hit max rounds), failed, cancelled
+    status VARCHAR(20) DEFAULT 'queued',  -- queued, running, completed, incomplete (hit max rounds), failed, cancelled
     result TEXT,
     error TEXT,
     model VARCHAR(100),
     started_at TIMESTAMPTZ DEFAULT NOW(),
     completed_at TIMESTAMPTZ,
     input_tokens INTEGER DEFAULT 0,
-    output_tokens INTEGER DEFAULT 0
+    output_tokens INTEGER DEFAULT 0,
+    context TEXT,                        -- context from the main session (kept for re-claims)
+    claimed_by TEXT,                     -- host:pid:tag of the process running it
+    heartbeat_at TIMESTAMPTZ,            -- lease: stale after subagents.lease_seconds → re-claimable
+    attempts INTEGER NOT NULL DEFAULT 0, -- claims so far; failed after subagents.max_attempts
+    checkpoint JSONB,                    -- tool-loop state after the last finished round
+    delivered_at TIMESTAMPTZ             -- result handed to the parent session (exactly once)
 );
 
+-- Job-queue columns for databases created before them.
+ALTER TABLE subagent_runs ADD COLUMN IF NOT EXISTS context TEXT;
+ALTER TABLE subagent_runs ADD COLUMN IF NOT EXISTS claimed_by TEXT;
+ALTER TABLE subagent_runs ADD COLUMN IF NOT EXISTS heartbeat_at TIMESTAMPTZ;
+ALTER TABLE subagent_runs ADD COLUMN IF NOT EXISTS attempts INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE subagent_runs ADD COLUMN IF NOT EXISTS checkpoint JSONB;
+ALTER TABLE subagent_runs ADD COLUMN IF NOT EXISTS delivered_at TIMESTAMPTZ;
+
 CREATE INDEX IF NOT EXISTS idx_subagent_runs_parent ON subagent_runs (parent_session_id);
 CREATE INDEX IF NOT EXISTS idx_subagent_runs_status ON subagent_runs (status);
+CREATE INDEX IF NOT EXISTS idx_subagent_runs_queue ON subagent_runs (id)
+    WHERE status IN ('queued', 'running');
+CREATE INDEX IF NOT EXISTS idx_subagent_runs_undelivered ON subagent_runs (completed_at)
+    WHERE delivered_at IS NULL;
+
+-- Sub-agent queue wake-up (syne/subagent.py): every status change NOTIFYs
+-- "status:run_id" so workers claim new runs and the bot delivers results.
+CREATE OR REPLACE FUNCTION notify_subagent_run_change() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('syne_subagents', NEW.status || ':' || NEW.run_id::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER trg_subagent_runs_notify
+    AFTER INSERT OR UPDATE OF status ON subagent_runs
+    FOR EACH ROW EXECUTE FUNCTION notify_subagent_run_change();
 
 -- ============================================================
 -- SCHEDULED TASKS: Cron/scheduler system
@@ -234,6 +389,19 @@ CREATE TABLE IF NOT EXISTS scheduled_tasks (
 CREATE INDEX IF NOT EXISTS idx_scheduled_tasks_enabled ON scheduled_tasks (enabled) WHERE enabled = true;
 CREATE INDEX IF NOT EXISTS idx_scheduled_tasks_next_run ON scheduled_tasks (next_run) WHERE enabled = true;
 
+-- Scheduler wake-up (syne/scheduler.py): inserts, deletes and changes to
+-- enabled/next_run NOTIFY the task id so running schedulers re-arm timers.
+CREATE OR REPLACE FUNCTION notify_scheduled_task_change() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('syne_scheduler', COALESCE(NEW.id, OLD.id)::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER trg_scheduled_tasks_notify
+    AFTER INSERT OR DELETE OR UPDATE OF enabled, next_run ON scheduled_tasks
+    FOR EACH ROW EXECUTE FUNCTION notify_scheduled_task_change();
+
 -- ============================================================
 -- CAPABILITIES: Registered tools/skills
 -- ============================================================
@@ -260,6 +428,19 @@ CREATE TABLE IF NOT EXISTS config (
     updated_at TIMESTAMPTZ DEFAULT NOW()
 );
 
+-- Cross-process config cache invalidation (syne/db/config_cache.py): every
+-- write to config, from any process or raw SQL, NOTIFYs the changed key.
+CREATE OR REPLACE FUNCTION notify_config_change() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('syne_config', COALESCE(NEW.key, OLD.key));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER trg_config_notify
+    AFTER INSERT OR UPDATE OR DELETE ON config
+    FOR EACH ROW EXECUTE FUNCTION notify_config_change();
+
 -- ============================================================
 -- SEED DATA
 -- ============================================================
@@ -781,6 +962,25 @@ CREATE INDEX IF NOT EXISTS idx_kg_entities_type ON kg_entities (entity_type);
 CREATE INDEX IF NOT EXISTS idx_kg_entities_name_trgm
     ON kg_entities USING gin (LOWER(name) gin_trgm_ops);
 
+-- Full-text search over name + aliases for graph recall (recall_graph).
+-- IMMUTABLE wrapper so it can back an expression index.
+CREATE OR REPLACE FUNCTION kg_entity_tsv(name TEXT, aliases TEXT[]) RETURNS tsvector IMMUTABLE AS $$
+BEGIN
+    RETURN to_tsvector('simple', COALESCE(name, '') || ' ' || COALESCE(array_to_string(aliases, ' '), ''));
+END;
+$$ LANGUAGE plpgsql;
+CREATE INDEX IF NOT EXISTS idx_kg_entities_tsv
+    ON kg_entities USING gin (kg_entity_tsv(name, aliases));
+
+-- Alias resolution (_resolve_entities): kg_lower_aliases(aliases) @> ARRAY[LOWER(name)].
+CREATE OR REPLACE FUNCTION kg_lower_aliases(aliases TEXT[]) RETURNS TEXT[] IMMUTABLE AS $$
+BEGIN
+    RETURN (SELECT COALESCE(array_agg(LOWER(a)), '{}') FROM unnest(aliases) AS a);
+END;
+$$ LANGUAGE plpgsql;
+CREATE INDEX IF NOT EXISTS idx_kg_entities_aliases_lower
+    ON kg_entities USING gin (kg_lower_aliases(aliases));
+
 CREATE TABLE IF NOT EXISTS kg_relations (
     id SERIAL PRIMARY KEY,
     subject_id INT REFERENCES kg_entities(id) ON DELETE CASCADE,
@@ -1012,3 +1212,142 @@ CREATE TABLE IF NOT EXISTS shell_denylist (
 INSERT INTO config (key, value, description) VALUES
     ('security.rule_checker_timeout', '120', 'Max seconds the rule checker may spend judging one draft response, applied to both drivers (Ollama evaluator and main provider). Read at check time and clamped to 5-120. On timeout the checker returns ERROR and fails open — the reply is sent with a warning tag rather than held. Default 120; owner tunes it via /checker timeout <sec>.')
 ON CONFLICT (key) DO NOTHING;
+
+-- Migration: shared HTTP client pool limits (syne/http_clients.py).
+-- One long-lived pooled client per provider/tool; these bound its pool.
+INSERT INTO config (key, value, description) VALUES
+    ('http.max_connections', '100', 'Max open connections per shared HTTP client (one client per provider/tool). Applied at startup.'),
+    ('http.max_keepalive_connections', '20', 'Max idle keep-alive connections kept per shared HTTP client. Applied at startup.'),
+    ('http.keepalive_expiry', '30', 'Seconds an idle pooled HTTP connection is kept before closing. Applied at startup.'),
+    ('http.http2', 'true', 'Negotiate HTTP/2 on shared HTTP clients where the server supports it. Applied at startup.')
+ON CONFLICT (key) DO NOTHING;
+
+-- Migration: embedding cache (syne/llm/embed_cache.py).
+-- Persistent tier behind the in-memory LRU — (model namespace, sha256(text))
+-- → vector, so unchanged text is never re-embedded across restarts.
+CREATE TABLE IF NOT EXISTS embedding_cache (
+    model         TEXT NOT NULL,
+    content_hash  BYTEA NOT NULL,
+    embedding     REAL[] NOT NULL,
+    created_at    TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (model, content_hash)
+);
+CREATE INDEX IF NOT EXISTS idx_embedding_cache_created ON embedding_cache (created_at);
+
+INSERT INTO config (key, value, description) VALUES
+    ('embedding.cache_size', '4096', 'In-memory embedding cache entries (LRU). 0 disables the memory tier.'),
+    ('embedding.cache_persistent', 'true', 'Also cache embeddings in the embedding_cache table (shared across restarts/processes).'),
+    ('embedding.cache_ttl_days', '30', 'Persistent embedding cache rows older than this are ignored and pruned.')
+ON CONFLICT (key) DO NOTHING;
+
+-- Migration: session.tokenizer — context token counting backend (syne/context.py).
+INSERT INTO config (key, value, description) VALUES
+    ('session.tokenizer', '"heuristic"', 'Context token counting: "heuristic" (chars_per_token) or "tiktoken[:encoding]" (needs tiktoken). Applied at startup.')
+ON CONFLICT (key) DO NOTHING;
+
+-- Migration: graph.recall_hops — multi-hop knowledge graph recall depth.
+INSERT INTO config (key, value, description) VALUES
+    ('graph.recall_hops', '1', 'Knowledge graph recall depth: 1 = relations of matched entities; 2-3 also follow their neighbours.')
+ON CONFLICT (key) DO NOTHING;
+
+-- Migration: telegram.stream_replies — progressive draft edits for Telegram replies.
+INSERT INTO config (key, value, description) VALUES
+    ('telegram.stream_replies', 'true', 'Stream Telegram replies into a draft message edited as text arrives'),
+    ('telegram.stream_edit_interval', '1.0', 'Minimum seconds between draft edits per chat (groups: at least 3)')
+ON CONFLICT (key) DO NOTHING;
+
+-- Migration: scheduler.max_concurrent — scheduled tasks run on a bounded worker pool.
+INSERT INTO config (key, value, description) VALUES
+    ('scheduler.max_concurrent', '3', 'Maximum scheduled tasks executing at the same time (read at startup)')
+ON CONFLICT (key) DO NOTHING;
+
+-- Migration: compaction.background / compaction.max_parallel — map-reduce compaction pipeline.
+INSERT INTO config (key, value, description) VALUES
+    ('compaction.background', 'true', 'Start compaction in the background after a turn crosses compaction.trigger_percent'),
+    ('compaction.max_parallel', '3', 'Concurrent chunk summaries when a transcript exceeds the model window')
+ON CONFLICT (key) DO NOTHING;
+
+-- Migration: extraction.* — PDF/Office parsing in a worker process pool.
+INSERT INTO config (key, value, description) VALUES
+    ('extraction.workers', '2', 'Worker processes for PDF/Office extraction'),
+    ('extraction.max_memory_mb', '1024', 'Address-space limit per extraction worker in MB (0 = unlimited)'),
+    ('extraction.timeout', '120', 'Seconds before an extraction job is killed'),
+    ('extraction.cache_size', '32', 'Extracted documents kept in memory, keyed by file hash (0 = off)')
+ON CONFLICT (key) DO NOTHING;
+
+-- Migration: history_search.mode / candidates / rrf_k — hybrid retrieval with rank fusion.
+INSERT INTO config (key, value, description) VALUES
+    ('history_search.mode', '"hybrid"', 'history_search retrieval: "hybrid" (vector + full text, rank-fused) or "semantic" (vector only)'),
+    ('history_search.candidates', '100', 'Candidates taken from each retriever before fusion (fixed for a whole pagination; bounds how deep it goes, max 1000)'),
+    ('history_search.rrf_k', '60', 'Reciprocal-rank fusion constant: higher flattens the weight of top ranks')
+ON CONFLICT (key) DO NOTHING;
+
+-- Migration: messages.partition_months_ahead / archive_index — partitioned messages table.
+INSERT INTO config (key, value, description) VALUES
+    ('messages.partition_months_ahead', '2', 'Monthly messages partitions created ahead of the current month'),
+    ('messages.archive_index', 'true', 'Keep an HNSW index on archived (compacted) messages; off saves RAM but history_search then scans the archive')
+ON CONFLICT (key) DO NOTHING;
+
+-- Migration: telegram.mode / webhook_* / queue limits — per-chat inbound queue, optional webhook.
+INSERT INTO config (key, value, description) VALUES
+    ('telegram.mode', '"polling"', 'How Telegram updates arrive: "polling" (getUpdates) or "webhook" (needs telegram.webhook_url)'),
+    ('telegram.webhook_url', '""', 'Public HTTPS URL Telegram posts updates to; the reverse proxy forwards it to webhook_host:webhook_port'),
+    ('telegram.webhook_host', '"127.0.0.1"', 'Address the webhook receiver listens on'),
+    ('telegram.webhook_port', '8081', 'Port the webhook receiver listens on'),
+    ('telegram.max_concurrent_turns', '8', 'Telegram turns processed at the same time across all chats (read at startup)'),
+    ('telegram.queue_max_pending', '500', 'Telegram messages allowed to wait for a turn; beyond this they are dropped (webhook: 503)'),
+    ('telegram.queue_max_per_chat', '20', 'Messages allowed to wait in one chat'),
+    ('telegram.coalesce_window', '1.0', 'Seconds to wait for more lines from the same user before starting a turn (0 = only merge while busy)')
+ON CONFLICT (key) DO NOTHING;
+
+-- Migration: subagents.executor / lease_seconds / max_attempts — durable sub-agent queue.
+INSERT INTO config (key, value, description) VALUES
+    ('subagents.executor', '"inline"', 'Who runs sub-agents: "inline" (the bot process) or "worker" (separate `syne worker` processes)'),
+    ('subagents.lease_seconds', '300', 'Seconds without a heartbeat before a running sub-agent is re-claimed and resumed from its checkpoint'),
+    ('subagents.max_attempts', '3', 'Claims per sub-agent run before one whose worker keeps dying is marked failed')
+ON CONFLICT (key) DO NOTHING;
+
+-- Migration: security.rule_checker_mode / cache_ttl / speculative — checker latency.
+INSERT INTO config (key, value, description) VALUES
+    ('security.rule_checker_mode', '"blocking"', '"blocking" = check before sending (rewrite on violation); "retract" = Telegram sends first, then edits/deletes the reply if the check finds a violation'),
+    ('security.rule_checker_cache_ttl', '300', 'Seconds a CLEAN verdict for an identical draft under the same hard rules is reused without a checker call (0 = off)'),
+    ('security.rule_checker_speculative', 'false', 'Check text that accompanies a tool round while the tools run, so a final draft equal to it is already judged (extra checker calls)')
+ON CONFLICT (key) DO NOTHING;
+
+-- ============================================================
+-- EMBEDDING MIGRATIONS: blue/green switch to a new embedding model
+-- ============================================================
+-- One row per table being moved to another embedding model by
+-- syne/memory/shadow.py. New vectors go to a shadow column, embedding_next,
+-- which exists only while a migration runs; last_id checkpoints the
+-- backfill cursor so an interrupted run resumes.
+CREATE TABLE IF NOT EXISTS embedding_migrations (
+    table_name   TEXT PRIMARY KEY,                  -- 'memory' | 'messages'
+    embed_key    TEXT NOT NULL,                     -- provider.embedding_models key migrated to
+    dimensions   INT NOT NULL,                      -- embedding_next is vector(dimensions)
+    status       VARCHAR(20) NOT NULL DEFAULT 'backfilling',  -- backfilling | indexing | ready | switched
+    last_id      BIGINT NOT NULL DEFAULT 0,         -- backfill cursor of the current pass
+    embedded     BIGINT NOT NULL DEFAULT 0,
+    failed       BIGINT NOT NULL DEFAULT 0,
+    started_at   TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    updated_at   TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    switched_at  TIMESTAMPTZ
+);
+
+-- Body of the trg_<table>_embedding_next trigger a migration attaches:
+-- a row whose content changes needs a new shadow vector.
+CREATE OR REPLACE FUNCTION reset_embedding_next() RETURNS trigger AS $$
+BEGIN
+    NEW.embedding_next := NULL;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Migration: embedding.migration_batch_size — shadow-column embedding migration.
+INSERT INTO config (key, value, description) VALUES
+    ('embedding.migration_batch_size', '64', 'Rows per embed_batch call while migrating memories/messages to a new embedding model')
+ON CONFLICT (key) DO NOTHING;
+
+-- Create the messages tier and monthly partitions. Last, because it reads
+-- messages.partition_months_ahead from config.
+SELECT ensure_messages_partitions();
@@ -0,0 +1,229 @@
+"""Shared pooled HTTP clients.
+
+Every provider and tool used to open `httpx.AsyncClient(...)` per request
+and close it on the way out — each embed, each chat turn, each web search
+paid DNS + TCP + TLS setup and threw the keep-alive connection away.
+
+This module keeps ONE long-lived pooled client per name (provider, tool or
+base URL) and hands out lightweight views of it:
+
+    async with pooled_client("ollama", timeout=30) as client:
+        resp = await client.post(url, json=...)
+
+The view applies the caller's timeout (and default headers) per request;
+leaving the `async with` does NOT close the pool, so the next call reuses
+the warm connection. HTTP/2 is negotiated via ALPN wherever the server
+supports it (plain-http servers such as a local Ollama stay on HTTP/1.1).
+
+Pool limits come from config (http.max_connections,
+http.max_keepalive_connections, http.keepalive_expiry, http.http2) and are
+applied by configure_from_config() at agent start. close_all_clients() runs
+at agent stop.
+
+Shared clients never store cookies: one pool serves every user and every
+site, so a jar would replay one request's session cookies on the next.
+Callers that need a cookie send it in their own headers.
+
+Clients are bound to the event loop that created them. CLI commands run
+several asyncio.run() loops in one process, so a client whose loop has
+gone away is dropped and rebuilt transparently on the next request.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from typing import Any, AsyncIterator, Optional
+
+import httpx
+
+logger = logging.getLogger("syne.http_clients")
+
+# Defaults used until configure() / configure_from_config() runs.
+DEFAULT_MAX_CONNECTIONS = 100
+DEFAULT_MAX_KEEPALIVE = 20
+DEFAULT_KEEPALIVE_EXPIRY = 30.0
+DEFAULT_TIMEOUT = 60.0
+
+_settings: dict[str, Any] = {
+    "max_connections": DEFAULT_MAX_CONNECTIONS,
+    "max_keepalive_connections": DEFAULT_MAX_KEEPALIVE,
+    "keepalive_expiry": DEFAULT_KEEPALIVE_EXPIRY,
+    "http2": True,
+}
+
+# name -> (owning loop, client)
+_clients: dict[str, tuple[asyncio.AbstractEventLoop, httpx.AsyncClient]] = {}
+
+
+def _h2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def configure(
+    max_connections: Optional[int] = None,
+    max_keepalive_connections: Optional[int] = None,
+    keepalive_expiry: Optional[float] = None,
+    http2: Optional[bool] = None,
+) -> None:
+    """Set pool limits for clients created from now on.
+
+    Existing clients keep their limits until reset_client() or
+    close_all_clients() — call this before the first request.
+    """
+    if max_connections is not None:
+        _settings["max_connections"] = max(1, int(max_connections))
+    if max_keepalive_connections is not None:
+        _settings["max_keepalive_connections"] = max(0, int(max_keepalive_connections))
+    if keepalive_expiry is not None:
+        _settings["keepalive_expiry"] = max(0.0, float(keepalive_expiry))
+    if http2 is not None:
+        _settings["http2"] = bool(http2)
+
+
+async def configure_from_config() -> None:
+    """Load pool limits from the config table (http.* keys)."""
+    from .db.models import get_config
+
+    configure(
+        max_connections=await get_config("http.max_connections", DEFAULT_MAX_CONNECTIONS),
+        max_keepalive_connections=await get_config(
+            "http.max_keepalive_connections", DEFAULT_MAX_KEEPALIVE,
+        ),
+        keepalive_expiry=await get_config("http.keepalive_expiry", DEFAULT_KEEPALIVE_EXPIRY),
+        http2=await get_config("http.http2", True),
+    )
+
+
+def _no_cookies() -> CookieJar:
+    """A jar that refuses every Set-Cookie (allowed_domains=[] matches nothing)."""
+    return CookieJar(policy=DefaultCookiePolicy(allowed_domains=[]))
+
+
+def _build_client() -> httpx.AsyncClient:
+    http2 = _settings["http2"] and _h2_available()
+    return httpx.AsyncClient(
+        timeout=DEFAULT_TIMEOUT,
+        http2=http2,
+        cookies=_no_cookies(),
+        limits=httpx.Limits(
+            max_connections=_settings["max_connections"],
+            max_keepalive_connections=_settings["max_keepalive_connections"],
+            keepalive_expiry=_settings["keepalive_expiry"],
+        ),
+    )
+
+
+def get_client(name: str) -> httpx.AsyncClient:
+    """Return the shared client for `name`, creating it on first use.
+
+    Must be called from inside a running event loop. Callers should pass
+    `timeout=` per request (or use pooled_client()) rather than relying on
+    the pool-wide default.
+    """
+    loop = asyncio.get_running_loop()
+    entry = _clients.get(name)
+    if entry is not None:
+        owner, client = entry
+        if owner is loop and not client.is_closed:
+            return client
+        # Loop changed (new asyncio.run) or the client was closed — its
+        # connections are unusable here. Drop it without awaiting aclose()
+        # on a foreign loop.
+    client = _build_client()
+    _clients[name] = (loop, client)
+    return client
+
+
+async def reset_client(name: str) -> None:
+    """Close and forget the client for `name`; the next get_client() dials fresh.
+
+    Used after transport errors that suggest a poisoned connection (stale
+    HTTP/2 stream, transient upstream routing errors).
+    """
+    entry = _clients.pop(name, None)
+    if entry is None:
+        return
+    owner, client = entry
+    if owner is asyncio.get_running_loop() and not client.is_closed:
+        try:
+            await client.aclose()
+        except Exception:
+            pass
+
+
+async def close_all_clients() -> None:
+    """Close every client owned by the running loop. Call at shutdown."""
+    loop = asyncio.get_running_loop()
+    for name in list(_clients):
+        owner, client = _clients[name]
+        if owner is not loop:
+            continue
+        del _clients[name]
+        if not client.is_closed:
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.debug(f"Error closing HTTP client '{name}': {e}")
+
+
+class ClientView:
+    """Per-caller facade over a shared client.
+
+    Fills in the caller's default timeout and headers on every request so
+    call sites keep their own settings while sharing one connection pool.
+    """
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        timeout: Any = None,
+        headers: Optional[dict] = None,
+        follow_redirects: Optional[bool] = None,
+    ):
+        self._client = client
+        self._timeout = timeout
+        self._headers = headers
+        self._follow_redirects = follow_redirects
+
+    def _apply(self, kwargs: dict) -> dict:
+        if self._timeout is not None:
+            kwargs.setdefault("timeout", self._timeout)
+        if self._follow_redirects is not None:
+            kwargs.setdefault("follow_redirects", self._follow_redirects)
+        if self._headers:
+            kwargs["headers"] = {**self._headers, **(kwargs.get("headers") or {})}
+        return kwargs
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        return await self._client.request(method, url, **self._apply(kwargs))
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self._client.get(url, **self._apply(kwargs))
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self._client.post(url, **self._apply(kwargs))
+
+    def stream(self, method: str, url: str, **kwargs):
+        return self._client.stream(method, url, **self._apply(kwargs))
+
+
+@asynccontextmanager
+async def pooled_client(
+    name: str,
+    timeout: Any = None,
+    headers: Optional[dict] = None,
+    follow_redirects: Optional[bool] = None,
+) -> AsyncIterator[ClientView]:
+    """Drop-in for `async with httpx.AsyncClient(timeout=...) as client`.
+
+    Yields a ClientView on the shared client for `name`. Exiting the block
+    leaves the pool open for the next caller.
+    """
+    yield ClientView(get_client(name), timeout, headers, follow_redirects)
@@ -10,7 +10,8 @@ from typing import Optional
 
 import httpx
 
-from .provider import LLMProvider, ChatMessage, ChatResponse, EmbeddingResponse, StreamCallbacks
+from ..http_clients import ClientView, get_client, reset_client
+from .provider import LLMProvider, ChatMessage, ChatResponse, EmbeddingResponse, StreamCallbacks, record_usage
 
 logger = logging.getLogger("syne.llm.anthropic")
 
@@ -18,6 +19,15 @@ logger = logging.getLogger("syne.llm.anthropic")
 ANTHROPIC_API_URL = "https://api.anthropic.com/v1/messages"
 ANTHROPIC_API_VERSION = "2023-06-01"
 
+# Per-request timeout on the shared pool — long reads for streamed turns.
+_HTTP_TIMEOUT = httpx.Timeout(120.0, connect=10.0)
+
+# Per-turn context (system messages with metadata volatile=True: time,
+# recalled memories, graph) is sent as leading text blocks of the current
+# user message rather than in `system`, so the system prompt and history
+# stay a byte-identical — cacheable — prefix across turns.
+_CONTEXT_BLOCK_PREFIX = "[System context for this turn — provided by Syne, not written by the user]\n"
+
 # Default Claude Code CLI version sent as user-agent for OAuth requests.
 # Anthropic fingerprints stale user-agents — bump this when the official
 # Claude Code release advances. Override at runtime via config key
@@ -113,8 +123,6 @@ class AnthropicProvider(LLMProvider):
         self._expires_at: float = 0
         self._last_load: float = 0
         self._claude_creds = None  # ClaudeCredentials instance
-        # Persistent HTTP client — reuse connections like Anthropic SDK
-        self._http_client: Optional[httpx.AsyncClient] = None
         # User-agent cache — refreshed from config on each token reload
         self._user_agent: str = DEFAULT_ANTHROPIC_USER_AGENT
         self._ua_last_load: float = 0
@@ -131,14 +139,13 @@ class AnthropicProvider(LLMProvider):
     def context_window(self) -> int:
         return 200_000  # Claude Sonnet 4 default; Opus 4.6 = 1M (set in model registry)
 
-    def _get_client(self) -> httpx.AsyncClient:
-        """Get or create persistent HTTP client for connection reuse."""
-        if self._http_client is None or self._http_client.is_closed:
-            self._http_client = httpx.AsyncClient(
-                timeout=httpx.Timeout(120.0, connect=10.0),
-                http2=True,  # HTTP/2 for multiplexing like Anthropic SDK
-            )
-        return self._http_client
+    def _get_client(self) -> ClientView:
+        """Shared pooled client (HTTP/2, see syne.http_clients) for connection reuse."""
+        return ClientView(get_client("anthropic"), timeout=_HTTP_TIMEOUT)
+
+    async def _reset_client(self) -> None:
+        """Drop the pooled connections so the retry dials a fresh TCP/TLS connection."""
+        await reset_client("anthropic")
 
     @property
     def reserved_output_tokens(self) -> int:
@@ -366,6 +373,35 @@ class AnthropicProvider(LLMProvider):
 
         return merged
 
+    @staticmethod
+    def _mark_history_breakpoint(conversation: list[dict], context_blocks: list[dict], cache: dict) -> None:
+        """Put a cache breakpoint on the block right before this turn's context blocks.
+
+        Blocks are found by identity, so this works after
+        _sanitize_conversation merged or rebuilt messages around them.
+        """
+        if not context_blocks:
+            return
+        first = context_blocks[0]
+        for mi, msg in enumerate(conversation):
+            content = msg.get("content")
+            if not isinstance(content, list):
+                continue
+            for bi, block in enumerate(content):
+                if block is not first:
+                    continue
+                if bi > 0:
+                    content[bi - 1]["cache_control"] = cache
+                elif mi > 0:
+                    prev = conversation[mi - 1]
+                    if isinstance(prev.get("content"), str):
+                        if not prev["content"]:
+                            return
+                        prev["content"] = [{"type": "text", "text": prev["content"]}]
+                    if prev["content"]:
+                        prev["content"][-1]["cache_control"] = cache
+                return
+
     # Claude-specific defaults — tuned for quality over creativity
     DEFAULT_TEMPERATURE = 0.3
     DEFAULT_MAX_TOKENS = 32000  # fallback — actual default computed from context_window/3
@@ -391,11 +427,18 @@ class AnthropicProvider(LLMProvider):
         system_parts = []
         conversation = []
         pending_tool_results = []
+        pending_context: list[tuple[dict, str]] = []  # (block, original text)
+        context_blocks: list[dict] = []
 
         for m in messages:
             if m.role == "system":
                 if m.content:
-                    system_parts.append(m.content)
+                    if (m.metadata or {}).get("volatile"):
+                        pending_context.append(
+                            ({"type": "text", "text": _CONTEXT_BLOCK_PREFIX + m.content}, m.content)
+                        )
+                    else:
+                        system_parts.append(m.content)
             elif m.role == "tool":
                 tool_call_id = (m.metadata or {}).get("tool_call_id", "unknown")
                 pending_tool_results.append({
@@ -472,13 +515,30 @@ class AnthropicProvider(LLMProvider):
                 else:
                     conversation.append({"role": m.role, "content": m.content})
 
+                if pending_context and m.role == "user":
+                    blocks = [b for b, _ in pending_context]
+                    content = conversation[-1]["content"]
+                    if isinstance(content, str):
+                        content = [{"type": "text", "text": content}] if content else []
+                    conversation[-1]["content"] = blocks + content
+                    context_blocks.extend(blocks)
+                    pending_context = []
+
         if pending_tool_results:
             conversation.append({"role": "user", "content": pending_tool_results})
+        # No user message after the context blocks — fall back to system.
+        system_parts.extend(text for _, text in pending_context)
 
         conversation = self._sanitize_conversation(conversation)
 
-        # Cache last user message (Pi style — no beta header needed)
+        # Prompt cache breakpoints (max 4 per request), all on boundaries that
+        # are stable across requests:
+        #   1. end of system prompt — covers tools + system (set below)
+        #   2. end of the stable history, just before this turn's context
+        #      blocks — next turn's request reads this prefix from cache
+        #   3. last user message — tool rounds within the turn reuse it
         _cache = {"type": "ephemeral"}
+        self._mark_history_breakpoint(conversation, context_blocks, _cache)
         for msg in reversed(conversation):
             if msg.get("role") == "user":
                 content = msg.get("content")
@@ -494,15 +554,16 @@ class AnthropicProvider(LLMProvider):
             "max_tokens": max_tokens or min(self.context_window // 3, self.DEFAULT_MAX_TOKENS),
         }
 
-        # Build system blocks — cache first + last (like Pi, max 2 cached)
+        # Build system blocks — one breakpoint on the last block caches the
+        # whole system prefix (the short OAuth identity block is below the
+        # minimum cacheable length on its own, so it gets no breakpoint).
         system_blocks = []
         if self._is_oauth:
-            system_blocks.append({"type": "text", "text": "You are Claude Code, Anthropic's official CLI for Claude.", "cache_control": _cache})
+            system_blocks.append({"type": "text", "text": "You are Claude Code, Anthropic's official CLI for Claude."})
         for sp in system_parts:
             system_blocks.append({"type": "text", "text": sp})
         if system_blocks:
-            if len(system_blocks) > 1:
-                system_blocks[-1]["cache_control"] = _cache
+            system_blocks[-1]["cache_control"] = _cache
             body["system"] = system_blocks
 
         # Thinking: None=default ON, 0=explicitly OFF, >0=use that value.
@@ -610,12 +671,7 @@ class AnthropicProvider(LLMProvider):
                             # Transient — retry with fresh connection (may route to different server)
                             if not last_attempt:
                                 # Recreate HTTP client to force new TCP/TLS connection
-                                try:
-                                    if self._http_client is not None and not self._http_client.is_closed:
-                                        await self._http_client.aclose()
-                                except Exception:
-                                    pass
-                                self._http_client = None
+                                await self._reset_client()
                                 # Longer base delay for transient 429 (3s base instead of 1s)
                                 delay = _backoff_delay(3000, attempt + 1)
                                 logger.warning(f"Transient 429 (not real rate limit), new connection + retrying in {delay:.1f}s (attempt {attempt + 1}/{_TOTAL_ATTEMPTS})")
@@ -726,12 +782,7 @@ class AnthropicProvider(LLMProvider):
                             # timeout_error, internal_server_error, unknown) → treat as
                             # transient. Retry with fresh client.
                             if not last_attempt:
-                                try:
-                                    if self._http_client is not None and not self._http_client.is_closed:
-                                        await self._http_client.aclose()
-                                except Exception:
-                                    pass
-                                self._http_client = None
+                                await self._reset_client()
                                 delay = _backoff_delay(3000, attempt + 1)
                                 logger.warning(
                                     f"Anthropic stream error '{err_type}' — recreating client, "
@@ -753,8 +804,7 @@ class AnthropicProvider(LLMProvider):
                             resp_model = msg_data.get("model", model)
                             u = msg_data.get("usage", {})
                             usage["input_tokens"] = u.get("input_tokens", 0)
-                            # DIAG(cache): these two were never captured, so every
-                            # cache_read=0 we logged before was meaningless.
+                            # Prompt cache usage — reported per turn via record_usage().
                             usage["cache_read_input_tokens"] = u.get("cache_read_input_tokens", 0)
                             usage["cache_creation_input_tokens"] = u.get("cache_creation_input_tokens", 0)
 
@@ -846,12 +896,7 @@ class AnthropicProvider(LLMProvider):
                 # Transport-level error — likely stale HTTP/2 connection.
                 # Close and recreate the persistent client so retry uses fresh pool.
                 logger.warning(f"Anthropic transport error ({type(exc).__name__}: {str(exc)[:200]}), recreating HTTP client")
-                try:
-                    if self._http_client is not None and not self._http_client.is_closed:
-                        await self._http_client.aclose()
-                except Exception:
-                    pass
-                self._http_client = None
+                await self._reset_client()
                 if not last_attempt:
                     delay = _backoff_delay(_BASE_DELAY_MS, attempt + 1)
                     logger.warning(f"Retrying in {delay:.1f}s (attempt {attempt + 1}/{_TOTAL_ATTEMPTS})")
@@ -865,12 +910,7 @@ class AnthropicProvider(LLMProvider):
                 # Catch-all for unexpected exceptions (e.g. h2 protocol errors).
                 # Log fully and recreate client before retry.
                 logger.warning(f"Anthropic unexpected error ({type(exc).__name__}: {str(exc)[:200]}), recreating HTTP client", exc_info=True)
-                try:
-                    if self._http_client is not None and not self._http_client.is_closed:
-                        await self._http_client.aclose()
-                except Exception:
-                    pass
-                self._http_client = None
+                await self._reset_client()
                 if not last_attempt:
                     delay = _backoff_delay(_BASE_DELAY_MS, attempt + 1)
                     logger.warning(f"Retrying in {delay:.1f}s (attempt {attempt + 1}/{_TOTAL_ATTEMPTS})")
@@ -909,33 +949,20 @@ class AnthropicProvider(LLMProvider):
                            usage.get('cache_read_input_tokens', 0), usage.get('cache_creation_input_tokens', 0),
                            usage.get('output_tokens', 0), event_counts)
 
-            # DIAG(cache): one line per successful request. Tells us whether the
-            # prompt cache is actually being hit, and how the system prompt is
-            # split into cacheable blocks. Remove after root-cause.
-            try:
-                _sys_sizes = [len(b.get("text", "")) for b in body.get("system", [])]
-                _cached_at = [
-                    i for i, b in enumerate(body.get("system", []))
-                    if b.get("cache_control")
-                ]
-                logger.warning(
-                    "DIAG-CACHE in=%s cache_read=%s cache_write=%s out=%s | "
-                    "sys_blocks=%s cached_idx=%s",
-                    usage.get("input_tokens", 0),
-                    usage.get("cache_read_input_tokens", 0),
-                    usage.get("cache_creation_input_tokens", 0),
-                    usage.get("output_tokens", 0),
-                    _sys_sizes, _cached_at,
-                )
-            except Exception as _e:
-                logger.debug("DIAG-CACHE logging failed: %s", _e)
+            logger.debug(
+                "Prompt cache: in=%s cache_read=%s cache_write=%s out=%s",
+                usage.get("input_tokens", 0),
+                usage.get("cache_read_input_tokens", 0),
+                usage.get("cache_creation_input_tokens", 0),
+                usage.get("output_tokens", 0),
+            )
 
             # Success — exit retry loop
             break
           else:
             raise RuntimeError(f"Anthropic API failed after {_TOTAL_ATTEMPTS} attempts")
 
-        return ChatResponse(
+        response = ChatResponse(
             content=content_text,
             model=resp_model,
             input_tokens=usage.get("input_tokens", 0),
@@ -943,7 +970,11 @@ class AnthropicProvider(LLMProvider):
             tool_calls=tool_calls if tool_calls else None,
             thinking=thinking_text if thinking_text else None,
             stop_reason=stop_reason or None,
+            cache_read_tokens=usage.get("cache_read_input_tokens", 0),
+            cache_write_tokens=usage.get("cache_creation_input_tokens", 0),
         )
+        record_usage(response)
+        return response
 
     async def embed(
         self,
@@ -7,6 +7,7 @@ import os
 import time
 import httpx
 from typing import Optional
+from ..http_clients import pooled_client
 from .provider import (
     LLMProvider, ChatMessage, ChatResponse, EmbeddingResponse,
     LLMRateLimitError, LLMAuthError, LLMBadRequestError, LLMContextWindowError, StreamCallbacks,
@@ -314,7 +315,7 @@ class CodexProvider(LLMProvider):
         event_counts: dict[str, int] = {}  # track all event types
         token_refreshed_for_401 = False  # track if we already retried 401 with refresh
 
-        async with httpx.AsyncClient(timeout=180) as client:
+        async with pooled_client("codex", timeout=180) as client:
           for attempt in range(_TOTAL_ATTEMPTS):
             # Reset accumulated state each attempt
             content_text = ""
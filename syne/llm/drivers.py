@@ -20,6 +20,7 @@ from .together import TogetherProvider
 from .hybrid import HybridProvider
 from .anthropic import AnthropicProvider
 from .ollama import OllamaProvider
+from .embed_cache import with_embedding_cache
 
 logger = logging.getLogger("syne.llm.drivers")
 
@@ -220,7 +221,7 @@ async def create_provider(model_entry: dict) -> LLMProvider:
     raise RuntimeError(f"Unhandled driver: {driver_name}")
 
 
-async def create_embedding_provider(embed_entry: dict) -> Optional[LLMProvider]:
+async def create_embedding_provider(embed_entry: dict, cached: bool = True) -> Optional[LLMProvider]:
     """Instantiate an embedding provider from an embedding registry entry.
     
     Args:
@@ -231,10 +232,17 @@ async def create_embedding_provider(embed_entry: dict) -> Optional[LLMProvider]:
             - credential_key: Config key for API credentials
             - base_url: (optional) API base URL for openai_compat
             - dimensions: (optional) Embedding dimensions
+        cached: Wrap in the embedding cache (see embed_cache.py). Pass
+            False when the provider itself must be exercised (tests).
             
     Returns:
         Configured LLMProvider instance or None on failure
     """
+    provider = await _build_embedding_provider(embed_entry)
+    return with_embedding_cache(provider) if cached else provider
+
+
+async def _build_embedding_provider(embed_entry: dict) -> Optional[LLMProvider]:
     driver_name = embed_entry.get("driver")
     model_id = embed_entry.get("model_id")
     credential_key = embed_entry.get("credential_key")
@@ -398,7 +406,7 @@ async def test_embedding(embed_entry: dict, timeout: int = 10) -> tuple[bool, st
         Tuple of (success, error_message)
     """
     try:
-        provider = await create_embedding_provider(embed_entry)
+        provider = await create_embedding_provider(embed_entry, cached=False)
         if not provider:
             return False, "Failed to create provider (missing API key?)"
         
@@ -0,0 +1,334 @@
+"""Embedding cache — skip re-embedding text we have already embedded.
+
+The same text is embedded many times: save_message embeds each user row
+in the background while recall embeds the identical query, store_if_new
+and the evaluator re-embed candidate content, and reprocess/reembed
+commands re-embed unchanged rows. On a CPU-only Ollama box every avoided
+call saves 100–400 ms.
+
+CachedEmbeddingProvider wraps any provider's embed/embed_batch:
+
+  1. in-memory LRU, bounded by embedding.cache_size entries
+  2. optional Postgres tier (embedding_cache table), shared across
+     processes and restarts, enabled by embedding.cache_persistent;
+     rows older than embedding.cache_ttl_days are ignored and pruned
+  3. the wrapped provider, on a miss in both tiers
+
+Keys are (model namespace, sha256(text)). The namespace includes the
+provider name, base URL and model, so switching embedding model — or
+pointing the same model name at another server — can never return a
+vector from the wrong space. Concurrent embeds of the same text share one
+provider call.
+
+The Postgres tier is best-effort: any DB error (pool not initialised,
+table missing) is logged at debug level and the call falls through to the
+provider.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from .provider import LLMProvider, ChatMessage, ChatResponse, EmbeddingResponse, StreamCallbacks
+
+logger = logging.getLogger("syne.llm.embed_cache")
+
+DEFAULT_CACHE_SIZE = 4096
+DEFAULT_TTL_DAYS = 30
+
+# Re-read embedding.* config at most this often (seconds).
+_CONFIG_REFRESH = 60.0
+
+
+def content_hash(text: str) -> bytes:
+    """sha256 of the exact text sent to the provider."""
+    return hashlib.sha256(text.encode("utf-8")).digest()
+
+
+class EmbeddingCache:
+    """Process-wide LRU + Postgres embedding store with hit/miss counters."""
+
+    def __init__(self, max_entries: int = DEFAULT_CACHE_SIZE):
+        self._lru: OrderedDict[tuple[str, bytes], tuple[float, ...]] = OrderedDict()
+        self.max_entries = max_entries
+        self.persistent = True
+        self.ttl_days = DEFAULT_TTL_DAYS
+        self._config_loaded_at = 0.0
+        self._pruned = False
+        self.hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+
+    # ── config ─────────────────────────────────────────────────────────
+
+    async def refresh_config(self) -> None:
+        """Pick up embedding.cache_* config; keeps defaults if the DB is unavailable."""
+        now = time.monotonic()
+        if self._config_loaded_at and now - self._config_loaded_at < _CONFIG_REFRESH:
+            return
+        self._config_loaded_at = now
+        try:
+            from ..db.models import get_config
+            self.max_entries = max(0, int(await get_config("embedding.cache_size", DEFAULT_CACHE_SIZE)))
+            self.persistent = bool(await get_config("embedding.cache_persistent", True))
+            self.ttl_days = max(1, int(await get_config("embedding.cache_ttl_days", DEFAULT_TTL_DAYS)))
+        except Exception as e:
+            logger.debug(f"Embedding cache config unavailable, using defaults: {e}")
+        self._trim()
+
+    # ── memory tier ────────────────────────────────────────────────────
+
+    def get(self, key: tuple[str, bytes]) -> Optional[tuple[float, ...]]:
+        vec = self._lru.get(key)
+        if vec is not None:
+            self._lru.move_to_end(key)
+        return vec
+
+    def put(self, key: tuple[str, bytes], vector) -> None:
+        if self.max_entries <= 0:
+            return
+        self._lru[key] = tuple(vector)
+        self._lru.move_to_end(key)
+        self._trim()
+
+    def _trim(self) -> None:
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+
+    def clear(self) -> None:
+        self._lru.clear()
+
+    # ── Postgres tier ──────────────────────────────────────────────────
+
+    async def _prune_once(self, conn) -> None:
+        if self._pruned:
+            return
+        self._pruned = True
+        await conn.execute(
+            "DELETE FROM embedding_cache WHERE created_at < now() - make_interval(days => $1)",
+            self.ttl_days,
+        )
+
+    async def load_persistent(self, namespace: str, hashes: list[bytes]) -> dict[bytes, list[float]]:
+        """Fetch cached vectors for hashes; {} if the tier is off or unavailable."""
+        if not self.persistent or not hashes:
+            return {}
+        try:
+            from ..db.connection import get_connection, vector_to_list
+            async with get_connection() as conn:
+                await self._prune_once(conn)
+                rows = await conn.fetch("""
+                    SELECT content_hash, embedding
+                    FROM embedding_cache
+                    WHERE model = $1
+                      AND content_hash = ANY($2::bytea[])
+                      AND created_at >= now() - make_interval(days => $3)
+                """, namespace, hashes, self.ttl_days)
+        except Exception as e:
+            logger.debug(f"Embedding cache read skipped: {e}")
+            return {}
+        return {bytes(r["content_hash"]): vector_to_list(r["embedding"]) for r in rows}
+
+    async def save_persistent(self, namespace: str, items: list[tuple[bytes, list[float]]]) -> None:
+        if not self.persistent or not items:
+            return
+        try:
+            from ..db.connection import get_connection
+            async with get_connection() as conn:
+                await conn.executemany("""
+                    INSERT INTO embedding_cache (model, content_hash, embedding)
+                    VALUES ($1, $2, $3)
+                    ON CONFLICT (model, content_hash) DO NOTHING
+                """, [(namespace, h, vec) for h, vec in items])
+        except Exception as e:
+            logger.debug(f"Embedding cache write skipped: {e}")
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.persistent_hits + self.misses
+        return {
+            "entries": len(self._lru),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "persistent_hits": self.persistent_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.persistent_hits) / lookups if lookups else 0.0,
+        }
+
+
+_cache = EmbeddingCache()
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """The process-wide embedding cache."""
+    return _cache
+
+
+class CachedEmbeddingProvider(LLMProvider):
+    """Wraps an embedding provider with the embedding cache.
+
+    Chat and every other attribute are delegated to the wrapped provider.
+    """
+
+    def __init__(self, provider: LLMProvider, cache: Optional[EmbeddingCache] = None):
+        self._inner = provider
+        self._cache = cache or _cache
+        self._inflight: dict[tuple[str, bytes], asyncio.Future] = {}
+
+    @property
+    def inner(self) -> LLMProvider:
+        return self._inner
+
+    @property
+    def name(self) -> str:
+        return self._inner.name
+
+    @property
+    def supports_vision(self) -> bool:
+        return self._inner.supports_vision
+
+    @property
+    def context_window(self) -> int:
+        return self._inner.context_window
+
+    @property
+    def reserved_output_tokens(self) -> int:
+        return self._inner.reserved_output_tokens
+
+    def __getattr__(self, attr):
+        # Only reached for attributes not defined here (embedding_model,
+        # base_url, provider-specific helpers).
+        if attr == "_inner":
+            raise AttributeError(attr)
+        return getattr(self._inner, attr)
+
+    async def chat(
+        self,
+        messages: list[ChatMessage],
+        model: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        tools: Optional[list[dict]] = None,
+        thinking_budget: Optional[int] = None,
+        top_p: Optional[float] = None,
+        top_k: Optional[int] = None,
+        frequency_penalty: Optional[float] = None,
+        presence_penalty: Optional[float] = None,
+        stream_callbacks: Optional[StreamCallbacks] = None,
+    ) -> ChatResponse:
+        return await self._inner.chat(
+            messages, model, temperature, max_tokens, tools, thinking_budget,
+            top_p=top_p, top_k=top_k,
+            frequency_penalty=frequency_penalty, presence_penalty=presence_penalty,
+            stream_callbacks=stream_callbacks,
+        )
+
+    def _namespace(self, model: Optional[str]) -> tuple[str, str]:
+        """(namespace, model name) for a call."""
+        model_name = model or getattr(self._inner, "embedding_model", None) or ""
+        base_url = getattr(self._inner, "base_url", "") or ""
+        return f"{self._inner.name}|{base_url}|{model_name}", model_name
+
+    async def embed(
+        self,
+        text: str,
+        model: Optional[str] = None,
+    ) -> EmbeddingResponse:
+        await self._cache.refresh_config()
+        namespace, model_name = self._namespace(model)
+        key = (namespace, content_hash(text))
+
+        vec = self._cache.get(key)
+        if vec is not None:
+            self._cache.hits += 1
+            return EmbeddingResponse(vector=list(vec), model=model_name, dimensions=len(vec))
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            # Same text already being embedded by a concurrent caller.
+            self._cache.hits += 1
+            resp = await asyncio.shield(pending)
+            return EmbeddingResponse(vector=list(resp.vector), model=resp.model,
+                                     dimensions=resp.dimensions)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            stored = await self._cache.load_persistent(namespace, [key[1]])
+            if key[1] in stored:
+                self._cache.persistent_hits += 1
+                vector = stored[key[1]]
+                resp = EmbeddingResponse(vector=vector, model=model_name, dimensions=len(vector))
+            else:
+                self._cache.misses += 1
+                resp = await self._inner.embed(text, model)
+                await self._cache.save_persistent(namespace, [(key[1], resp.vector)])
+            self._cache.put(key, resp.vector)
+            future.set_result(resp)
+            return resp
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Nobody else may be awaiting; don't warn about an unretrieved exception.
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    async def embed_batch(
+        self,
+        texts: list[str],
+        model: Optional[str] = None,
+    ) -> list[EmbeddingResponse]:
+        await self._cache.refresh_config()
+        namespace, model_name = self._namespace(model)
+        hashes = [content_hash(t) for t in texts]
+        results: list[Optional[EmbeddingResponse]] = [None] * len(texts)
+
+        missing: dict[bytes, list[int]] = {}
+        for i, h in enumerate(hashes):
+            vec = self._cache.get((namespace, h))
+            if vec is not None:
+                self._cache.hits += 1
+                results[i] = EmbeddingResponse(vector=list(vec), model=model_name, dimensions=len(vec))
+            else:
+                missing.setdefault(h, []).append(i)
+
+        if missing:
+            stored = await self._cache.load_persistent(namespace, list(missing))
+            for h, vector in stored.items():
+                self._cache.put((namespace, h), vector)
+                for i in missing.pop(h):
+                    self._cache.persistent_hits += 1
+                    results[i] = EmbeddingResponse(vector=list(vector), model=model_name,
+                                                   dimensions=len(vector))
+
+        if missing:
+            # One provider call for the distinct remaining texts.
+            order = list(missing)
+            self._cache.misses += len(order)
+            fresh = await self._inner.embed_batch([texts[missing[h][0]] for h in order], model)
+            for h, resp in zip(order, fresh):
+                self._cache.put((namespace, h), resp.vector)
+                for n, i in enumerate(missing[h]):
+                    results[i] = resp if n == 0 else EmbeddingResponse(
+                        vector=list(resp.vector), model=resp.model, dimensions=resp.dimensions,
+                    )
+            await self._cache.save_persistent(
+                namespace, [(h, resp.vector) for h, resp in zip(order, fresh)],
+            )
+
+        return results  # type: ignore[return-value]
+
+
+def with_embedding_cache(provider: Optional[LLMProvider]) -> Optional[LLMProvider]:
+    """Wrap provider in CachedEmbeddingProvider (idempotent, None-safe)."""
+    if provider is None or isinstance(provider, CachedEmbeddingProvider):
+        return provider
+    return CachedEmbeddingProvider(provider)
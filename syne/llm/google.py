@@ -28,6 +28,7 @@ import httpx
 from typing import Optional
 from .provider import LLMProvider, ChatMessage, ChatResponse, EmbeddingResponse, LLMRateLimitError, LLMAuthError, LLMBadRequestError, LLMContextWindowError, LLMEmptyResponseError, StreamCallbacks
 from ..auth.google_oauth import GoogleCredentials
+from ..http_clients import pooled_client
 from .gemini_common import (
     _sanitize_surrogates,
     _extract_retry_delay,
@@ -273,7 +274,7 @@ class GoogleProvider(LLMProvider):
             # ANY data, including empty keep-alive lines).
             stream_deadline = time.monotonic() + _STREAM_OVERALL_TIMEOUT
 
-            async with httpx.AsyncClient(timeout=180) as client:
+            async with pooled_client("google", timeout=180) as client:
                 async with client.stream("POST", url, content=body_json, headers=headers) as resp:
                     # Check status BEFORE consuming stream.
                     # On error, read body for retry delay info, then raise.
@@ -532,7 +533,7 @@ class GoogleProvider(LLMProvider):
         # unbounded retries on 429 would outlive their own timeout.
         max_retries = current_max_retries()
         for attempt in range(max_retries + 1):
-            async with httpx.AsyncClient(timeout=120) as client:
+            async with pooled_client("google", timeout=120) as client:
                 resp = await client.post(url, json=body, params={"key": self.api_key})
                 if resp.status_code == 200:
                     data = resp.json()
@@ -641,7 +642,7 @@ class GoogleProvider(LLMProvider):
                 params = {"key": self.api_key}
 
             try:
-                async with httpx.AsyncClient(timeout=30) as client:
+                async with pooled_client("google", timeout=30) as client:
                     resp = await client.post(url, json=body, headers=headers, params=params)
                     resp.raise_for_status()
                     data = resp.json()
@@ -704,7 +705,7 @@ class GoogleProvider(LLMProvider):
                 params = {"key": self.api_key}
 
             try:
-                async with httpx.AsyncClient(timeout=60) as client:
+                async with pooled_client("google", timeout=60) as client:
                     resp = await client.post(
                         url, json={"requests": requests}, headers=headers, params=params
                     )
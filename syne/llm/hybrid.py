@@ -1,10 +1,12 @@
 """Hybrid provider — chat from one provider, embedding from another.
 
 Default setup: Google CCA (free OAuth chat) + Together AI (cheap embedding).
+The embedding side always goes through the embedding cache.
 """
 
 from typing import Optional
 from .provider import LLMProvider, ChatMessage, ChatResponse, EmbeddingResponse, StreamCallbacks
+from .embed_cache import with_embedding_cache
 
 
 class HybridProvider(LLMProvider):
@@ -16,7 +18,7 @@ class HybridProvider(LLMProvider):
         embed_provider: LLMProvider,
     ):
         self._chat = chat_provider
-        self._embed = embed_provider
+        self._embed = with_embedding_cache(embed_provider)
 
     @property
     def name(self) -> str:
@@ -9,19 +9,135 @@ import httpx
 import logging
 import random
 from typing import Optional
-from .provider import LLMProvider, ChatMessage, ChatResponse, EmbeddingResponse, StreamCallbacks
+from .provider import (
+    LLMProvider, ChatMessage, ChatResponse, EmbeddingResponse, StreamCallbacks,
+    current_embed_priority,
+)
+from ..http_clients import pooled_client
 
 logger = logging.getLogger("syne.llm.ollama")
 
-# Serialize concurrent embed requests — Ollama on small CPU servers can't
-# handle parallel requests well (model load contention).
-_EMBED_SEMAPHORE = asyncio.Semaphore(1)
-
 _EMBED_TIMEOUT = 120.0  # was 30s — local Ollama can be slow under load / cold start
 _BATCH_TIMEOUT = 180.0
 _MAX_RETRIES = 3
 _BASE_DELAY = 1.0  # initial backoff
 
+# Micro-batching: concurrent embed() calls arriving within _BATCH_WINDOW of
+# an idle dispatcher are sent as ONE /api/embed request (input=[...]), up
+# to _MAX_BATCH texts. Requests stay serialized per server — Ollama on
+# small CPU servers can't handle parallel requests well (model load
+# contention) — but N queued callers now cost one round-trip, not N.
+_BATCH_WINDOW = 0.010
+_MAX_BATCH = 32
+
+
+async def _post_embed(base_url: str, model: str, texts: list[str]) -> list[list[float]]:
+    """One /api/embed call with retry on timeout/network errors."""
+    timeout = _EMBED_TIMEOUT if len(texts) == 1 else _BATCH_TIMEOUT
+    for attempt in range(_MAX_RETRIES):
+        try:
+            async with pooled_client("ollama", timeout=timeout) as client:
+                resp = await client.post(
+                    f"{base_url}/api/embed",
+                    json={"model": model, "input": texts[0] if len(texts) == 1 else texts},
+                )
+                resp.raise_for_status()
+                data = resp.json()
+            vectors = data["embeddings"]
+            if len(vectors) != len(texts):
+                raise RuntimeError(
+                    f"Ollama returned {len(vectors)} embeddings for {len(texts)} inputs"
+                )
+            return vectors
+        except (httpx.TimeoutException, httpx.NetworkError, httpx.RemoteProtocolError) as e:
+            if attempt < _MAX_RETRIES - 1:
+                delay = _BASE_DELAY * (2 ** attempt) * random.uniform(0.8, 1.2)
+                logger.warning(
+                    f"Ollama embed ({len(texts)} input(s)) {type(e).__name__}, "
+                    f"retry {attempt + 1}/{_MAX_RETRIES} in {delay:.1f}s"
+                )
+                await asyncio.sleep(delay)
+                continue
+            raise
+    raise RuntimeError("Ollama embed failed without exception")
+
+
+class _EmbedDispatcher:
+    """Per-server queue that coalesces concurrent embeds into batched calls.
+
+    Entries are (priority, seq, model, text, future). Each round takes the
+    best-priority entry, then fills the batch with the next-best entries
+    for the same model, so interactive recall (priority 0) always goes
+    ahead of background backfill (priority 10) waiting in the same queue.
+    One request is in flight per server at a time.
+    """
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+        self._pending: list[tuple[int, int, str, str, asyncio.Future]] = []
+        self._seq = 0
+        self._worker: Optional[asyncio.Task] = None
+        self.requests = 0
+        self.embedded = 0
+
+    async def submit(self, model: str, text: str, priority: int) -> list[float]:
+        future = asyncio.get_running_loop().create_future()
+        self._seq += 1
+        self._pending.append((priority, self._seq, model, text, future))
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+        return await future
+
+    def _take_batch(self) -> tuple[str, list[tuple[str, asyncio.Future]]]:
+        self._pending = [e for e in self._pending if not e[4].done()]  # drop cancelled
+        if not self._pending:
+            return "", []
+        self._pending.sort(key=lambda e: (e[0], e[1]))
+        model = self._pending[0][2]
+        batch, rest = [], []
+        for entry in self._pending:
+            if entry[2] == model and len(batch) < _MAX_BATCH:
+                batch.append((entry[3], entry[4]))
+            else:
+                rest.append(entry)
+        self._pending = rest
+        return model, batch
+
+    async def _run(self) -> None:
+        # Let the callers that arrive together with the first one join it.
+        if len(self._pending) < _MAX_BATCH:
+            await asyncio.sleep(_BATCH_WINDOW)
+        while True:
+            model, batch = self._take_batch()
+            if not batch:
+                return
+            self.requests += 1
+            self.embedded += len(batch)
+            try:
+                vectors = await _post_embed(self.base_url, model, [t for t, _ in batch])
+            except Exception as e:
+                for _, fut in batch:
+                    if not fut.done():
+                        fut.set_exception(e)
+                continue
+            for (_, fut), vec in zip(batch, vectors):
+                if not fut.done():
+                    fut.set_result(vec)
+
+
+# base_url -> (owning loop, dispatcher). Rebuilt when the loop changes
+# (CLI commands run several asyncio.run() loops in one process).
+_dispatchers: dict[str, tuple[asyncio.AbstractEventLoop, _EmbedDispatcher]] = {}
+
+
+def _get_dispatcher(base_url: str) -> _EmbedDispatcher:
+    loop = asyncio.get_running_loop()
+    entry = _dispatchers.get(base_url)
+    if entry is None or entry[0] is not loop:
+        entry = (loop, _EmbedDispatcher(base_url))
+        _dispatchers[base_url] = entry
+    return entry[1]
+
 
 class OllamaProvider(LLMProvider):
     """Ollama provider for local embeddings."""
@@ -66,44 +182,20 @@ class OllamaProvider(LLMProvider):
     ) -> EmbeddingResponse:
         """Generate an embedding vector using Ollama's /api/embed endpoint.
 
-        Serialized via semaphore (Ollama on small servers can't handle
-        concurrent embed requests well) and retried on timeout/network errors.
+        Queued on the per-server dispatcher, which batches concurrent calls
+        into one request and serves them in embed-priority order (see
+        embed_priority in provider.py). Retried on timeout/network errors.
         """
         model = model or self.embedding_model
-
-        last_exc: Exception | None = None
-        async with _EMBED_SEMAPHORE:
-            for attempt in range(_MAX_RETRIES):
-                try:
-                    async with httpx.AsyncClient(timeout=_EMBED_TIMEOUT) as client:
-                        resp = await client.post(
-                            f"{self.base_url}/api/embed",
-                            json={"model": model, "input": text},
-                        )
-                        resp.raise_for_status()
-                        data = resp.json()
-                    vector = data["embeddings"][0]
-                    return EmbeddingResponse(
-                        vector=vector,
-                        model=model,
-                        dimensions=len(vector),
-                        input_tokens=0,
-                    )
-                except (httpx.TimeoutException, httpx.NetworkError, httpx.RemoteProtocolError) as e:
-                    last_exc = e
-                    if attempt < _MAX_RETRIES - 1:
-                        delay = _BASE_DELAY * (2 ** attempt) * random.uniform(0.8, 1.2)
-                        logger.warning(
-                            f"Ollama embed {type(e).__name__}, retry {attempt + 1}/{_MAX_RETRIES} in {delay:.1f}s"
-                        )
-                        await asyncio.sleep(delay)
-                        continue
-                    raise
-
-        # Should not reach here, but appease the type-checker
-        if last_exc:
-            raise last_exc
-        raise RuntimeError("Ollama embed failed without exception")
+        vector = await _get_dispatcher(self.base_url).submit(
+            model, text, current_embed_priority(),
+        )
+        return EmbeddingResponse(
+            vector=vector,
+            model=model,
+            dimensions=len(vector),
+            input_tokens=0,
+        )
 
     async def embed_batch(
         self,
@@ -112,51 +204,31 @@ class OllamaProvider(LLMProvider):
     ) -> list[EmbeddingResponse]:
         """Generate embeddings for multiple texts.
 
-        Ollama /api/embed supports batch via input=[...].
-        Serialized + retried like embed().
+        Goes through the same dispatcher as embed(), so a large backfill
+        is split into _MAX_BATCH-sized requests and never holds the server
+        ahead of an interactive recall.
         """
         model = model or self.embedding_model
-
-        last_exc: Exception | None = None
-        async with _EMBED_SEMAPHORE:
-            for attempt in range(_MAX_RETRIES):
-                try:
-                    async with httpx.AsyncClient(timeout=_BATCH_TIMEOUT) as client:
-                        resp = await client.post(
-                            f"{self.base_url}/api/embed",
-                            json={"model": model, "input": texts},
-                        )
-                        resp.raise_for_status()
-                        data = resp.json()
-                    return [
-                        EmbeddingResponse(
-                            vector=vec,
-                            model=model,
-                            dimensions=len(vec),
-                            input_tokens=0,
-                        )
-                        for vec in data["embeddings"]
-                    ]
-                except (httpx.TimeoutException, httpx.NetworkError, httpx.RemoteProtocolError) as e:
-                    last_exc = e
-                    if attempt < _MAX_RETRIES - 1:
-                        delay = _BASE_DELAY * (2 ** attempt) * random.uniform(0.8, 1.2)
-                        logger.warning(
-                            f"Ollama embed_batch {type(e).__name__}, retry {attempt + 1}/{_MAX_RETRIES} in {delay:.1f}s"
-                        )
-                        await asyncio.sleep(delay)
-                        continue
-                    raise
-
-        if last_exc:
-            raise last_exc
-        raise RuntimeError("Ollama embed_batch failed without exception")
+        dispatcher = _get_dispatcher(self.base_url)
+        priority = current_embed_priority()
+        vectors = await asyncio.gather(
+            *(dispatcher.submit(model, t, priority) for t in texts)
+        )
+        return [
+            EmbeddingResponse(
+                vector=vec,
+                model=model,
+                dimensions=len(vec),
+                input_tokens=0,
+            )
+            for vec in vectors
+        ]
 
 
 async def check_ollama_available(base_url: str = "http://localhost:11434") -> bool:
     """Check if Ollama server is running and reachable."""
     try:
-        async with httpx.AsyncClient(timeout=5) as client:
+        async with pooled_client("ollama", timeout=5) as client:
             resp = await client.get(f"{base_url.rstrip('/')}/api/tags")
             return resp.status_code == 200
     except Exception:
@@ -169,7 +241,7 @@ async def check_model_available(
 ) -> bool:
     """Check if a specific model is already pulled in Ollama."""
     try:
-        async with httpx.AsyncClient(timeout=5) as client:
+        async with pooled_client("ollama", timeout=5) as client:
             resp = await client.get(f"{base_url.rstrip('/')}/api/tags")
             if resp.status_code != 200:
                 return False
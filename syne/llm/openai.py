@@ -6,6 +6,7 @@ import logging
 import time
 import httpx
 from typing import Optional
+from ..http_clients import pooled_client
 from .provider import (
     LLMProvider, ChatMessage, ChatResponse, EmbeddingResponse,
     LLMRateLimitError, LLMAuthError, LLMBadRequestError, LLMContextWindowError, StreamCallbacks,
@@ -243,7 +244,7 @@ class OpenAIProvider(LLMProvider):
 
         stream_body = {**body, "stream": True, "stream_options": {"include_usage": True}}
 
-        async with httpx.AsyncClient(timeout=180) as client:
+        async with pooled_client("openai", timeout=180) as client:
           for attempt in range(_TOTAL_ATTEMPTS):
             # Accumulated state
             content_parts: list[str] = []
@@ -399,7 +400,7 @@ class OpenAIProvider(LLMProvider):
         timeout: int,
     ) -> dict:
         """Shared embed request with retry logic."""
-        async with httpx.AsyncClient(timeout=timeout) as client:
+        async with pooled_client("openai", timeout=timeout) as client:
             for attempt in range(_TOTAL_ATTEMPTS):
                 last_attempt = attempt >= _MAX_RETRIES
                 try:
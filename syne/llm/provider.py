@@ -1,6 +1,8 @@
 """Provider-agnostic LLM interface."""
 
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
 from dataclasses import dataclass, field
 from typing import Optional, Callable
 
@@ -40,6 +42,9 @@ class ChatMessage:
     role: str           # 'system', 'user', 'assistant', 'tool'
     content: str
     metadata: Optional[dict] = None
+    # Token estimate cache, owned by syne.context.message_tokens():
+    # (content it was computed for, tokenizer key, tokens).
+    _tokens: Optional[tuple] = field(default=None, init=False, repr=False, compare=False)
 
 
 @dataclass
@@ -51,6 +56,8 @@ class ChatResponse:
     tool_calls: Optional[list] = None
     thinking: Optional[str] = None  # Model's reasoning/thinking text (if returned)
     stop_reason: Optional[str] = None  # Provider stop reason (e.g. 'refusal', 'end_turn')
+    cache_read_tokens: int = 0   # Prompt-cache hits (input tokens served from cache)
+    cache_write_tokens: int = 0  # Prompt-cache writes (input tokens stored to cache)
 
 
 @dataclass
@@ -66,19 +73,31 @@ class UsageAccumulator:
 
     Tracks total output tokens (genuinely new per round) and snapshots
     the last call's input tokens (avoids inflated sums from growing context).
+    Prompt-cache reads/writes are summed so a turn's cache hit rate can be
+    reported.
     """
     total_input: int = 0
     total_output: int = 0
     last_input: int = 0
     rounds: int = 0
+    total_cache_read: int = 0
+    total_cache_write: int = 0
 
     def add(self, response: ChatResponse):
         """Add a response's token counts to the accumulator."""
         self.total_input += response.input_tokens
         self.total_output += response.output_tokens
         self.last_input = response.input_tokens
+        self.total_cache_read += response.cache_read_tokens
+        self.total_cache_write += response.cache_write_tokens
         self.rounds += 1
 
+    @property
+    def cache_hit_rate(self) -> float:
+        """Share of prompt tokens served from the provider cache."""
+        prompt = self.total_input + self.total_cache_read + self.total_cache_write
+        return self.total_cache_read / prompt if prompt else 0.0
+
     def apply_to(self, response: ChatResponse) -> ChatResponse:
         """Return a new ChatResponse with accumulated token counts."""
         return ChatResponse(
@@ -88,6 +107,15 @@ class UsageAccumulator:
             output_tokens=self.total_output,
             tool_calls=response.tool_calls,
             thinking=response.thinking,
+            cache_read_tokens=self.total_cache_read,
+            cache_write_tokens=self.total_cache_write,
+        )
+
+    def __str__(self) -> str:
+        return (
+            f"calls={self.rounds} in={self.total_input} out={self.total_output} "
+            f"cache_read={self.total_cache_read} cache_write={self.total_cache_write} "
+            f"cache_hit={self.cache_hit_rate:.0%}"
         )
 
 
@@ -99,6 +127,62 @@ class EmbeddingResponse:
     input_tokens: int = 0
 
 
+# ════════════════════════════════════════════════════════
+# Embedding priority — lets background work (message backfill,
+# memory evaluation) yield to interactive recall in providers that
+# queue embed calls (OllamaProvider). Lower value = served first.
+# Carried in a ContextVar so it passes through wrappers (hybrid,
+# embedding cache) without changing the embed() signature.
+# ════════════════════════════════════════════════════════
+
+EMBED_PRIORITY_INTERACTIVE = 0
+EMBED_PRIORITY_BACKGROUND = 10
+
+_embed_priority: ContextVar[int] = ContextVar("embed_priority", default=EMBED_PRIORITY_INTERACTIVE)
+
+
+def current_embed_priority() -> int:
+    """Priority of embed calls made from the current task."""
+    return _embed_priority.get()
+
+
+@contextmanager
+def embed_priority(priority: int):
+    """Run embed calls inside the block at the given priority."""
+    token = _embed_priority.set(priority)
+    try:
+        yield
+    finally:
+        _embed_priority.reset(token)
+
+
+# ════════════════════════════════════════════════════════
+# Per-turn token usage — a turn makes several chat calls (tool rounds,
+# rule-checker retries). Conversation opens track_turn_usage() around the
+# turn; providers report each response with record_usage().
+# ════════════════════════════════════════════════════════
+
+_turn_usage: ContextVar[Optional[UsageAccumulator]] = ContextVar("turn_usage", default=None)
+
+
+@contextmanager
+def track_turn_usage(usage: Optional[UsageAccumulator] = None):
+    """Collect usage of every chat call made inside the block."""
+    usage = usage if usage is not None else UsageAccumulator()
+    token = _turn_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _turn_usage.reset(token)
+
+
+def record_usage(response: "ChatResponse") -> None:
+    """Add a chat response's usage to the current turn, if one is tracked."""
+    usage = _turn_usage.get()
+    if usage is not None:
+        usage.add(response)
+
+
 class LLMProvider(ABC):
     """Abstract base class for LLM providers."""
 
@@ -1,7 +1,7 @@
 """Together AI provider — primarily used for embeddings."""
 
-import httpx
 from typing import Optional
+from ..http_clients import pooled_client
 from .provider import LLMProvider, ChatMessage, ChatResponse, EmbeddingResponse, StreamCallbacks
 
 
@@ -87,7 +87,7 @@ class TogetherProvider(LLMProvider):
         if presence_penalty is not None:
             body["presence_penalty"] = presence_penalty
 
-        async with httpx.AsyncClient(timeout=120) as client:
+        async with pooled_client("together", timeout=120) as client:
             resp = await client.post(
                 f"{self.base_url}/chat/completions",
                 json=body,
@@ -113,7 +113,7 @@ class TogetherProvider(LLMProvider):
     ) -> EmbeddingResponse:
         model = model or self.embedding_model
 
-        async with httpx.AsyncClient(timeout=30) as client:
+        async with pooled_client("together", timeout=30) as client:
             resp = await client.post(
                 f"{self.base_url}/embeddings",
                 json={"model": model, "input": text},
@@ -137,7 +137,7 @@ class TogetherProvider(LLMProvider):
     ) -> list[EmbeddingResponse]:
         model = model or self.embedding_model
 
-        async with httpx.AsyncClient(timeout=60) as client:
+        async with pooled_client("together", timeout=60) as client:
             resp = await client.post(
                 f"{self.base_url}/embeddings",
                 json={"model": model, "input": texts},
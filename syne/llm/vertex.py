@@ -15,6 +15,7 @@ from typing import Optional
 
 import httpx
 
+from ..http_clients import pooled_client
 from .provider import (
     LLMProvider,
     ChatMessage,
@@ -80,7 +81,7 @@ async def detect_vertex_region(api_key: str, model: str = "gemini-2.5-flash") ->
     async def _test_region(region: str) -> str:
         url = f"{_vertex_endpoint(region, model)}:generateContent"
         try:
-            async with httpx.AsyncClient(timeout=10) as client:
+            async with pooled_client("vertex", timeout=10) as client:
                 resp = await client.post(
                     url,
                     json={"contents": [{"role": "user", "parts": [{"text": "hi"}]}]},
@@ -237,7 +238,7 @@ class VertexProvider(LLMProvider):
             has_content = False
             stream_deadline = time.monotonic() + _STREAM_OVERALL_TIMEOUT
 
-            async with httpx.AsyncClient(timeout=180) as client:
+            async with pooled_client("vertex", timeout=180) as client:
                 async with client.stream(
                     "POST", url, content=body_json, headers=headers, params=params,
                 ) as resp:
@@ -409,7 +410,7 @@ class VertexProvider(LLMProvider):
         current_delay = _BASE_DELAY_MS
         for attempt in range(_MAX_RETRIES + 1):
             try:
-                async with httpx.AsyncClient(timeout=30) as client:
+                async with pooled_client("vertex", timeout=30) as client:
                     resp = await client.post(
                         url, json=body, params={"key": self.api_key},
                     )
@@ -467,7 +468,7 @@ class VertexProvider(LLMProvider):
         current_delay = _BASE_DELAY_MS
         for attempt in range(_MAX_RETRIES + 1):
             try:
-                async with httpx.AsyncClient(timeout=60) as client:
+                async with pooled_client("vertex", timeout=60) as client:
                     resp = await client.post(
                         url, json=body, params={"key": self.api_key},
                     )
@@ -225,10 +225,15 @@ async def run():
             logger.warning(f"Gateway failed to start: {e}")
 
         # Start scheduler
-        scheduler = Scheduler(on_task_execute=_scheduler_callback)
+        scheduler = Scheduler(on_task_execute=_scheduler_callback, dsn=settings.database_url)
         await scheduler.start()
         logger.info("Scheduler active.")
 
+        # Sub-agent queue — after the channels, so results that finished
+        # while we were down have somewhere to go. Runs queued/orphaned runs
+        # here unless subagents.executor = "worker".
+        await agent.subagents.start(settings.database_url)
+
         # Start the self-contained daily update-check loop (independent of the
         # scheduler table). Needs Telegram to DM the owner, so only if active.
         update_check_task = None
@@ -271,6 +276,9 @@ async def run():
         # Stop scheduler
         if scheduler:
             await scheduler.stop()
+        # Hand running sub-agents back to the queue
+        if agent.subagents:
+            await agent.subagents.stop()
         # Stop channels
         for ch in channels:
             await ch.stop()
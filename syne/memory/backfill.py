@@ -0,0 +1,232 @@
+"""Pipelined, adaptively batched embedding backfill.
+
+Shared by `syne memory reembed-history` / `reembed-memory` and the
+shadow-column embedding migration (shadow.py). Three stages run at the
+same time, connected by one-slot queues:
+
+    fetch   next page of (id, content) rows, keyset-paged on id
+    embed   one provider.embed_batch() call per page
+    write   the caller's bulk write for the page — typically one
+            UPDATE ... FROM unnest($1::int[], $2::vector[])
+
+so the next page is read and the previous one written while the
+provider embeds the current page. The page size adapts to observed embed
+latency (BatchSizer): it grows while batches come back well under the
+target latency and shrinks when they run long or fail, so a local Ollama
+and a remote API each settle at their own throughput.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Optional
+
+from ..llm.provider import EMBED_PRIORITY_BACKGROUND, embed_priority
+
+logger = logging.getLogger("syne.memory.backfill")
+
+DEFAULT_BATCH_SIZE = 64
+DEFAULT_MAX_BATCH = 512
+MIN_BATCH = 4
+
+# Seconds one embed_batch call should take. Long enough to amortise
+# per-request overhead, short enough that progress, checkpoints and a
+# failed batch stay cheap.
+DEFAULT_TARGET_SECONDS = 2.0
+
+
+class BatchSizer:
+    """Rows per page, steered toward a target embed latency.
+
+    After each batch the per-row latency gives the size that would take
+    target_seconds; the next size moves halfway there, growing at most 2x
+    per step. A failed batch halves it.
+    """
+
+    def __init__(
+        self,
+        initial: int = DEFAULT_BATCH_SIZE,
+        minimum: int = MIN_BATCH,
+        maximum: int = DEFAULT_MAX_BATCH,
+        target_seconds: float = DEFAULT_TARGET_SECONDS,
+    ):
+        self.minimum = max(1, min(minimum, initial))
+        self.maximum = max(self.minimum, maximum)
+        self.size = min(self.maximum, max(self.minimum, initial))
+        self.target_seconds = target_seconds
+
+    def observe(self, rows: int, seconds: float) -> None:
+        if rows <= 0:
+            return
+        ideal = self.target_seconds * rows / max(seconds, 1e-3)
+        step = min(self.size * 2, (self.size + ideal) / 2)
+        self.size = int(min(self.maximum, max(self.minimum, step)))
+
+    def failed(self) -> None:
+        self.size = max(self.minimum, self.size // 2)
+
+
+@dataclass
+class BackfillStats:
+    """Running totals of one backfill, with rate and ETA."""
+
+    total: Optional[int] = None
+    done: int = 0
+    failed: int = 0
+    batches: int = 0
+    cursor: int = 0
+    batch_size: int = 0
+    started: float = field(default_factory=time.monotonic)
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    @property
+    def rate(self) -> float:
+        """Rows processed (embedded or failed) per second."""
+        elapsed = self.elapsed
+        return (self.done + self.failed) / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def eta(self) -> Optional[float]:
+        """Seconds left, None while unknown."""
+        if self.total is None or not self.rate:
+            return None
+        return max(0, self.total - self.done - self.failed) / self.rate
+
+    def describe(self) -> str:
+        target = f"/{self.total:,}" if self.total is not None else ""
+        eta = self.eta
+        return (
+            f"embedded {self.done:,}{target} (failed {self.failed:,}) · "
+            f"{self.rate:,.0f}/s · batch {self.batch_size}"
+            + (f" · ETA {_duration(eta)}" if eta is not None else "")
+        )
+
+
+def _duration(seconds: float) -> str:
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}h {seconds % 3600 // 60:02d}m"
+    if seconds >= 60:
+        return f"{seconds // 60}m {seconds % 60:02d}s"
+    return f"{seconds}s"
+
+
+async def embed_texts(provider, texts: list[str]) -> tuple[list, bool]:
+    """(vectors, batch_ok) for texts; a vector is None where embedding failed.
+
+    One embed_batch call at background priority. If the whole batch fails
+    the texts are retried one by one so a single bad row doesn't sink its
+    neighbours; batch_ok is then False.
+    """
+    with embed_priority(EMBED_PRIORITY_BACKGROUND):
+        try:
+            return [r.vector if len(r.vector) else None for r in await provider.embed_batch(texts)], True
+        except Exception as e:
+            logger.warning(f"embed_batch of {len(texts)} texts failed, retrying one by one: {e}")
+        vectors = []
+        for text in texts:
+            try:
+                vector = (await provider.embed(text)).vector
+                vectors.append(vector if len(vector) else None)
+            except Exception as e:
+                logger.debug(f"embed failed: {e}")
+                vectors.append(None)
+        return vectors, False
+
+
+async def run(
+    fetch: Callable[[int, int], Awaitable[list]],
+    write: Callable[[list[int], list, int, int], Awaitable[None]],
+    provider,
+    after_id: int = 0,
+    limit: Optional[int] = None,
+    total: Optional[int] = None,
+    sizer: Optional[BatchSizer] = None,
+    max_chars: Optional[int] = None,
+    sleep: float = 0.0,
+    on_progress: Optional[Callable[[BackfillStats], None]] = None,
+) -> BackfillStats:
+    """Embed every row fetch() returns after `after_id`, writing as it goes.
+
+    Args:
+        fetch: (after_id, limit) → rows with "id" and "content", id ascending.
+        write: (ids, vectors, cursor, failed) for each page, in page order;
+            cursor is the page's last id (embedded or not) for checkpoints.
+        limit: Stop after this many rows.
+        total: Expected row count, for the ETA.
+        max_chars: Truncate content before embedding.
+        sleep: Pause after each embed call (throttle a shared server).
+
+    Raises whatever a stage raised; rows already written stay written.
+    """
+    sizer = sizer or BatchSizer()
+    stats = BackfillStats(total=total, cursor=after_id, batch_size=sizer.size)
+    pages: asyncio.Queue = asyncio.Queue(maxsize=1)
+    embedded: asyncio.Queue = asyncio.Queue(maxsize=1)
+
+    async def fetcher():
+        cursor, fetched = after_id, 0
+        try:
+            while limit is None or fetched < limit:
+                take = sizer.size if limit is None else min(sizer.size, limit - fetched)
+                rows = await fetch(cursor, take)
+                if not rows:
+                    break
+                await pages.put(rows)
+                cursor, fetched = rows[-1]["id"], fetched + len(rows)
+                if len(rows) < take:
+                    break
+        except Exception as e:
+            await pages.put(e)
+            return
+        await pages.put(None)
+
+    async def embedder():
+        try:
+            while True:
+                rows = await pages.get()
+                if rows is None or isinstance(rows, Exception):
+                    await embedded.put(rows)
+                    return
+                texts = [r["content"][:max_chars] if max_chars else r["content"] for r in rows]
+                started = time.monotonic()
+                vectors, batch_ok = await embed_texts(provider, texts)
+                if batch_ok:
+                    sizer.observe(len(rows), time.monotonic() - started)
+                else:
+                    sizer.failed()
+                await embedded.put((rows, vectors))
+                if sleep > 0:
+                    await asyncio.sleep(sleep)
+        except Exception as e:
+            await embedded.put(e)
+
+    tasks = [asyncio.create_task(fetcher()), asyncio.create_task(embedder())]
+    try:
+        while True:
+            item = await embedded.get()
+            if item is None:
+                break
+            if isinstance(item, Exception):
+                raise item
+            rows, vectors = item
+            ids = [r["id"] for r, v in zip(rows, vectors) if v is not None]
+            vecs = [v for v in vectors if v is not None]
+            cursor = rows[-1]["id"]
+            await write(ids, vecs, cursor, len(rows) - len(ids))
+            stats.done += len(ids)
+            stats.failed += len(rows) - len(ids)
+            stats.batches += 1
+            stats.cursor = cursor
+            stats.batch_size = sizer.size
+            if on_progress:
+                on_progress(stats)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    return stats
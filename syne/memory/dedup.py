@@ -0,0 +1,239 @@
+"""Duplicate detection for the memory table.
+
+The old dedup compared every pair of memories with its own
+`SELECT 1 - ($1::vector <=> $2::vector)` round-trip on a freshly acquired
+pooled connection — O(N²) network calls, hours for a few thousand rows.
+Two in-bulk strategies replace it:
+
+  matrix — read every embedding ONCE, parse into a float32 NumPy matrix,
+           L2-normalise, and compute cosine similarity in B×B tiles of the
+           upper triangle. Peak scratch memory is one tile (block_size² ×
+           4 bytes) on top of the N×D matrix; only pairs at or above the
+           threshold are kept.
+  hnsw   — let pgvector find each row's nearest neighbours with a LATERAL
+           self-join over the HNSW index, in a single statement. Approximate
+           (ANN), but needs no NumPy and never ships vectors to Python.
+
+Both produce the same candidate-pair shape and go through one resolver,
+so the keep/remove rules are identical whichever finds the pairs:
+higher importance wins, equal importance keeps the older (lower id) row.
+"""
+
+from __future__ import annotations
+
+import logging
+
+logger = logging.getLogger("syne.memory.dedup")
+
+# Tile edge for the matrix strategy. 1024×1024 float32 = 4 MB of scratch.
+DEFAULT_BLOCK_SIZE = 1024
+
+# Neighbours fetched per row by the HNSW strategy. A row with more
+# near-duplicates than this loses the extras to the next run.
+DEFAULT_NEIGHBOURS = 10
+
+
+def has_numpy() -> bool:
+    """True if the matrix strategy is available."""
+    try:
+        import numpy  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def parse_embeddings(values: list):
+    """Parse pgvector values into an (N, D) float32 matrix.
+
+    Pooled connections decode vectors through pgvector's binary codec
+    (db/connection.py): pgvector.Vector objects on pgvector >= 0.4, float32
+    NumPy arrays on older releases. pgvector's text form ("[0.1,0.2,...]")
+    is still accepted for connections opened without the codec.
+    """
+    import numpy as np
+
+    parsed = []
+    for v in values:
+        if isinstance(v, str):
+            parsed.append(np.fromstring(v.strip()[1:-1], sep=",", dtype=np.float32))
+        elif hasattr(v, "to_numpy"):
+            parsed.append(v.to_numpy().astype(np.float32, copy=False))
+        else:
+            parsed.append(np.asarray(v, dtype=np.float32))
+    if not parsed:
+        return np.zeros((0, 0), dtype=np.float32)
+    return np.vstack(parsed)
+
+
+def find_pairs_matrix(
+    embeddings,
+    threshold: float,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+) -> list[tuple[int, int, float]]:
+    """Blocked all-pairs cosine similarity.
+
+    Args:
+        embeddings: (N, D) matrix, row order = the caller's row order.
+        threshold: Minimum cosine similarity for a pair to be reported.
+        block_size: Tile edge; bounds scratch memory to block_size² floats.
+
+    Returns:
+        (i, j, similarity) with i < j as row positions, sorted by (i, j).
+    """
+    import numpy as np
+
+    x = np.asarray(embeddings, dtype=np.float32)
+    n = x.shape[0]
+    if n < 2:
+        return []
+
+    norms = np.linalg.norm(x, axis=1, keepdims=True)
+    # Zero vectors have no direction; pgvector returns NaN for them, which
+    # never passes a >= threshold test. Dividing by 1 gives similarity 0.
+    norms[norms == 0] = 1.0
+    x = x / norms
+
+    pairs: list[tuple[int, int, float]] = []
+    for bi in range(0, n, block_size):
+        a = x[bi:bi + block_size]
+        for bj in range(bi, n, block_size):
+            tile = a @ x[bj:bj + block_size].T
+            if bi == bj:
+                # Diagonal tile: keep the strict upper triangle only.
+                tile = np.triu(tile, k=1)
+            rows, cols = np.nonzero(tile >= threshold)
+            for r, c in zip(rows.tolist(), cols.tolist()):
+                pairs.append((bi + r, bj + c, float(tile[r, c])))
+    pairs.sort()
+    return pairs
+
+
+async def find_pairs_hnsw(
+    conn,
+    threshold: float,
+    neighbours: int = DEFAULT_NEIGHBOURS,
+) -> list[tuple[int, int, float]]:
+    """Nearest-neighbour self-join on the memory HNSW index.
+
+    Returns:
+        (id_a, id_b, similarity) with id_a < id_b as memory IDs, one entry
+        per unordered pair, sorted by (id_a, id_b).
+    """
+    rows = await conn.fetch("""
+        SELECT a.id AS a_id, nn.id AS b_id, nn.similarity
+        FROM memory a
+        CROSS JOIN LATERAL (
+            SELECT b.id, 1 - (b.embedding <=> a.embedding) AS similarity
+            FROM memory b
+            WHERE b.embedding IS NOT NULL
+              AND b.id <> a.id
+            ORDER BY b.embedding <=> a.embedding
+            LIMIT $2
+        ) nn
+        WHERE a.embedding IS NOT NULL
+          AND nn.similarity >= $1
+    """, threshold, neighbours)
+
+    best: dict[tuple[int, int], float] = {}
+    for r in rows:
+        key = (min(r["a_id"], r["b_id"]), max(r["a_id"], r["b_id"]))
+        best[key] = max(best.get(key, -1.0), float(r["similarity"]))
+    return sorted((a, b, sim) for (a, b), sim in best.items())
+
+
+def resolve_duplicates(rows: list, pairs: list[tuple[int, int, float]]) -> list[dict]:
+    """Decide keep/remove for each duplicate pair.
+
+    Args:
+        rows: Memory rows (id, content, importance), ordered by id.
+        pairs: (i, j, similarity) as positions into `rows`, i < j, sorted.
+
+    Walks pairs in (i, j) order — the same order as the original pairwise
+    loop — skipping rows already removed. Higher importance wins; on a
+    tie the older row (i, lower id) is kept. A row that loses stops being
+    a keeper for the rest of its pairs.
+
+    Returns:
+        One detail dict per removal (keep_id, remove_id, similarity,
+        keep_preview, remove_preview), in decision order.
+    """
+    removed: set[int] = set()
+    details: list[dict] = []
+    for i, j, sim in pairs:
+        if i in removed or j in removed:
+            continue
+        imp_i = rows[i]["importance"] or 0
+        imp_j = rows[j]["importance"] or 0
+        if imp_i >= imp_j:
+            keep, remove, remove_pos = rows[i], rows[j], j
+        else:
+            keep, remove, remove_pos = rows[j], rows[i], i
+        details.append({
+            "keep_id": keep["id"],
+            "remove_id": remove["id"],
+            "similarity": round(sim, 3),
+            "keep_preview": keep["content"][:60],
+            "remove_preview": remove["content"][:60],
+        })
+        removed.add(remove_pos)
+    return details
+
+
+async def find_duplicates(
+    conn,
+    similarity_threshold: float,
+    method: str = "auto",
+    block_size: int = DEFAULT_BLOCK_SIZE,
+    neighbours: int = DEFAULT_NEIGHBOURS,
+) -> list[dict]:
+    """Find duplicate memories with the requested strategy.
+
+    Args:
+        method: "matrix", "hnsw", or "auto" (matrix if NumPy is installed,
+            otherwise hnsw).
+
+    Returns:
+        resolve_duplicates() details.
+    """
+    if method == "auto":
+        method = "matrix" if has_numpy() else "hnsw"
+    if method not in ("matrix", "hnsw"):
+        raise ValueError(f"Unknown dedup method: {method!r} (expected auto, matrix or hnsw)")
+
+    if method == "matrix":
+        rows = await conn.fetch("""
+            SELECT id, content, embedding, importance
+            FROM memory
+            WHERE embedding IS NOT NULL
+            ORDER BY id
+        """)
+        if len(rows) < 2:
+            return []
+        matrix = parse_embeddings([r["embedding"] for r in rows])
+        pairs = find_pairs_matrix(matrix, similarity_threshold, block_size)
+        logger.info(
+            f"Dedup (matrix): {len(rows)} memories, {len(pairs)} candidate pair(s) "
+            f">= {similarity_threshold}"
+        )
+        return resolve_duplicates(rows, pairs)
+
+    rows = await conn.fetch("""
+        SELECT id, content, importance
+        FROM memory
+        WHERE embedding IS NOT NULL
+        ORDER BY id
+    """)
+    if len(rows) < 2:
+        return []
+    id_pairs = await find_pairs_hnsw(conn, similarity_threshold, neighbours)
+    position = {r["id"]: pos for pos, r in enumerate(rows)}
+    pairs: list[tuple[int, int, float]] = [
+        (position[a], position[b], sim)
+        for a, b, sim in id_pairs
+        if a in position and b in position
+    ]
+    logger.info(
+        f"Dedup (hnsw): {len(rows)} memories, {len(pairs)} candidate pair(s) "
+        f">= {similarity_threshold}"
+    )
+    return resolve_duplicates(rows, pairs)
@@ -6,6 +6,7 @@ from typing import Optional
 from ..db.connection import get_connection
 from ..llm.provider import LLMProvider
 from ..security import check_rule_760
+from .shadow import active_embedding_is
 
 logger = logging.getLogger("syne.memory.engine")
 
@@ -58,8 +59,12 @@ def format_relative_time(dt, now: Optional[datetime] = None, locale: str = "id")
 class MemoryEngine:
     """Handles storing and recalling memories using PostgreSQL + pgvector."""
 
-    def __init__(self, provider: LLMProvider):
+    def __init__(self, provider: LLMProvider, embed_key: Optional[str] = None):
         self.provider = provider
+        # provider.active_embedding the provider embeds with. When set, a
+        # vector is only written while that is still the active model — after
+        # an embedding switch (shadow.py) it would be an old-model vector.
+        self.embed_key = embed_key
 
     async def store(
         self,
@@ -95,25 +100,16 @@ class MemoryEngine:
         initial_count = int(await get_config("memory.initial_recall_count", "5")) if not permanent else 0
 
         async with get_connection() as conn:
-            row = await conn.fetchrow("""
-                INSERT INTO memory (content, category, embedding, source, user_id, importance, permanent, recall_count)
-                VALUES ($1, $2, $3::vector, $4, $5, $6, $7, $8)
-                RETURNING id
-            """, content, category, str(vector), source, user_id, importance, permanent, initial_count)
-
-            # Decay v2: store-event tick — a brand-new non-permanent memory
-            # nudges all OTHER non-permanent memories down by 1 (permanent
-            # immune). New row keeps its initial recall_count. Life/death is
-            # decided by the cap in run_decay(), not by hitting 0.
-            if not permanent:
-                await conn.execute("""
-                    UPDATE memory
-                    SET recall_count = recall_count - 1
-                    WHERE COALESCE(permanent, false) = false
-                      AND id <> $1
-                """, row["id"])
+            return await self._insert_memory(
+                conn, content, category, vector, source, user_id, importance,
+                permanent, initial_count, self.embed_key,
+            )
 
-            return row["id"]
+    @staticmethod
+    def is_recallable_query(query: str) -> bool:
+        """True if recall() would search for query (at least two real words)."""
+        words = [w for w in query.strip().split() if len(w) > 1]
+        return len(words) >= 2
 
     async def recall(
         self,
@@ -125,6 +121,7 @@ class MemoryEngine:
         exclude_categories: Optional[list[str]] = None,
         user_id: Optional[int] = None,
         requester_access_level: str = "public",
+        query_vector: Optional[list[float]] = None,
     ) -> list[dict]:
         """Recall memories by semantic similarity.
 
@@ -140,6 +137,8 @@ class MemoryEngine:
                 categories are searched instead.
             user_id: Filter by user
             requester_access_level: Access level of the requester (for Rule 760 filtering)
+            query_vector: Embedding of `query` if the caller already has it
+                (speculative recall in Conversation) — skips the embed call.
 
         Returns:
             List of matching memories (filtered by Rule 760 for privacy)
@@ -167,20 +166,22 @@ class MemoryEngine:
                 return []
 
         # Skip recall for very short queries (1 word) — no meaningful semantic match
-        words = [w for w in query.strip().split() if len(w) > 1]
-        if len(words) < 2:
+        if not self.is_recallable_query(query):
             logger.debug(f"Recall skipped: query too short ({query!r})")
             return []
 
-        # Generate query embedding
-        embedding_resp = await self.provider.embed(query)
-        vector = embedding_resp.vector
+        # Generate query embedding (unless the caller pre-computed it)
+        if query_vector is not None:
+            vector = query_vector
+        else:
+            embedding_resp = await self.provider.embed(query)
+            vector = embedding_resp.vector
 
         async with get_connection() as conn:
             # Build query with optional filters. All columns prefixed with m. so
             # that the LEFT JOIN to memory_blobs (alias b) doesn't conflict.
             conditions = ["1 = 1"]
-            params = [str(vector), limit]
+            params = [vector, limit]
             param_idx = 3
 
             # Category filter: categories (list) takes priority over category (single)
@@ -226,7 +227,10 @@ class MemoryEngine:
                     m.id, m.content, m.category, m.source, m.importance,
                     m.access_count, m.created_at,
                     COALESCE(m.permanent, false) as permanent,
-                    COALESCE(m.recall_count, 1) as recall_count,
+                    CASE WHEN COALESCE(m.permanent, false) THEN COALESCE(m.recall_count, 1)
+                         ELSE COALESCE(m.recall_count, 1)
+                              - ((SELECT memory_event_clock_now()) - m.touched_tick)
+                    END as recall_count,
                     1 - (m.embedding <=> $1::vector) as similarity,
                     (b.memory_id IS NOT NULL) AS has_attachment,
                     b.filename AS attachment_filename,
@@ -273,26 +277,30 @@ class MemoryEngine:
                 results.sort(key=lambda r: r["_score"], reverse=True)
 
             # Update access stats + recall_count (for non-permanent memories)
+            #
+            # Decay v3: a recall is one event — tick the clock ONCE and
+            # rewrite only the recalled rows. Every OTHER non-permanent row
+            # loses 1 effective recall through the tick alone. A recalled
+            # row folds its pending decay into recall_count and is re-stamped
+            # at the new tick; the "+ 2" is the recall boost (+1) plus the
+            # exemption from this event's own ambient decrement (+1), which
+            # is exactly what v2's "+1 here, -1 everywhere else" produced.
+            # recall_count may go 0/negative; that's just ordering score.
+            # Life/death is decided by the cap in run_decay(), not by 0.
             if ids_to_update:
                 await conn.execute("""
+                    WITH clk AS (SELECT nextval('memory_event_clock') AS tick)
                     UPDATE memory
                     SET access_count = access_count + 1,
                         accessed_at = NOW(),
-                        recall_count = CASE WHEN permanent = true THEN recall_count ELSE recall_count + 1 END
+                        recall_count = CASE WHEN COALESCE(permanent, false) THEN recall_count
+                                            ELSE recall_count - (clk.tick - touched_tick) + 2 END,
+                        touched_tick = CASE WHEN COALESCE(permanent, false) THEN touched_tick
+                                            ELSE clk.tick END
+                    FROM clk
                     WHERE id = ANY($1)
                 """, ids_to_update)
 
-                # Decay v2: event-driven tick — every recall nudges all
-                # OTHER non-permanent memories down by 1 (permanent immune).
-                # recall_count may go 0/negative; that's just ordering score.
-                # Life/death is decided by the cap in run_decay(), not by 0.
-                await conn.execute("""
-                    UPDATE memory
-                    SET recall_count = recall_count - 1
-                    WHERE COALESCE(permanent, false) = false
-                      AND NOT (id = ANY($1))
-                """, ids_to_update)
-
             # ═══════════════════════════════════════════════════════════
             # CONFLICT DETECTION — flag contradictory memories
             # If multiple high-similarity results are about the same
@@ -479,7 +487,7 @@ class MemoryEngine:
                   AND LOWER(TRIM(COALESCE(category, ''))) = LOWER(TRIM($3))
                 ORDER BY embedding <=> $1::vector
                 LIMIT 1
-            """, str(vector), conflict_threshold, category or "")
+            """, vector, conflict_threshold, category or "")
 
         if rows:
             existing = dict(rows[0])
@@ -608,32 +616,56 @@ class MemoryEngine:
         importance: float = 0.5,
         permanent: bool = False,
     ) -> int:
-        """Store a memory with a pre-computed embedding vector."""
+        """Store a memory with a pre-computed embedding vector (list or NumPy array)."""
         from ..db.models import get_config
-        if not vector:
+        if vector is None or len(vector) == 0:
             raise RuntimeError("Refusing to store memory with empty vector.")
         initial_count = int(await get_config("memory.initial_recall_count", "5")) if not permanent else 0
 
         async with get_connection() as conn:
-            row = await conn.fetchrow("""
-                INSERT INTO memory (content, category, embedding, source, user_id, importance, permanent, recall_count)
-                VALUES ($1, $2, $3::vector, $4, $5, $6, $7, $8)
-                RETURNING id
-            """, content, category, str(vector), source, user_id, importance, permanent, initial_count)
-
-            # Decay v2: store-event tick — a brand-new non-permanent memory
-            # nudges all OTHER non-permanent memories down by 1 (permanent
-            # immune). New row keeps its initial recall_count. Life/death is
-            # decided by the cap in run_decay(), not by hitting 0.
-            if not permanent:
-                await conn.execute("""
-                    UPDATE memory
-                    SET recall_count = recall_count - 1
-                    WHERE COALESCE(permanent, false) = false
-                      AND id <> $1
-                """, row["id"])
+            return await self._insert_memory(
+                conn, content, category, vector, source, user_id, importance,
+                permanent, initial_count, self.embed_key,
+            )
+
+    @staticmethod
+    async def _insert_memory(
+        conn,
+        content: str,
+        category: str,
+        vector: list,
+        source: str,
+        user_id: Optional[int],
+        importance: float,
+        permanent: bool,
+        initial_count: int,
+        embed_key: Optional[str] = None,
+    ) -> int:
+        """INSERT one memory row and stamp it on the decay event clock.
 
-            return row["id"]
+        Decay v3: a brand-new non-permanent memory is a store event, so it
+        ticks the global clock (nextval) and is stamped with the new tick.
+        Every OTHER non-permanent row thereby loses 1 effective recall
+        without being written — see run_decay() for the model. Permanent
+        rows are immune to decay and do not tick the clock.
+
+        With embed_key, the row is stored without a vector if the embedding
+        model switched since it was computed; shadow.embed_stragglers()
+        embeds it with the new one.
+        """
+        tick_sql = "memory_event_clock_now()" if permanent else "nextval('memory_event_clock')"
+        args = [content, category, vector, source, user_id, importance, permanent, initial_count]
+        embedding_sql = "$3::vector"
+        if embed_key is not None:
+            embedding_sql = f"CASE WHEN {active_embedding_is('$9')} THEN $3::vector END"
+            args.append(embed_key)
+        row = await conn.fetchrow(f"""
+            INSERT INTO memory (content, category, embedding, source, user_id, importance,
+                                permanent, recall_count, touched_tick)
+            VALUES ($1, $2, {embedding_sql}, $4, $5, $6, $7, $8, {tick_sql})
+            RETURNING id
+        """, *args)
+        return row["id"]
 
     async def _update_memory(
         self,
@@ -652,13 +684,18 @@ class MemoryEngine:
             embedding_resp = await self.provider.embed(content)
             vector = embedding_resp.vector
 
+        args = [content, vector, category, source, importance, memory_id]
+        embedding_sql = "$2::vector"
+        if self.embed_key is not None:
+            embedding_sql = f"CASE WHEN {active_embedding_is('$7')} THEN $2::vector END"
+            args.append(self.embed_key)
         async with get_connection() as conn:
-            await conn.execute("""
+            await conn.execute(f"""
                 UPDATE memory
-                SET content = $1, embedding = $2::vector, category = $3,
+                SET content = $1, embedding = {embedding_sql}, category = $3,
                     source = $4, importance = $5, updated_at = NOW()
                 WHERE id = $6
-            """, content, str(vector), category, source, importance, memory_id)
+            """, *args)
 
         return memory_id
 
@@ -754,79 +791,46 @@ class MemoryEngine:
             row = await conn.fetchrow("SELECT COUNT(*) as count FROM memory")
             return row["count"]
 
-    async def dedup(self, similarity_threshold: float = 0.95, dry_run: bool = False) -> dict:
+    async def dedup(
+        self,
+        similarity_threshold: float = 0.95,
+        dry_run: bool = False,
+        method: str = "auto",
+    ) -> dict:
         """Remove duplicate memories based on embedding similarity.
-        
-        Compares all pairs of memories and removes newer duplicates.
+
+        Finds every pair at or above the threshold in bulk (see
+        memory/dedup.py) and removes the loser of each pair.
         Keeps the memory with the higher importance, or the older one if equal.
-        
+
         Args:
             similarity_threshold: Similarity above which memories are considered duplicates
             dry_run: If True, only report duplicates without deleting
-            
+            method: "matrix" (exact, NumPy tiles), "hnsw" (approximate,
+                pgvector nearest-neighbour self-join) or "auto" (matrix when
+                NumPy is installed, else hnsw)
+
         Returns:
-            dict with keys: duplicates_found, deleted_ids, kept_ids
+            dict with keys: duplicates_found, deleted_ids, kept_ids, details
         """
-        async with get_connection() as conn:
-            rows = await conn.fetch("""
-                SELECT id, content, embedding, importance, created_at
-                FROM memory
-                WHERE embedding IS NOT NULL
-                ORDER BY id
-            """)
-
-        if len(rows) < 2:
-            return {"duplicates_found": 0, "deleted_ids": [], "kept_ids": []}
+        from .dedup import find_duplicates
 
-        # Compare each pair using cosine similarity via DB
-        duplicates_found = []
-        deleted_ids = set()
-
-        for i in range(len(rows)):
-            if rows[i]["id"] in deleted_ids:
-                continue
-            for j in range(i + 1, len(rows)):
-                if rows[j]["id"] in deleted_ids:
-                    continue
-
-                # Compute similarity via DB
-                async with get_connection() as conn:
-                    sim_row = await conn.fetchrow(
-                        "SELECT 1 - ($1::vector <=> $2::vector) as similarity",
-                        str(rows[i]["embedding"]),
-                        str(rows[j]["embedding"]),
-                    )
-                sim = sim_row["similarity"]
-
-                if sim >= similarity_threshold:
-                    # Determine which to keep: higher importance wins, then older wins
-                    imp_i = rows[i]["importance"] or 0
-                    imp_j = rows[j]["importance"] or 0
-                    if imp_i >= imp_j:
-                        keep, remove = rows[i], rows[j]
-                    else:
-                        keep, remove = rows[j], rows[i]
+        async with get_connection() as conn:
+            duplicates_found = await find_duplicates(conn, similarity_threshold, method=method)
 
-                    duplicates_found.append({
-                        "keep_id": keep["id"],
-                        "remove_id": remove["id"],
-                        "similarity": round(sim, 3),
-                        "keep_preview": keep["content"][:60],
-                        "remove_preview": remove["content"][:60],
-                    })
-                    deleted_ids.add(remove["id"])
+        deleted_ids = [d["remove_id"] for d in duplicates_found]
 
         if not dry_run and deleted_ids:
             async with get_connection() as conn:
                 await conn.execute(
                     "DELETE FROM memory WHERE id = ANY($1::int[])",
-                    list(deleted_ids),
+                    deleted_ids,
                 )
             logger.info(f"Dedup: removed {len(deleted_ids)} duplicate memories")
 
         return {
             "duplicates_found": len(duplicates_found),
-            "deleted_ids": list(deleted_ids),
+            "deleted_ids": deleted_ids,
             "kept_ids": [d["keep_id"] for d in duplicates_found],
             "details": duplicates_found,
         }
@@ -841,30 +845,32 @@ class MemoryEngine:
         / oldest rows until back at cap. Nothing is deleted on the basis of
         recall_count alone — life/death is decided by the cap here.
 
-        ── Decay v2 design notes ──────────────────────────────────────────
-        Two per-event UPDATEs (in store() and recall()) also nudge every
-        OTHER non-permanent row's recall_count down by 1. That's what gives
-        the "busy day = faster global decay" property (see README's
-        Zero-sum dynamic note). Simple, no timestamps to maintain, ordering
-        stays correct across restarts.
-
-        Cost: each store or recall is an O(N) UPDATE across all
-        non-permanent rows. At the current cap of 1000 and realistic
-        traffic (~50-100 store+recall events / day for a single owner),
-        Postgres handles this comfortably — ~50-100K narrow UPDATEs per
-        day is well inside its comfort zone. If the cap is raised, or if
-        family/group traffic pushes events into the low thousands per day,
-        this is where the model starts to hurt.
-
-        Decay v3 (not implemented, worth noting for future work): store an
-        `updated_at` timestamp per row and compute effective decay lazily
-        on read — `effective_recall = recall_count - hours_since_touch * α`.
-        Zero per-event writes to other rows; the ORDER BY in eviction sorts
-        on `effective_recall` instead of `recall_count`. Same qualitative
-        behaviour (busy days still push unused rows down faster, because
-        events tick the clock forward), but the write path stays O(1). The
-        promotion + cap-eviction shape from v2 carries over — only the
-        per-event decrement is what changes.
+        ── Decay v3 design notes ──────────────────────────────────────────
+        Every store and every recall is an EVENT. Each event that v2 would
+        have answered with "decrement every OTHER non-permanent row by 1"
+        instead ticks a global event clock — the `memory_event_clock`
+        sequence — exactly once. Each row carries `touched_tick`, the clock
+        value at which its `recall_count` was last materialised, and its
+        effective recall is computed lazily wherever it is read:
+
+            effective_recall = recall_count - (clock_now - touched_tick)
+
+        Only rows that are actually touched (the inserted row, the recalled
+        rows) are written; everything else decays through the clock alone.
+        Same qualitative behaviour as v2 — busy days still push unused rows
+        down faster, because events tick the clock forward — but the write
+        path per event is O(touched rows) instead of O(N). Ordering stays
+        correct across restarts: the clock lives in the database.
+
+        v2 cost each store or recall an UPDATE across all non-permanent
+        rows, which became the dominant WAL/vacuum load once the cap was
+        raised or group traffic pushed events into the thousands per day.
+        See benchmarks/bench_decay_writes.py for the v2 vs v3 write volume.
+
+        The promotion + cap-eviction shape from v2 carries over unchanged;
+        both simply compare and sort on effective recall. Promotion folds
+        the pending decay into recall_count, since permanent rows no longer
+        follow the clock.
         ─────────────────────────────────────────────────────────────────
         """
         from ..db.models import get_config, set_config
@@ -883,21 +889,28 @@ class MemoryEngine:
         promo = int(await get_config("memory.promotion_threshold", "1000"))
 
         async with get_connection() as conn:
+            # One clock read for the whole pass — effective recall is
+            # relative, so every comparison below must use the same "now".
+            clock = await conn.fetchval("SELECT memory_event_clock_now()")
+
             # Decay v2 — Fase 2 (dormant): auto-promote a non-permanent
-            # memory to permanent once its recall_count crosses the (high)
+            # memory to permanent once its effective recall crosses the (high)
             # promotion threshold. Threshold defaults very high so this is
             # effectively inert until tuned against real recall data.
             await conn.execute("""
                 UPDATE memory
-                SET permanent = true, updated_at = NOW()
+                SET permanent = true, updated_at = NOW(),
+                    recall_count = recall_count - ($2 - touched_tick),
+                    touched_tick = $2
                 WHERE COALESCE(permanent, false) = false
-                  AND recall_count >= $1
-            """, promo)
+                  AND recall_count - ($2 - touched_tick) >= $1
+            """, promo, clock)
 
             # Decay v2 — cap-based eviction (LRU/LFU hybrid). Life/death is
             # decided HERE, not by recall_count<=0. When non-permanent count
-            # exceeds the cap, evict the lowest-recall (LFU), oldest-id (LRU)
-            # rows until back at cap. Permanent memories are never touched.
+            # exceeds the cap, evict the lowest effective recall (LFU),
+            # oldest-id (LRU) rows until back at cap. Permanent memories are
+            # never touched.
             n = await conn.fetchval("""
                 SELECT COUNT(*) FROM memory WHERE COALESCE(permanent, false) = false
             """)
@@ -908,12 +921,12 @@ class MemoryEngine:
                     WHERE id IN (
                         SELECT id FROM memory
                         WHERE COALESCE(permanent, false) = false
-                        ORDER BY recall_count ASC, id ASC
+                        ORDER BY recall_count - ($2 - touched_tick) ASC, id ASC
                         LIMIT $1
                     )
                     RETURNING id, content
-                """, over)
+                """, over, clock)
                 if deleted:
-                    logger.info(f"Memory decay v2: evicted {len(deleted)} over-cap memories (cap={cap})")
+                    logger.info(f"Memory decay v3: evicted {len(deleted)} over-cap memories (cap={cap})")
                     for row in deleted:
                         logger.debug(f"  Evicted: [{row['id']}] {row['content'][:60]}...")
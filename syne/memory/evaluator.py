@@ -3,7 +3,7 @@
 import asyncio
 import logging
 from typing import Optional
-import httpx
+from ..http_clients import pooled_client
 from ..llm.provider import LLMProvider, ChatMessage
 
 logger = logging.getLogger("syne.memory.evaluator")
@@ -252,7 +252,7 @@ async def evaluate_message_ollama(
 
     try:
         logger.debug(f"Evaluating message via Ollama ({model}): {user_message[:80]}")
-        async with httpx.AsyncClient(timeout=60) as client:
+        async with pooled_client("ollama", timeout=60) as client:
             resp = await client.post(
                 f"{base_url.rstrip('/')}/api/chat",
                 json={
@@ -313,7 +313,7 @@ async def check_model_available(
 ) -> bool:
     """Check if an Ollama model is available locally."""
     try:
-        async with httpx.AsyncClient(timeout=5) as client:
+        async with pooled_client("ollama", timeout=5) as client:
             resp = await client.get(f"{base_url.rstrip('/')}/api/tags")
             resp.raise_for_status()
             data = resp.json()
@@ -13,10 +13,9 @@ import logging
 import re
 from typing import Optional, TYPE_CHECKING
 
-import httpx
-
 from ..db.connection import get_connection
 from ..db.models import get_config
+from ..http_clients import pooled_client
 
 if TYPE_CHECKING:
     from ..llm.provider import LLMProvider
@@ -315,7 +314,7 @@ async def _extract_via_ollama(
     """Extract entities/relations using Ollama."""
     speaker_ctx = f"The speaker is {speaker_name}. " if speaker_name else ""
     try:
-        async with httpx.AsyncClient(timeout=60) as client:
+        async with pooled_client("ollama", timeout=60) as client:
             resp = await client.post(
                 f"{base_url.rstrip('/')}/api/chat",
                 json={
@@ -405,46 +404,61 @@ def _try_parse_json(s: str) -> Optional[dict]:
         return None
 
 
-async def _resolve_entity(name: str, entity_type: str, description: str = "") -> int:
-    """Find existing entity or create new one. Returns entity ID.
+async def _resolve_entities(conn, entities: list[dict]) -> dict[str, int]:
+    """Find or create entities in one set-based statement.
+
+    entities: [{"name", "type", "desc"}, ...], distinct by lowercase name.
+    Returns {lowercase name: entity id}.
 
-    Resolution order:
-    1. Exact name + type match (case-insensitive)
-    2. Alias match
+    Resolution order per entity (same as one-at-a-time resolution):
+    1. Exact name + type match (case-insensitive, unique index)
+    2. Alias match (GIN index on kg_lower_aliases(aliases))
     3. Create new entity
     """
-    async with get_connection() as conn:
-        # 1. Exact match
-        row = await conn.fetchrow(
-            "SELECT id FROM kg_entities WHERE LOWER(name) = LOWER($1) AND entity_type = $2",
-            name, entity_type,
-        )
-        if row:
-            return row["id"]
-
-        # 2. Alias match
-        row = await conn.fetchrow(
-            "SELECT id FROM kg_entities WHERE entity_type = $1 AND LOWER($2) = ANY(SELECT LOWER(unnest(aliases)))",
-            entity_type, name,
-        )
-        if row:
-            return row["id"]
-
-        # 3. Create new
-        row = await conn.fetchrow(
-            """INSERT INTO kg_entities (name, entity_type, description)
-               VALUES ($1, $2, $3)
-               ON CONFLICT (LOWER(name), entity_type) DO UPDATE SET updated_at = NOW()
-               RETURNING id""",
-            name, entity_type, description or "",
+    if not entities:
+        return {}
+    rows = await conn.fetch(
+        """
+        WITH input AS (
+            SELECT name, entity_type, description
+            FROM unnest($1::text[], $2::text[], $3::text[]) AS t(name, entity_type, description)
+        ),
+        matched AS (
+            SELECT i.name, i.entity_type, i.description,
+                   COALESCE(
+                       (SELECT e.id FROM kg_entities e
+                        WHERE LOWER(e.name) = LOWER(i.name) AND e.entity_type = i.entity_type),
+                       (SELECT e.id FROM kg_entities e
+                        WHERE kg_lower_aliases(e.aliases) @> ARRAY[LOWER(i.name)]
+                          AND e.entity_type = i.entity_type
+                        ORDER BY e.id LIMIT 1)
+                   ) AS id
+            FROM input i
+        ),
+        inserted AS (
+            INSERT INTO kg_entities (name, entity_type, description)
+            SELECT name, entity_type, description FROM matched WHERE id IS NULL
+            ON CONFLICT (LOWER(name), entity_type) DO UPDATE SET updated_at = NOW()
+            RETURNING id, LOWER(name) AS lname, entity_type
         )
-        return row["id"]
+        SELECT LOWER(m.name) AS lname, COALESCE(m.id, ins.id) AS id
+        FROM matched m
+        LEFT JOIN inserted ins
+               ON m.id IS NULL AND ins.lname = LOWER(m.name) AND ins.entity_type = m.entity_type
+        """,
+        [e["name"] for e in entities],
+        [e["type"] for e in entities],
+        [e["desc"] or "" for e in entities],
+    )
+    return {r["lname"]: r["id"] for r in rows if r["id"] is not None}
 
 
 async def _store_graph(extracted: dict, memory_id: int) -> None:
     """Store extracted entities and relations into the graph tables.
 
     Only creates entities that are referenced in relations — no orphans.
+    One transaction, two statements: all entities resolved set-based
+    (_resolve_entities), then all relations upserted via UNNEST.
     """
     entities = extracted.get("entities", [])
     relations = extracted.get("relations", [])
@@ -466,129 +480,182 @@ async def _store_graph(extracted: dict, memory_id: int) -> None:
         needed.add(r["object"].strip().lower())
 
     # Only resolve/create entities that have relations
-    entity_map = {}  # name -> entity_id
-    for name in needed:
-        info = entity_info.get(name)
-        if info:
-            entity_id = await _resolve_entity(info["name"], info["type"], info["desc"])
-            entity_map[name] = entity_id
-
-    # Store relations
-    for r in relations:
-        subj_name = r["subject"].strip().lower()
-        obj_name = r["object"].strip().lower()
-        predicate = r["predicate"].strip().lower()
+    to_resolve = [entity_info[name] for name in needed if name in entity_info]
+    if not to_resolve:
+        return
 
-        subj_id = entity_map.get(subj_name)
-        obj_id = entity_map.get(obj_name)
-
-        if not subj_id or not obj_id:
-            logger.debug(f"Skipping relation: entity not found ({r['subject']} -> {r['object']})")
-            continue
+    async with get_connection() as conn:
+        async with conn.transaction():
+            entity_map = await _resolve_entities(conn, to_resolve)
+
+            # Distinct triples — ON CONFLICT DO UPDATE cannot touch a row twice
+            # in one statement.
+            triples: dict[tuple[int, str, int], None] = {}
+            for r in relations:
+                subj_id = entity_map.get(r["subject"].strip().lower())
+                obj_id = entity_map.get(r["object"].strip().lower())
+                if not subj_id or not obj_id:
+                    logger.debug(f"Skipping relation: entity not found ({r['subject']} -> {r['object']})")
+                    continue
+                triples[(subj_id, r["predicate"].strip().lower(), obj_id)] = None
 
-        async with get_connection() as conn:
+            if not triples:
+                return
+            subj_ids, predicates, obj_ids = (list(col) for col in zip(*triples))
             await conn.execute(
                 """INSERT INTO kg_relations (subject_id, predicate, object_id, source_memory_id)
-                   VALUES ($1, $2, $3, $4)
+                   SELECT s, p, o, $4
+                   FROM unnest($1::int[], $2::text[], $3::int[]) AS t(s, p, o)
                    ON CONFLICT (subject_id, predicate, object_id)
-                   DO UPDATE SET source_memory_id = $4, updated_at = NOW()""",
-                subj_id, predicate, obj_id, memory_id,
+                   DO UPDATE SET source_memory_id = EXCLUDED.source_memory_id, updated_at = NOW()""",
+                subj_ids, predicates, obj_ids, memory_id,
             )
 
 
-async def recall_graph(query: str, limit: int = 10) -> tuple[list[str], bool]:
-    """Query the knowledge graph for relevant entity-relation context.
+# kg_entities / kg_relations exist once schema.sql has run; tables are never
+# dropped at runtime, so a positive check is cached for the process lifetime.
+_kg_tables_ready = False
+
+# Seed entities considered per hop.
+_MAX_SEED_ENTITIES = 100
+_MAX_RECALL_HOPS = 3
+
+_WORD_RE = re.compile(r"\w+")
+
+
+async def _kg_tables_exist(conn) -> bool:
+    """Whether the knowledge graph tables exist (positive result cached)."""
+    global _kg_tables_ready
+    if not _kg_tables_ready:
+        _kg_tables_ready = bool(await conn.fetchval("SELECT to_regclass('kg_entities') IS NOT NULL"))
+    return _kg_tables_ready
 
-    Two-step approach for performance:
-    1. Find matching entities by keyword (uses GIN trigram index if available)
-    2. Fetch relations via btree indexes on subject_id/object_id
+
+def _recall_terms(query: str) -> list[str]:
+    """Distinct lowercase search words from a recall query.
 
     Words shorter than 4 chars are excluded to avoid noisy matches
-    (e.g. "sah" matches thousands of entities). Entities are ranked by
-    number of matching keywords so multi-word matches surface first.
+    (e.g. "sah" matches thousands of entities); falls back to > 2 chars
+    when nothing longer remains.
+    """
+    words = _WORD_RE.findall(query.lower()) if query else []
+    terms = [w for w in words if len(w) >= 4] or [w for w in words if len(w) > 2]
+    return list(dict.fromkeys(terms))
 
-    Returns a list of formatted lines (empty on no-match / failure).
+
+def _to_tsquery_text(terms: list[str]) -> str:
+    """OR-of-prefixes tsquery source ('simple' config) — 'riyo:* | jakarta:*'.
+
+    Terms are word characters only, so nothing needs escaping.
     """
-    if not query or not query.strip():
-        return []
+    return " | ".join(f"{t}:*" for t in terms)
 
-    try:
-        async with get_connection() as conn:
-            # Check if tables exist
-            exists = await conn.fetchval(
-                "SELECT EXISTS(SELECT 1 FROM information_schema.tables "
-                "WHERE table_name = 'kg_entities')"
-            )
-            if not exists:
-                return []
 
-            # Filter words: prefer >= 4 chars, fall back to > 2 if none remain
-            words = [w for w in query.lower().split() if len(w) >= 4]
-            if not words:
-                words = [w for w in query.lower().split() if len(w) > 2]
-            if not words:
-                return []
+async def _find_seed_entities(conn, terms: list[str]) -> list[int]:
+    """Entity IDs matching the query terms, best first.
 
-            # Build LIKE conditions + relevance score (more keyword matches = higher)
-            conditions = []
-            score_parts = []
-            params: list = []
-            for i, word in enumerate(words):
-                idx = i + 1
-                conditions.append(f"LOWER(name) LIKE ${idx}")
-                score_parts.append(f"CASE WHEN LOWER(name) LIKE ${idx} THEN 1 ELSE 0 END")
-                params.append(f"%{word}%")
-
-            where_clause = " OR ".join(conditions)
-            score_expr = " + ".join(score_parts)
-
-            # Step 1: find top entity IDs ranked by keyword overlap
-            entity_rows = await conn.fetch(
-                f"SELECT id FROM kg_entities "
-                f"WHERE {where_clause} "
-                f"ORDER BY ({score_expr}) DESC "
-                f"LIMIT 100",
-                *params,
-            )
-            if not entity_rows:
-                return []
+    Two index-backed matchers, OR-ed into one bitmap scan:
+      - full text: kg_entity_tsv(name, aliases) @@ prefix tsquery
+        (GIN idx_kg_entities_tsv) — whole/prefix words in name or aliases
+      - trigram: LOWER(name) % term (GIN idx_kg_entities_name_trgm) —
+        typos and inflections the word match misses
+    Ranked by ts_rank plus word_similarity of the name against the query,
+    so multi-word and closer matches surface first.
+    """
+    rows = await conn.fetch(
+        """
+        SELECT e.id
+        FROM kg_entities e, to_tsquery('simple', $1) q
+        WHERE kg_entity_tsv(e.name, e.aliases) @@ q
+           OR LOWER(e.name) % ANY($2::text[])
+        ORDER BY ts_rank(kg_entity_tsv(e.name, e.aliases), q)
+                 + word_similarity(LOWER(e.name), $3) DESC
+        LIMIT $4
+        """,
+        _to_tsquery_text(terms), terms, " ".join(terms), _MAX_SEED_ENTITIES,
+    )
+    return [r["id"] for r in rows]
 
-            entity_ids = [r["id"] for r in entity_rows]
 
-            # Step 2: fetch relations via UNION (subject + object separately)
-            # Each branch uses btree index on subject_id / object_id
-            rows = await conn.fetch(
-                """
-                (SELECT s.name AS subject, s.entity_type AS s_type,
-                        r.predicate, o.name AS object, o.entity_type AS o_type
-                 FROM kg_relations r
-                 JOIN kg_entities s ON r.subject_id = s.id
-                 JOIN kg_entities o ON r.object_id = o.id
-                 WHERE r.subject_id = ANY($1)
-                 LIMIT $2)
-                UNION
-                (SELECT s.name AS subject, s.entity_type AS s_type,
-                        r.predicate, o.name AS object, o.entity_type AS o_type
-                 FROM kg_relations r
-                 JOIN kg_entities s ON r.subject_id = s.id
-                 JOIN kg_entities o ON r.object_id = o.id
-                 WHERE r.object_id = ANY($1)
-                 LIMIT $2)
-                LIMIT $2
-                """,
-                entity_ids,
-                limit,
-            )
+async def recall_graph(query: str, limit: int = 10, hops: Optional[int] = None) -> list[str]:
+    """Query the knowledge graph for relevant entity-relation context.
+
+    1. Find seed entities lexically (full text + trigram over names and
+       aliases, see _find_seed_entities)
+    2. Fetch their relations via btree indexes on subject_id/object_id
+    3. With hops > 1 (graph.recall_hops, max 3), expand from the entities
+       reached in the previous hop — skipping edges back to entities seen
+       in earlier hops — until limit relations are collected
 
-            if not rows:
+    Returns a list of formatted lines (empty on no-match / failure).
+    """
+    terms = _recall_terms(query)
+    if not terms:
+        return []
+
+    try:
+        if hops is None:
+            hops = int(await get_config("graph.recall_hops", 1))
+        hops = max(1, min(int(hops), _MAX_RECALL_HOPS))
+
+        async with get_connection() as conn:
+            if not await _kg_tables_exist(conn):
                 return []
 
-            lines = []
-            for row in rows:
-                lines.append(
-                    f"- {row['subject']} [{row['s_type']}] --{row['predicate']}--> "
-                    f"{row['object']} [{row['o_type']}]"
+            frontier = await _find_seed_entities(conn, terms)
+            seen_entities = set(frontier)
+            seen_relations: set[tuple] = set()
+            lines: list[str] = []
+
+            for _ in range(hops):
+                if not frontier or len(lines) >= limit:
+                    break
+                # Entities reached in earlier hops: edges back to them were
+                # collected already (or lead nowhere new), so they must not
+                # take up this hop's LIMIT. Seed-to-seed edges stay in hop 1.
+                behind = list(seen_entities.difference(frontier))
+                # UNION (subject + object separately) — each branch uses the
+                # btree index on subject_id / object_id
+                rows = await conn.fetch(
+                    """
+                    (SELECT r.subject_id, s.name AS subject, s.entity_type AS s_type,
+                            r.predicate, r.object_id, o.name AS object, o.entity_type AS o_type
+                     FROM kg_relations r
+                     JOIN kg_entities s ON r.subject_id = s.id
+                     JOIN kg_entities o ON r.object_id = o.id
+                     WHERE r.subject_id = ANY($1) AND NOT (r.object_id = ANY($3))
+                     LIMIT $2)
+                    UNION
+                    (SELECT r.subject_id, s.name AS subject, s.entity_type AS s_type,
+                            r.predicate, r.object_id, o.name AS object, o.entity_type AS o_type
+                     FROM kg_relations r
+                     JOIN kg_entities s ON r.subject_id = s.id
+                     JOIN kg_entities o ON r.object_id = o.id
+                     WHERE r.object_id = ANY($1) AND NOT (r.subject_id = ANY($3))
+                     LIMIT $2)
+                    LIMIT $2
+                    """,
+                    frontier,
+                    limit,
+                    behind,
                 )
+
+                next_frontier: list[int] = []
+                for row in rows:
+                    key = (row["subject_id"], row["predicate"], row["object_id"])
+                    if key in seen_relations or len(lines) >= limit:
+                        continue
+                    seen_relations.add(key)
+                    lines.append(
+                        f"- {row['subject']} [{row['s_type']}] --{row['predicate']}--> "
+                        f"{row['object']} [{row['o_type']}]"
+                    )
+                    for eid in (row["subject_id"], row["object_id"]):
+                        if eid not in seen_entities:
+                            seen_entities.add(eid)
+                            next_frontier.append(eid)
+                frontier = next_frontier[:_MAX_SEED_ENTITIES]
+
             return lines
 
     except Exception as e:
@@ -600,10 +667,7 @@ async def get_graph_stats() -> dict:
     """Get knowledge graph statistics."""
     try:
         async with get_connection() as conn:
-            exists = await conn.fetchval(
-                "SELECT EXISTS(SELECT 1 FROM information_schema.tables WHERE table_name = 'kg_entities')"
-            )
-            if not exists:
+            if not await _kg_tables_exist(conn):
                 return {"entities": 0, "relations": 0, "types": []}
 
             entity_count = await conn.fetchval("SELECT COUNT(*) FROM kg_entities")
@@ -758,10 +822,7 @@ async def search_entities(query: str, limit: int = 20) -> list[dict]:
     """Search entities by name. Returns list of entity dicts."""
     try:
         async with get_connection() as conn:
-            exists = await conn.fetchval(
-                "SELECT EXISTS(SELECT 1 FROM information_schema.tables WHERE table_name = 'kg_entities')"
-            )
-            if not exists:
+            if not await _kg_tables_exist(conn):
                 return []
 
             rows = await conn.fetch(
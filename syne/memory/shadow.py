@@ -0,0 +1,521 @@
+"""Blue/green embedding-model migration through shadow columns.
+
+Switching embedding model used to rewrite `memory.embedding` in place —
+or delete every memory when the dimension changed — while recall kept
+comparing new-model query vectors against old-model rows. A migration now
+builds the new vectors next to the live ones and switches in one step:
+
+  1. prepare   add `embedding_next vector(D)` to the table (catalog-only,
+               no rewrite) and a trigger that clears it when a row's
+               content changes
+  2. backfill  embed every eligible row with the new model through the
+               pipelined engine in backfill.py (embed_batch, adaptive
+               page size) and write embedding_next in bulk; the id cursor is
+               checkpointed in embedding_migrations with every batch.
+               Rows written meanwhile get old-model vectors in `embedding`
+               and are picked up by the next pass
+  3. index     build the HNSW index (and messages' pending-embed index)
+               on the shadow column with CREATE INDEX CONCURRENTLY, one
+               partition at a time on the partitioned messages table
+  4. switch    live writes only ever fill `embedding`, so catch-up passes
+               embed the rows they added (outside any lock) until none is
+               pending; then one transaction for all tables re-checks
+               coverage is 100%, drops the old column with its indexes,
+               renames embedding_next → embedding and its indexes to the
+               names schema.sql uses, and points provider.active_embedding
+               at the new model. Agents reload their provider on that
+               config change (SyneAgent._on_embedding_switched).
+
+A vector an agent computed with the old model before it reloaded must not
+land in the renamed column: live writes check active_embedding_is() in
+the same statement and store NULL instead, and embed_stragglers() embeds
+those rows with the new model once the agent has reloaded.
+
+Until the switch, recall and history_search keep using the old model and
+column. Everything before it is resumable — state lives in
+embedding_migrations and in the shadow column — and cancel() drops the
+shadow column without touching live data.
+"""
+
+import asyncio
+import json
+import logging
+from typing import Callable, Optional
+
+import asyncpg
+
+from ..db.connection import get_connection
+from .backfill import DEFAULT_MAX_BATCH, BatchSizer, embed_texts, run as run_backfill
+
+logger = logging.getLogger("syne.memory.shadow")
+
+# Rows that need a vector, per table. Must match what the live code
+# embeds: every memory, user-role messages only (history_search anchors).
+TABLES = {
+    "memory": "content <> ''",
+    "messages": "role = 'user' AND content <> ''",
+}
+
+# Rows written since the switch, per table: when they were last written.
+_WRITTEN_AT = {
+    "memory": "updated_at",
+    "messages": "created_at",
+}
+
+DEFAULT_BATCH_SIZE = 64
+# Catch-up passes + switch attempts before migrate() gives up for now.
+SWITCH_ATTEMPTS = 10
+
+# HNSW parameters, same as ensure_memory_hnsw_index / ensure_messages_hnsw_index.
+_HNSW = "USING hnsw (embedding_next vector_cosine_ops) WITH (m = 24, ef_construction = 200)"
+_PENDING = "(session_id, id) WHERE role = 'user' AND embedding_next IS NULL"
+
+# Shadow index (relation, kind) → name schema.sql gives the live index.
+# Other shadow indexes (per-partition children) become <rel>_embedding_<kind>.
+_CANONICAL_INDEX = {
+    ("memory", "hnsw"): "idx_memory_embedding_hnsw",
+    ("messages", "hnsw"): "idx_messages_embedding_hnsw",
+    ("messages_hot", "hnsw"): "idx_messages_hot_embedding_hnsw",
+    ("messages_archive", "hnsw"): "idx_messages_archive_embedding_hnsw",
+    ("messages", "pending"): "idx_messages_embedding_pending",
+}
+
+# Provider config written by the switch, same keys /embedding sets.
+_PROVIDER_KEYS = (
+    ("provider.active_embedding", "key"),
+    ("provider.embedding_model", "model_id"),
+    ("provider.embedding_dimensions", "dimensions"),
+    ("provider.embedding_driver", "driver"),
+)
+
+
+class MigrationNotReady(Exception):
+    """The switch found rows without a shadow vector, or an unfinished table."""
+
+
+def _check_table(table: str) -> str:
+    if table not in TABLES:
+        raise ValueError(f"Unknown embedding table: {table!r}")
+    return table
+
+
+def _index_name(rel: str, kind: str) -> str:
+    return f"{rel}_next_{kind}"
+
+
+def _live_index_name(rel: str, kind: str) -> str:
+    return _CANONICAL_INDEX.get((rel, kind), f"{rel}_embedding_{kind}")
+
+
+def active_embedding_is(param: str) -> str:
+    """SQL condition: provider.active_embedding is still the key in `param`.
+
+    For writes of a vector computed before the statement runs — a switch in
+    between means it came from the old model.
+    """
+    return (
+        "COALESCE((SELECT value #>> '{}' FROM config "
+        f"WHERE key = 'provider.active_embedding'), '') = {param}"
+    )
+
+
+async def has_shadow(conn, table: str) -> bool:
+    """True while `table` carries an embedding_next column."""
+    return bool(await conn.fetchval("""
+        SELECT EXISTS (
+            SELECT 1 FROM pg_attribute
+            WHERE attrelid = $1::regclass AND attname = 'embedding_next' AND NOT attisdropped
+        )
+    """, _check_table(table)))
+
+
+async def pending(conn, table: str) -> int:
+    """Eligible rows that have no shadow vector yet."""
+    return int(await conn.fetchval(
+        f"SELECT count(*) FROM {_check_table(table)} "
+        f"WHERE {TABLES[table]} AND embedding_next IS NULL"
+    ))
+
+
+async def _drop_shadow(conn, table: str) -> None:
+    await conn.execute(f"DROP TRIGGER IF EXISTS trg_{table}_embedding_next ON {table}")
+    # Takes the shadow indexes with it.
+    await conn.execute(f"ALTER TABLE {table} DROP COLUMN IF EXISTS embedding_next")
+
+
+async def prepare(conn, table: str, embed_key: str, dimensions: int) -> dict:
+    """Start (or resume) migrating `table` to embed_key; returns its state row.
+
+    An unfinished migration to the same model and dimension is resumed
+    as-is. Anything else — another model, a finished migration — starts
+    over with an empty shadow column.
+    """
+    _check_table(table)
+    row = await conn.fetchrow("SELECT * FROM embedding_migrations WHERE table_name = $1", table)
+    if (
+        row and row["status"] != "switched"
+        and row["embed_key"] == embed_key and row["dimensions"] == dimensions
+        and await has_shadow(conn, table)
+    ):
+        return dict(row)
+
+    async with conn.transaction():
+        await _drop_shadow(conn, table)
+        await conn.execute(f"ALTER TABLE {table} ADD COLUMN embedding_next vector({int(dimensions)})")
+        await conn.execute(f"""
+            CREATE TRIGGER trg_{table}_embedding_next
+                BEFORE UPDATE OF content ON {table}
+                FOR EACH ROW WHEN (OLD.content IS DISTINCT FROM NEW.content)
+                EXECUTE FUNCTION reset_embedding_next()
+        """)
+        row = await conn.fetchrow("""
+            INSERT INTO embedding_migrations (table_name, embed_key, dimensions)
+            VALUES ($1, $2, $3)
+            ON CONFLICT (table_name) DO UPDATE
+                SET embed_key = $2, dimensions = $3, status = 'backfilling',
+                    last_id = 0, embedded = 0, failed = 0,
+                    started_at = NOW(), updated_at = NOW(), switched_at = NULL
+            RETURNING *
+        """, table, embed_key, int(dimensions))
+    logger.info(f"Embedding migration started: {table} → {embed_key} ({dimensions} dims)")
+    return dict(row)
+
+
+async def cancel(conn, table: str) -> bool:
+    """Abandon an unfinished migration of `table`. Live data is untouched."""
+    _check_table(table)
+    async with conn.transaction():
+        state = await conn.fetchval(
+            "DELETE FROM embedding_migrations WHERE table_name = $1 AND status <> 'switched' "
+            "RETURNING status", table,
+        )
+        await _drop_shadow(conn, table)
+    return state is not None
+
+
+async def status(conn) -> list[dict]:
+    """State rows of all migrations, with the pending count of unfinished ones."""
+    rows = [dict(r) for r in await conn.fetch(
+        "SELECT * FROM embedding_migrations ORDER BY table_name"
+    )]
+    for r in rows:
+        r["pending"] = (
+            await pending(conn, r["table_name"])
+            if r["status"] != "switched" and await has_shadow(conn, r["table_name"])
+            else 0
+        )
+    return rows
+
+
+async def backfill(
+    table: str,
+    provider,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    max_chars: Optional[int] = None,
+    progress: Optional[Callable[[str], None]] = None,
+) -> dict:
+    """Fill embedding_next for every eligible row of `table`.
+
+    Walks rows without a shadow vector in id order from the checkpointed
+    cursor through the pipelined backfill engine (backfill.py), starting at
+    batch_size rows per page; each page's UPDATE and the checkpoint commit
+    together. When the cursor runs off the end, rows written or edited
+    since are still pending, so another pass starts from id 0 — until
+    nothing is pending, or a whole pass embeds nothing (rows the model
+    keeps failing on).
+
+    Returns {"embedded", "failed", "pending"} for this call.
+    """
+    _check_table(table)
+    note = progress or logger.info
+    where = TABLES[table]
+    embedded = failed = 0
+    sizer = BatchSizer(initial=batch_size, maximum=max(batch_size, DEFAULT_MAX_BATCH))
+    async with get_connection() as conn:
+        cursor = int(await conn.fetchval(
+            "SELECT last_id FROM embedding_migrations WHERE table_name = $1", table
+        ) or 0)
+        left = await pending(conn, table)
+    full_pass = cursor == 0
+
+    async def fetch(after_id: int, limit: int) -> list:
+        async with get_connection() as conn:
+            return await conn.fetch(
+                f"SELECT id, content FROM {table} "
+                f"WHERE {where} AND embedding_next IS NULL AND id > $1 "
+                f"ORDER BY id LIMIT $2",
+                after_id, limit,
+            )
+
+    async def write(ids: list[int], vectors: list, last_id: int, failures: int) -> None:
+        async with get_connection() as conn:
+            async with conn.transaction():
+                if ids:
+                    await conn.execute(f"""
+                        UPDATE {table} t SET embedding_next = u.vec
+                        FROM unnest($1::int[], $2::vector[]) AS u(id, vec)
+                        WHERE t.id = u.id
+                    """, ids, vectors)
+                await conn.execute("""
+                    UPDATE embedding_migrations
+                    SET last_id = $2, embedded = embedded + $3, failed = failed + $4, updated_at = NOW()
+                    WHERE table_name = $1
+                """, table, last_id, len(ids), failures)
+
+    while True:
+        stats = await run_backfill(
+            fetch, write, provider,
+            after_id=cursor, total=left, sizer=sizer, max_chars=max_chars,
+            on_progress=lambda s: note(f"{table}: {s.describe()}, cursor at id {s.cursor}"),
+        )
+        embedded += stats.done
+        failed += stats.failed
+        async with get_connection() as conn:
+            left = await pending(conn, table)
+        if not left or (full_pass and not stats.done):
+            return {"embedded": embedded, "failed": failed, "pending": left}
+        note(f"{table}: {left:,} rows written since the pass started — another pass")
+        cursor, full_pass = 0, True
+        async with get_connection() as conn:
+            await conn.execute(
+                "UPDATE embedding_migrations SET last_id = 0, updated_at = NOW() "
+                "WHERE table_name = $1", table,
+            )
+
+
+async def _index_roots(conn, table: str) -> list[tuple[str, str, str]]:
+    """(root relation, kind, definition) of the shadow indexes `table` needs."""
+    if table == "memory":
+        return [("memory", "hnsw", _HNSW)]
+    from ..db.partitions import is_partitioned
+    roots = [("messages", "pending", _PENDING)]
+    if not await is_partitioned(conn):
+        return roots + [("messages", "hnsw", _HNSW)]
+    roots.append(("messages_hot", "hnsw", _HNSW))
+    archive_index = await conn.fetchval(
+        "SELECT COALESCE((SELECT value #>> '{}' = 'true' FROM config "
+        "WHERE key = 'messages.archive_index'), true)"
+    )
+    if archive_index:
+        roots.append(("messages_archive", "hnsw", _HNSW))
+    return roots
+
+
+async def _create_index_concurrently(conn, root: str, kind: str, definition: str) -> None:
+    """Build an index over a (possibly partitioned) table without blocking writers.
+
+    Partitioned tables can't CREATE INDEX CONCURRENTLY, so each partitioned
+    level gets an index ON ONLY itself, every leaf is indexed concurrently,
+    and the leaf indexes are attached bottom-up — the parent index turns
+    valid once every child is attached. Re-running after an interruption
+    drops a leftover invalid leaf index and carries on.
+    """
+    tree = await conn.fetch("""
+        SELECT relid::regclass::text AS rel, parentrelid::regclass::text AS parent, isleaf, level
+        FROM pg_partition_tree($1::regclass) ORDER BY level
+    """, root)
+    for node in tree:
+        name = _index_name(node["rel"], kind)
+        if not node["isleaf"]:
+            await conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON ONLY {node['rel']} {definition}")
+            continue
+        valid = await conn.fetchval(
+            "SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass($1)", name
+        )
+        if valid is False:
+            await conn.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+        await conn.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {node['rel']} {definition}")
+    for node in sorted(tree, key=lambda n: -n["level"]):
+        if node["parent"] and node["level"] > 0:
+            await conn.execute(
+                f"ALTER INDEX {_index_name(node['parent'], kind)} "
+                f"ATTACH PARTITION {_index_name(node['rel'], kind)}"
+            )
+
+
+async def build_indexes(conn, table: str, progress: Optional[Callable[[str], None]] = None) -> None:
+    """Index the shadow column of `table`; marks the migration ready."""
+    note = progress or logger.info
+    await conn.execute(
+        "UPDATE embedding_migrations SET status = 'indexing', updated_at = NOW() WHERE table_name = $1",
+        _check_table(table),
+    )
+    for root, kind, definition in await _index_roots(conn, table):
+        note(f"{table}: building {kind} index on {root}.embedding_next")
+        await _create_index_concurrently(conn, root, kind, definition)
+    await conn.execute(
+        "UPDATE embedding_migrations SET status = 'ready', updated_at = NOW() WHERE table_name = $1",
+        table,
+    )
+
+
+async def _rename_shadow_indexes(conn, table: str) -> None:
+    for root, kind, _ in await _index_roots(conn, table):
+        for node in await conn.fetch(
+            "SELECT relid::regclass::text AS rel FROM pg_partition_tree($1::regclass)", root
+        ):
+            name = _index_name(node["rel"], kind)
+            if await conn.fetchval("SELECT to_regclass($1) IS NOT NULL", name):
+                await conn.execute(f"ALTER INDEX {name} RENAME TO {_live_index_name(node['rel'], kind)}")
+
+
+async def switch(
+    conn,
+    tables: list[str],
+    embed_entry: dict,
+    lock_timeout: str = "5s",
+) -> None:
+    """Swap the shadow columns in and activate embed_entry, atomically.
+
+    Takes ACCESS EXCLUSIVE on every table for the few catalog changes, with
+    a lock_timeout so a long reader can't queue every other session behind
+    the switch (asyncpg.LockNotAvailableError — retry later). Nothing is
+    embedded under the lock: raises MigrationNotReady, changing nothing, if
+    any table isn't indexed or still has rows without a shadow vector —
+    catch up with backfill() and try again.
+    """
+    from ..db.config_cache import get_config_cache
+
+    async with conn.transaction():
+        await conn.execute(f"SET LOCAL lock_timeout = '{lock_timeout}'")
+        await conn.execute(f"LOCK TABLE {', '.join(map(_check_table, tables))} IN ACCESS EXCLUSIVE MODE")
+        for table in tables:
+            state = await conn.fetchval(
+                "SELECT status FROM embedding_migrations WHERE table_name = $1 AND embed_key = $2",
+                table, embed_entry["key"],
+            )
+            if state != "ready":
+                raise MigrationNotReady(f"{table}: migration is {state or 'not started'}")
+            left = await pending(conn, table)
+            if left:
+                raise MigrationNotReady(f"{table}: {left} rows without a new embedding")
+        for table in tables:
+            await conn.execute(f"DROP TRIGGER IF EXISTS trg_{table}_embedding_next ON {table}")
+            await conn.execute(f"ALTER TABLE {table} DROP COLUMN embedding")
+            await conn.execute(f"ALTER TABLE {table} RENAME COLUMN embedding_next TO embedding")
+            await _rename_shadow_indexes(conn, table)
+            await conn.execute(
+                "UPDATE embedding_migrations SET status = 'switched', switched_at = NOW(), updated_at = NOW() "
+                "WHERE table_name = $1", table,
+            )
+        previous = await conn.fetchval("SELECT value FROM config WHERE key = 'provider.active_embedding'")
+        values = [("provider.previous_embedding", json.loads(previous) if previous else None)]
+        values += [(key, embed_entry.get(field)) for key, field in _PROVIDER_KEYS]
+        for key, value in values:
+            await conn.execute("""
+                INSERT INTO config (key, value) VALUES ($1, $2::jsonb)
+                ON CONFLICT (key) DO UPDATE SET value = $2::jsonb, updated_at = NOW()
+            """, key, json.dumps(value))
+    for key, _ in values:
+        get_config_cache().invalidate(key)
+    logger.info(f"Embedding switched to {embed_entry['key']} for {', '.join(tables)}")
+
+
+async def migrate(
+    embed_entry: dict,
+    provider,
+    tables: tuple[str, ...] = tuple(TABLES),
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    max_chars: Optional[int] = None,
+    progress: Optional[Callable[[str], None]] = None,
+    switch_over: bool = True,
+) -> dict:
+    """Run (or resume) a full migration of `tables` to embed_entry.
+
+    `provider` embeds with the new model. The column dimension comes from
+    a probe embedding rather than the registry entry, so a mislabelled
+    entry can't produce a column the vectors don't fit. With
+    switch_over=False the run stops once everything is indexed.
+
+    Returns {"switched": bool, "dimensions": int, "tables": {table: backfill
+    result}, "reason": str}. reason says why a run stopped short: "failed"
+    (the new model can't embed some rows), "behind" (rows kept arriving
+    faster than the catch-up passes), "busy" (the switch never got its
+    locks) or "no_switch"; it is None after a switch.
+    """
+    note = progress or logger.info
+    probe = await provider.embed("dimension probe")
+    if not probe.vector:
+        raise RuntimeError(f"{embed_entry.get('key')}: provider returned an empty vector")
+    dimensions = len(probe.vector)
+    entry = {**embed_entry, "dimensions": dimensions}
+
+    results = {}
+    for table in tables:
+        async with get_connection() as conn:
+            state = await prepare(conn, table, entry["key"], dimensions)
+        if state["status"] == "backfilling":
+            results[table] = await backfill(table, provider, batch_size, max_chars if table == "messages" else None, note)
+            if results[table]["pending"]:
+                note(f"{table}: {results[table]['pending']:,} rows could not be embedded — stopping before the switch")
+                return {"switched": False, "dimensions": dimensions, "tables": results, "reason": "failed"}
+        if state["status"] != "ready":
+            async with get_connection() as conn:
+                await build_indexes(conn, table, note)
+
+    if not switch_over:
+        return {"switched": False, "dimensions": dimensions, "tables": results, "reason": "no_switch"}
+
+    # Rows keep arriving while the indexes build and between passes. Catch
+    # up outside the lock, then switch; a row written in between sends the
+    # switch back for another pass.
+    reason = "behind"
+    for attempt in range(SWITCH_ATTEMPTS):
+        for table in tables:
+            caught_up = await backfill(table, provider, batch_size, max_chars if table == "messages" else None, note)
+            if caught_up["pending"]:
+                note(f"{table}: {caught_up['pending']:,} rows could not be embedded — stopping before the switch")
+                return {"switched": False, "dimensions": dimensions, "tables": results, "reason": "failed"}
+        try:
+            async with get_connection() as conn:
+                await switch(conn, list(tables), entry)
+            return {"switched": True, "dimensions": dimensions, "tables": results, "reason": None}
+        except MigrationNotReady as e:
+            note(f"not switching yet: {e}")
+            reason = "behind"
+        except asyncpg.LockNotAvailableError:
+            note("tables busy — retrying the switch")
+            reason = "busy"
+            await asyncio.sleep(min(2 ** attempt, 30))
+    return {"switched": False, "dimensions": dimensions, "tables": results, "reason": reason}
+
+
+async def embed_stragglers(provider, embed_key: str, max_chars: Optional[int] = None) -> int:
+    """Embed rows a recent switch left without a vector; returns how many.
+
+    Those are rows an agent wrote with an old-model vector after the switch,
+    which active_embedding_is() turned into NULL. Run by each agent once it
+    has reloaded onto embed_key (SyneAgent._reload_for_embedding).
+    """
+    done = 0
+    async with get_connection() as conn:
+        switched = await conn.fetch(
+            "SELECT table_name, switched_at FROM embedding_migrations "
+            "WHERE status = 'switched' AND switched_at > NOW() - INTERVAL '1 hour'"
+        )
+        for row in switched:
+            table = row["table_name"]
+            if table not in TABLES:
+                continue
+            rows = await conn.fetch(
+                f"SELECT id, content FROM {table} "
+                f"WHERE {TABLES[table]} AND embedding IS NULL AND {_WRITTEN_AT[table]} >= $1 "
+                f"ORDER BY id LIMIT {DEFAULT_MAX_BATCH}",
+                row["switched_at"],
+            )
+            if not rows:
+                continue
+            limit = max_chars if table == "messages" else None
+            vectors, _ = await embed_texts(provider, [r["content"][:limit] if limit else r["content"] for r in rows])
+            ids = [r["id"] for r, v in zip(rows, vectors) if v is not None]
+            if not ids:
+                continue
+            result = await conn.execute(f"""
+                UPDATE {table} t SET embedding = u.vec
+                FROM unnest($1::int[], $2::vector[]) AS u(id, vec)
+                WHERE t.id = u.id AND t.embedding IS NULL AND {active_embedding_is("$3")}
+            """, ids, [v for v in vectors if v is not None], embed_key)
+            count = int(result.split()[-1])
+            logger.info(f"{table}: embedded {count} rows written with the old model after the switch")
+            done += count
+    return done
@@ -20,19 +20,27 @@ Design notes
   to `ERROR`. The caller degrades gracefully — the response still reaches
   the user, but with a `⚠️ [Rule checker unavailable ...]` warning
   prepended so the owner sees the response wasn't gated.
+* Latency: CLEAN verdicts are cached per draft hash + rule-set version, a
+  draft can be checked speculatively while the tool loop is still running
+  (prefetch_check), and a channel that can edit what it sent may ask for
+  the check to run after delivery instead (DeferredCheck, "retract" mode).
+  record_turn() keeps per-turn checker latency for /status.
 """
 
 from __future__ import annotations
 
 import asyncio
+import hashlib
 import logging
 import re
-from dataclasses import dataclass, field
+import statistics
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field, replace
 from enum import Enum
 from typing import Optional
 
-import httpx
-
+from .http_clients import pooled_client
 from .llm.retry import retry_budget
 from .llm.provider import ChatMessage, LLMProvider
 
@@ -50,6 +58,7 @@ class CheckResult:
     state: VerdictState
     violated: list[str] = field(default_factory=list)  # rule codes
     reason: str = ""
+    cached: bool = False  # True when no checker LLM call was made for it
 
 
 _CHECKER_PROMPT_TEMPLATE = """You are a strict but fair compliance checker. Your ONLY job is to decide whether the DRAFT RESPONSE below violates any of the HARD RULES.
@@ -197,7 +206,7 @@ async def _check_via_ollama(
     timeout: float = 120.0,
 ) -> str:
     """Direct HTTP to Ollama /api/chat — same shape as evaluate_message_ollama."""
-    async with httpx.AsyncClient(timeout=timeout) as client:
+    async with pooled_client("ollama", timeout=timeout) as client:
         resp = await client.post(
             f"{base_url.rstrip('/')}/api/chat",
             json={
@@ -243,10 +252,86 @@ async def _check_via_provider(
         return (response.content or "").strip()
 
     return await asyncio.wait_for(_call(), timeout=timeout)
-async def check_response(
-    draft: str,
 
 
+# ── Verdict cache + single-flight ─────────────────────────────────────
+# Only CLEAN verdicts are cached: a VIOLATED draft is rewritten anyway, and
+# ERROR must be retried. The key is the draft hash plus the rule-set
+# version (plus the inputs that change the verdict for the same text:
+# tools_ran and which model judges), so editing any hard rule invalidates
+# every entry at once. Entries expire after the caller's cache_ttl; the
+# prompt also carries the Current Time block, which the key leaves out, so
+# keep the TTL short. A check already in flight for the same key (a
+# speculative check started from the tool loop) is joined, not repeated.
+
+_CACHE_MAX = 512
+_clean_cache: "OrderedDict[str, float]" = OrderedDict()  # key -> monotonic expiry
+_inflight: dict[str, asyncio.Task] = {}
+
+
+def rules_version(hard_rules: list[dict]) -> str:
+    """Short hash of the hard-rule set (code, name, description)."""
+    h = hashlib.sha256()
+    for r in sorted(hard_rules, key=lambda r: str(r.get("code", ""))):
+        h.update(f"{r.get('code', '')}\x1f{r.get('name', '')}\x1f{r.get('description', '')}\x1e".encode())
+    return h.hexdigest()[:16]
+
+
+def _verdict_key(
+    draft: str, hard_rules: list[dict], tools_ran: bool,
+    evaluator_driver: str, evaluator_model: str, provider: Optional[LLMProvider],
+) -> str:
+    if evaluator_driver == "ollama":
+        judge = f"ollama:{evaluator_model}"
+    else:
+        judge = f"provider:{getattr(provider, 'chat_model', '') or getattr(provider, 'name', '')}"
+    digest = hashlib.sha256((draft or "").strip().encode()).hexdigest()
+    return f"{rules_version(hard_rules)}:{judge}:{int(bool(tools_ran))}:{digest}"
+
+
+def _cached_clean(key: str) -> bool:
+    expires = _clean_cache.get(key)
+    if expires is None:
+        return False
+    if expires < time.monotonic():
+        del _clean_cache[key]
+        return False
+    _clean_cache.move_to_end(key)
+    return True
+
+
+def _remember(key: str, verdict: CheckResult, ttl: float) -> None:
+    if verdict.state != VerdictState.CLEAN:
+        return
+    _clean_cache[key] = time.monotonic() + ttl
+    _clean_cache.move_to_end(key)
+    while len(_clean_cache) > _CACHE_MAX:
+        _clean_cache.popitem(last=False)
+
+
+def _start(key: str, ttl: float, kwargs: dict) -> asyncio.Task:
+    """The in-flight check for `key`, starting one if there is none."""
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.create_task(_judge(**kwargs))
+
+        def _done(t: asyncio.Task) -> None:
+            _inflight.pop(key, None)
+            if not t.cancelled() and t.exception() is None:
+                _remember(key, t.result(), ttl)
+
+        task.add_done_callback(_done)
+        _inflight[key] = task
+    return task
+
+
+def clear_cache() -> None:
+    """Drop every cached verdict (tests, rule edits made outside the DB)."""
+    _clean_cache.clear()
+
+
+async def check_response(
+    draft: str,
     user_message: str,
     hard_rules: list[dict],
     evaluator_driver: str = "ollama",
@@ -255,6 +340,7 @@ async def check_response(
     tools_ran: bool = True,
     time_context: str = "",
     timeout: float = 120.0,
+    cache_ttl: float = 0.0,
 ) -> CheckResult:
     """Judge a draft response against every hard rule.
 
@@ -278,9 +364,13 @@ async def check_response(
             it raises TimeoutError, caught below and returned as ERROR so the
             caller fails open. The caller clamps this (5-120) from
             security.rule_checker_timeout.
+        cache_ttl: Seconds a CLEAN verdict for the same draft + rule set is
+            reused without an LLM call (security.rule_checker_cache_ttl).
+            0 disables both the cache and joining an in-flight check.
 
     Returns:
-        CheckResult with state CLEAN / VIOLATED / ERROR.
+        CheckResult with state CLEAN / VIOLATED / ERROR; `cached` is True
+        when no LLM call was made for it.
         ERROR is fail-open: the caller must send the draft with a warning.
     """
     # Nothing to check — pass through as CLEAN. No rules == nothing to
@@ -291,6 +381,59 @@ async def check_response(
     if not (draft and draft.strip()):
         return CheckResult(VerdictState.CLEAN)
 
+    kwargs = dict(
+        draft=draft, user_message=user_message, hard_rules=hard_rules,
+        evaluator_driver=evaluator_driver, evaluator_model=evaluator_model,
+        provider=provider, tools_ran=tools_ran, time_context=time_context,
+        timeout=timeout,
+    )
+    if cache_ttl <= 0:
+        return await _judge(**kwargs)
+
+    key = _verdict_key(draft, hard_rules, tools_ran, evaluator_driver, evaluator_model, provider)
+    if _cached_clean(key):
+        return CheckResult(VerdictState.CLEAN, cached=True)
+    joined = key in _inflight
+    # Shielded: a caller giving up (turn cancelled) must not cancel a
+    # check another caller is waiting on.
+    verdict = await asyncio.shield(_start(key, cache_ttl, kwargs))
+    if joined:
+        return replace(verdict, cached=True)
+    return verdict
+
+
+def prefetch_check(draft: str, hard_rules: list[dict], cache_ttl: float, **kwargs) -> None:
+    """Start checking `draft` in the background; a later check_response() joins it.
+
+    Used for text that is likely to be (or become) the final draft before
+    the turn asks for its verdict — e.g. the text that accompanies a tool
+    round. No-op when caching is off, nothing is checkable, or the verdict
+    is already cached or being computed.
+    """
+    if cache_ttl <= 0 or not hard_rules or not (draft and draft.strip()):
+        return
+    key = _verdict_key(
+        draft, hard_rules, kwargs.get("tools_ran", True),
+        kwargs.get("evaluator_driver", "ollama"), kwargs.get("evaluator_model", "qwen3:0.6b"),
+        kwargs.get("provider"),
+    )
+    if _cached_clean(key):
+        return
+    _start(key, cache_ttl, dict(kwargs, draft=draft, hard_rules=hard_rules))
+
+
+async def _judge(
+    draft: str,
+    user_message: str,
+    hard_rules: list[dict],
+    evaluator_driver: str = "ollama",
+    evaluator_model: str = "qwen3:0.6b",
+    provider: Optional[LLMProvider] = None,
+    tools_ran: bool = True,
+    time_context: str = "",
+    timeout: float = 120.0,
+) -> CheckResult:
+    """One checker LLM call and its parsed, code-filtered verdict."""
     prompt = _build_prompt(
         draft, user_message, hard_rules,
         tools_ran=tools_ran, time_context=time_context,
@@ -331,3 +474,91 @@ async def check_response(
             return CheckResult(VerdictState.ERROR, reason="unknown codes from checker")
 
     return verdict
+
+
+class DeferredCheck:
+    """A rule check that runs after its draft was delivered ("retract" mode).
+
+    The channel puts one in the turn's metadata as "deferred_rule_check";
+    the conversation then starts the check with start() instead of awaiting
+    it, and returns the draft at once. After sending, the channel awaits
+    verdict() and edits or deletes what it sent if the draft was VIOLATED.
+    """
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self, coro) -> None:
+        self._task = asyncio.create_task(coro)
+
+    @property
+    def started(self) -> bool:
+        return self._task is not None
+
+    def cancel(self) -> None:
+        """Drop the check (the reply never went out)."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def verdict(self) -> Optional[CheckResult]:
+        """The verdict, or None if no check was started or it crashed."""
+        if self._task is None:
+            return None
+        try:
+            return await self._task
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Deferred rule check crashed — reply left as sent")
+            return None
+
+
+# ── Per-turn latency ──────────────────────────────────────────────────
+# What the checker cost each turn: total time spent in checks, and how much
+# of it the user actually waited for (0 when the reply went out first in
+# retract mode). Shown by /status.
+
+_TURN_SAMPLES = 200
+_turns: deque[tuple[float, float]] = deque(maxlen=_TURN_SAMPLES)  # (checker_s, blocked_s)
+_counters = {"turns": 0, "checks": 0, "cache_hits": 0, "deferred": 0, "retracted": 0}
+
+
+def record_turn(
+    checker_seconds: float, blocked_seconds: float, checks: int, cache_hits: int,
+    deferred: bool = False,
+) -> None:
+    """Record one turn's checker latency."""
+    _turns.append((checker_seconds, blocked_seconds))
+    _counters["turns"] += 1
+    _counters["checks"] += checks
+    _counters["cache_hits"] += cache_hits
+    if deferred:
+        _counters["deferred"] += 1
+    logger.info(
+        f"Rule checker turn: {checker_seconds * 1000:.0f}ms over {checks} check(s), "
+        f"{cache_hits} cached, user waited {blocked_seconds * 1000:.0f}ms"
+        f"{' (deferred)' if deferred else ''}"
+    )
+
+
+def record_retraction() -> None:
+    """A reply that was already delivered got retracted after the check."""
+    _counters["retracted"] += 1
+
+
+def _p(values: list[float], q: float) -> int:
+    return round(values[max(0, int(len(values) * q) - 1)] * 1000) if values else 0
+
+
+def stats() -> dict:
+    """Recent per-turn checker latency (ms) and lifetime counters."""
+    checker = sorted(c for c, _ in _turns)
+    blocked = sorted(b for _, b in _turns)
+    return {
+        **_counters,
+        "checker_p50_ms": round(statistics.median(checker) * 1000) if checker else 0,
+        "checker_p95_ms": _p(checker, 0.95),
+        "blocked_p50_ms": round(statistics.median(blocked) * 1000) if blocked else 0,
+        "blocked_p95_ms": _p(blocked, 0.95),
+    }
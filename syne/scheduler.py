@@ -1,7 +1,9 @@
 """Scheduler — Background task scheduler with DB persistence.
 
 Runs as an asyncio background task alongside the Telegram bot.
-Checks for due tasks every 30 seconds and executes them.
+Sleeps until the next task is due (in-memory timer heap), woken early by
+NOTIFY syne_scheduler when scheduled_tasks changes, and runs due tasks
+concurrently on a bounded worker pool.
 
 Task types:
 - 'once': Execute once at specified time, then disable
@@ -10,7 +12,9 @@ Task types:
 """
 
 import asyncio
+import heapq
 import logging
+import time
 from datetime import datetime, timedelta, timezone
 from typing import Callable, Optional, Awaitable
 
@@ -21,9 +25,32 @@ except Exception:  # pragma: no cover
 
 logger = logging.getLogger("syne.scheduler")
 
-# Check interval in seconds
+# NOTIFY channel fired by the notify_scheduled_task_change() trigger.
+NOTIFY_CHANNEL = "syne_scheduler"
+
+# Poll interval (seconds) while there is no LISTEN connection; also the
+# retry delay after a failed task run.
 _CHECK_INTERVAL = 30
 
+# Full re-read of the table while LISTEN is healthy — a safety net for a
+# lost notification.
+_RELOAD_LISTENING = 300
+
+# How far a claimed task's next_run is pushed out while it runs, renewed
+# every _LEASE_RENEW seconds until the run ends. If the process dies
+# mid-run the task becomes due again after this.
+_CLAIM_LEASE = 900
+_LEASE_RENEW = _CLAIM_LEASE / 3
+
+# Pause before re-checking a task that could not be claimed.
+_UNCLAIMED_BACKOFF = 1.0
+
+_DEFAULT_MAX_CONCURRENT = 3
+_CLEANUP_INTERVAL = 86400
+
+# Backoff between LISTEN reconnect attempts.
+_RECONNECT_DELAYS = [1, 2, 5, 10, 30]
+
 
 def _get_tz(tz_name: str):
     """Resolve IANA timezone name to a tzinfo, fallback to UTC."""
@@ -131,17 +158,33 @@ async def _get_system_tz():
 
 class Scheduler:
     """Background task scheduler.
-    
+
     Usage:
-        scheduler = Scheduler(on_task_execute=my_callback)
+        scheduler = Scheduler(on_task_execute=my_callback, dsn=database_url)
         await scheduler.start()
         # ... later ...
         await scheduler.stop()
+
+    Due times are kept in an in-memory min-heap of (next_run, task_id).
+    The loop sleeps until the earliest entry, or until a NOTIFY on
+    syne_scheduler (a trigger on scheduled_tasks fires it for every insert,
+    delete and enabled/next_run change, from any process) says the table
+    changed — so tasks fire within a second of next_run.
+
+    Due tasks run on a bounded pool (scheduler.max_concurrent). Each run is
+    claimed with SELECT ... FOR UPDATE SKIP LOCKED, which pushes next_run
+    out by a lease, so two Syne processes sharing one DB never run the same
+    task twice. No connection is held while the callback (a full LLM turn)
+    runs; bookkeeping is written in a second short transaction afterwards.
+
+    Without a dsn (or while the LISTEN connection is down) the table is
+    re-read every _CHECK_INTERVAL seconds instead.
     """
-    
+
     def __init__(
         self,
         on_task_execute: Callable[..., Awaitable[None]],
+        dsn: Optional[str] = None,
     ):
         """Initialize scheduler.
 
@@ -149,48 +192,79 @@ class Scheduler:
             on_task_execute: Async callback when task executes.
                 Args: (task_id, payload, created_by, target_chat_id, target_chat_type)
                 The callback should inject payload as user message.
+            dsn: Database URL for the dedicated LISTEN connection. None =
+                poll every _CHECK_INTERVAL seconds.
         """
         self._on_execute = on_task_execute
+        self._dsn = dsn
         self._running = False
         self._task: Optional[asyncio.Task] = None
-    
+        self._heap: list[tuple[datetime, int]] = []
+        self._due_at: dict[int, datetime] = {}      # task_id -> next_run (heap entries not matching are stale)
+        self._changed: set[int] = set()             # task ids to re-read
+        self._reload_needed = True
+        self._loaded_at = 0.0
+        self._wake = asyncio.Event()
+        self._inflight: dict[int, asyncio.Task] = {}
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._listener_task: Optional[asyncio.Task] = None
+        self._listen_conn = None
+        self._listening = False
+
     async def start(self):
         """Start the scheduler background task."""
         if self._running:
             logger.warning("Scheduler already running")
             return
-        
+
         self._running = True
         self._task = asyncio.create_task(self._run_loop())
         logger.info("Scheduler started")
-    
+
     async def stop(self):
         """Stop the scheduler."""
         self._running = False
-        if self._task:
-            self._task.cancel()
+        tasks = [t for t in (self._task, self._listener_task) if t]
+        tasks += list(self._inflight.values())
+        for t in tasks:
+            t.cancel()
+        for t in tasks:
             try:
-                await self._task
-            except asyncio.CancelledError:
+                await t
+            except (asyncio.CancelledError, Exception):
                 pass
+        self._listener_task = None
+        if self._listen_conn is not None and not self._listen_conn.is_closed():
+            await self._listen_conn.close()
+        self._listen_conn = None
+        self._listening = False
         logger.info("Scheduler stopped")
-    
+
     async def _run_loop(self):
-        """Main scheduler loop."""
-        # Start near the threshold so the first cleanup pass runs shortly
-        # after startup (files may already be long overdue), then daily.
-        cleanup_counter = 2878
+        """Main scheduler loop: sleep until the next due task or a NOTIFY."""
+        from .db.models import get_config
+
+        try:
+            slots = max(1, int(await get_config("scheduler.max_concurrent", _DEFAULT_MAX_CONCURRENT)))
+        except Exception:
+            slots = _DEFAULT_MAX_CONCURRENT
+        self._slots = asyncio.Semaphore(slots)
+        if self._dsn:
+            self._listener_task = asyncio.create_task(self._listen_loop())
+
+        # First cleanup pass shortly after startup (files may already be
+        # long overdue), then daily.
+        next_cleanup = time.monotonic() + 60
         while self._running:
             try:
-                await self._check_and_execute()
+                await self._sync()
+                self._dispatch_due()
             except Exception as e:
                 logger.error(f"Scheduler error: {e}", exc_info=True)
 
             # Periodic cleanup: delete disabled tasks older than 30 days.
-            # Runs roughly once per day (every ~2880 checks at 30s interval).
-            cleanup_counter += 1
-            if cleanup_counter >= 2880:
-                cleanup_counter = 0
+            if time.monotonic() >= next_cleanup:
+                next_cleanup = time.monotonic() + _CLEANUP_INTERVAL
                 try:
                     await self._cleanup_expired()
                 except Exception as e:
@@ -199,8 +273,12 @@ class Scheduler:
                     await self._cleanup_workspace()
                 except Exception as e:
                     logger.error(f"Workspace cleanup error: {e}")
+                try:
+                    await self._ensure_message_partitions()
+                except Exception as e:
+                    logger.error(f"Message partition maintenance error: {e}")
 
-            await asyncio.sleep(_CHECK_INTERVAL)
+            await self._sleep()
 
     async def _cleanup_expired(self):
         """Delete disabled tasks older than 30 days."""
@@ -218,6 +296,20 @@ class Scheduler:
         if count != "0":
             logger.info(f"Cleanup: deleted {count} expired disabled tasks (>30 days old)")
 
+    async def _ensure_message_partitions(self):
+        """Create next months' messages partitions before rows arrive for them.
+
+        Without this an agent that runs for months without a restart (the
+        schema replay also creates them) would start filling
+        messages_hot_default. No-op on an unpartitioned legacy table.
+        """
+        from .db.connection import get_connection
+
+        async with get_connection() as conn:
+            created = await conn.fetchval("SELECT ensure_messages_partitions()")
+        if created:
+            logger.info(f"Created {created} messages partition(s)")
+
     async def _cleanup_workspace(self):
         """Delete files older than workspace.retention_days from workspace dirs.
 
@@ -272,40 +364,192 @@ class Scheduler:
                 f"Workspace cleanup: removed {removed} files older than "
                 f"{days} days, freed {freed / 1_000_000:.1f} MB"
             )
-    
-    async def _check_and_execute(self):
-        """Check for due tasks and execute them."""
+
+    # ── timer heap ─────────────────────────────────────────────────────
+
+    def _set_due(self, task_id: int, next_run: Optional[datetime]) -> None:
+        if next_run is None:
+            self._due_at.pop(task_id, None)
+            return
+        self._due_at[task_id] = next_run
+        heapq.heappush(self._heap, (next_run, task_id))
+
+    async def _sync(self) -> None:
+        """Bring the heap up to date: full reload when needed, else re-read changed ids."""
         from .db.connection import get_connection
-        
+
+        ttl = _RELOAD_LISTENING if self._listening else _CHECK_INTERVAL
+        if self._reload_needed or time.monotonic() - self._loaded_at > ttl:
+            self._reload_needed = False
+            self._changed.clear()  # ids notified after this point are re-read next pass
+            async with get_connection() as conn:
+                rows = await conn.fetch("""
+                    SELECT id, next_run FROM scheduled_tasks
+                    WHERE enabled = true AND next_run IS NOT NULL
+                """)
+            self._due_at = {r["id"]: r["next_run"] for r in rows}
+            self._heap = [(nr, tid) for tid, nr in self._due_at.items()]
+            heapq.heapify(self._heap)
+            self._loaded_at = time.monotonic()
+            return
+
+        if self._changed:
+            ids = list(self._changed)
+            self._changed.clear()
+            async with get_connection() as conn:
+                rows = await conn.fetch("""
+                    SELECT id, next_run FROM scheduled_tasks
+                    WHERE id = ANY($1::int[]) AND enabled = true
+                """, ids)
+            found = {r["id"]: r["next_run"] for r in rows}
+            for tid in ids:
+                if self._due_at.get(tid) != found.get(tid):
+                    self._set_due(tid, found.get(tid))
+
+    def _dispatch_due(self) -> None:
+        """Pop every due heap entry and hand it to the worker pool."""
+        now = datetime.now(timezone.utc)
+        while self._heap and self._heap[0][0] <= now:
+            due, tid = heapq.heappop(self._heap)
+            if self._due_at.get(tid) != due or tid in self._inflight:
+                continue  # stale entry, or already running in this process
+            del self._due_at[tid]
+            self._inflight[tid] = asyncio.create_task(self._run_task(tid))
+
+    async def _sleep(self) -> None:
+        timeout = _RELOAD_LISTENING if self._listening else _CHECK_INTERVAL
+        if self._heap:
+            until_due = (self._heap[0][0] - datetime.now(timezone.utc)).total_seconds()
+            timeout = min(timeout, max(0.0, until_due))
+        try:
+            await asyncio.wait_for(self._wake.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._wake.clear()
+
+    # ── LISTEN ─────────────────────────────────────────────────────────
+
+    def _on_notify(self, conn, pid, channel, payload) -> None:
+        try:
+            self._changed.add(int(payload))
+        except (TypeError, ValueError):
+            self._reload_needed = True
+        self._wake.set()
+
+    async def _listen_loop(self) -> None:
+        """Hold a dedicated LISTEN connection; reconnect if it drops."""
+        import asyncpg
+
+        attempt = 0
+        while self._running:
+            try:
+                conn = await asyncpg.connect(self._dsn)
+                self._listen_conn = conn
+                lost = asyncio.get_running_loop().create_future()
+                conn.add_termination_listener(
+                    lambda _c: lost.done() or lost.set_result(None)
+                )
+                await conn.add_listener(NOTIFY_CHANNEL, self._on_notify)
+                # Anything may have changed while we were not listening.
+                self._listening = True
+                self._reload_needed = True
+                self._wake.set()
+                attempt = 0
+                logger.debug("Scheduler: LISTEN connection established")
+                await lost
+                logger.warning("Scheduler: LISTEN connection lost — polling until reconnected")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Scheduler: LISTEN connect failed: {e}")
+            self._listening = False
+            self._listen_conn = None
+            delay = _RECONNECT_DELAYS[min(attempt, len(_RECONNECT_DELAYS) - 1)]
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    # ── execution ──────────────────────────────────────────────────────
+
+    async def _run_task(self, task_id: int) -> None:
+        """Worker: wait for a slot, claim, execute, record the outcome."""
+        ran = False
+        try:
+            async with self._slots:
+                claimed = await self._claim(task_id)
+                if claimed is None:
+                    return
+                ran = True
+                task, now = claimed
+                logger.info(
+                    f"Executing scheduled task: {task['name']} (id={task_id}) "
+                    f"target={task['target_chat_id']}"
+                )
+                lease = asyncio.create_task(
+                    self._renew_lease(task_id, now + timedelta(seconds=_CLAIM_LEASE))
+                )
+                try:
+                    await self._on_execute(
+                        task_id, task["payload"], task["created_by"],
+                        task["target_chat_id"], task["target_chat_type"],
+                    )
+                except Exception as e:
+                    logger.error(f"Error executing task {task_id}: {e}", exc_info=True)
+                    # Don't disable on error — retry after the normal check interval
+                    await self._reschedule(task_id, now + timedelta(seconds=_CHECK_INTERVAL))
+                    return
+                finally:
+                    lease.cancel()
+                await self._complete(task, now)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Scheduler: task {task_id} failed: {e}", exc_info=True)
+        finally:
+            if not ran and self._running:
+                # Claimed elsewhere, or the DB is unhappy: the row may still
+                # look due, so don't re-dispatch it in a tight loop.
+                await asyncio.sleep(_UNCLAIMED_BACKOFF)
+            self._inflight.pop(task_id, None)
+            # Pick up the next_run written above (or by another process).
+            self._changed.add(task_id)
+            self._wake.set()
+
+    async def _claim(self, task_id: int):
+        """Claim a due task for this process, or None if it is not ours to run.
+
+        Runs in one short transaction. SKIP LOCKED makes a concurrent claim
+        by another process return nothing instead of waiting. A claimed
+        task's next_run is pushed out by _CLAIM_LEASE so it is not due for
+        anyone else while it runs (_renew_lease keeps it there for runs
+        longer than that); if this process dies mid-run the lease expires
+        and the task is picked up again.
+
+        Recurring tasks that are more than scheduler.misfire_grace_seconds
+        overdue are advanced without running.
+        """
+        from .db.connection import get_connection
+        from .db.models import get_config
+
+        grace = await get_config("scheduler.misfire_grace_seconds", 300)
         now = datetime.now(timezone.utc)
-        
         async with get_connection() as conn:
-            # Get all due tasks
-            due_tasks = await conn.fetch(
-                """
-                SELECT id, name, schedule_type, schedule_value, payload, created_by, end_date, next_run,
-                       target_chat_id, target_chat_type
-                FROM scheduled_tasks
-                WHERE enabled = true
-                  AND next_run <= $1
-                ORDER BY next_run ASC
-                """,
-                now,
-            )
-            
-            # Load misfire grace window and system timezone
-            from .db.models import get_config
-            grace = await get_config("scheduler.misfire_grace_seconds", 300)
-            sys_tz = await _get_system_tz()
-
-            for task in due_tasks:
-                task_id = task["id"]
-                task_name = task["name"]
+            async with conn.transaction():
+                task = await conn.fetchrow(
+                    """
+                    SELECT id, name, schedule_type, schedule_value, payload, created_by, end_date, next_run,
+                           target_chat_id, target_chat_type
+                    FROM scheduled_tasks
+                    WHERE id = $1
+                      AND enabled = true
+                      AND next_run <= $2
+                    FOR UPDATE SKIP LOCKED
+                    """,
+                    task_id, now,
+                )
+                if task is None:
+                    return None  # not due any more, deleted, or claimed elsewhere
+
                 schedule_type = task["schedule_type"]
-                schedule_value = task["schedule_value"]
-                payload = task["payload"]
-                created_by = task["created_by"]
-                end_date = task["end_date"]
                 task_next_run = task["next_run"]
 
                 # Misfire check: skip recurring tasks that are too far overdue
@@ -313,19 +557,15 @@ class Scheduler:
                     overdue = (now - task_next_run).total_seconds()
                     if overdue > grace:
                         logger.warning(
-                            f"Skipping overdue task {task_id} ({task_name}): "
+                            f"Skipping overdue task {task_id} ({task['name']}): "
                             f"{overdue:.0f}s late (grace={grace}s)"
                         )
                         # Advance next_run without executing
-                        cron_tz = sys_tz if schedule_type == "cron" else None
-                        next_run = _calculate_next_run(schedule_type, schedule_value, now, tz=cron_tz)
+                        cron_tz = await _get_system_tz() if schedule_type == "cron" else None
+                        next_run = _calculate_next_run(schedule_type, task["schedule_value"], now, tz=cron_tz)
                         if next_run:
                             await conn.execute(
-                                """
-                                UPDATE scheduled_tasks
-                                SET next_run = $1
-                                WHERE id = $2
-                                """,
+                                "UPDATE scheduled_tasks SET next_run = $1 WHERE id = $2",
                                 next_run, task_id,
                             )
                         else:
@@ -334,80 +574,104 @@ class Scheduler:
                                 "UPDATE scheduled_tasks SET enabled = false WHERE id = $1",
                                 task_id,
                             )
-                        continue
+                        return None
+
+                await conn.execute(
+                    "UPDATE scheduled_tasks SET next_run = $1 WHERE id = $2",
+                    now + timedelta(seconds=_CLAIM_LEASE), task_id,
+                )
+        return task, now
+
+    async def _renew_lease(self, task_id: int, leased_until: datetime) -> None:
+        """Keep a running task's claim alive until the run ends.
+
+        A callback is an agent turn and can outlast one lease; without
+        renewal the task would turn due again mid-run and another process
+        would run it a second time. Only a next_run this process set is
+        moved — if the row was edited, disabled or deleted meanwhile the
+        renewal stops and the edit stands.
+        """
+        from .db.connection import get_connection
 
-                target_chat_id = task["target_chat_id"]
-                target_chat_type = task["target_chat_type"]
+        while True:
+            await asyncio.sleep(_LEASE_RENEW)
+            renewed = datetime.now(timezone.utc) + timedelta(seconds=_CLAIM_LEASE)
+            try:
+                async with get_connection() as conn:
+                    status = await conn.execute(
+                        "UPDATE scheduled_tasks SET next_run = $1 WHERE id = $2 AND next_run = $3",
+                        renewed, task_id, leased_until,
+                    )
+            except Exception as e:
+                logger.warning(f"Scheduler: lease renewal for task {task_id} failed: {e}")
+                continue
+            if not str(status).endswith(" 1"):
+                logger.warning(f"Scheduler: task {task_id} changed while running; lease no longer renewed")
+                return
+            leased_until = renewed
+
+    async def _reschedule(self, task_id: int, next_run: datetime) -> None:
+        from .db.connection import get_connection
 
-                logger.info(f"Executing scheduled task: {task_name} (id={task_id}) target={target_chat_id}")
+        async with get_connection() as conn:
+            await conn.execute(
+                "UPDATE scheduled_tasks SET next_run = $1 WHERE id = $2",
+                next_run, task_id,
+            )
 
-                try:
-                    # Execute the callback
-                    await self._on_execute(task_id, payload, created_by, target_chat_id, target_chat_type)
-                    
-                    # Update task based on type
-                    if schedule_type == "once":
-                        # Disable one-time tasks after execution (keep for audit trail)
-                        await conn.execute(
-                            """
-                            UPDATE scheduled_tasks
-                            SET enabled = false,
-                                last_run = $1,
-                                run_count = run_count + 1
-                            WHERE id = $2
-                            """,
-                            now, task_id,
-                        )
-                    else:
-                        # Calculate next run for interval/cron
-                        cron_tz = sys_tz if schedule_type == "cron" else None
-                        next_run = _calculate_next_run(schedule_type, schedule_value, now, tz=cron_tz)
-                        
-                        if next_run:
-                            # Check end_date: if next_run exceeds end_date, disable task
-                            if end_date and next_run > end_date:
-                                logger.info(
-                                    f"Task {task_id} ({task_name}) reached end_date "
-                                    f"{end_date.isoformat()}, disabling"
-                                )
-                                await conn.execute(
-                                    """
-                                    UPDATE scheduled_tasks
-                                    SET enabled = false,
-                                        last_run = $1,
-                                        run_count = run_count + 1
-                                    WHERE id = $2
-                                    """,
-                                    now, task_id,
-                                )
-                            else:
-                                await conn.execute(
-                                    """
-                                    UPDATE scheduled_tasks
-                                    SET last_run = $1,
-                                        next_run = $2,
-                                        run_count = run_count + 1
-                                    WHERE id = $3
-                                    """,
-                                    now, next_run, task_id,
-                                )
-                        else:
-                            # Failed to calculate next run — disable
-                            logger.error(f"Failed to calculate next run for task {task_id}, disabling")
-                            await conn.execute(
-                                """
-                                UPDATE scheduled_tasks
-                                SET enabled = false,
-                                    last_run = $1,
-                                    run_count = run_count + 1
-                                WHERE id = $2
-                                """,
-                                now, task_id,
-                            )
-                
-                except Exception as e:
-                    logger.error(f"Error executing task {task_id}: {e}", exc_info=True)
-                    # Don't disable on error — will retry next interval
+    async def _complete(self, task, now: datetime) -> None:
+        """Record a successful run: last_run, run_count and the next schedule."""
+        from .db.connection import get_connection
+
+        task_id = task["id"]
+        task_name = task["name"]
+        schedule_type = task["schedule_type"]
+        end_date = task["end_date"]
+
+        if schedule_type == "once":
+            # Disable one-time tasks after execution (keep for audit trail)
+            next_run, disable = None, True
+        else:
+            # Calculate next run for interval/cron
+            cron_tz = await _get_system_tz() if schedule_type == "cron" else None
+            next_run = _calculate_next_run(schedule_type, task["schedule_value"], now, tz=cron_tz)
+            if not next_run:
+                # Failed to calculate next run — disable
+                logger.error(f"Failed to calculate next run for task {task_id}, disabling")
+                disable = True
+            elif end_date and next_run > end_date:
+                # next_run exceeds end_date — disable task
+                logger.info(
+                    f"Task {task_id} ({task_name}) reached end_date "
+                    f"{end_date.isoformat()}, disabling"
+                )
+                disable = True
+            else:
+                disable = False
+
+        async with get_connection() as conn:
+            if disable:
+                await conn.execute(
+                    """
+                    UPDATE scheduled_tasks
+                    SET enabled = false,
+                        last_run = $1,
+                        run_count = run_count + 1
+                    WHERE id = $2
+                    """,
+                    now, task_id,
+                )
+            else:
+                await conn.execute(
+                    """
+                    UPDATE scheduled_tasks
+                    SET last_run = $1,
+                        next_run = $2,
+                        run_count = run_count + 1
+                    WHERE id = $3
+                    """,
+                    now, next_run, task_id,
+                )
 
 
 # ═══════════════════════════════════════════════════════════════
@@ -8,15 +8,33 @@ Sub-agents are a CORE capability (not an ability). They enable:
 
 Guard rails:
 - Max concurrent sub-agents (default: 2)
-- Timeout per sub-agent (default: 24 hours)
+- Timeout per sub-agent (default: 48 hours)
 - No nesting: sub-agents cannot spawn sub-agents
 - Owner can disable entirely via config
 - SECURITY: Sub-agents inherit owner tools but config/management tools blocked
+
+Durability: subagent_runs is a job queue. A run is claimed by one process
+(claimed_by) and keeps a lease alive with heartbeat_at; after every tool
+round the conversation so far is written to `checkpoint`. A run whose
+lease expires (process crashed, host gone) is claimed again with
+SELECT ... FOR UPDATE SKIP LOCKED and continues from its last checkpoint,
+up to subagents.max_attempts claims. A clean shutdown hands its runs back
+to the queue at once.
+
+subagents.executor picks who runs them: "inline" — the bot process, as
+before — or "worker" — `syne worker` processes, on this host or others
+sharing the database, so long tool-heavy runs stay off the chat event
+loop. Results are delivered by the bot process either way: a trigger
+NOTIFYs syne_subagents on every status change, and delivered_at makes
+delivery happen exactly once, including for runs that finished while the
+bot was down.
 """
 
 import asyncio
 import json
 import logging
+import os
+import socket
 import uuid
 from typing import Optional, Callable, Awaitable
 
@@ -27,6 +45,44 @@ from .security import get_subagent_access_level, filter_tools_for_subagent
 
 logger = logging.getLogger("syne.subagent")
 
+# NOTIFY channel fired by the notify_subagent_run_change() trigger.
+NOTIFY_CHANNEL = "syne_subagents"
+
+# Statuses a run never leaves; these are delivered to the parent session.
+TERMINAL_STATUSES = ("completed", "incomplete", "failed", "cancelled")
+
+_DEFAULT_LEASE = 300
+_DEFAULT_MAX_ATTEMPTS = 3
+
+# Per-process suffix of worker_id: host:pid alone repeats across container
+# restarts (same hostname, pid 1), which would let a new process pass the
+# claimed_by checks on a dead one's leases.
+_PROCESS_TAG = uuid.uuid4().hex[:8]
+
+# Queue re-check interval while LISTEN is healthy / while it is down.
+_POLL_LISTENING = 60
+_POLL_DEGRADED = 10
+
+# Backoff between LISTEN reconnect attempts.
+_RECONNECT_DELAYS = [1, 2, 5, 10, 30]
+
+
+def _dump_messages(messages: list[ChatMessage]) -> list[dict]:
+    """ChatMessages as JSON-safe dicts for the checkpoint column."""
+    return [{"role": m.role, "content": m.content, "metadata": m.metadata} for m in messages]
+
+
+def _load_messages(data: list[dict]) -> list[ChatMessage]:
+    return [ChatMessage(role=m["role"], content=m["content"], metadata=m.get("metadata")) for m in data]
+
+
+def _row_count(status: str) -> int:
+    """Rows affected, from an asyncpg command status like "UPDATE 3"."""
+    try:
+        return int(status.split()[-1])
+    except (AttributeError, IndexError, ValueError):
+        return 0
+
 
 class SubAgentIncomplete(Exception):
     """Raised when a sub-agent reaches max_rounds before finishing the task.
@@ -41,6 +97,10 @@ class SubAgentIncomplete(Exception):
         super().__init__("Sub-agent reached max rounds before completing the task")
 
 
+class LeaseLost(Exception):
+    """The run was cancelled, or claimed by another process, while this one ran it."""
+
+
 class SubAgentManager:
     """Manages sub-agent lifecycle: spawn, monitor, deliver results."""
 
@@ -49,9 +109,22 @@ class SubAgentManager:
         self.system_prompt = system_prompt
         self.tools = None          # ToolRegistry — set by agent after init
         self.abilities = None      # AbilityRegistry — set by agent after init
+        self.provider_factory = None  # async (model_key) -> LLMProvider | None — set by agent after init
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{_PROCESS_TAG}"
+        self.concurrency: Optional[int] = None  # overrides subagents.max_concurrent (syne worker)
         self._active_runs: dict[str, asyncio.Task] = {}
         self._on_complete: Optional[Callable[[str, str, str, int], Awaitable[None]]] = None
         self._on_start: Optional[Callable[[str, str, int], Awaitable[None]]] = None
+        # Background queue loop (start()/stop())
+        self._dsn: Optional[str] = None
+        self._execute = False
+        self._deliver = True
+        self._running = False
+        self._loop_task: Optional[asyncio.Task] = None
+        self._listener_task: Optional[asyncio.Task] = None
+        self._listen_conn = None
+        self._listening = False
+        self._wake = asyncio.Event()
 
     def set_completion_callback(self, callback: Callable[[str, str, str, int], Awaitable[None]]):
         """Set callback for when sub-agent completes.
@@ -72,13 +145,28 @@ class SubAgentManager:
         return await get_config("subagents.enabled", True)
 
     async def max_concurrent(self) -> int:
-        """Get max concurrent sub-agents."""
+        """Get max concurrent sub-agents (per process)."""
+        if self.concurrency:
+            return self.concurrency
         return await get_config("subagents.max_concurrent", 2)
 
     async def timeout_seconds(self) -> int:
         """Get sub-agent timeout."""
         return await get_config("subagents.timeout_seconds", 172800)
 
+    async def executor(self) -> str:
+        """Who runs sub-agents: "inline" (this process) or "worker" (syne worker)."""
+        value = await get_config("subagents.executor", "inline")
+        return "worker" if value == "worker" else "inline"
+
+    async def lease_seconds(self) -> int:
+        """Seconds without a heartbeat after which a running run is reclaimed."""
+        return max(30, int(await get_config("subagents.lease_seconds", _DEFAULT_LEASE)))
+
+    async def max_attempts(self) -> int:
+        """Claims per run before a run whose worker keeps dying is failed."""
+        return max(1, int(await get_config("subagents.max_attempts", _DEFAULT_MAX_ATTEMPTS)))
+
     @property
     def active_count(self) -> int:
         """Number of currently running sub-agents."""
@@ -115,9 +203,10 @@ class SubAgentManager:
                 "error": "Sub-agents are disabled. Owner can enable via config.",
             }
 
-        # Check max concurrent
+        # Check max concurrent (worker mode: the queue absorbs the backlog)
+        executor = await self.executor()
         max_conc = await self.max_concurrent()
-        if self.active_count >= max_conc:
+        if executor == "inline" and self.active_count >= max_conc:
             return {
                 "success": False,
                 "error": f"Max concurrent sub-agents reached ({max_conc}). Wait for one to complete.",
@@ -166,22 +255,27 @@ class SubAgentManager:
             if not task or not task.strip():
                 task = original_task
 
-        # Create run record
+        # Create the run record. Inline runs are inserted already claimed by
+        # this process, so no other executor can pick them up first.
         run_id = str(uuid.uuid4())
         async with get_connection() as conn:
-            await conn.execute("""
-                INSERT INTO subagent_runs (run_id, parent_session_id, task, model)
-                VALUES ($1, $2, $3, $4)
-            """, run_id, parent_session_id, task, model)
-
-        # Start the sub-agent task
-        # Use parent conversation's provider if given, else fall back to default
-        effective_provider = provider or self.provider
-        timeout = await self.timeout_seconds()
-        async_task = asyncio.create_task(
-            self._run_subagent(run_id, task, context, model, timeout, effective_provider)
-        )
-        self._active_runs[run_id] = async_task
+            if executor == "inline":
+                await conn.execute("""
+                    INSERT INTO subagent_runs
+                        (run_id, parent_session_id, task, context, model,
+                         status, claimed_by, heartbeat_at, attempts)
+                    VALUES ($1, $2, $3, $4, $5, 'running', $6, NOW(), 1)
+                """, run_id, parent_session_id, task, context, model, self.worker_id)
+            else:
+                await conn.execute("""
+                    INSERT INTO subagent_runs (run_id, parent_session_id, task, context, model, status)
+                    VALUES ($1, $2, $3, $4, $5, 'queued')
+                """, run_id, parent_session_id, task, context, model)
+
+        if executor == "inline":
+            # Use parent conversation's provider if given, else fall back to default
+            job = {"run_id": run_id, "task": task, "context": context, "model": model, "checkpoint": None}
+            self._start_job(job, provider or self.provider)
 
         logger.info(f"Sub-agent spawned: run_id={run_id}, task='{task[:80]}'")
 
@@ -195,26 +289,41 @@ class SubAgentManager:
         return {
             "success": True,
             "run_id": run_id,
-            "message": f"Sub-agent spawned. I'll notify you when it completes.",
+            "message": (
+                "Sub-agent spawned. I'll notify you when it completes."
+                if executor == "inline" else
+                "Sub-agent queued for a worker. I'll notify you when it completes."
+            ),
         }
 
-    async def _run_subagent(
-        self,
-        run_id: str,
-        task: str,
-        context: Optional[str],
-        model: Optional[str],
-        timeout: int,
-        provider: Optional[LLMProvider] = None,
-    ):
-        """Execute a sub-agent task in the background."""
+    def _start_job(self, job: dict, provider: Optional[LLMProvider]) -> None:
+        """Run a claimed job in the background on this process."""
+        run_id = job["run_id"]
+        self._active_runs[run_id] = asyncio.create_task(self._run_subagent(job, provider))
+
+    async def _run_subagent(self, job: dict, provider: Optional[LLMProvider] = None):
+        """Execute a claimed sub-agent run in the background.
+
+        Cancellation (shutdown, or the heartbeat finding the lease gone)
+        writes nothing: the run stays claimable and resumes from its last
+        checkpoint wherever it is claimed next.
+        """
+        run_id = job["run_id"]
+        timeout = await self.timeout_seconds()
+        heartbeat = asyncio.create_task(self._heartbeat(run_id, asyncio.current_task()))
         try:
             result = await asyncio.wait_for(
-                self._execute_task(run_id, task, context, model, provider),
+                self._execute_task(
+                    run_id, job["task"], job.get("context"), job.get("model"), provider,
+                    checkpoint=job.get("checkpoint"),
+                ),
                 timeout=timeout,
             )
             await self._complete_run(run_id, "completed", result=result)
 
+        except LeaseLost:
+            logger.info(f"Sub-agent {run_id}: cancelled or claimed elsewhere, stopping")
+
         except SubAgentIncomplete as e:
             logger.warning(f"Sub-agent {run_id}: incomplete (reached max rounds)")
             await self._complete_run(run_id, "incomplete", result=e.partial_result)
@@ -229,6 +338,36 @@ class SubAgentManager:
             logger.error(f"Sub-agent {run_id}: {error_msg}")
             await self._complete_run(run_id, "failed", error=error_msg)
 
+        finally:
+            heartbeat.cancel()
+            self._active_runs.pop(run_id, None)
+            self._wake.set()  # a slot is free
+
+    async def _heartbeat(self, run_id: str, run_task: asyncio.Task) -> None:
+        """Keep this process's claim on a run alive while it executes.
+
+        LLM calls and tool rounds can each take minutes, so the lease is
+        refreshed on a timer rather than only at checkpoints. If the row is
+        no longer ours — cancelled from another process, or reclaimed after
+        a stall — the run task is cancelled.
+        """
+        interval = max(5.0, (await self.lease_seconds()) / 3)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                async with get_connection() as conn:
+                    status = await conn.execute("""
+                        UPDATE subagent_runs SET heartbeat_at = NOW()
+                        WHERE run_id = $1 AND claimed_by = $2 AND status = 'running'
+                    """, run_id, self.worker_id)
+            except Exception as e:
+                logger.warning(f"Sub-agent {run_id[:8]}: heartbeat failed: {e}")
+                continue
+            if _row_count(status) == 0:
+                logger.warning(f"Sub-agent {run_id[:8]}: lease lost (cancelled or reclaimed)")
+                run_task.cancel()
+                return
+
     async def _execute_task(
         self,
         run_id: str,
@@ -236,19 +375,22 @@ class SubAgentManager:
         context: Optional[str],
         model: Optional[str],
         provider: Optional[LLMProvider] = None,
+        checkpoint: Optional[dict] = None,
     ) -> str:
         """Execute a sub-agent task with full tool-calling loop.
 
         Sub-agents can use tools (exec, memory, web, abilities) just like
         the main agent, enabling them to do real work autonomously.
         Config/management tools are filtered out for safety.
+
+        Loop state is checkpointed after each round's tool results. Given a
+        `checkpoint`, the run continues from there instead of starting over;
+        only a round cut off mid-tools runs its tools a second time.
         """
         # Use parent conversation's provider (inherits group/user model override)
         llm = provider or self.provider
         logger.info(f"Sub-agent {run_id[:8]} using provider: {llm.name}")
 
-        messages = []
-
         # ═══════════════════════════════════════════════════════════════
         # SECURITY: Sub-agents are "workers" — they inherit owner privileges
         # for doing actual work (exec, memory, abilities) but CANNOT modify
@@ -261,67 +403,28 @@ class SubAgentManager:
         # Budget (fetched early so it can be injected into the prompt)
         max_rounds = await get_config("subagents.max_rounds", 30)
 
-        # System prompt for sub-agent — worker privileges
-        subagent_prompt = (
-            f"{self.system_prompt}\n\n"
-            "# SUB-AGENT CONTEXT\n"
-            "You are running as a SUB-AGENT in a background session.\n\n"
-            "## Task Guidelines:\n"
-            "- START WORKING IMMEDIATELY. Do NOT research, read source code, test, or plan first.\n"
-            "- Execute the task directly using the tools available to you.\n"
-            "- Be concise but complete in your response.\n"
-            "- You CANNOT spawn other sub-agents.\n"
-            "- You CANNOT interact with the user directly.\n"
-            "- Your result will be delivered to the main session.\n\n"
-            "## YOUR CAPABILITIES (Worker Privileges):\n"
-            "You CAN use all available tools:\n"
-            "- exec — execute shell commands (your main tool for getting work done)\n"
-            "- memory_search / memory_store — search and save information\n"
-            "- web_search / fetch_url — search the web and fetch pages\n"
-            "- file_read / file_write — read and write files\n"
-            "- read_source — read Syne's own source code\n"
-            "- All enabled abilities (image_gen, image_analysis, maps, etc.)\n\n"
-            "You CANNOT use (config/management tools blocked):\n"
-            "- update_config, update_soul, update_ability\n"
-            "- manage_group, manage_user\n"
-            "- spawn_subagent (no nesting)\n\n"
-            "## IMPORTANT CONSTRAINTS:\n"
-            "- You have a LIMITED number of tool call rounds. Use them wisely.\n"
-            "- NEVER use 'sleep' inside exec to wait/monitor — it wastes rounds.\n"
-            "- For long tasks: launch as background script (nohup) then STOP. "
-            "Do NOT poll/monitor progress — the user can check manually.\n"
-            "- Prefer doing the actual work directly over writing scripts to do it later.\n"
-            f"\n## ROUND BUDGET: You have {max_rounds} tool call round(s) total.\n"
-            "- If the task genuinely needs MORE rounds than your budget and you cannot\n"
-            "  finish, do NOT pretend it is done. Report the partial progress and end your\n"
-            "  final message with the exact marker on its own line: [[INCOMPLETE]]\n"
-            "- Only use [[INCOMPLETE]] when work genuinely remains. If you finished, do NOT use it.\n"
-        )
-        messages.append(ChatMessage(role="system", content=subagent_prompt))
-
-        # Add context if provided
-        if context:
-            messages.append(ChatMessage(
-                role="system",
-                content=f"Context from main session:\n{context}",
-            ))
-
-        # Task
-        messages.append(ChatMessage(role="user", content=task))
-
         # Build tool schemas (filtered for sub-agent safety)
         tool_schemas = self._get_tool_schemas(access_level)
 
-        total_input_tokens = 0
-        total_output_tokens = 0
-
-        # ── Factual tool call tracking ──
-        # Track every tool call and its success/failure so the completion
-        # report contains verifiable data, not LLM-generated claims.
-        tool_call_log: list[dict] = []  # [{name, success, error?}, ...]
-        tool_call_counts: dict[str, dict] = {}  # name -> {total, success, failed}
-
-        # Initial LLM call
+        if checkpoint:
+            messages = _load_messages(checkpoint["messages"])
+            round_num = checkpoint["round"]
+            tool_call_log: list[dict] = checkpoint["tool_call_log"]
+            tool_call_counts: dict[str, dict] = checkpoint["tool_call_counts"]
+            total_input_tokens, total_output_tokens = checkpoint["tokens"]
+            logger.info(f"Sub-agent {run_id[:8]}: resuming from checkpoint after round {round_num}")
+        else:
+            messages = self._initial_messages(task, context, max_rounds)
+            round_num = 0
+            # ── Factual tool call tracking ──
+            # Track every tool call and its success/failure so the completion
+            # report contains verifiable data, not LLM-generated claims.
+            tool_call_log = []  # [{name, success, error?}, ...]
+            tool_call_counts = {}  # name -> {total, success, failed}
+            total_input_tokens = 0
+            total_output_tokens = 0
+
+        # Initial LLM call (on resume: the call the previous attempt was waiting on)
         response = await llm.chat(
             messages=messages,
             tools=tool_schemas if tool_schemas else None,
@@ -333,7 +436,6 @@ class SubAgentManager:
         # Tool-calling loop with round limit and inter-round delay
         # (max_rounds already fetched above for the prompt)
         round_delay = await get_config("subagents.round_delay", 2.0)  # seconds between rounds
-        round_num = 0
         forced_stop = False
         while response.tool_calls:
             # Hard round limit — force stop to prevent runaway sub-agents
@@ -411,6 +513,16 @@ class SubAgentManager:
                 if tool_call_id:
                     tool_meta["tool_call_id"] = tool_call_id
                 messages.append(ChatMessage(role="tool", content=result, metadata=tool_meta))
+            round_num += 1
+
+            # Durable point: after a crash the run resumes with this round done.
+            await self._save_checkpoint(run_id, {
+                "messages": _dump_messages(messages),
+                "round": round_num,
+                "tool_call_log": tool_call_log,
+                "tool_call_counts": tool_call_counts,
+                "tokens": [total_input_tokens, total_output_tokens],
+            })
 
             # Get next response — may contain more tool calls
             response = await llm.chat(
@@ -420,7 +532,6 @@ class SubAgentManager:
             )
             total_input_tokens += getattr(response, "input_tokens", 0) or 0
             total_output_tokens += getattr(response, "output_tokens", 0) or 0
-            round_num += 1
 
         # If forced stop, get final summary response (no tools)
         if forced_stop:
@@ -437,8 +548,8 @@ class SubAgentManager:
             await conn.execute("""
                 UPDATE subagent_runs
                 SET input_tokens = $1, output_tokens = $2
-                WHERE run_id = $3
-            """, total_input_tokens, total_output_tokens, run_id)
+                WHERE run_id = $3 AND claimed_by = $4
+            """, total_input_tokens, total_output_tokens, run_id, self.worker_id)
 
         # ── Build factual execution report ──
         # This is appended to the result so the completion callback delivers
@@ -473,6 +584,73 @@ class SubAgentManager:
             raise SubAgentIncomplete(result)
         return result
 
+    def _initial_messages(self, task: str, context: Optional[str], max_rounds: int) -> list[ChatMessage]:
+        """Opening conversation of a fresh run: sub-agent prompt, context, task."""
+        messages = []
+
+        # System prompt for sub-agent — worker privileges
+        subagent_prompt = (
+            f"{self.system_prompt}\n\n"
+            "# SUB-AGENT CONTEXT\n"
+            "You are running as a SUB-AGENT in a background session.\n\n"
+            "## Task Guidelines:\n"
+            "- START WORKING IMMEDIATELY. Do NOT research, read source code, test, or plan first.\n"
+            "- Execute the task directly using the tools available to you.\n"
+            "- Be concise but complete in your response.\n"
+            "- You CANNOT spawn other sub-agents.\n"
+            "- You CANNOT interact with the user directly.\n"
+            "- Your result will be delivered to the main session.\n\n"
+            "## YOUR CAPABILITIES (Worker Privileges):\n"
+            "You CAN use all available tools:\n"
+            "- exec — execute shell commands (your main tool for getting work done)\n"
+            "- memory_search / memory_store — search and save information\n"
+            "- web_search / fetch_url — search the web and fetch pages\n"
+            "- file_read / file_write — read and write files\n"
+            "- read_source — read Syne's own source code\n"
+            "- All enabled abilities (image_gen, image_analysis, maps, etc.)\n\n"
+            "You CANNOT use (config/management tools blocked):\n"
+            "- update_config, update_soul, update_ability\n"
+            "- manage_group, manage_user\n"
+            "- spawn_subagent (no nesting)\n\n"
+            "## IMPORTANT CONSTRAINTS:\n"
+            "- You have a LIMITED number of tool call rounds. Use them wisely.\n"
+            "- NEVER use 'sleep' inside exec to wait/monitor — it wastes rounds.\n"
+            "- For long tasks: launch as background script (nohup) then STOP. "
+            "Do NOT poll/monitor progress — the user can check manually.\n"
+            "- Prefer doing the actual work directly over writing scripts to do it later.\n"
+            f"\n## ROUND BUDGET: You have {max_rounds} tool call round(s) total.\n"
+            "- If the task genuinely needs MORE rounds than your budget and you cannot\n"
+            "  finish, do NOT pretend it is done. Report the partial progress and end your\n"
+            "  final message with the exact marker on its own line: [[INCOMPLETE]]\n"
+            "- Only use [[INCOMPLETE]] when work genuinely remains. If you finished, do NOT use it.\n"
+        )
+        messages.append(ChatMessage(role="system", content=subagent_prompt))
+
+        # Add context if provided
+        if context:
+            messages.append(ChatMessage(
+                role="system",
+                content=f"Context from main session:\n{context}",
+            ))
+
+        # Task
+        messages.append(ChatMessage(role="user", content=task))
+
+        return messages
+
+    async def _save_checkpoint(self, run_id: str, state: dict) -> None:
+        """Persist loop state (doubles as a heartbeat). LeaseLost if the run is no longer ours."""
+        in_tokens, out_tokens = state["tokens"]
+        async with get_connection() as conn:
+            status = await conn.execute("""
+                UPDATE subagent_runs
+                SET checkpoint = $1::jsonb, heartbeat_at = NOW(),
+                    input_tokens = $2, output_tokens = $3
+                WHERE run_id = $4 AND claimed_by = $5 AND status = 'running'
+            """, json.dumps(state, default=str), in_tokens, out_tokens, run_id, self.worker_id)
+        if _row_count(status) == 0:
+            raise LeaseLost(run_id)
+
     def _get_tool_schemas(self, access_level: str) -> list[dict]:
         """Get tool schemas available to sub-agents (filtered)."""
         schemas = []
@@ -562,35 +740,69 @@ class SubAgentManager:
         result: Optional[str] = None,
         error: Optional[str] = None,
     ):
-        """Mark a run as completed/failed and notify."""
+        """Record a run's outcome and deliver it.
+
+        Only the process holding the claim writes the outcome: a run that
+        was cancelled or reclaimed meanwhile is left as it is.
+        """
         async with get_connection() as conn:
-            await conn.execute("""
+            updated = await conn.execute("""
                 UPDATE subagent_runs
-                SET status = $1, result = $2, error = $3, completed_at = NOW()
-                WHERE run_id = $4
-            """, status, result, error, run_id)
-
-            # Fetch parent_session_id for routing the result
-            row = await conn.fetchrow(
-                "SELECT parent_session_id FROM subagent_runs WHERE run_id = $1",
-                run_id,
-            )
-            parent_session_id = row["parent_session_id"] if row else 0
+                SET status = $1, result = $2, error = $3, completed_at = NOW(), checkpoint = NULL
+                WHERE run_id = $4 AND claimed_by = $5 AND status = 'running'
+            """, status, result, error, run_id, self.worker_id)
 
         # Clean up from active runs
-        if run_id in self._active_runs:
-            del self._active_runs[run_id]
-
-        # Notify via callback
-        if self._on_complete:
-            output = result if status in ("completed", "incomplete") else f"Error: {error}"
-            try:
-                await self._on_complete(run_id, status, output, parent_session_id)
-            except Exception as e:
-                logger.error(f"Completion callback failed for {run_id}: {e}")
+        self._active_runs.pop(run_id, None)
 
+        if _row_count(updated) == 0:
+            logger.info(f"Sub-agent {run_id}: no longer claimed here, outcome '{status}' discarded")
+            return
         logger.info(f"Sub-agent {run_id}: {status}")
 
+        if self._deliver:
+            await self.deliver(run_id)
+
+    async def deliver(self, run_id: str) -> bool:
+        """Hand a finished run to the completion callback — once, across all processes.
+
+        delivered_at is set in the same statement that reads the outcome, so
+        when several bot processes see the same NOTIFY only one delivers.
+        Returns True if this call delivered it.
+        """
+        if not self._on_complete:
+            return False
+        async with get_connection() as conn:
+            row = await conn.fetchrow("""
+                UPDATE subagent_runs SET delivered_at = NOW()
+                WHERE run_id = $1 AND delivered_at IS NULL AND status = ANY($2::text[])
+                RETURNING status, result, error, parent_session_id
+            """, run_id, list(TERMINAL_STATUSES))
+        if not row:
+            return False
+
+        status = row["status"]
+        output = row["result"] if status in ("completed", "incomplete") else f"Error: {row['error']}"
+        try:
+            await self._on_complete(run_id, status, output, row["parent_session_id"] or 0)
+        except Exception as e:
+            logger.error(f"Completion callback failed for {run_id}: {e}")
+        return True
+
+    async def deliver_pending(self) -> int:
+        """Deliver every finished run nobody has delivered yet (oldest first)."""
+        async with get_connection() as conn:
+            rows = await conn.fetch("""
+                SELECT run_id::text AS run_id FROM subagent_runs
+                WHERE delivered_at IS NULL AND status = ANY($1::text[])
+                ORDER BY completed_at
+            """, list(TERMINAL_STATUSES))
+        delivered = 0
+        for row in rows:
+            if await self.deliver(row["run_id"]):
+                delivered += 1
+        return delivered
+
     async def _resolve_run_id(self, run_id: str) -> Optional[str]:
         """Resolve a possibly-truncated run_id to the full UUID.
 
@@ -641,33 +853,50 @@ class SubAgentManager:
             return dict(row) if row else None
 
     async def list_active(self) -> list[dict]:
-        """List all active sub-agent runs."""
+        """List all queued and running sub-agent runs."""
         async with get_connection() as conn:
             rows = await conn.fetch("""
-                SELECT run_id, task, status, started_at, input_tokens, output_tokens
+                SELECT run_id, task, status, started_at, input_tokens, output_tokens,
+                       claimed_by, attempts
                 FROM subagent_runs
-                WHERE status = 'running'
+                WHERE status IN ('queued', 'running')
                 ORDER BY started_at DESC
             """)
             return [dict(row) for row in rows]
 
     async def cancel(self, run_id: str) -> bool:
-        """Cancel a running sub-agent."""
-        if run_id in self._active_runs:
-            self._active_runs[run_id].cancel()
-            await self._complete_run(run_id, "cancelled", error="Cancelled by user")
-            return True
-        return False
+        """Cancel a queued or running sub-agent, wherever it runs.
+
+        A run on another process notices at its next heartbeat or checkpoint.
+        """
+        run_id = str(run_id)
+        async with get_connection() as conn:
+            row = await conn.fetchrow("""
+                UPDATE subagent_runs
+                SET status = 'cancelled', error = 'Cancelled by user', completed_at = NOW(),
+                    checkpoint = NULL
+                WHERE run_id = $1 AND status IN ('queued', 'running')
+                RETURNING run_id
+            """, run_id)
+        task = self._active_runs.pop(run_id, None)
+        if task:
+            task.cancel()
+        if not row:
+            return False
+        logger.info(f"Sub-agent {run_id}: cancelled")
+        if self._deliver:
+            await self.deliver(run_id)
+        return True
 
     async def cancel_by_session(self, parent_session_id: int) -> int:
-        """Cancel all running sub-agents spawned from a specific session.
+        """Cancel all queued/running sub-agents spawned from a specific session.
 
         Returns number of cancelled runs.
         """
         async with get_connection() as conn:
             rows = await conn.fetch("""
                 SELECT run_id FROM subagent_runs
-                WHERE parent_session_id = $1 AND status = 'running'
+                WHERE parent_session_id = $1 AND status IN ('queued', 'running')
             """, parent_session_id)
 
         count = 0
@@ -677,19 +906,203 @@ class SubAgentManager:
         return count
 
     async def cancel_all(self):
-        """Cancel all running sub-agents."""
+        """Cancel all sub-agents running on this process."""
         for run_id in list(self._active_runs.keys()):
             await self.cancel(run_id)
 
     async def cleanup_stale_runs(self):
-        """Mark any 'running' DB records as failed (stale from previous bot run)."""
+        """Fail runs whose lease expired after their last allowed attempt.
+
+        Other stale runs (their process died or was restarted) are not
+        touched here: they are claimed again and resume from their checkpoint.
+        """
+        lease = await self.lease_seconds()
+        max_attempts = await self.max_attempts()
         async with get_connection() as conn:
             result = await conn.execute("""
                 UPDATE subagent_runs
-                SET status = 'failed', error = 'Bot restarted', completed_at = NOW()
-                WHERE status = 'running'
-            """)
-            # result is "UPDATE N" — extract count
-            count = int(result.split()[-1]) if result else 0
+                SET status = 'failed', completed_at = NOW(), checkpoint = NULL,
+                    error = 'Sub-agent lost its worker ' || attempts || ' time(s); giving up'
+                WHERE status = 'running' AND attempts >= $1
+                  AND COALESCE(heartbeat_at, started_at) < NOW() - make_interval(secs => $2)
+            """, max_attempts, float(lease))
+            count = _row_count(result)
             if count:
-                logger.info(f"Cleaned up {count} stale sub-agent run(s)")
+                logger.info(f"Failed {count} sub-agent run(s) that exhausted their attempts")
+
+    # ── Queue ──────────────────────────────────────────────────────────
+
+    async def _claim_next(self) -> Optional[dict]:
+        """Claim the oldest queued run, or a running one whose lease expired.
+
+        SKIP LOCKED lets any number of processes claim concurrently without
+        blocking each other or taking the same row.
+        """
+        lease = await self.lease_seconds()
+        max_attempts = await self.max_attempts()
+        async with get_connection() as conn:
+            row = await conn.fetchrow("""
+                UPDATE subagent_runs r
+                SET status = 'running', claimed_by = $1, heartbeat_at = NOW(),
+                    attempts = r.attempts + 1
+                WHERE r.id = (
+                    SELECT id FROM subagent_runs
+                    WHERE status = 'queued'
+                       OR (status = 'running' AND attempts < $3
+                           AND COALESCE(heartbeat_at, started_at) < NOW() - make_interval(secs => $2))
+                    ORDER BY id
+                    LIMIT 1
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING r.run_id::text AS run_id, r.task, r.context, r.model,
+                          r.checkpoint, r.attempts
+            """, self.worker_id, float(lease), max_attempts)
+        if not row:
+            return None
+        job = dict(row)
+        if isinstance(job["checkpoint"], str):
+            job["checkpoint"] = json.loads(job["checkpoint"])
+        return job
+
+    async def _provider_for(self, model: Optional[str]) -> Optional[LLMProvider]:
+        """Provider for a claimed run: its recorded model if resolvable, else the default."""
+        if model and self.provider_factory:
+            try:
+                override = await self.provider_factory(model)
+                if override:
+                    return override
+            except Exception as e:
+                logger.warning(f"Sub-agent model '{model}' unavailable, using default: {e}")
+        return self.provider
+
+    async def _fill_slots(self) -> int:
+        """Claim runs until this process is at max_concurrent. Returns runs started."""
+        started = 0
+        max_conc = await self.max_concurrent()
+        while self._running and self.active_count < max_conc:
+            job = await self._claim_next()
+            if not job:
+                break
+            verb = "resuming" if job["checkpoint"] else "starting"
+            logger.info(
+                f"Sub-agent {job['run_id'][:8]}: claimed by {self.worker_id}, "
+                f"{verb} (attempt {job['attempts']})"
+            )
+            self._start_job(job, await self._provider_for(job["model"]))
+            started += 1
+        return started
+
+    async def _release_claims(self) -> int:
+        """Hand this process's running runs back to the queue (clean shutdown).
+
+        The checkpoint stays, so the next claimer resumes at once instead of
+        waiting for the lease to expire; the attempt is not counted.
+        """
+        async with get_connection() as conn:
+            result = await conn.execute("""
+                UPDATE subagent_runs
+                SET status = 'queued', claimed_by = NULL, heartbeat_at = NULL,
+                    attempts = GREATEST(attempts - 1, 0)
+                WHERE claimed_by = $1 AND status = 'running'
+            """, self.worker_id)
+        return _row_count(result)
+
+    async def start(self, dsn: Optional[str] = None, *, execute: Optional[bool] = None,
+                    deliver: bool = True) -> None:
+        """Start the background queue loop.
+
+        Args:
+            dsn: Database URL for the LISTEN connection. None = poll only.
+            execute: Claim and run queued/orphaned runs here. None = only
+                when subagents.executor is "inline".
+            deliver: Deliver finished runs (bot process: yes; worker: no —
+                it has no channels, the bot delivers its results).
+        """
+        if self._running:
+            return
+        self._dsn = dsn
+        self._execute = (await self.executor() == "inline") if execute is None else execute
+        self._deliver = deliver
+        self._running = True
+        if dsn:
+            self._listener_task = asyncio.create_task(self._listen_loop())
+        self._loop_task = asyncio.create_task(self._loop())
+        logger.info(
+            f"Sub-agent queue started ({self.worker_id}: "
+            f"execute={self._execute}, deliver={self._deliver})"
+        )
+
+    async def stop(self) -> None:
+        """Stop the loop; runs in progress here go back to the queue."""
+        self._running = False
+        tasks = [t for t in (self._loop_task, self._listener_task) if t]
+        runs = list(self._active_runs.values())
+        for t in tasks + runs:
+            t.cancel()
+        for t in tasks + runs:
+            try:
+                await t
+            except (asyncio.CancelledError, Exception):
+                pass
+        self._loop_task = self._listener_task = None
+        if self._listen_conn is not None and not self._listen_conn.is_closed():
+            await self._listen_conn.close()
+        self._listen_conn = None
+        self._listening = False
+        if runs:
+            try:
+                released = await self._release_claims()
+                logger.info(f"Sub-agent queue: {released} run(s) handed back for resumption")
+            except Exception as e:
+                logger.warning(f"Sub-agent queue: could not release claims (they resume after the lease): {e}")
+
+    async def _loop(self) -> None:
+        while self._running:
+            try:
+                if self._deliver:
+                    await self.deliver_pending()
+                if self._execute:
+                    await self.cleanup_stale_runs()
+                    await self._fill_slots()
+            except Exception as e:
+                logger.error(f"Sub-agent queue error: {e}", exc_info=True)
+            timeout = _POLL_LISTENING if self._listening else _POLL_DEGRADED
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    def _on_notify(self, conn, pid, channel, payload) -> None:
+        self._wake.set()
+
+    async def _listen_loop(self) -> None:
+        """Hold a dedicated LISTEN connection; reconnect if it drops."""
+        import asyncpg
+
+        attempt = 0
+        while self._running:
+            try:
+                conn = await asyncpg.connect(self._dsn)
+                self._listen_conn = conn
+                lost = asyncio.get_running_loop().create_future()
+                conn.add_termination_listener(
+                    lambda _c: lost.done() or lost.set_result(None)
+                )
+                await conn.add_listener(NOTIFY_CHANNEL, self._on_notify)
+                # Anything may have changed while we were not listening.
+                self._listening = True
+                self._wake.set()
+                attempt = 0
+                logger.debug("Sub-agent queue: LISTEN connection established")
+                await lost
+                logger.warning("Sub-agent queue: LISTEN connection lost — polling until reconnected")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Sub-agent queue: LISTEN connect failed: {e}")
+            self._listening = False
+            self._listen_conn = None
+            delay = _RECONNECT_DELAYS[min(attempt, len(_RECONNECT_DELAYS) - 1)]
+            attempt += 1
+            await asyncio.sleep(delay)
@@ -35,6 +35,7 @@ from urllib.parse import urljoin
 import httpx
 
 from ..db.models import get_config
+from ..http_clients import pooled_client
 from ..security import is_url_safe_async
 
 logger = logging.getLogger("syne.tools.fetch_url")
@@ -111,7 +112,8 @@ async def fetch_url_handler(
     current = url
     try:
         # Manual redirect handling — validate every hop.
-        async with httpx.AsyncClient(
+        async with pooled_client(
+            "fetch_url",
             timeout=timeout,
             follow_redirects=False,
             headers=headers,
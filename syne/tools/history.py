@@ -24,8 +24,11 @@ recall from the memory table.
 
 from __future__ import annotations
 
+import base64
+import binascii
 import json
 import logging
+import re
 from datetime import datetime
 from typing import Optional
 
@@ -81,6 +84,72 @@ def _iso_or_none(raw: Optional[str]) -> Optional[datetime]:
         return None
 
 
+# ---------------------------------------------------------------------------
+# Retrieval helpers
+# ---------------------------------------------------------------------------
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+# Candidate list depth per retriever, and the hard cap when paging deep.
+_DEFAULT_CANDIDATES = 100
+_MAX_CANDIDATES = 1000
+# Reciprocal-rank fusion constant (Cormack et al.): score = Σ 1 / (k + rank).
+_DEFAULT_RRF_K = 60
+
+# pgvector >= 0.8 can keep scanning the HNSW graph until enough rows pass
+# the WHERE filters (hnsw.iterative_scan). None = not probed yet.
+_iterative_scan: Optional[bool] = None
+
+
+def _lexical_terms(query: str) -> list[str]:
+    """Distinct lowercase words for the lexical retriever (>= 3 chars)."""
+    words = _WORD_RE.findall(query.lower()) if query else []
+    return list(dict.fromkeys(w for w in words if len(w) >= 3))
+
+
+def _encode_cursor(key, row_id: int, depth: int, candidates: int) -> str:
+    """Opaque keyset cursor: last row's sort key + id, rows served so far,
+    and the candidate depth the first page used (kept for every page)."""
+    raw = json.dumps({"k": key, "id": row_id, "n": depth, "c": candidates}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> Optional[dict]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        return {
+            "k": data["k"], "id": int(data["id"]), "n": max(0, int(data["n"])),
+            "c": max(0, int(data.get("c", 0))),
+        }
+    except (ValueError, TypeError, KeyError, binascii.Error):
+        return None
+
+
+class _Params(list):
+    """Positional asyncpg parameters — add() returns the $n placeholder."""
+
+    def add(self, value) -> str:
+        self.append(value)
+        return f"${len(self)}"
+
+
+async def _tune_vector_scan(conn, candidates: int) -> None:
+    """Let the HNSW scan return `candidates` rows even under selective filters.
+
+    Session-level SETs are safe here: the pool runs RESET ALL on release.
+    """
+    global _iterative_scan
+    await conn.execute(f"SET hnsw.ef_search = {max(40, min(candidates, _MAX_CANDIDATES))}")
+    if _iterative_scan is False:
+        return
+    try:
+        await conn.execute("SET hnsw.iterative_scan = relaxed_order")
+        _iterative_scan = True
+    except Exception:
+        _iterative_scan = False  # pgvector < 0.8 — the filtered ANN list may come back short
+
+
 # ---------------------------------------------------------------------------
 # history_search
 # ---------------------------------------------------------------------------
@@ -95,8 +164,34 @@ async def history_search_handler(
     until: Optional[str] = None,
     also_contains: Optional[list] = None,
     sort_by: str = "similarity",
+    mode: Optional[str] = None,
+    cursor: Optional[str] = None,
 ) -> str:
-    """Return an ordered list of anchor previews, JSON-formatted for the LLM."""
+    """Return an ordered list of anchor previews, JSON-formatted for the LLM.
+
+    Retrieval (mode='hybrid', the default):
+      - vector: nearest user rows by embedding <=> query (HNSW)
+      - lexical: user rows whose to_tsvector('simple', content) matches any
+        query word, ranked by length-normalised ts_rank_cd (GIN
+        idx_messages_content_tsv) — a BM25-style candidate set that also
+        catches rows not embedded yet
+    Each list is cut at history_search.candidates rows and fused by
+    reciprocal rank (history_search.rrf_k). mode='semantic' uses the vector
+    list alone. also_contains keywords filter both lists inside the
+    candidate queries (trigram index idx_messages_content_trgm), so they
+    can no longer empty an already-fetched ANN list.
+
+    sort_by='recency' orders the same candidates newest first. Paging is
+    keyset-based: pass back `next_cursor`. `offset` is still accepted as a
+    starting depth when no cursor is given.
+
+    The candidate depth is fixed by the first page (history_search.candidates,
+    widened to cover `offset`) and carried in the cursor. Widening it on
+    later pages would change the fused scores, and a row first picked up
+    deep down could then rank above the cursor and be skipped. A pagination
+    therefore ends once the fused candidate set is exhausted; raise
+    history_search.candidates to page deeper.
+    """
     if not query or not query.strip():
         return "Error: query is required (non-empty string)."
 
@@ -111,6 +206,14 @@ async def history_search_handler(
     if sort_by not in ("similarity", "recency"):
         return f"Error: sort_by must be 'similarity' or 'recency', got {sort_by!r}."
 
+    if mode is None:
+        try:
+            mode = str(await get_config("history_search.mode", "hybrid"))
+        except Exception:
+            mode = "hybrid"
+    if mode not in ("hybrid", "semantic"):
+        return f"Error: mode must be 'hybrid' or 'semantic', got {mode!r}."
+
     since_dt = _iso_or_none(since)
     if since and since_dt is None:
         return f"Error: unparseable 'since' timestamp: {since!r} (use ISO like '2026-07-01')."
@@ -118,6 +221,17 @@ async def history_search_handler(
     if until and until_dt is None:
         return f"Error: unparseable 'until' timestamp: {until!r}."
 
+    after = None
+    if cursor:
+        after = _decode_cursor(cursor)
+        if after is None:
+            return "Error: invalid cursor — pass next_cursor from a previous history_search result unchanged."
+        if sort_by == "recency":
+            after["k"] = _iso_or_none(str(after["k"]))
+            if after["k"] is None:
+                return "Error: cursor does not belong to a sort_by='recency' search."
+    depth = after["n"] if after else offset
+
     also = [str(k).strip() for k in (also_contains or []) if str(k).strip()]
 
     if _embedding_provider is None:
@@ -135,88 +249,130 @@ async def history_search_handler(
     if not vector:
         return "Error: embedding provider returned an empty vector."
 
-    # Assemble SQL. Sort direction depends on mode; recency mode still
-    # applies the vector similarity as a tie-breaker so top matches still
-    # semantically-close if two rows share the same second.
-    conditions = ["m.role = 'user'", "m.embedding IS NOT NULL"]
-    params: list = [str(vector)]
-    p = 2
+    try:
+        candidates = int(await get_config("history_search.candidates", _DEFAULT_CANDIDATES))
+        rrf_k = int(await get_config("history_search.rrf_k", _DEFAULT_RRF_K))
+    except Exception:
+        candidates, rrf_k = _DEFAULT_CANDIDATES, _DEFAULT_RRF_K
+    if after and after["c"]:
+        # Same lists as the first page, so the fused scores (and the
+        # cursor's position in them) don't move.
+        candidates = min(_MAX_CANDIDATES, after["c"])
+    else:
+        # A starting offset widens the lists rather than OFFSET-ing a scan.
+        candidates = max(limit, min(_MAX_CANDIDATES, max(candidates, depth + limit)))
+    rrf_k = max(1, rrf_k)
 
+    params = _Params()
+    qvec = params.add(vector)
+    filters = ["m.role = 'user'"]
     if session_id is not None:
-        conditions.append(f"m.session_id = ${p}")
-        params.append(int(session_id))
-        p += 1
-
+        filters.append(f"m.session_id = {params.add(int(session_id))}")
     if since_dt is not None:
-        conditions.append(f"m.created_at >= ${p}")
-        params.append(since_dt)
-        p += 1
-
+        filters.append(f"m.created_at >= {params.add(since_dt)}")
     if until_dt is not None:
-        conditions.append(f"m.created_at <= ${p}")
-        params.append(until_dt)
-        p += 1
-
+        filters.append(f"m.created_at <= {params.add(until_dt)}")
     for kw in also:
-        conditions.append(f"m.content ILIKE ${p}")
-        params.append(f"%{kw}%")
-        p += 1
-
-    where = " AND ".join(conditions)
+        filters.append(f"m.content ILIKE {params.add(f'%{kw}%')}")
+    where = " AND ".join(filters)
+
+    branches = [f"""
+        SELECT id, ROW_NUMBER() OVER (ORDER BY dist, id) AS r FROM (
+            SELECT m.id, m.embedding <=> {qvec}::vector AS dist
+            FROM messages m
+            WHERE {where} AND m.embedding IS NOT NULL
+            ORDER BY dist
+            LIMIT {candidates}
+        ) v
+    """]
+    terms = _lexical_terms(query) if mode == "hybrid" else []
+    if terms:
+        tsq = params.add(" | ".join(terms))
+        branches.append(f"""
+        SELECT id, ROW_NUMBER() OVER (ORDER BY rank DESC, id DESC) AS r FROM (
+            SELECT m.id, ts_rank_cd(to_tsvector('simple', m.content), q, 1) AS rank
+            FROM messages m, to_tsquery('simple', {tsq}) q
+            WHERE {where} AND to_tsvector('simple', m.content) @@ q
+            ORDER BY rank DESC
+            LIMIT {candidates}
+        ) l
+    """)
 
     if sort_by == "recency":
-        order = "m.created_at DESC, (m.embedding <=> $1::vector) ASC"
+        order = "m.created_at DESC, m.id DESC"
+        if after:
+            keyset = f"(m.created_at, m.id) < ({params.add(after['k'])}, {params.add(after['id'])})"
     else:
-        order = "(m.embedding <=> $1::vector) ASC, m.created_at DESC"
-
-    limit_param = p
-    offset_param = p + 1
-    params.append(limit)
-    params.append(offset)
+        order = "f.score DESC, m.id DESC"
+        if after:
+            keyset = f"(f.score, m.id) < ({params.add(float(after['k']))}::float8, {params.add(after['id'])})"
+    limit_param = params.add(limit)
 
     sql = f"""
+        WITH candidates AS ({" UNION ALL ".join(branches)}),
+        fused AS (
+            SELECT id, SUM(1.0::float8 / ({rrf_k} + r)) AS score
+            FROM candidates
+            GROUP BY id
+        )
         SELECT
-            m.id, m.session_id, m.content, m.created_at,
-            1 - (m.embedding <=> $1::vector) AS similarity,
+            m.id, m.session_id, m.content, m.created_at, f.score,
+            1 - (m.embedding <=> {qvec}::vector) AS similarity,
             s.platform_chat_id AS chat_id
-        FROM messages m
+        FROM fused f
+        JOIN messages m ON m.id = f.id
         LEFT JOIN sessions s ON s.id = m.session_id
-        WHERE {where}
+        {f"WHERE {keyset}" if after else ""}
         ORDER BY {order}
-        LIMIT ${limit_param} OFFSET ${offset_param}
+        {"" if after or not depth else f"OFFSET {int(depth)}"}
+        LIMIT {limit_param}
     """
 
     try:
         async with get_connection() as conn:
+            await _tune_vector_scan(conn, candidates)
             rows = await conn.fetch(sql, *params)
     except Exception as e:
         logger.exception("history_search DB error")
         return f"Error: database query failed: {e}"
 
+    if not rows and after:
+        return "No more results for this search."
     if not rows:
         return "No matches. Try a broader query, a different keyword, or wider since/until range."
 
     hits = []
     for r in rows:
+        sim = r["similarity"]
         hits.append({
             "anchor_id": r["id"],
             "session_id": r["session_id"],
             "chat_id": r["chat_id"] or "",
             "created_at": r["created_at"].isoformat() if r["created_at"] else None,
-            "similarity": round(float(r["similarity"] or 0.0), 4),
+            # None: matched lexically, embedding still pending.
+            "similarity": round(float(sim), 4) if sim is not None else None,
             "preview": _preview(r["content"]),
         })
 
+    next_cursor = None
+    if len(rows) == limit:
+        last = rows[-1]
+        key = last["created_at"].isoformat() if sort_by == "recency" else float(last["score"] or 0.0)
+        next_cursor = _encode_cursor(key, last["id"], depth + len(rows), candidates)
+
     return json.dumps({
         "sort_by": sort_by,
+        "mode": mode,
         "limit": limit,
-        "offset": offset,
+        "offset": depth,
         "returned": len(hits),
         "hits": hits,
-        "next_offset": offset + len(hits),
+        "next_offset": depth + len(hits),
+        "next_cursor": next_cursor,
         "hint": (
             "Call history_expand([anchor_id, ...]) to read full context around "
-            "promising previews. Reject obvious no-matches without expanding."
+            "promising previews. Reject obvious no-matches without expanding. "
+            "For more results, call again with cursor=next_cursor."
         ),
     }, ensure_ascii=False)
 
@@ -224,7 +380,7 @@ async def history_search_handler(
 HISTORY_SEARCH_TOOL = {
     "name": "history_search",
     "description": (
-        "Semantic search over USER messages across the entire chat log. Indexing "
+        "Hybrid search (meaning + exact words) over USER messages across the entire chat log. Indexing "
         "is user-only BY DESIGN: user messages are ground truth (what the owner "
         "actually said) so results can never be seeded by a past assistant "
         "hallucination. Returns anchor PREVIEWS only — a snippet of the USER "
@@ -250,9 +406,12 @@ HISTORY_SEARCH_TOOL = {
                 "type": "integer",
                 "description": "Max previews to return (default 10, cap 50).",
             },
-            "offset": {
-                "type": "integer",
-                "description": "Skip N results — for pagination.",
+            "cursor": {
+                "type": "string",
+                "description": (
+                    "Pagination: pass next_cursor from the previous result "
+                    "(same query and filters) to get the next page."
+                ),
             },
             "session_id": {
                 "type": "integer",
@@ -275,6 +434,14 @@ HISTORY_SEARCH_TOOL = {
                     "many candidates."
                 ),
             },
+            "mode": {
+                "type": "string",
+                "enum": ["hybrid", "semantic"],
+                "description": (
+                    "Default 'hybrid': meaning + exact words (names, numbers, "
+                    "rare terms) fused. 'semantic': meaning only."
+                ),
+            },
             "sort_by": {
                 "type": "string",
                 "enum": ["similarity", "recency"],
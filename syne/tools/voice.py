@@ -10,6 +10,7 @@ from typing import Optional
 import edge_tts
 
 from ..db.models import get_config
+from ..http_clients import pooled_client
 
 logger = logging.getLogger("syne.tools.voice")
 
@@ -119,7 +120,7 @@ async def _transcribe_groq(
         data["language"] = language
     
     try:
-        async with httpx.AsyncClient(timeout=60) as client:
+        async with pooled_client("groq", timeout=60) as client:
             response = await client.post(
                 GROQ_WHISPER_ENDPOINT,
                 headers={
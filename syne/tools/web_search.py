@@ -6,6 +6,7 @@ import time
 import httpx
 
 from ..db.models import get_config
+from ..http_clients import pooled_client
 
 logger = logging.getLogger("syne.tools.web_search")
 
@@ -45,7 +46,7 @@ async def _request_with_retry(client: httpx.AsyncClient, method: str, url: str,
 
 async def _search_tavily(query: str, api_key: str, count: int) -> str:
     """Search using Tavily API (POST, Bearer auth)."""
-    async with httpx.AsyncClient(timeout=30) as client:
+    async with pooled_client("web_search", timeout=30) as client:
         response = await _request_with_retry(
             client, "POST",
             "https://api.tavily.com/search",
@@ -81,7 +82,7 @@ async def _search_tavily(query: str, api_key: str, count: int) -> str:
 
 async def _search_brave(query: str, api_key: str, count: int) -> str:
     """Search using Brave Search API (GET, X-Subscription-Token)."""
-    async with httpx.AsyncClient(timeout=30) as client:
+    async with pooled_client("web_search", timeout=30) as client:
         response = await _request_with_retry(
             client, "GET",
             "https://api.search.brave.com/res/v1/web/search",
@@ -0,0 +1,56 @@
+"""Syne sub-agent worker — runs queued sub-agents outside the bot process.
+
+`syne worker` boots the agent core (DB, provider, tools, abilities) without
+any channel, scheduler or gateway, then claims sub-agent runs from the
+subagent_runs queue and executes them. Any number of workers can run, on
+this host or others pointed at the same database; each claims with SKIP
+LOCKED. The bot process delivers their results.
+
+Set subagents.executor = "worker" so the bot stops running sub-agents
+itself; with "inline" a worker still helps drain the queue and picks up
+runs orphaned by a crashed bot.
+"""
+
+import asyncio
+import logging
+import signal
+from typing import Optional
+
+from .agent import SyneAgent
+from .config import load_settings
+
+logger = logging.getLogger("syne.worker")
+
+
+async def run_worker(concurrency: Optional[int] = None) -> None:
+    """Run sub-agents from the queue until SIGINT/SIGTERM.
+
+    Args:
+        concurrency: Runs executed at once by this worker. None =
+            subagents.max_concurrent.
+    """
+    settings = load_settings()
+    agent = SyneAgent(settings)
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except (NotImplementedError, RuntimeError):
+            pass
+
+    try:
+        await agent.start()
+        manager = agent.subagents
+        manager.concurrency = concurrency
+        await manager.start(settings.database_url, execute=True, deliver=False)
+        logger.info(
+            f"Sub-agent worker {manager.worker_id} ready "
+            f"(concurrency {await manager.max_concurrent()})"
+        )
+        await stop.wait()
+        logger.info("Sub-agent worker stopping — running sub-agents go back to the queue")
+    finally:
+        if agent.subagents:
+            await agent.subagents.stop()
+        await agent.stop()
@@ -0,0 +1,156 @@
+"""Anthropic prompt-cache layout — stable prefix, volatile tail, breakpoints.
+
+AnthropicProvider.chat() keeps the system prompt in `system` but sends
+per-turn context (system messages marked volatile: time, memories, graph)
+as leading blocks of the current user message, so the system prompt and
+older history stay byte-identical across turns. These tests capture the
+request body and check where content and cache breakpoints land.
+"""
+
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from syne.conversation import Conversation
+from syne.llm.anthropic import AnthropicProvider
+from syne.llm.provider import ChatMessage, track_turn_usage
+
+_SSE = [
+    "event: message_start",
+    'data: {"message": {"model": "claude-test", "usage": {"input_tokens": 12, '
+    '"cache_read_input_tokens": 900, "cache_creation_input_tokens": 40}}}',
+    "event: content_block_start",
+    'data: {"index": 0, "content_block": {"type": "text"}}',
+    "event: content_block_delta",
+    'data: {"index": 0, "delta": {"type": "text_delta", "text": "ok"}}',
+    "event: content_block_stop",
+    'data: {"index": 0}',
+    "event: message_delta",
+    'data: {"delta": {"stop_reason": "end_turn"}, "usage": {"output_tokens": 3}}',
+]
+
+
+class _FakeResp:
+    status_code = 200
+
+    async def aiter_lines(self):
+        for line in _SSE:
+            yield line
+
+
+class _FakeClient:
+    def __init__(self):
+        self.bodies = []
+
+    @asynccontextmanager
+    async def stream(self, method, url, json=None, **kw):
+        self.bodies.append(json)
+        yield _FakeResp()
+
+
+@pytest.fixture
+def provider():
+    p = AnthropicProvider(chat_model="claude-sonnet-4-20250514")
+    client = _FakeClient()
+    with patch.object(p, "_load_token", new=AsyncMock(return_value="sk-test")), \
+         patch.object(p, "_get_user_agent", new=AsyncMock(return_value="ua")), \
+         patch.object(p, "_get_client", return_value=client):
+        p.client = client
+        yield p
+
+
+def _cached(block) -> bool:
+    return isinstance(block, dict) and "cache_control" in block
+
+
+def _turn(question: str = "what's new?") -> list[ChatMessage]:
+    return [
+        ChatMessage(role="system", content="RULES"),
+        ChatMessage(role="user", content="hello"),
+        ChatMessage(role="assistant", content="hi there"),
+        ChatMessage(role="system", content="# Current Time\n12:01", metadata={"volatile": True}),
+        ChatMessage(role="system", content="# Relevant Memories\n- x", metadata={"volatile": True}),
+        ChatMessage(role="user", content=question),
+    ]
+
+
+class TestCacheLayout:
+
+    async def test_volatile_blocks_go_to_user_turn(self, provider):
+        await provider.chat(_turn(), thinking_budget=0)
+        body = provider.client.bodies[0]
+        assert [b["text"] for b in body["system"]] == ["RULES"]
+        last = body["messages"][-1]
+        texts = [b["text"] for b in last["content"]]
+        assert "# Current Time" in texts[0] and "not written by the user" in texts[0]
+        assert "# Relevant Memories" in texts[1]
+        assert texts[2] == "what's new?"
+
+    async def test_breakpoints_on_stable_boundaries(self, provider):
+        await provider.chat(_turn(), thinking_budget=0)
+        body = provider.client.bodies[0]
+        assert _cached(body["system"][-1])
+        history_end = body["messages"][-2]["content"]
+        assert _cached(history_end[-1])                       # end of stable history
+        last = body["messages"][-1]["content"]
+        assert not _cached(last[0]) and _cached(last[-1])     # current user message
+        n = sum(_cached(b) for m in body["messages"] for b in m["content"] if isinstance(m["content"], list))
+        assert n + 1 <= 4
+
+    async def test_prefix_identical_across_turns(self, provider):
+        first = _turn("first question")
+        await provider.chat(first, thinking_budget=0)
+        second = [m for m in first if not (m.metadata or {}).get("volatile")] + [
+            ChatMessage(role="assistant", content="answer"),
+            ChatMessage(role="system", content="# Current Time\n12:02", metadata={"volatile": True}),
+            ChatMessage(role="user", content="second question"),
+        ]
+        await provider.chat(second, thinking_budget=0)
+        b1, b2 = provider.client.bodies
+        assert b1["system"] == b2["system"]
+
+        def plain(msg):
+            # String content is shorthand for one text block; cache_control
+            # marks a boundary but is not part of the cached content.
+            c = msg["content"]
+            if isinstance(c, str):
+                c = [{"type": "text", "text": c}]
+            return msg["role"], [{k: v for k, v in b.items() if k != "cache_control"} for b in c]
+
+        # Everything before the first turn's context blocks is reused verbatim.
+        assert [plain(m) for m in b1["messages"][:2]] == [plain(m) for m in b2["messages"][:2]]
+        # ...and the second turn's history breakpoint sits after the new answer.
+        assert _cached(b2["messages"][-2]["content"][-1])
+
+    async def test_context_without_user_falls_back_to_system(self, provider):
+        msgs = [
+            ChatMessage(role="system", content="RULES"),
+            ChatMessage(role="user", content="hi"),
+            ChatMessage(role="system", content="late", metadata={"volatile": True}),
+        ]
+        await provider.chat(msgs, thinking_budget=0)
+        assert [b["text"] for b in provider.client.bodies[0]["system"]] == ["RULES", "late"]
+
+    async def test_cache_usage_reported_per_turn(self, provider):
+        with track_turn_usage() as usage:
+            resp = await provider.chat(_turn(), thinking_budget=0)
+            await provider.chat(_turn(), thinking_budget=0)
+        assert (resp.cache_read_tokens, resp.cache_write_tokens) == (900, 40)
+        assert usage.rounds == 2
+        assert usage.total_cache_read == 1800
+        assert usage.cache_hit_rate == pytest.approx(900 / 952)
+
+
+class TestBuildContextLayout:
+
+    def test_volatile_blocks_placed_before_current_user(self):
+        msgs = [
+            ChatMessage(role="system", content="RULES"),
+            ChatMessage(role="user", content="old"),
+            ChatMessage(role="assistant", content="reply"),
+            ChatMessage(role="user", content="now"),
+        ]
+        vol = [ChatMessage(role="system", content="time", metadata={"volatile": True})]
+        Conversation._place_volatile_blocks(msgs, vol)
+        assert [m.content for m in msgs] == ["RULES", "old", "reply", "time", "now"]
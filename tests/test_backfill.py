@@ -0,0 +1,153 @@
+"""Tests for syne.memory.backfill — pipelined, adaptively batched embedding backfill."""
+
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock
+
+from syne.memory.backfill import BackfillStats, BatchSizer, run
+from tests.conftest import MockEmbeddingResponse
+
+
+def _rows(ids):
+    return [{"id": i, "content": f"row {i}"} for i in ids]
+
+
+class _Table:
+    """In-memory table served 'id > after LIMIT n' like the real fetch queries."""
+
+    def __init__(self, ids):
+        self.ids = list(ids)
+        self.fetches = []
+        self.writes = []
+
+    async def fetch(self, after_id, limit):
+        self.fetches.append((after_id, limit))
+        return _rows([i for i in self.ids if i > after_id][:limit])
+
+    async def write(self, ids, vectors, last_id, failed):
+        self.writes.append((ids, vectors, last_id, failed))
+
+
+def _provider():
+    provider = AsyncMock()
+    provider.embed_batch.side_effect = lambda texts: [MockEmbeddingResponse(vector=[1.0]) for _ in texts]
+    return provider
+
+
+class TestBatchSizer:
+
+    def test_grows_toward_target_latency_at_most_doubling(self):
+        sizer = BatchSizer(initial=16, maximum=512, target_seconds=2.0)
+        sizer.observe(16, 0.1)  # ideal 320
+        assert sizer.size == 32
+        for _ in range(10):
+            sizer.observe(sizer.size, 0.1)
+        assert sizer.size == 512
+
+    def test_shrinks_when_batches_run_long(self):
+        sizer = BatchSizer(initial=256, target_seconds=2.0)
+        sizer.observe(256, 8.0)  # ideal 64
+        assert sizer.size == 160
+
+    def test_failure_halves_down_to_minimum(self):
+        sizer = BatchSizer(initial=8, minimum=4)
+        sizer.failed()
+        sizer.failed()
+        assert sizer.size == 4
+
+    def test_small_initial_is_respected(self):
+        assert BatchSizer(initial=2).size == 2
+
+
+class TestStats:
+
+    def test_eta_from_rate(self):
+        stats = BackfillStats(total=300, done=100)
+        stats.started -= 10
+        assert stats.rate == pytest.approx(10, rel=0.01)
+        assert stats.eta == pytest.approx(20, rel=0.01)
+        assert "ETA" in stats.describe() and "100/300" in stats.describe()
+
+    def test_no_eta_without_total(self):
+        assert BackfillStats(done=5).eta is None
+
+
+class TestRun:
+
+    async def test_keyset_pages_and_bulk_writes(self):
+        table = _Table([2, 4, 6, 8, 10])
+        stats = await run(table.fetch, table.write, _provider(), sizer=BatchSizer(initial=2, maximum=2))
+        assert stats.done == 5 and stats.batches == 3 and stats.cursor == 10
+        assert [after for after, _ in table.fetches] == [0, 4, 8]
+        assert [w[0] for w in table.writes] == [[2, 4], [6, 8], [10]]
+
+    async def test_failed_rows_skipped_and_cursor_advances(self):
+        table = _Table([1, 2, 3])
+        provider = AsyncMock()
+        provider.embed_batch.return_value = [
+            MockEmbeddingResponse(vector=[1.0]), MockEmbeddingResponse(vector=[]), MockEmbeddingResponse(vector=[2.0]),
+        ]
+        stats = await run(table.fetch, table.write, provider)
+        assert table.writes == [([1, 3], [[1.0], [2.0]], 3, 1)]
+        assert (stats.done, stats.failed) == (2, 1)
+
+    async def test_limit_caps_rows(self):
+        table = _Table(range(1, 100))
+        stats = await run(table.fetch, table.write, _provider(), limit=5, sizer=BatchSizer(initial=4, maximum=4))
+        assert stats.done == 5
+        assert table.fetches == [(0, 4), (4, 1)]
+
+    async def test_truncates_content(self):
+        provider = _provider()
+        table = _Table([1])
+        await run(table.fetch, table.write, provider, max_chars=3)
+        assert provider.embed_batch.await_args.args[0] == ["row"]
+
+    async def test_batch_failure_retries_rows_and_shrinks(self):
+        table = _Table([1, 2])
+        provider = AsyncMock()
+        provider.embed_batch.side_effect = RuntimeError("down")
+        provider.embed.return_value = MockEmbeddingResponse(vector=[1.0])
+        sizer = BatchSizer(initial=64)
+        stats = await run(table.fetch, table.write, provider, sizer=sizer)
+        assert stats.done == 2 and provider.embed.await_count == 2
+        assert sizer.size == 32
+
+    async def test_next_page_fetched_while_current_embeds(self):
+        table = _Table([1, 2, 3, 4])
+        release = asyncio.Event()
+        fetched_during_embed = []
+
+        async def slow_embed(texts):
+            if not release.is_set():
+                await asyncio.sleep(0.01)
+                fetched_during_embed.append(len(table.fetches))
+                release.set()
+            return [MockEmbeddingResponse(vector=[1.0]) for _ in texts]
+
+        provider = AsyncMock()
+        provider.embed_batch.side_effect = slow_embed
+        await run(table.fetch, table.write, provider, sizer=BatchSizer(initial=2, maximum=2))
+        assert fetched_during_embed[0] >= 2  # page 2 was read before page 1 finished embedding
+
+    async def test_write_error_propagates_and_stops_stages(self):
+        table = _Table(range(1, 50))
+        write = AsyncMock(side_effect=RuntimeError("db gone"))
+        with pytest.raises(RuntimeError, match="db gone"):
+            await run(table.fetch, write, _provider(), sizer=BatchSizer(initial=4, maximum=4))
+        assert len(table.fetches) <= 3
+
+    async def test_fetch_error_propagates(self):
+        fetch = AsyncMock(side_effect=RuntimeError("bad sql"))
+        with pytest.raises(RuntimeError, match="bad sql"):
+            await run(fetch, AsyncMock(), _provider())
+
+    async def test_progress_reported_per_page(self):
+        table = _Table([1, 2, 3])
+        seen = []
+        await run(
+            table.fetch, table.write, _provider(), total=3,
+            sizer=BatchSizer(initial=1, maximum=1), on_progress=lambda s: seen.append(s.done),
+        )
+        assert seen == [1, 2, 3]
@@ -0,0 +1,182 @@
+"""Tests for syne.communication.chat_queue — per-chat lanes, global cap, coalescing."""
+
+import asyncio
+
+import pytest
+
+from syne.communication.chat_queue import ChatWorkQueue
+
+
+class _Recorder:
+    """Runner that records batches and can hold jobs open until released."""
+
+    def __init__(self, hold=False):
+        self.batches = []
+        self.active = 0
+        self.peak = 0
+        self.gate = asyncio.Event()
+        if not hold:
+            self.gate.set()
+
+    async def __call__(self, items):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        self.batches.append(list(items))
+        try:
+            await self.gate.wait()
+        finally:
+            self.active -= 1
+
+
+async def _settle(rounds=10):
+    for _ in range(rounds):
+        await asyncio.sleep(0)
+
+
+@pytest.fixture
+async def closing():
+    queues = []
+    yield queues.append
+    for q in queues:
+        await q.close()
+
+
+class TestLanes:
+
+    async def test_one_job_per_chat_at_a_time(self, closing):
+        run = _Recorder(hold=True)
+        q = ChatWorkQueue(run, coalesce_window=0)
+        closing(q)
+        for i in range(3):
+            assert q.submit("a", i)
+        await _settle()
+        assert run.batches == [[0]]
+        run.gate.set()
+        await _settle()
+        assert run.batches == [[0], [1], [2]]
+
+    async def test_global_cap_across_chats(self, closing):
+        run = _Recorder(hold=True)
+        q = ChatWorkQueue(run, max_running=2, coalesce_window=0)
+        closing(q)
+        for chat in "abcd":
+            q.submit(chat, chat)
+        await _settle()
+        assert run.active == 2
+        assert q.stats()["pending"] == 2
+        run.gate.set()
+        await _settle()
+        assert run.peak == 2 and len(run.batches) == 4
+
+    async def test_failing_job_does_not_stop_lane(self, closing):
+        done = []
+
+        async def _run(items):
+            if items == ["boom"]:
+                raise RuntimeError("handler crashed")
+            done.append(items[0])
+
+        q = ChatWorkQueue(_run, coalesce_window=0)
+        closing(q)
+        q.submit("a", "boom")
+        q.submit("a", "next")
+        await _settle()
+        assert done == ["next"]
+        assert q.stats()["failed"] == 1
+
+    async def test_cancelling_a_job_keeps_the_worker(self, closing):
+        tasks = []
+
+        async def _run(items):
+            tasks.append(asyncio.current_task())
+            if items == ["slow"]:
+                await asyncio.sleep(60)
+
+        q = ChatWorkQueue(_run, coalesce_window=0)
+        closing(q)
+        q.submit("a", "slow")
+        q.submit("a", "after")
+        await _settle()
+        tasks[0].cancel()          # what /cancel does to the running turn
+        await _settle()
+        assert len(tasks) == 2
+
+
+class TestBackpressure:
+
+    async def test_per_chat_limit(self, closing):
+        q = ChatWorkQueue(_Recorder(hold=True), max_pending_per_chat=2, coalesce_window=0)
+        closing(q)
+        results = [q.submit("a", i) for i in range(4)]
+        assert results == [True, True, False, False]
+        assert q.submit("b", 0)
+        assert q.stats()["rejected"] == 2
+
+    async def test_global_limit_and_saturated(self, closing):
+        q = ChatWorkQueue(_Recorder(hold=True), max_pending=3, coalesce_window=0)
+        closing(q)
+        for chat in "abc":
+            assert q.submit(chat, chat)
+        assert q.saturated
+        assert not q.submit("d", "d")
+
+    async def test_close_discards_waiting_items(self):
+        dropped = []
+        q = ChatWorkQueue(_Recorder(hold=True), discard=dropped.append, coalesce_window=0)
+        for i in range(3):
+            q.submit("a", i)
+        await _settle()
+        await q.close()
+        assert dropped == [1, 2]
+        assert not q.submit("a", 9)
+
+
+class TestCoalescing:
+
+    async def test_lines_sent_while_busy_become_one_job(self, closing):
+        run = _Recorder(hold=True)
+        q = ChatWorkQueue(run, coalesce_window=0)
+        closing(q)
+        q.submit("a", "first", coalesce_key="u1")
+        await _settle()
+        for line in ("two", "three", "four"):
+            q.submit("a", line, coalesce_key="u1")
+        run.gate.set()
+        await _settle()
+        assert run.batches == [["first"], ["two", "three", "four"]]
+        assert q.stats()["coalesced"] == 2
+
+    async def test_window_merges_quick_burst(self, closing):
+        run = _Recorder()
+        q = ChatWorkQueue(run, coalesce_window=0.05)
+        closing(q)
+        q.submit("a", "hi", coalesce_key="u1")
+        await asyncio.sleep(0.01)
+        q.submit("a", "there", coalesce_key="u1")
+        await asyncio.sleep(0.1)
+        assert run.batches == [["hi", "there"]]
+
+    async def test_different_sender_or_keyless_not_merged(self, closing):
+        run = _Recorder(hold=True)
+        q = ChatWorkQueue(run, coalesce_window=0)
+        closing(q)
+        q.submit("a", "busy", coalesce_key="u1")
+        await _settle()
+        q.submit("a", "x", coalesce_key="u1")
+        q.submit("a", "photo")
+        q.submit("a", "y", coalesce_key="u1")
+        q.submit("a", "z", coalesce_key="u2")
+        run.gate.set()
+        await _settle(30)
+        assert run.batches == [["busy"], ["x"], ["photo"], ["y"], ["z"]]
+
+
+async def test_stats_report_waits(closing):
+    run = _Recorder()
+    q = ChatWorkQueue(run, coalesce_window=0)
+    closing(q)
+    q.submit("a", 1)
+    await _settle()
+    s = q.stats()
+    assert s["processed"] == 1 and s["pending"] == 0 and s["running"] == 0
+    assert s["wait_p50_ms"] >= 0 and s["wait_p95_ms"] >= s["wait_p50_ms"]
@@ -0,0 +1,173 @@
+"""Tests for syne.compaction — chunked serialization, map-reduce, short transactions."""
+
+import asyncio
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from syne.compaction import (
+    _chunk_transcript,
+    _serialize_messages,
+    compact_session,
+)
+from syne.context import ContextManager
+from syne.conversation import Conversation
+from syne.llm.provider import ChatMessage, ChatResponse
+
+
+def _rows(n, size=100, start=1):
+    return [
+        {"id": i, "role": "user" if i % 2 else "assistant", "content": f"m{i} " + "x" * size, "metadata": None}
+        for i in range(start, start + n)
+    ]
+
+
+class TestChunkTranscript:
+
+    def test_small_transcript_is_one_chunk(self):
+        rows = _rows(4)
+        assert _chunk_transcript(rows, 10_000) == [_serialize_messages(rows)]
+
+    def test_chunks_respect_limit_and_keep_every_row(self):
+        rows = _rows(50, size=300)
+        chunks = _chunk_transcript(rows, 2_000)
+        assert len(chunks) > 1
+        assert all(len(c) <= 2_000 for c in chunks)
+        joined = "\n\n".join(chunks)
+        assert all(f"m{r['id']} " in joined for r in rows)
+
+    def test_oversized_row_is_cut_to_fit(self):
+        rows = [{"id": 1, "role": "tool", "content": "word " * 10_000, "metadata": None}]
+        (chunk,) = _chunk_transcript(rows, 1_000)
+        assert len(chunk) <= 1_000
+        assert "chars omitted" in chunk
+
+    def test_plain_system_rows_skipped(self):
+        rows = [{"id": 1, "role": "system", "content": "RULES", "metadata": None}] + _rows(1)
+        assert "RULES" not in _chunk_transcript(rows, 10_000)[0]
+
+
+def _provider(window, reply="SUMMARY"):
+    p = MagicMock()
+    p.context_window = window
+    p.chat = AsyncMock(return_value=ChatResponse(content=reply, model="m"))
+    return p
+
+
+@pytest.fixture
+def db(mock_get_config):
+    """Fake pool: tracks how many connections are checked out at a time."""
+    conn = AsyncMock()
+    tx = MagicMock()
+    tx.__aenter__ = AsyncMock(return_value=None)
+    tx.__aexit__ = AsyncMock(return_value=False)
+    conn.transaction = MagicMock(return_value=tx)
+    conn.held = 0
+    conn.stats = {"message_count": 60, "total_chars": 6000, "oldest_message": None, "newest_message": None}
+    conn.fetchrow.side_effect = lambda sql, *a: conn.stats if "COUNT(*)" in sql else None
+    conn.fetch.return_value = _rows(10)
+    conn.execute.side_effect = lambda sql, *a: f"UPDATE {len(a[0])}" if "status = 'compacted'" in sql else "OK"
+
+    @asynccontextmanager
+    async def _get_connection():
+        conn.held += 1
+        try:
+            yield conn
+        finally:
+            conn.held -= 1
+
+    with patch("syne.compaction.get_connection", _get_connection), \
+         patch("syne.compaction.get_config", side_effect=lambda k, d=None: mock_get_config._store.get(k, d)):
+        yield conn
+
+
+class TestCompactSession:
+
+    async def test_no_connection_held_during_llm_call(self, db):
+        provider = _provider(200_000)
+        held = []
+        provider.chat.side_effect = lambda **kw: held.append(db.held) or ChatResponse(content="S", model="m")
+        result = await compact_session(1, provider, keep_recent=50)
+        assert held == [0]
+        assert result["chunks"] == 1
+        assert result["messages_summarized"] == 10
+
+    async def test_oversized_transcript_is_map_reduced(self, db):
+        db.fetch.return_value = _rows(40, size=3_000)
+        provider = _provider(24_000)   # ~10k chars of transcript per chunk
+        result = await compact_session(1, provider, keep_recent=20)
+        n = result["chunks"]
+        assert n > 1
+        assert provider.chat.await_count >= n + 1
+        final = provider.chat.await_args.kwargs["messages"][0].content
+        assert final.count("<partial-summary>") >= 2
+        # Every row is archived: nothing silently dropped.
+        archived = next(c.args[1] for c in db.execute.await_args_list if "status = 'compacted'" in c.args[0])
+        assert archived == list(range(1, 41))
+
+    async def test_chunk_summaries_bounded_parallelism(self, db, mock_get_config):
+        mock_get_config._store["compaction.max_parallel"] = 2
+        db.fetch.return_value = _rows(60, size=3_000)
+        running = peak = 0
+
+        async def _chat(**kw):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return ChatResponse(content="part", model="m")
+
+        provider = _provider(24_000)
+        provider.chat.side_effect = _chat
+        await compact_session(1, provider, keep_recent=20)
+        assert peak == 2
+
+    async def test_concurrent_archive_discards_result(self, db):
+        db.execute.side_effect = lambda sql, *a: "UPDATE 3" if "status = 'compacted'" in sql else "OK"
+        result = await compact_session(1, _provider(200_000), keep_recent=50)
+        assert result is None
+        assert not any("INSERT INTO messages" in c.args[0] for c in db.execute.await_args_list)
+
+    async def test_not_enough_messages(self, db):
+        db.stats = {**db.stats, "message_count": 10}
+        provider = _provider(200_000)
+        assert await compact_session(1, provider, keep_recent=40) is None
+        provider.chat.assert_not_awaited()
+
+
+def _conv():
+    c = object.__new__(Conversation)
+    c.session_id = 7
+    c.context_mgr = ContextManager(max_context_tokens=1_000, reserved_output_tokens=0)
+    c._message_cache = [ChatMessage(role="user", content="x" * 4_000)]
+    c._compact_lock = asyncio.Lock()
+    c._compact_task = None
+    c._history_stale = False
+    return c
+
+
+class TestBackgroundCompaction:
+
+    async def test_crossing_threshold_starts_background_task(self, mock_get_config):
+        c = _conv()
+        with patch.object(c, "_run_compact", new=AsyncMock(return_value={
+            "messages_before": 60, "messages_after": 21,
+        })), patch.object(c, "load_history", new=AsyncMock()) as reload:
+            await c._maybe_compact_in_background()
+            await c._compact_task
+        assert c._history_stale is True
+        reload.assert_not_awaited()   # swapped in by the next turn, under the turn lock
+
+    async def test_disabled_by_config(self, mock_get_config):
+        mock_get_config._store["compaction.background"] = False
+        c = _conv()
+        await c._maybe_compact_in_background()
+        assert c._compact_task is None
+
+    async def test_below_threshold_does_nothing(self, mock_get_config):
+        c = _conv()
+        c._message_cache = [ChatMessage(role="user", content="hi")]
+        await c._maybe_compact_in_background()
+        assert c._compact_task is None
@@ -0,0 +1,94 @@
+"""Tests for syne.db.config_cache — bulk load, invalidation, get_config wiring."""
+
+from unittest.mock import patch
+
+import pytest
+
+from syne.db import config_cache as C
+from syne.db import models
+
+
+@pytest.fixture
+def db(mock_connection):
+    """Patch get_connection everywhere the cache path touches the DB."""
+    conn, ctx = mock_connection
+    with patch("syne.db.config_cache.get_connection", return_value=ctx), \
+         patch("syne.db.models.get_connection", return_value=ctx):
+        yield conn
+
+
+@pytest.fixture
+def cache(db):
+    """A loaded, enabled cache without the LISTEN task."""
+    cache = C.ConfigCache()
+    db.fetch.return_value = [
+        {"key": "memory.recall_limit", "value": "5"},
+        {"key": "memory.category_routes", "value": '{"a": ["b"]}'},
+    ]
+    with patch.object(C, "_cache", cache):
+        yield cache
+
+
+async def _load(cache):
+    await cache.reload()
+    cache._enabled = True
+    cache._listening = True
+
+
+class TestConfigCache:
+
+    async def test_bulk_load_then_no_round_trips(self, cache, db):
+        await _load(cache)
+        assert db.fetch.await_count == 1
+        assert await models.get_config("memory.recall_limit") == 5
+        assert await models.get_config("session.history_limit", 100) == 100
+        assert db.fetch.await_count == 1
+        db.fetchrow.assert_not_called()
+
+    async def test_returned_values_are_independent_copies(self, cache, db):
+        await _load(cache)
+        routes = await models.get_config("memory.category_routes")
+        routes["a"].append("mutated")
+        assert await models.get_config("memory.category_routes") == {"a": ["b"]}
+
+    async def test_invalidate_rereads_single_key_once(self, cache, db):
+        await _load(cache)
+        db.fetchrow.return_value = {"value": "9"}
+        cache.invalidate("memory.recall_limit")
+        assert await models.get_config("memory.recall_limit") == 9
+        assert await models.get_config("memory.recall_limit") == 9
+        assert db.fetchrow.await_count == 1
+
+    async def test_invalidate_deleted_key_returns_default(self, cache, db):
+        await _load(cache)
+        db.fetchrow.return_value = None
+        cache.invalidate("memory.recall_limit")
+        assert await models.get_config("memory.recall_limit", "dflt") == "dflt"
+
+    async def test_notify_payload_invalidates(self, cache, db):
+        await _load(cache)
+        cache._on_notify(None, 123, C.CHANNEL, "memory.recall_limit")
+        db.fetchrow.return_value = {"value": "7"}
+        assert await models.get_config("memory.recall_limit") == 7
+
+    async def test_set_and_delete_invalidate(self, cache, db):
+        await _load(cache)
+        db.execute.return_value = "DELETE 1"
+        await models.set_config("memory.recall_limit", 11)
+        assert "memory.recall_limit" in cache._stale
+        cache._stale.clear()
+        await models.delete_config("memory.recall_limit")
+        assert "memory.recall_limit" in cache._stale
+
+    async def test_ttl_expiry_triggers_full_reload(self, cache, db):
+        await _load(cache)
+        cache._loaded_at -= C.TTL_LISTENING + 1
+        await models.get_config("memory.recall_limit")
+        assert db.fetch.await_count == 2
+
+    async def test_disabled_cache_reads_db(self, cache, db):
+        db.fetchrow.return_value = {"value": "3"}
+        assert await models.get_config("memory.recall_limit") == 3
+        assert await models.get_config("memory.recall_limit") == 3
+        assert db.fetchrow.await_count == 2
+        db.fetch.assert_not_called()
@@ -2,8 +2,8 @@
 
 import pytest
 from syne.context import (
-    estimate_tokens, estimate_messages_tokens, ContextManager,
-    DEFAULT_CHARS_PER_TOKEN, SAFETY_MARGIN,
+    estimate_tokens, estimate_messages_tokens, message_tokens, set_tokenizer,
+    ContextManager, DEFAULT_CHARS_PER_TOKEN, SAFETY_MARGIN,
 )
 from syne.llm.provider import ChatMessage
 
@@ -254,3 +254,98 @@ class TestSafetyMargin:
         raw = 200000 - 4096
         assert cm.available < raw
         assert cm.available == int(raw / SAFETY_MARGIN)
+
+
+class TestIncrementalAccounting:
+    """Cached per-message counts and single-pass reduction."""
+
+    def test_message_tokens_cached_until_content_changes(self):
+        msg = ChatMessage(role="user", content="a" * 40)
+        assert message_tokens(msg) == 14
+        assert msg._tokens[2] == 14
+        msg.content = "a" * 80
+        assert message_tokens(msg) == 24
+
+    def test_cache_keyed_on_chars_per_token(self):
+        msg = ChatMessage(role="user", content="a" * 40)
+        assert message_tokens(msg, 4.0) == 14
+        assert message_tokens(msg, 2.0) == 24
+
+    def test_cache_not_part_of_equality(self):
+        a = ChatMessage(role="user", content="x")
+        b = ChatMessage(role="user", content="x")
+        message_tokens(a)
+        assert a == b
+
+    def test_reduce_to_fit_noop_when_fits(self):
+        cm = ContextManager(max_context_tokens=10000, reserved_output_tokens=0)
+        msgs = [ChatMessage(role="user", content="hi")]
+        assert cm.reduce_to_fit(msgs) is msgs
+
+    def test_reduce_to_fit_matches_drop_four_loop(self):
+        cm = ContextManager(max_context_tokens=600, reserved_output_tokens=0)
+        msgs = [ChatMessage(role="system", content="s" * 100)] + [
+            ChatMessage(role="user" if i % 2 == 0 else "assistant", content=f"{i}" * 96)
+            for i in range(10)
+        ]
+        # Reference: the old loop — drop 4 oldest non-system, re-estimate.
+        expected = list(msgs)
+        while estimate_messages_tokens(expected) > cm.available:
+            new, skip = [], 4
+            for m in expected:
+                if m.role == "system" or skip <= 0:
+                    new.append(m)
+                else:
+                    skip -= 1
+            if len(new) == len(expected):
+                break
+            expected = new
+        result = cm.reduce_to_fit(msgs)
+        assert result == expected
+        assert result[0].role == "system"
+        assert estimate_messages_tokens(result) <= cm.available
+
+    def test_reduce_to_fit_keeps_system_when_nothing_left(self):
+        cm = ContextManager(max_context_tokens=10, reserved_output_tokens=0)
+        msgs = [ChatMessage(role="system", content="s" * 400),
+                ChatMessage(role="user", content="hello")]
+        assert cm.reduce_to_fit(msgs) == [msgs[0]]
+
+    def test_prune_running_total_matches_recount(self):
+        cm = ContextManager(max_context_tokens=12000, reserved_output_tokens=0)
+        msgs = [ChatMessage(role="user", content="q")]
+        for _ in range(8):
+            msgs.append(ChatMessage(role="assistant", content="call"))
+            msgs.append(ChatMessage(role="tool", content="r" * 6000))
+        result = cm.prune_tool_results(msgs)
+        assert estimate_messages_tokens(result) < estimate_messages_tokens(msgs)
+        assert all(len(m.content) == 6000 for m in result[-6:] if m.role == "tool")
+        assert msgs[2].content == "r" * 6000  # input untouched
+
+
+class TestTokenizerBackend:
+
+    def teardown_method(self):
+        set_tokenizer("heuristic")
+
+    def test_unknown_tokenizer_falls_back(self):
+        assert set_tokenizer("nonsense") == "heuristic"
+        assert estimate_tokens("a" * 40) == 10
+
+    def test_tiktoken_missing_falls_back(self, monkeypatch):
+        import sys
+        monkeypatch.setitem(sys.modules, "tiktoken", None)
+        assert set_tokenizer("tiktoken") == "heuristic"
+
+    def test_switching_backend_invalidates_cache(self, monkeypatch):
+        import sys
+        import types
+        fake = types.SimpleNamespace(get_encoding=lambda name: types.SimpleNamespace(
+            encode=lambda text, disallowed_special=(): text.split()))
+        monkeypatch.setitem(sys.modules, "tiktoken", fake)
+        msg = ChatMessage(role="user", content="one two three " * 10)
+        heuristic = message_tokens(msg)
+        assert set_tokenizer("tiktoken:cl100k_base") == "tiktoken:cl100k_base"
+        assert message_tokens(msg) == 30 + 4
+        set_tokenizer("heuristic")
+        assert message_tokens(msg) == heuristic
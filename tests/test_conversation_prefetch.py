@@ -0,0 +1,91 @@
+"""Speculative recall — query embedding started before the message is saved.
+
+_chat_inner starts the recall embedding, graph recall and time config read
+at the top of the turn (_start_prefetch) and build_context() consumes them.
+These tests pin when speculation happens and that build_context reuses the
+prefetched vector instead of embedding the query a second time.
+"""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from syne.context import ContextManager
+from syne.conversation import Conversation, _TurnPrefetch
+from syne.llm.provider import ChatMessage, EmbeddingResponse
+
+
+def _conv(access_level="owner"):
+    """Bare Conversation — no DB, no __init__ side effects."""
+    c = object.__new__(Conversation)
+    c.session_id = 42
+    c.system_prompt = "RULES"
+    c.is_group = False
+    c.inbound = None
+    c.user = {"id": 1, "access_level": access_level}
+    c.provider = type("P", (), {"name": "anthropic"})()
+    c._sys_epoch = 0
+    c._ctx_sys_epoch = -1
+    c._message_cache = [ChatMessage(role="user", content="hi")]
+    c.context_mgr = ContextManager()
+    c.memory = MagicMock()
+    c.memory.provider.embed = AsyncMock(
+        return_value=EmbeddingResponse(vector=[0.1, 0.2], model="m", dimensions=2)
+    )
+    c.memory.recall = AsyncMock(return_value=[])
+    return c
+
+
+@pytest.fixture(autouse=True)
+def no_io(mock_get_config):
+    with patch("syne.conversation._load_time_config", new=AsyncMock(return_value={
+        "system.timezone": "UTC", "time.locale": "en", "time.format.full": "{date}",
+    })), patch("syne.memory.graph.recall_graph", new=AsyncMock(return_value=["A → B"])):
+        yield
+
+
+class TestStartPrefetch:
+
+    async def test_owner_query_embeds_speculatively(self):
+        c = _conv()
+        timings = {}
+        p = c._start_prefetch("where did I park", timings)
+        assert await p.query_vector() == [0.1, 0.2]
+        assert await p.graph == ["A → B"]
+        assert {"recall_embed", "graph_recall", "time_config"} <= set(timings)
+
+    async def test_public_requester_not_speculated(self):
+        c = _conv(access_level="public")
+        p = c._start_prefetch("where did I park", {})
+        assert p.embed is None
+        c.memory.provider.embed.assert_not_called()
+        await p.graph
+
+    async def test_short_query_not_speculated(self):
+        c = _conv()
+        p = c._start_prefetch("hi", {})
+        assert p.embed is None
+        await p.graph
+
+    async def test_failed_embed_falls_back_to_none(self):
+        c = _conv()
+        c.memory.provider.embed.side_effect = RuntimeError("ollama down")
+        p = c._start_prefetch("where did I park", {})
+        assert await p.query_vector() is None
+
+
+class TestBuildContextUsesPrefetch:
+
+    async def test_prefetched_vector_passed_to_recall(self):
+        c = _conv()
+        p = c._start_prefetch("where did I park", {})
+        ctx = await c.build_context("where did I park", recall_query="where did I park", prefetch=p)
+        assert c.memory.recall.await_args.kwargs["query_vector"] == [0.1, 0.2]
+        assert c.memory.provider.embed.await_count == 1
+        assert any("A → B" in m.content for m in ctx)
+
+    async def test_prefetch_for_other_query_is_ignored(self):
+        c = _conv()
+        p = _TurnPrefetch("something else entirely", {})
+        await c.build_context("where did I park", recall_query="where did I park", prefetch=p)
+        assert c.memory.recall.await_args.kwargs["query_vector"] is None
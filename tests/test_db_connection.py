@@ -0,0 +1,57 @@
+"""Tests for syne.db.connection — pool init hook and pgvector binary codec."""
+
+import sys
+import types
+
+import pytest
+from unittest.mock import patch, AsyncMock, MagicMock
+
+from syne.db import connection
+
+
+@pytest.fixture
+def fake_pgvector():
+    """Stand-in pgvector.asyncpg module so the hook is testable without it."""
+    register = AsyncMock()
+    pkg = types.ModuleType("pgvector")
+    mod = types.ModuleType("pgvector.asyncpg")
+    mod.register_vector = register
+    pkg.asyncpg = mod
+    with patch.dict(sys.modules, {"pgvector": pkg, "pgvector.asyncpg": mod}):
+        yield register
+
+
+class TestInitConnection:
+
+    async def test_registers_vector_codec(self, fake_pgvector):
+        conn = MagicMock()
+        await connection._init_connection(conn)
+        fake_pgvector.assert_awaited_once_with(conn)
+
+    async def test_missing_extension_is_tolerated(self, fake_pgvector):
+        fake_pgvector.side_effect = ValueError("unknown type: public.vector")
+        await connection._init_connection(MagicMock())
+
+    async def test_other_errors_propagate(self, fake_pgvector):
+        fake_pgvector.side_effect = ValueError("something else")
+        with pytest.raises(ValueError):
+            await connection._init_connection(MagicMock())
+
+    async def test_pool_created_with_init_hook(self):
+        with patch("syne.db.connection.asyncpg.create_pool", new=AsyncMock()) as create:
+            await connection.init_db("postgresql://x")
+        assert create.await_args.kwargs["init"] is connection._init_connection
+        await connection.close_db()
+
+
+class TestRefreshVectorCodec:
+
+    async def test_expires_pool_connections(self):
+        pool = MagicMock(expire_connections=AsyncMock())
+        with patch.object(connection, "_pool", pool):
+            await connection.refresh_vector_codec()
+        pool.expire_connections.assert_awaited_once()
+
+    async def test_noop_without_pool(self):
+        with patch.object(connection, "_pool", None):
+            await connection.refresh_vector_codec()
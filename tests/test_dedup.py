@@ -0,0 +1,119 @@
+"""Tests for syne.memory.dedup — bulk duplicate detection + keep/remove rules."""
+
+import pytest
+
+from syne.memory import dedup as D
+
+np = pytest.importorskip("numpy")
+
+
+def _row(id: int, content: str = "", importance: float = 0.5) -> dict:
+    return {"id": id, "content": content or f"memory {id}", "importance": importance}
+
+
+class TestParseEmbeddings:
+
+    def test_text_form(self):
+        m = D.parse_embeddings(["[1,0,0]", "[0.5,0.25,-1]"])
+        assert m.shape == (2, 3)
+        assert m.dtype == np.float32
+        assert m[1].tolist() == [0.5, 0.25, -1.0]
+
+    def test_sequence_form(self):
+        m = D.parse_embeddings([[1.0, 2.0], np.array([3.0, 4.0])])
+        assert m.tolist() == [[1.0, 2.0], [3.0, 4.0]]
+
+    def test_binary_codec_form(self):
+        pgvector = pytest.importorskip("pgvector")
+        # What register_vector's decoder hands back for a vector column.
+        decoded = [pgvector.Vector.from_binary(pgvector.Vector(v).to_binary()) for v in ([1, 0], [0.5, -2])]
+        m = D.parse_embeddings(decoded)
+        assert m.dtype == np.float32
+        assert m.tolist() == [[1.0, 0.0], [0.5, -2.0]]
+
+
+class TestFindPairsMatrix:
+
+    def test_finds_only_pairs_above_threshold(self):
+        x = np.array([[1, 0], [0.99, 0.01], [0, 1]], dtype=np.float32)
+        pairs = D.find_pairs_matrix(x, 0.95)
+        assert [(i, j) for i, j, _ in pairs] == [(0, 1)]
+        assert pairs[0][2] > 0.99
+
+    def test_block_size_does_not_change_result(self):
+        rng = np.random.default_rng(0)
+        base = rng.normal(size=(40, 16)).astype(np.float32)
+        # Plant near-duplicates across block boundaries.
+        base[25] = base[3] + 0.001
+        base[39] = base[12] + 0.001
+        full = D.find_pairs_matrix(base, 0.99, block_size=1024)
+        tiled = D.find_pairs_matrix(base, 0.99, block_size=7)
+        assert [(i, j) for i, j, _ in full] == [(i, j) for i, j, _ in tiled]
+        assert {(3, 25), (12, 39)} <= {(i, j) for i, j, _ in full}
+
+    def test_zero_vector_never_matches(self):
+        x = np.array([[0, 0], [0, 0]], dtype=np.float32)
+        assert D.find_pairs_matrix(x, 0.5) == []
+
+
+class TestResolveDuplicates:
+
+    def test_higher_importance_wins(self):
+        rows = [_row(1, importance=0.3), _row(2, importance=0.9)]
+        details = D.resolve_duplicates(rows, [(0, 1, 0.97)])
+        assert details[0]["keep_id"] == 2
+        assert details[0]["remove_id"] == 1
+
+    def test_tie_keeps_older(self):
+        rows = [_row(1), _row(2)]
+        details = D.resolve_duplicates(rows, [(0, 1, 0.97)])
+        assert details[0]["keep_id"] == 1
+        assert details[0]["remove_id"] == 2
+
+    def test_removed_row_is_not_compared_again(self):
+        rows = [_row(1), _row(2), _row(3)]
+        details = D.resolve_duplicates(rows, [(0, 1, 0.97), (1, 2, 0.97)])
+        assert [d["remove_id"] for d in details] == [2]
+
+    def test_report_shape(self):
+        rows = [_row(1, "a" * 100), _row(2, "b" * 100)]
+        d = D.resolve_duplicates(rows, [(0, 1, 0.96789)])[0]
+        assert d == {
+            "keep_id": 1,
+            "remove_id": 2,
+            "similarity": 0.968,
+            "keep_preview": "a" * 60,
+            "remove_preview": "b" * 60,
+        }
+
+
+class TestFindDuplicates:
+
+    async def test_matrix_method_single_fetch(self, mock_connection):
+        conn, _ = mock_connection
+        conn.fetch.return_value = [
+            {**_row(1), "embedding": "[1,0]"},
+            {**_row(2), "embedding": "[1,0.001]"},
+            {**_row(3), "embedding": "[0,1]"},
+        ]
+        details = await D.find_duplicates(conn, 0.95, method="matrix")
+        assert conn.fetch.await_count == 1
+        assert [(d["keep_id"], d["remove_id"]) for d in details] == [(1, 2)]
+
+    async def test_hnsw_method_maps_ids(self, mock_connection):
+        conn, _ = mock_connection
+        conn.fetch.side_effect = [
+            [_row(10), _row(20), _row(30)],
+            # Both directions of the same pair come back from the self-join.
+            [
+                {"a_id": 30, "b_id": 10, "similarity": 0.97},
+                {"a_id": 10, "b_id": 30, "similarity": 0.97},
+            ],
+        ]
+        details = await D.find_duplicates(conn, 0.95, method="hnsw")
+        assert [(d["keep_id"], d["remove_id"]) for d in details] == [(10, 30)]
+
+    async def test_unknown_method(self, mock_connection):
+        conn, _ = mock_connection
+        with pytest.raises(ValueError):
+            await D.find_duplicates(conn, 0.95, method="brute")
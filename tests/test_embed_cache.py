@@ -0,0 +1,169 @@
+"""Tests for syne.llm.embed_cache — LRU, Postgres tier, in-flight sharing."""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from syne.llm.embed_cache import (
+    CachedEmbeddingProvider,
+    EmbeddingCache,
+    content_hash,
+    with_embedding_cache,
+)
+from syne.llm.hybrid import HybridProvider
+from syne.llm.provider import EmbeddingResponse
+
+
+def _inner(name="ollama", model="m1"):
+    inner = MagicMock()
+    inner.name = name
+    inner.embedding_model = model
+    inner.base_url = "http://localhost:11434"
+
+    async def _embed(text, model=None):
+        return EmbeddingResponse(vector=[float(len(text)), 1.0], model=model or "m1", dimensions=2)
+
+    async def _embed_batch(texts, model=None):
+        return [await _embed(t, model) for t in texts]
+
+    inner.embed = AsyncMock(side_effect=_embed)
+    inner.embed_batch = AsyncMock(side_effect=_embed_batch)
+    return inner
+
+
+@pytest.fixture
+def cache():
+    """Memory-only cache with config already 'loaded'."""
+    c = EmbeddingCache(max_entries=3)
+    c.persistent = False
+    c._config_loaded_at = float("inf")
+    return c
+
+
+class TestMemoryTier:
+
+    async def test_second_embed_is_a_hit(self, cache):
+        inner = _inner()
+        p = CachedEmbeddingProvider(inner, cache)
+        first = await p.embed("hello")
+        second = await p.embed("hello")
+        assert first.vector == second.vector
+        assert inner.embed.await_count == 1
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    async def test_returned_vectors_are_copies(self, cache):
+        p = CachedEmbeddingProvider(_inner(), cache)
+        (await p.embed("hello")).vector.append(99.0)
+        assert (await p.embed("hello")).vector == [5.0, 1.0]
+
+    async def test_model_is_part_of_key(self, cache):
+        inner = _inner()
+        p = CachedEmbeddingProvider(inner, cache)
+        await p.embed("hello")
+        await p.embed("hello", model="m2")
+        assert inner.embed.await_count == 2
+
+    async def test_lru_eviction(self, cache):
+        inner = _inner()
+        p = CachedEmbeddingProvider(inner, cache)
+        for t in ("a", "bb", "ccc", "dddd"):
+            await p.embed(t)
+        await p.embed("a")  # evicted
+        assert inner.embed.await_count == 5
+        assert cache.stats()["entries"] == 3
+
+    async def test_concurrent_same_text_shares_one_call(self, cache):
+        inner = _inner()
+        gate = asyncio.Event()
+
+        async def _slow(text, model=None):
+            await gate.wait()
+            return EmbeddingResponse(vector=[1.0], model="m1", dimensions=1)
+
+        inner.embed = AsyncMock(side_effect=_slow)
+        p = CachedEmbeddingProvider(inner, cache)
+        tasks = [asyncio.create_task(p.embed("same")) for _ in range(3)]
+        await asyncio.sleep(0)
+        gate.set()
+        results = await asyncio.gather(*tasks)
+        assert inner.embed.await_count == 1
+        assert all(r.vector == [1.0] for r in results)
+
+    async def test_batch_embeds_only_distinct_misses(self, cache):
+        cache.max_entries = 10
+        inner = _inner()
+        p = CachedEmbeddingProvider(inner, cache)
+        await p.embed("x")
+        out = await p.embed_batch(["x", "yy", "yy", "zzz"])
+        assert [r.vector[0] for r in out] == [1.0, 2.0, 2.0, 3.0]
+        inner.embed_batch.assert_awaited_once_with(["yy", "zzz"], None)
+
+
+class TestPersistentTier:
+
+    async def test_persistent_hit_skips_provider(self, cache, mock_connection):
+        conn, ctx = mock_connection
+        cache.persistent = True
+        conn.fetch.return_value = [
+            {"content_hash": content_hash("hello"), "embedding": [0.5, 0.5]},
+        ]
+        inner = _inner()
+        p = CachedEmbeddingProvider(inner, cache)
+        with patch("syne.db.connection.get_connection", return_value=ctx):
+            resp = await p.embed("hello")
+        assert resp.vector == [0.5, 0.5]
+        inner.embed.assert_not_called()
+        assert cache.persistent_hits == 1
+        # Promoted into the memory tier.
+        assert (await p.embed("hello")).vector == [0.5, 0.5]
+        assert cache.hits == 1
+
+    async def test_binary_codec_vector_decoded(self, cache, mock_connection):
+        pgvector = pytest.importorskip("pgvector")
+        conn, ctx = mock_connection
+        cache.persistent = True
+        conn.fetch.return_value = [
+            {"content_hash": content_hash("hello"),
+             "embedding": pgvector.Vector.from_binary(pgvector.Vector([0.5, 0.25]).to_binary())},
+        ]
+        with patch("syne.db.connection.get_connection", return_value=ctx):
+            resp = await CachedEmbeddingProvider(_inner(), cache).embed("hello")
+        assert resp.vector == [0.5, 0.25]
+
+    async def test_miss_writes_through(self, cache, mock_connection):
+        conn, ctx = mock_connection
+        cache.persistent = True
+        conn.fetch.return_value = []
+        p = CachedEmbeddingProvider(_inner(), cache)
+        with patch("syne.db.connection.get_connection", return_value=ctx):
+            await p.embed("hello")
+        rows = conn.executemany.await_args.args[1]
+        assert rows[0][1] == content_hash("hello")
+        assert rows[0][2] == [5.0, 1.0]
+
+    async def test_db_unavailable_falls_through(self, cache):
+        cache.persistent = True
+        inner = _inner()
+        p = CachedEmbeddingProvider(inner, cache)
+        with patch("syne.db.connection.get_connection", side_effect=RuntimeError("no pool")):
+            resp = await p.embed("hello")
+        assert resp.vector == [5.0, 1.0]
+        assert inner.embed.await_count == 1
+
+
+class TestWiring:
+
+    def test_wrap_is_idempotent(self):
+        wrapped = with_embedding_cache(_inner())
+        assert with_embedding_cache(wrapped) is wrapped
+        assert with_embedding_cache(None) is None
+
+    def test_hybrid_wraps_embed_side(self):
+        hybrid = HybridProvider(chat_provider=MagicMock(), embed_provider=_inner())
+        assert isinstance(hybrid._embed, CachedEmbeddingProvider)
+
+    def test_delegates_provider_attributes(self):
+        p = with_embedding_cache(_inner(model="qwen"))
+        assert p.embedding_model == "qwen"
+        assert p.name == "ollama"
@@ -0,0 +1,241 @@
+"""Tests for syne.memory.shadow — blue/green embedding-model migration."""
+
+import pytest
+from unittest.mock import patch, AsyncMock, MagicMock
+
+from syne.db.config_cache import ConfigCache
+from syne.memory import shadow
+from tests.conftest import MockEmbeddingResponse
+
+
+@pytest.fixture
+def db(mock_connection):
+    conn, ctx = mock_connection
+    tx = AsyncMock()
+    tx.__aenter__ = AsyncMock(return_value=None)
+    tx.__aexit__ = AsyncMock(return_value=False)
+    conn.transaction = MagicMock(return_value=tx)
+    with patch("syne.memory.shadow.get_connection", return_value=ctx):
+        yield conn
+
+
+def _sql(conn) -> list[str]:
+    return [" ".join(c.args[0].split()) for c in conn.execute.await_args_list]
+
+
+class TestPrepare:
+
+    async def test_resumes_unfinished_migration_to_same_model(self, db):
+        db.fetchrow.return_value = {"status": "backfilling", "embed_key": "new", "dimensions": 1024, "last_id": 77}
+        db.fetchval.return_value = True  # embedding_next exists
+        state = await shadow.prepare(db, "memory", "new", 1024)
+        assert state["last_id"] == 77
+        db.execute.assert_not_awaited()
+
+    async def test_other_model_starts_over_with_fresh_shadow_column(self, db):
+        db.fetchrow.side_effect = [
+            {"status": "backfilling", "embed_key": "old", "dimensions": 768},
+            {"status": "backfilling", "embed_key": "new", "dimensions": 1024, "last_id": 0},
+        ]
+        db.fetchval.return_value = True
+        state = await shadow.prepare(db, "messages", "new", 1024)
+        sql = _sql(db)
+        assert "ALTER TABLE messages DROP COLUMN IF EXISTS embedding_next" in sql
+        assert "ALTER TABLE messages ADD COLUMN embedding_next vector(1024)" in sql
+        assert any("CREATE TRIGGER trg_messages_embedding_next" in s for s in sql)
+        assert state["last_id"] == 0
+
+    async def test_unknown_table_rejected(self, db):
+        with pytest.raises(ValueError):
+            await shadow.prepare(db, "users", "new", 8)
+
+
+class TestBackfill:
+
+    async def test_bulk_update_and_checkpoint_per_batch(self, db):
+        db.fetchval.side_effect = [0, 3, 0]  # checkpoint cursor, pending at start and end
+        db.fetch.side_effect = [
+            [{"id": 3, "content": "a"}, {"id": 5, "content": "b"}, {"id": 9, "content": "c"}],
+            [],
+        ]
+        provider = AsyncMock()
+        provider.embed_batch.return_value = [
+            MockEmbeddingResponse(vector=[1.0]), MockEmbeddingResponse(vector=[]), MockEmbeddingResponse(vector=[2.0]),
+        ]
+        result = await shadow.backfill("memory", provider, batch_size=3)
+
+        assert result == {"embedded": 2, "failed": 1, "pending": 0}
+        update, checkpoint = db.execute.await_args_list
+        assert "unnest($1::int[], $2::vector[])" in update.args[0]
+        assert update.args[1:] == ([3, 9], [[1.0], [2.0]])
+        assert checkpoint.args[1:] == ("memory", 9, 2, 1)
+        provider.embed.assert_not_awaited()
+
+    async def test_messages_content_truncated(self, db):
+        db.fetchval.side_effect = [0, 1, 0]
+        db.fetch.side_effect = [[{"id": 1, "content": "x" * 50}], []]
+        provider = AsyncMock()
+        provider.embed_batch.return_value = [MockEmbeddingResponse(vector=[1.0])]
+        await shadow.backfill("messages", provider, max_chars=10)
+        assert provider.embed_batch.await_args.args[0] == ["x" * 10]
+
+    async def test_rows_written_meanwhile_get_another_pass(self, db):
+        db.fetchval.side_effect = [40, 1, 1, 0]  # resume at id 40; 1 pending; still 1; then none
+        db.fetch.side_effect = [[], [{"id": 12, "content": "edited"}], []]
+        provider = AsyncMock()
+        provider.embed_batch.return_value = [MockEmbeddingResponse(vector=[1.0])]
+        result = await shadow.backfill("memory", provider)
+        assert result["embedded"] == 1 and result["pending"] == 0
+        assert db.fetch.await_args_list[0].args[1] == 40
+        assert db.fetch.await_args_list[1].args[1] == 0
+
+    async def test_pass_without_progress_stops(self, db):
+        db.fetchval.side_effect = [0, 2, 2]
+        db.fetch.side_effect = [[{"id": 1, "content": "x"}, {"id": 2, "content": "y"}], []]
+        provider = AsyncMock()
+        provider.embed_batch.side_effect = RuntimeError("model down")
+        provider.embed.side_effect = RuntimeError("model down")
+        result = await shadow.backfill("memory", provider)
+        assert result == {"embedded": 0, "failed": 2, "pending": 2}
+        assert provider.embed.await_count == 2  # per-row retry after the batch failed
+
+
+class TestSwitch:
+
+    async def test_refuses_while_rows_are_pending(self, db):
+        db.fetchval.side_effect = ["ready", 3]
+        with pytest.raises(shadow.MigrationNotReady):
+            await shadow.switch(db, ["memory"], {"key": "new"})
+        assert not any("RENAME" in s or "DROP COLUMN" in s for s in _sql(db))
+
+    async def test_swaps_columns_and_activates_model(self, db):
+        db.fetchval.side_effect = [
+            "ready", 0,        # status, pending
+            True,              # memory_next_hnsw exists
+            '"old-key"',       # previous provider.active_embedding
+        ]
+        db.fetch.return_value = [{"rel": "memory"}]
+        entry = {"key": "new", "model_id": "m", "dimensions": 1024, "driver": "ollama"}
+        with patch("syne.db.config_cache.get_config_cache") as cache:
+            await shadow.switch(db, ["memory"], entry)
+        sql = _sql(db)
+        assert sql[1] == "LOCK TABLE memory IN ACCESS EXCLUSIVE MODE"
+        assert "ALTER TABLE memory DROP COLUMN embedding" in sql
+        assert "ALTER TABLE memory RENAME COLUMN embedding_next TO embedding" in sql
+        assert "ALTER INDEX memory_next_hnsw RENAME TO idx_memory_embedding_hnsw" in sql
+        written = {c.args[1]: c.args[2] for c in db.execute.await_args_list if "INSERT INTO config" in c.args[0]}
+        assert written["provider.active_embedding"] == '"new"'
+        assert written["provider.previous_embedding"] == '"old-key"'
+        assert written["provider.embedding_dimensions"] == "1024"
+        cache.return_value.invalidate.assert_any_call("provider.active_embedding")
+
+
+    async def test_nothing_is_embedded_under_the_lock(self, db):
+        db.fetchval.side_effect = ["ready", 2]
+        with pytest.raises(shadow.MigrationNotReady):
+            await shadow.switch(db, ["memory"], {"key": "new"})
+        assert not any("unnest" in s for s in _sql(db))
+
+
+class TestMigrate:
+
+    async def test_catches_up_outside_the_lock_before_every_switch(self, db):
+        provider = AsyncMock()
+        provider.embed.return_value = MockEmbeddingResponse(vector=[1.0, 2.0])
+        ready = {"status": "ready"}
+        order = []
+
+        async def backfill(*args):
+            order.append("backfill")
+            return {"embedded": 2, "failed": 0, "pending": 0}
+
+        async def switch(*args, **kwargs):
+            order.append("switch")
+            if order.count("switch") == 1:
+                raise shadow.MigrationNotReady("memory: 1 rows without a new embedding")
+
+        with patch.object(shadow, "prepare", AsyncMock(return_value=ready)), \
+             patch.object(shadow, "backfill", side_effect=backfill), \
+             patch.object(shadow, "switch", side_effect=switch):
+            result = await shadow.migrate({"key": "new"}, provider, tables=("memory",))
+        assert result["switched"] is True
+        assert order == ["backfill", "switch", "backfill", "switch"]
+
+    async def test_reason_reported_when_rows_cannot_be_embedded(self, db):
+        provider = AsyncMock()
+        provider.embed.return_value = MockEmbeddingResponse(vector=[1.0, 2.0])
+        ready = {"status": "ready"}
+        with patch.object(shadow, "prepare", AsyncMock(return_value=ready)), \
+             patch.object(shadow, "backfill", AsyncMock(return_value={"embedded": 0, "failed": 1, "pending": 1})), \
+             patch.object(shadow, "switch", AsyncMock()) as sw:
+            result = await shadow.migrate({"key": "new"}, provider, tables=("memory",))
+        assert result["switched"] is False and result["reason"] == "failed"
+        sw.assert_not_awaited()
+
+    async def test_reason_reported_when_switch_keeps_finding_new_rows(self, db):
+        provider = AsyncMock()
+        provider.embed.return_value = MockEmbeddingResponse(vector=[1.0, 2.0])
+        ready = {"status": "ready"}
+        with patch.object(shadow, "prepare", AsyncMock(return_value=ready)), \
+             patch.object(shadow, "backfill", AsyncMock(return_value={"embedded": 1, "failed": 0, "pending": 0})) as bf, \
+             patch.object(shadow, "switch", AsyncMock(side_effect=shadow.MigrationNotReady("memory: 1 rows"))):
+            result = await shadow.migrate({"key": "new"}, provider, tables=("memory",))
+        assert result["switched"] is False and result["reason"] == "behind"
+        assert bf.await_count == shadow.SWITCH_ATTEMPTS
+
+
+class TestStragglers:
+
+    async def test_embeds_null_rows_written_since_the_switch(self, db):
+        switched_at = object()
+        db.fetch.side_effect = [
+            [{"table_name": "memory", "switched_at": switched_at}],
+            [{"id": 4, "content": "old-model write"}],
+        ]
+        db.execute.return_value = "UPDATE 1"
+        provider = AsyncMock()
+        provider.embed_batch.return_value = [MockEmbeddingResponse(vector=[1.0])]
+        assert await shadow.embed_stragglers(provider, "new") == 1
+        select = db.fetch.await_args_list[1]
+        assert "embedding IS NULL AND updated_at >= $1" in select.args[0]
+        assert select.args[1] is switched_at
+        update = db.execute.await_args
+        assert "provider.active_embedding" in update.args[0]
+        assert update.args[1:] == ([4], [[1.0]], "new")
+
+
+class TestStaleWrites:
+
+    async def test_memory_insert_only_keeps_the_vector_while_its_model_is_active(self, db):
+        from syne.memory.engine import MemoryEngine
+        db.fetchrow.return_value = {"id": 9}
+        await MemoryEngine._insert_memory(db, "fact", "fact", [1.0], "observed", None, 0.5, False, 5, "old")
+        sql, *args = db.fetchrow.await_args.args
+        assert "CASE WHEN" in sql and "provider.active_embedding" in sql
+        assert args[-1] == "old"
+
+    async def test_unguarded_without_an_embed_key(self, db):
+        from syne.memory.engine import MemoryEngine
+        db.fetchrow.return_value = {"id": 9}
+        await MemoryEngine._insert_memory(db, "fact", "fact", [1.0], "observed", None, 0.5, False, 5)
+        assert "provider.active_embedding" not in db.fetchrow.await_args.args[0]
+
+
+class TestIndexNames:
+
+    def test_live_names(self):
+        assert shadow._live_index_name("messages_hot", "hnsw") == "idx_messages_hot_embedding_hnsw"
+        assert shadow._live_index_name("messages", "pending") == "idx_messages_embedding_pending"
+        assert shadow._live_index_name("messages_hot_2026_10", "hnsw") == "messages_hot_2026_10_embedding_hnsw"
+
+
+class TestConfigWatch:
+
+    def test_watcher_called_on_notify(self):
+        cache = ConfigCache()
+        seen = []
+        cache.watch("provider.active_embedding", seen.append)
+        cache._on_notify(None, 1, "syne_config", "provider.active_embedding")
+        cache._on_notify(None, 1, "syne_config", "other.key")
+        assert seen == ["provider.active_embedding"]
+        assert "provider.active_embedding" in cache._stale
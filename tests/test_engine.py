@@ -2,7 +2,7 @@
 
 import pytest
 from datetime import datetime, timezone, timedelta
-from unittest.mock import AsyncMock
+from unittest.mock import AsyncMock, patch
 
 from syne.memory.engine import MemoryEngine
 
@@ -189,3 +189,55 @@ class TestDetectConflicts:
         result = engine._detect_conflicts([mem_a, mem_b])
         assert "_conflict_status" not in result[0]
         assert "_conflict_status" not in result[1]
+
+
+class TestDecayV3Writes:
+    """Decay v3 — store/recall write only the rows they touch."""
+
+    @pytest.fixture
+    def engine(self, mock_provider):
+        return MemoryEngine(mock_provider)
+
+    @pytest.fixture
+    def conn(self, mock_connection, mock_get_config):
+        conn, ctx = mock_connection
+        with patch("syne.memory.engine.get_connection", return_value=ctx):
+            yield conn
+
+    async def test_store_non_permanent_ticks_clock_without_table_update(self, engine, conn):
+        conn.fetchrow.return_value = {"id": 7}
+        mem_id = await engine.store("Alice likes cats", permanent=False)
+        assert mem_id == 7
+        sql = conn.fetchrow.call_args[0][0]
+        assert "nextval('memory_event_clock')" in sql
+        conn.execute.assert_not_called()
+
+    async def test_store_permanent_does_not_tick_clock(self, engine, conn):
+        conn.fetchrow.return_value = {"id": 8}
+        await engine.store("Alice likes cats", permanent=True)
+        sql = conn.fetchrow.call_args[0][0]
+        assert "nextval" not in sql
+        assert "memory_event_clock_now()" in sql
+        conn.execute.assert_not_called()
+
+    async def test_recall_updates_only_recalled_rows(self, engine, conn):
+        conn.fetch.return_value = [{
+            "id": 1, "content": "Alice likes cats", "category": "fact",
+            "source": "user_confirmed", "importance": 0.5, "access_count": 0,
+            "created_at": datetime(2025, 1, 1, tzinfo=timezone.utc),
+            "permanent": False, "recall_count": 3, "similarity": 0.9,
+            "has_attachment": False, "attachment_filename": None,
+            "attachment_mime": None, "attachment_size": None,
+        }]
+        results = await engine.recall("what does alice like", requester_access_level="owner")
+        assert [r["id"] for r in results] == [1]
+        assert conn.execute.await_count == 1
+        sql, ids = conn.execute.call_args[0]
+        assert "nextval('memory_event_clock')" in sql
+        assert "WHERE id = ANY($1)" in sql
+        assert ids == [1]
+
+    async def test_recall_without_hits_writes_nothing(self, engine, conn):
+        conn.fetch.return_value = []
+        await engine.recall("what does alice like", requester_access_level="owner")
+        conn.execute.assert_not_called()
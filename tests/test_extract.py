@@ -0,0 +1,186 @@
+"""Tests for syne.abilities._extract — worker pool, page streaming, file-hash cache."""
+
+import asyncio
+import signal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from syne.abilities import _extract
+from syne.abilities._extract import DocumentExtractor, ExtractionError, PAGE_BATCH
+
+
+def _sleep_job(seconds):
+    time.sleep(seconds)
+    return seconds
+
+
+def _stubborn_job(seconds):
+    """A job the worker's own timer can't stop."""
+    signal.pthread_sigmask(signal.SIG_BLOCK, {signal.SIGALRM})
+    time.sleep(seconds)
+    return seconds
+
+
+@pytest.fixture
+def extractor():
+    """Thread-backed extractor so worker functions can be monkeypatched."""
+    ex = DocumentExtractor(workers=4, timeout=5)
+    ex._config_loaded_at = float("inf")
+    ex._make_pool = lambda: ThreadPoolExecutor(4)
+    yield ex
+    ex.shutdown()
+
+
+def _fake_scan(count, calls, gate=None):
+    def _scan(path, start, end):
+        calls.append(start)
+        if start and gate is not None:
+            assert gate.wait(5), "later batch ran before the first page was consumed"
+        return count, [(f"page {i}", i % 3) for i in range(start, min(end, count))]
+    return _scan
+
+
+class TestPdfPages:
+
+    async def test_pages_yielded_in_order(self, extractor, monkeypatch):
+        calls = []
+        monkeypatch.setattr(_extract, "_pdf_scan", _fake_scan(40, calls))
+        pages = await extractor.pdf_pages(b"%PDF-1 doc")
+        assert [p.index for p in pages] == list(range(40))
+        assert pages[7].text == "page 7" and pages[7].vectors == 1
+        assert sorted(calls) == [0, PAGE_BATCH, 2 * PAGE_BATCH]
+
+    async def test_first_batch_streams_before_the_rest(self, extractor, monkeypatch):
+        gate = threading.Event()
+        monkeypatch.setattr(_extract, "_pdf_scan", _fake_scan(40, [], gate))
+        async with extractor.open_pdf(b"%PDF-1 doc") as job:
+            pages = job.pages()
+            first = await pages.__anext__()
+            assert first.index == 0 and job.page_count == 40
+            gate.set()
+            rest = [p async for p in pages]
+        assert len(rest) == 39
+
+    async def test_scan_batches_in_flight_bounded_by_workers(self, extractor, monkeypatch):
+        extractor.workers = 2
+        running, peak = [0], [0]
+        lock = threading.Lock()
+
+        def _scan(path, start, end):
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.02)
+            with lock:
+                running[0] -= 1
+            return 200, [("p", 0)] * (min(end, 200) - start)
+
+        monkeypatch.setattr(_extract, "_pdf_scan", _scan)
+        pages = await extractor.pdf_pages(b"%PDF-1 long doc")
+        assert len(pages) == 200
+        assert peak[0] <= 2
+
+    async def test_same_bytes_hit_the_cache(self, extractor, monkeypatch):
+        calls = []
+        monkeypatch.setattr(_extract, "_pdf_scan", _fake_scan(3, calls))
+        await extractor.pdf_pages(b"same")
+        again = await extractor.pdf_pages(b"same")
+        assert len(again) == 3
+        assert calls == [0]
+        assert extractor.stats()["hits"] == 1
+
+    async def test_temp_file_removed(self, extractor, monkeypatch):
+        seen = []
+
+        def _scan(path, start, end):
+            seen.append(path)
+            return 1, [("x", 0)]
+
+        monkeypatch.setattr(_extract, "_pdf_scan", _scan)
+        await extractor.pdf_pages(b"doc")
+        assert seen and not _extract.os.path.exists(seen[0])
+
+    async def test_failed_scan_is_not_cached(self, extractor, monkeypatch):
+        def _boom(path, start, end):
+            raise RuntimeError("corrupt xref")
+
+        monkeypatch.setattr(_extract, "_pdf_scan", _boom)
+        with pytest.raises(RuntimeError):
+            await extractor.pdf_pages(b"bad")
+        assert extractor.stats()["entries"] == 0
+
+
+class TestOffice:
+
+    async def test_office_text_cached_by_hash(self, extractor, monkeypatch):
+        calls = []
+
+        def _read(kind, content, max_rows, max_cols):
+            calls.append(kind)
+            return "hello", {"paragraphs": 1, "tables": 0}
+
+        monkeypatch.setattr(_extract, "_office_read", _read)
+        assert await extractor.office_text("docx", b"d") == ("hello", {"paragraphs": 1, "tables": 0})
+        await extractor.office_text("docx", b"d")
+        await extractor.office_text("docx", b"other")
+        assert calls == ["docx", "docx"]
+
+    async def test_cache_is_bounded(self, extractor, monkeypatch):
+        extractor.cache_size = 2
+        monkeypatch.setattr(_extract, "_office_read", lambda *a: ("t", {}))
+        for content in (b"a", b"b", b"c"):
+            await extractor.office_text("pptx", content)
+        assert extractor.stats()["entries"] == 2
+
+
+class TestProcessPool:
+
+    async def test_timeout_stops_the_job_and_keeps_the_pool(self):
+        ex = DocumentExtractor(workers=1, timeout=0.5)
+        ex._config_loaded_at = float("inf")
+        try:
+            with pytest.raises(ExtractionError, match="exceeded"):
+                await ex.run(_sleep_job, 30)
+            pool = ex._pool
+            assert pool is not None
+            assert await ex.run(_sleep_job, 0) == 0
+            assert ex._pool is pool
+        finally:
+            ex.shutdown()
+
+    async def test_time_queued_behind_other_jobs_does_not_count(self):
+        ex = DocumentExtractor(workers=1, timeout=1.5)
+        ex._config_loaded_at = float("inf")
+        try:
+            assert await asyncio.gather(*(ex.run(_sleep_job, 0.8) for _ in range(3))) == [0.8] * 3
+        finally:
+            ex.shutdown()
+
+    async def test_job_that_ignores_its_timeout_kills_pool_and_recovers(self, monkeypatch):
+        monkeypatch.setattr(_extract, "_HANG_GRACE", 0.5)
+        ex = DocumentExtractor(workers=1, timeout=0.5)
+        ex._config_loaded_at = float("inf")
+        try:
+            with pytest.raises(ExtractionError, match="exceeded"):
+                await ex.run(_stubborn_job, 30)
+            assert ex._pool is None
+            ex.timeout = 60
+            assert await ex.run(_sleep_job, 0) == 0
+        finally:
+            ex.shutdown()
+
+    async def test_event_loop_stays_responsive(self):
+        ex = DocumentExtractor(workers=1, timeout=60)
+        try:
+            job = asyncio.ensure_future(ex.run(_sleep_job, 1))
+            ticks = 0
+            while not job.done():
+                await asyncio.sleep(0.05)
+                ticks += 1
+            assert await job == 1
+            assert ticks >= 10
+        finally:
+            ex.shutdown()
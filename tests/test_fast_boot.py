@@ -0,0 +1,100 @@
+"""Tests for fast agent startup — schema fingerprint and concurrent stages."""
+
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from syne.agent import SyneAgent, _gather_stages
+from syne.db import migrations
+
+
+class TestFingerprint:
+
+    def test_changes_with_schema_and_version(self):
+        fp = migrations.schema_fingerprint("CREATE TABLE a ();")
+        assert fp == migrations.schema_fingerprint("CREATE TABLE a ();")
+        assert fp != migrations.schema_fingerprint("CREATE TABLE b ();")
+        with patch.object(migrations, "CURRENT_SCHEMA_VERSION", migrations.CURRENT_SCHEMA_VERSION + 1):
+            assert fp != migrations.schema_fingerprint("CREATE TABLE a ();")
+
+    async def test_current_when_hash_and_version_match(self, mock_connection):
+        conn, _ = mock_connection
+        conn.fetchrow.return_value = {"fingerprint": "abc", "version": str(migrations.CURRENT_SCHEMA_VERSION)}
+        assert await migrations.schema_is_current(conn, "abc")
+        assert not await migrations.schema_is_current(conn, "other")
+
+    async def test_not_current_while_migrations_lag(self, mock_connection):
+        conn, _ = mock_connection
+        conn.fetchrow.return_value = {"fingerprint": "abc", "version": str(migrations.CURRENT_SCHEMA_VERSION - 1)}
+        assert not await migrations.schema_is_current(conn, "abc")
+
+    async def test_fresh_database_is_not_current(self, mock_connection):
+        conn, _ = mock_connection
+        conn.fetchrow.side_effect = Exception('relation "config" does not exist')
+        assert not await migrations.schema_is_current(conn, "abc")
+
+
+class TestStartupMigration:
+
+    @pytest.fixture
+    def env(self, mock_connection):
+        conn, ctx = mock_connection
+        with patch("syne.db.connection.get_connection", return_value=ctx), \
+             patch("syne.db.connection.refresh_vector_codec", new=AsyncMock()), \
+             patch("syne.cli.helpers._split_sql_statements", return_value=["CREATE TABLE a ()", "CREATE TABLE b ()"]), \
+             patch("syne.db.migrations.run_migrations", new=AsyncMock(return_value={"applied": [], "final_version": 1})) as run, \
+             patch("syne.db.migrations.record_schema_fingerprint", new=AsyncMock()) as record:
+            yield conn, run, record
+
+    async def test_fingerprint_match_skips_replay(self, env):
+        conn, run, record = env
+        with patch("syne.db.migrations.schema_is_current", new=AsyncMock(return_value=True)):
+            await object.__new__(SyneAgent)._run_startup_migration()
+        conn.execute.assert_not_awaited()
+        conn.fetchval.assert_awaited_once_with("SELECT ensure_messages_partitions()")
+        run.assert_not_awaited()
+        record.assert_not_awaited()
+
+    async def test_changed_schema_replays_and_records(self, env):
+        conn, run, record = env
+        with patch("syne.db.migrations.schema_is_current", new=AsyncMock(return_value=False)):
+            await object.__new__(SyneAgent)._run_startup_migration()
+        assert [c.args[0] for c in conn.execute.await_args_list] == ["CREATE TABLE a ()", "CREATE TABLE b ()"]
+        run.assert_awaited_once()
+        record.assert_awaited_once()
+
+    async def test_failed_statement_keeps_full_replay(self, env):
+        conn, run, record = env
+        conn.execute.side_effect = [None, Exception("boom")]
+        with patch("syne.db.migrations.schema_is_current", new=AsyncMock(return_value=False)):
+            await object.__new__(SyneAgent)._run_startup_migration()
+        run.assert_awaited_once()
+        record.assert_not_awaited()
+
+
+class TestGatherStages:
+
+    async def test_results_in_order(self):
+        async def value(v, delay):
+            await asyncio.sleep(delay)
+            return v
+
+        assert await _gather_stages(value(1, 0.02), value(2, 0)) == [1, 2]
+
+    async def test_failure_cancels_other_stages_and_reraises(self):
+        cancelled = asyncio.Event()
+
+        async def slow():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        async def broken():
+            raise RuntimeError("no provider")
+
+        with pytest.raises(RuntimeError, match="no provider"):
+            await _gather_stages(slow(), broken())
+        assert cancelled.is_set()
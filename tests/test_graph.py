@@ -4,7 +4,10 @@ import json
 import pytest
 from unittest.mock import AsyncMock, patch, MagicMock
 
-from syne.memory.graph import _parse_extraction, extract_and_store
+from syne.memory import graph
+from syne.memory.graph import (
+    _parse_extraction, _recall_terms, _store_graph, extract_and_store, recall_graph,
+)
 
 
 # ── _parse_extraction (pure function) ────────────────────────
@@ -190,3 +193,141 @@ class TestExtractAndStore:
         call_args = mock_provider.chat.call_args
         user_msg = call_args[0][0][1].content
         assert "The speaker is" not in user_msg
+
+
+# ── recall_graph (lexical seed + multi-hop) ──────────────────
+
+
+def _rel(sid, subj, pred, oid, obj):
+    return {"subject_id": sid, "subject": subj, "s_type": "person", "predicate": pred,
+            "object_id": oid, "object": obj, "o_type": "place"}
+
+
+class TestRecallGraph:
+    @pytest.fixture(autouse=True)
+    def tables_ready(self):
+        with patch.object(graph, "_kg_tables_ready", True):
+            yield
+
+    def test_recall_terms_filters_and_dedupes(self):
+        assert _recall_terms("Where does Riyo live, riyo?") == ["where", "does", "riyo", "live"]
+        assert _recall_terms("who is Ani") == ["who", "ani"]
+        assert _recall_terms("a b") == []
+
+    async def test_single_hop_formats_relations(self, mock_connection):
+        conn, ctx = mock_connection
+        conn.fetch.side_effect = [
+            [{"id": 1}],
+            [_rel(1, "Riyo", "lives_in", 2, "Jakarta")],
+        ]
+        with patch("syne.memory.graph.get_connection", return_value=ctx):
+            lines = await recall_graph("where does riyo live", hops=1)
+        assert lines == ["- Riyo [person] --lives_in--> Jakarta [place]"]
+        tsq, terms = conn.fetch.await_args_list[0].args[1:3]
+        assert tsq == "where:* | does:* | riyo:* | live:*"
+        assert terms == ["where", "does", "riyo", "live"]
+
+    async def test_multi_hop_expands_from_new_entities(self, mock_connection):
+        conn, ctx = mock_connection
+        conn.fetch.side_effect = [
+            [{"id": 1}],
+            [_rel(1, "Riyo", "lives_in", 2, "Jakarta")],
+            [_rel(1, "Riyo", "lives_in", 2, "Jakarta"), _rel(2, "Jakarta", "located_in", 3, "Indonesia")],
+        ]
+        with patch("syne.memory.graph.get_connection", return_value=ctx):
+            lines = await recall_graph("riyo home", hops=2)
+        assert len(lines) == 2
+        assert "located_in" in lines[1]
+        assert conn.fetch.await_args_list[2].args[1] == [2]
+
+    async def test_later_hops_exclude_edges_back_to_seen_entities(self, mock_connection):
+        conn, ctx = mock_connection
+        conn.fetch.side_effect = [
+            [{"id": 1}, {"id": 4}],
+            [_rel(1, "Riyo", "lives_in", 2, "Jakarta"), _rel(1, "Riyo", "knows", 4, "Ani")],
+            [_rel(2, "Jakarta", "located_in", 3, "Indonesia")],
+        ]
+        with patch("syne.memory.graph.get_connection", return_value=ctx):
+            await recall_graph("riyo ani home", hops=2)
+        first, second = conn.fetch.await_args_list[1], conn.fetch.await_args_list[2]
+        assert "NOT (r.object_id = ANY($3))" in first.args[0]
+        assert first.args[3] == []  # seed-to-seed edges count in hop 1
+        assert second.args[1] == [2]
+        assert sorted(second.args[3]) == [1, 4]
+
+    async def test_hops_read_from_config(self, mock_connection):
+        conn, ctx = mock_connection
+        conn.fetch.side_effect = [[{"id": 1}], []]
+        with patch("syne.memory.graph.get_connection", return_value=ctx), \
+             patch("syne.memory.graph.get_config", new=AsyncMock(return_value=1)) as cfg:
+            assert await recall_graph("riyo home") == []
+        cfg.assert_awaited_once_with("graph.recall_hops", 1)
+
+    async def test_table_check_cached(self, mock_connection):
+        conn, ctx = mock_connection
+        conn.fetchval.return_value = True
+        with patch.object(graph, "_kg_tables_ready", False), \
+             patch("syne.memory.graph.get_connection", return_value=ctx):
+            await recall_graph("riyo home", hops=1)
+            await recall_graph("riyo home", hops=1)
+        assert conn.fetchval.await_count == 1
+
+    async def test_short_query_skips_db(self):
+        with patch("syne.memory.graph.get_connection") as gc:
+            assert await recall_graph("hi", hops=1) == []
+        gc.assert_not_called()
+
+
+# ── _store_graph (bulk writer) ───────────────────────────────
+
+
+class TestStoreGraph:
+    @pytest.fixture
+    def conn_ctx(self, mock_connection):
+        conn, ctx = mock_connection
+        tx = AsyncMock()
+        tx.__aenter__ = AsyncMock(return_value=None)
+        tx.__aexit__ = AsyncMock(return_value=False)
+        conn.transaction = MagicMock(return_value=tx)
+        return conn, ctx
+
+    async def test_two_statements_in_one_transaction(self, conn_ctx):
+        conn, ctx = conn_ctx
+        conn.fetch.return_value = [{"lname": "alice", "id": 1}, {"lname": "jakarta", "id": 2}]
+        extracted = {
+            "entities": [
+                {"name": "Alice", "type": "Person"},
+                {"name": "Jakarta", "type": "place"},
+                {"name": "Orphan", "type": "concept"},
+            ],
+            "relations": [
+                {"subject": "Alice", "predicate": "Lives_In", "object": "jakarta"},
+                {"subject": "alice", "predicate": "lives_in", "object": "Jakarta"},
+            ],
+        }
+        with patch("syne.memory.graph.get_connection", return_value=ctx):
+            await _store_graph(extracted, memory_id=7)
+
+        conn.transaction.assert_called_once()
+        names, types, _ = conn.fetch.await_args.args[1:4]
+        assert sorted(names) == ["Alice", "Jakarta"]  # no orphan entity
+        assert types[names.index("Alice")] == "person"
+        conn.execute.assert_awaited_once()
+        args = conn.execute.await_args.args
+        assert args[1:] == ([1], ["lives_in"], [2], 7)  # duplicate triple collapsed
+
+    async def test_unresolved_relation_skipped(self, conn_ctx):
+        conn, ctx = conn_ctx
+        conn.fetch.return_value = [{"lname": "alice", "id": 1}]
+        extracted = {
+            "entities": [{"name": "Alice", "type": "person"}],
+            "relations": [{"subject": "Alice", "predicate": "knows", "object": "Bob"}],
+        }
+        with patch("syne.memory.graph.get_connection", return_value=ctx):
+            await _store_graph(extracted, memory_id=1)
+        conn.execute.assert_not_called()
+
+    async def test_no_relations_no_db(self):
+        with patch("syne.memory.graph.get_connection") as gc:
+            await _store_graph({"entities": [{"name": "A", "type": "x"}], "relations": []}, 1)
+        gc.assert_not_called()
@@ -165,10 +165,111 @@ class TestHistorySearchShape:
         with patch("syne.tools.history.get_connection", return_value=ctx):
             await H.history_search_handler(query="x", limit=9999)
 
-        # Last two params of the SELECT are limit + offset (see handler SQL).
+        # Last param of the SELECT is the page limit (see handler SQL).
         params = captured_params["params"]
-        assert params[-2] == 50, "limit must be clamped to 50"
-        assert params[-1] == 0
+        assert params[-1] == 50, "limit must be clamped to 50"
+
+
+# ---------------------------------------------------------------------------
+# history_search: hybrid retrieval + keyset pagination
+# ---------------------------------------------------------------------------
+
+
+class TestHistorySearchHybrid:
+
+    def _row(self, id_, score, similarity=0.5):
+        from datetime import datetime, timezone
+        return {
+            "id": id_, "session_id": 1, "content": f"row {id_}",
+            "created_at": datetime(2026, 7, 12, 10, id_ % 60, tzinfo=timezone.utc),
+            "score": score, "similarity": similarity, "chat_id": "c",
+        }
+
+    async def _search(self, rows=(), **kwargs):
+        prov = MagicMock()
+        prov.embed = AsyncMock(return_value=MagicMock(vector=[0.1, 0.2]))
+        H.set_embedding_provider(prov)
+        captured = {}
+
+        async def fetch(sql, *params):
+            captured["sql"], captured["params"] = sql, params
+            return list(rows)
+
+        conn = AsyncMock()
+        conn.fetch = AsyncMock(side_effect=fetch)
+        ctx = AsyncMock()
+        ctx.__aenter__ = AsyncMock(return_value=conn)
+        ctx.__aexit__ = AsyncMock(return_value=False)
+        with patch("syne.tools.history.get_connection", return_value=ctx):
+            result = await H.history_search_handler(query="decay memory", **kwargs)
+        return result, captured
+
+    async def test_hybrid_fuses_vector_and_lexical_lists(self, mock_get_config):
+        _, cap = await self._search()
+        sql = cap["sql"]
+        assert "embedding <=>" in sql and "to_tsvector('simple', m.content) @@ q" in sql
+        assert "SUM(1.0::float8 / (60 + r))" in sql
+        assert "decay | memory" in cap["params"]
+        assert "OFFSET" not in sql
+
+    async def test_semantic_mode_skips_lexical_list(self, mock_get_config):
+        _, cap = await self._search(mode="semantic")
+        assert "to_tsvector" not in cap["sql"]
+
+    async def test_keywords_filter_inside_candidate_queries(self, mock_get_config):
+        _, cap = await self._search(also_contains=["decay"])
+        sql = cap["sql"]
+        fused_at = sql.index("fused AS")
+        assert sql.count("m.content ILIKE $") == 2
+        assert sql.rindex("m.content ILIKE $") < fused_at
+
+    async def test_full_page_returns_cursor_that_resumes_after_last_row(self, mock_get_config):
+        rows = [self._row(9, 0.031), self._row(4, 0.016, similarity=None)]
+        result, _ = await self._search(rows, limit=2)
+        payload = json.loads(result)
+        assert payload["hits"][1]["similarity"] is None
+        cursor = payload["next_cursor"]
+        assert cursor
+
+        _, cap = await self._search(cursor=cursor, limit=2)
+        assert "(f.score, m.id) <" in cap["sql"]
+        assert 0.016 in cap["params"] and 4 in cap["params"]
+
+    async def test_partial_page_has_no_cursor(self, mock_get_config):
+        result, _ = await self._search([self._row(1, 0.02)], limit=5)
+        assert json.loads(result)["next_cursor"] is None
+
+    async def test_recency_cursor_keys_on_created_at(self, mock_get_config):
+        result, _ = await self._search([self._row(3, 0.02)], limit=1, sort_by="recency")
+        cursor = json.loads(result)["next_cursor"]
+        _, cap = await self._search(cursor=cursor, limit=1, sort_by="recency")
+        assert "(m.created_at, m.id) <" in cap["sql"]
+        assert "ORDER BY m.created_at DESC" in cap["sql"]
+
+    async def test_starting_offset_widens_candidate_lists(self, mock_get_config):
+        _, cap = await self._search(offset=180, limit=20)
+        assert "LIMIT 200" in cap["sql"]
+
+    async def test_candidate_depth_fixed_across_pages(self, mock_get_config):
+        rows = [self._row(9, 0.031), self._row(4, 0.016)]
+        result, _ = await self._search(rows, limit=2)
+        cursor = json.loads(result)["next_cursor"]
+        assert H._decode_cursor(cursor)["c"] == 100
+        for _ in range(3):
+            # Deep into the pagination the lists stay as long as on page one.
+            cursor = H._encode_cursor(0.01, 7, 180, H._decode_cursor(cursor)["c"])
+            result, cap = await self._search(rows, cursor=cursor, limit=2)
+            assert "LIMIT 100" in cap["sql"] and "LIMIT 200" not in cap["sql"]
+            cursor = json.loads(result)["next_cursor"]
+
+    async def test_exhausted_pagination_says_so(self, mock_get_config):
+        result, _ = await self._search([], cursor=H._encode_cursor(0.01, 7, 100, 100))
+        assert result == "No more results for this search."
+
+    async def test_garbage_cursor_is_rejected(self, mock_get_config):
+        H.set_embedding_provider(MagicMock())
+        result = await H.history_search_handler(query="x", cursor="not-a-cursor")
+        assert result.startswith("Error:") and "cursor" in result
 
 
 # ---------------------------------------------------------------------------
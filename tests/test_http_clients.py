@@ -0,0 +1,105 @@
+"""Tests for syne.http_clients — shared pooled client registry."""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+import pytest
+
+from syne import http_clients as H
+
+
+@pytest.fixture(autouse=True)
+def clean_registry():
+    """Isolate the module-level registry and settings per test."""
+    with patch.dict(H._clients, clear=True), patch.dict(H._settings):
+        yield
+
+
+class TestRegistry:
+
+    async def test_same_name_reuses_client(self):
+        a = H.get_client("ollama")
+        b = H.get_client("ollama")
+        assert a is b
+        assert H.get_client("google") is not a
+        await H.close_all_clients()
+
+    async def test_pooled_client_does_not_close_pool(self):
+        async with H.pooled_client("ollama", timeout=5) as view:
+            assert isinstance(view, H.ClientView)
+        client = H.get_client("ollama")
+        assert not client.is_closed
+        await H.close_all_clients()
+
+    async def test_reset_client_closes_and_rebuilds(self):
+        first = H.get_client("anthropic")
+        await H.reset_client("anthropic")
+        assert first.is_closed
+        assert H.get_client("anthropic") is not first
+        await H.close_all_clients()
+
+    async def test_close_all_clients(self):
+        clients = [H.get_client(n) for n in ("a", "b")]
+        await H.close_all_clients()
+        assert all(c.is_closed for c in clients)
+        assert H._clients == {}
+
+    async def test_foreign_loop_client_is_replaced(self):
+        stale = MagicMock(is_closed=False)
+        H._clients["ollama"] = (asyncio.new_event_loop(), stale)
+        fresh = H.get_client("ollama")
+        assert fresh is not stale
+        await H.close_all_clients()
+
+    async def test_configure_limits_applied(self):
+        H.configure(max_connections=7, max_keepalive_connections=3,
+                    keepalive_expiry=1.5, http2=False)
+        client = H.get_client("x")
+        pool = client._transport._pool
+        assert pool._max_connections == 7
+        assert pool._max_keepalive_connections == 3
+        assert pool._http2 is False
+        await H.close_all_clients()
+
+    async def test_configure_from_config(self, mock_get_config):
+        mock_get_config._store["http.max_connections"] = 12
+        mock_get_config._store["http.http2"] = False
+        await H.configure_from_config()
+        assert H._settings["max_connections"] == 12
+        assert H._settings["http2"] is False
+        assert H._settings["max_keepalive_connections"] == H.DEFAULT_MAX_KEEPALIVE
+
+
+    async def test_shared_client_never_keeps_cookies(self):
+        def handler(request):
+            assert "cookie" not in request.headers
+            return httpx.Response(200, headers={"set-cookie": "session=alice; Path=/"})
+
+        client = H.get_client("fetch_url")
+        client._transport = httpx.MockTransport(handler)
+        async with H.pooled_client("fetch_url") as view:
+            await view.get("https://example.com/login")
+            await view.get("https://example.com/account")
+        assert len(client.cookies.jar) == 0
+        await H.close_all_clients()
+
+
+class TestClientView:
+
+    async def test_view_fills_timeout_and_merges_headers(self):
+        client = MagicMock(spec=httpx.AsyncClient)
+        client.post = AsyncMock(return_value="ok")
+        view = H.ClientView(client, timeout=30, headers={"A": "1", "B": "2"},
+                            follow_redirects=False)
+        assert await view.post("http://x", headers={"B": "3"}) == "ok"
+        kwargs = client.post.await_args.kwargs
+        assert kwargs["timeout"] == 30
+        assert kwargs["follow_redirects"] is False
+        assert kwargs["headers"] == {"A": "1", "B": "3"}
+
+    async def test_explicit_timeout_wins(self):
+        client = MagicMock(spec=httpx.AsyncClient)
+        view = H.ClientView(client, timeout=30)
+        view.stream("GET", "http://x", timeout=5)
+        assert client.stream.call_args.kwargs["timeout"] == 5
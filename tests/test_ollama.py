@@ -0,0 +1,77 @@
+"""Tests for OllamaProvider's micro-batching embed dispatcher."""
+
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from syne.llm import ollama
+from syne.llm.ollama import OllamaProvider
+from syne.llm.provider import EMBED_PRIORITY_BACKGROUND, embed_priority
+
+
+@pytest.fixture
+def calls():
+    """Replace the HTTP call; record each batch sent to the server."""
+    sent: list[tuple[str, list[str]]] = []
+
+    async def _fake(base_url, model, texts):
+        sent.append((model, list(texts)))
+        await asyncio.sleep(0)
+        return [[float(len(t))] for t in texts]
+
+    with patch.object(ollama, "_post_embed", side_effect=_fake), \
+         patch.dict(ollama._dispatchers, clear=True):
+        yield sent
+
+
+class TestEmbedDispatcher:
+
+    async def test_concurrent_embeds_share_one_request(self, calls):
+        p = OllamaProvider(embedding_model="m")
+        results = await asyncio.gather(*(p.embed("x" * n) for n in range(1, 6)))
+        assert [r.vector for r in results] == [[1.0], [2.0], [3.0], [4.0], [5.0]]
+        assert len(calls) == 1
+        assert calls[0][1] == ["x", "xx", "xxx", "xxxx", "xxxxx"]
+
+    async def test_max_batch_splits_requests(self, calls):
+        p = OllamaProvider(embedding_model="m")
+        with patch.object(ollama, "_MAX_BATCH", 2):
+            out = await p.embed_batch(["a", "bb", "ccc", "dddd", "eeeee"])
+        assert [r.vector[0] for r in out] == [1.0, 2.0, 3.0, 4.0, 5.0]
+        assert [len(c[1]) for c in calls] == [2, 2, 1]
+
+    async def test_interactive_goes_before_background(self, calls):
+        p = OllamaProvider(embedding_model="m")
+
+        async def _background(text):
+            with embed_priority(EMBED_PRIORITY_BACKGROUND):
+                return await p.embed(text)
+
+        with patch.object(ollama, "_MAX_BATCH", 1):
+            await asyncio.gather(_background("bg1"), _background("bg2"), p.embed("query"))
+        assert [c[1] for c in calls] == [["query"], ["bg1"], ["bg2"]]
+
+    async def test_models_are_not_mixed(self, calls):
+        p = OllamaProvider(embedding_model="m")
+        await asyncio.gather(p.embed("a"), p.embed("b", model="other"), p.embed("c"))
+        assert calls == [("m", ["a", "c"]), ("other", ["b"])]
+
+    async def test_failure_fans_out_to_batch(self):
+        async def _boom(base_url, model, texts):
+            raise RuntimeError("ollama down")
+
+        p = OllamaProvider(embedding_model="m")
+        with patch.object(ollama, "_post_embed", side_effect=_boom), \
+             patch.dict(ollama._dispatchers, clear=True):
+            results = await asyncio.gather(p.embed("a"), p.embed("b"), return_exceptions=True)
+        assert all(isinstance(r, RuntimeError) for r in results)
+
+    async def test_cancelled_caller_is_skipped(self, calls):
+        p = OllamaProvider(embedding_model="m")
+        doomed = asyncio.create_task(p.embed("gone"))
+        kept = asyncio.create_task(p.embed("kept"))
+        await asyncio.sleep(0)
+        doomed.cancel()
+        assert (await kept).vector == [4.0]
+        assert calls == [("m", ["kept"])]
@@ -0,0 +1,138 @@
+"""Tests for syne.db.partitions — messages conversion, default-partition draining, migration 37."""
+
+import re
+from datetime import date
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from syne.cli.helpers import _split_sql_statements
+from syne.db import migrations, partitions
+
+SCHEMA = (Path(__file__).resolve().parents[1] / "syne" / "db" / "schema.sql").read_text()
+
+
+def _norm(sql: str) -> str:
+    return re.sub(r"\s+", " ", sql).strip().rstrip(";")
+
+
+@pytest.fixture
+def conn():
+    c = AsyncMock()
+    tx = MagicMock()
+    tx.__aenter__ = AsyncMock(return_value=None)
+    tx.__aexit__ = AsyncMock(return_value=False)
+    c.transaction = MagicMock(return_value=tx)
+    return c
+
+
+def _sql(mock) -> list[str]:
+    return [_norm(call.args[0]) for call in mock.await_args_list]
+
+
+class TestSchemaMirror:
+
+    def test_message_indexes_match_schema(self):
+        # Top-level statements, and those a DO block only runs on an empty table.
+        in_schema = {
+            _norm(s) for s in re.findall(
+                r"CREATE INDEX IF NOT EXISTS idx_messages_\w+\s+ON messages\b[^;]*;", SCHEMA,
+            )
+        }
+        assert in_schema == {_norm(s) for s in partitions.MESSAGE_INDEXES}
+
+    async def test_migration_functions_match_schema(self, conn):
+        conn.fetchval.return_value = True   # already partitioned: only DDL + seeds
+        await migrations._m37_partition_messages(conn)
+        executed = _sql(conn.execute)
+        for name in ("ensure_messages_partitions", "ensure_messages_hnsw_index"):
+            (schema_fn,) = [
+                _norm(s) for s in _split_sql_statements(SCHEMA)
+                if s.strip().startswith(f"CREATE OR REPLACE FUNCTION {name}(")
+            ]
+            assert schema_fn in executed
+
+    def test_partitions_created_after_config(self):
+        statements = [s.strip() for s in _split_sql_statements(SCHEMA)]
+        config = next(i for i, s in enumerate(statements) if s.startswith("CREATE TABLE IF NOT EXISTS config"))
+        call = statements.index("SELECT ensure_messages_partitions();")
+        assert call > config
+
+
+class TestConvert:
+
+    async def test_already_partitioned_is_noop(self, conn):
+        conn.fetchval.return_value = True
+        assert await partitions.convert(conn) == 0
+        conn.execute.assert_not_awaited()
+
+    async def test_copies_in_batches_and_keeps_sequence(self, conn):
+        conn.fetchval.side_effect = [False, "public.messages_id_seq", date(2025, 3, 9), 0]
+        conn.fetch.return_value = [{"attname": c} for c in ("id", "session_id", "status", "created_at")]
+        conn.fetchrow.side_effect = [
+            {"n": 2, "last_id": 10}, {"n": 1, "last_id": 15}, {"n": 0, "last_id": None},
+        ]
+        assert await partitions.convert(conn, batch_size=2) == 3
+
+        assert [c.args[1:] for c in conn.fetchrow.await_args_list] == [(0, 2), (10, 2), (15, 2)]
+        copy_sql = conn.fetchrow.await_args_list[0].args[0]
+        assert "COALESCE(status, 'active')" in copy_sql and "COALESCE(created_at, NOW())" in copy_sql
+        assert conn.fetchval.await_args_list[-1].args[1:] == (date(2025, 3, 9),)
+
+        executed = _sql(conn.execute)
+        rename = executed.index("ALTER TABLE messages RENAME TO messages_legacy")
+        owned = executed.index("ALTER SEQUENCE public.messages_id_seq OWNED BY messages.id")
+        drop = executed.index("DROP TABLE messages_legacy")
+        assert rename < owned < drop
+        assert "ALTER TABLE messages ADD PRIMARY KEY (id, status, created_at)" in executed[drop:]
+        assert {_norm(s) for s in partitions.MESSAGE_INDEXES} <= set(executed[drop:])
+
+
+class TestDrainDefault:
+
+    async def test_each_month_moved_then_attached(self, conn):
+        conn.fetch.return_value = [
+            {"month": date(2025, 12, 1), "n": 40},
+            {"month": date(2026, 1, 1), "n": 2},
+        ]
+        assert await partitions.drain_default(conn) == 42
+        executed = _sql(conn.execute)
+        assert executed[0].startswith("CREATE TABLE messages_hot_2025_12 (LIKE messages_hot")
+        assert "DELETE FROM messages_hot_default" in executed[1]
+        assert executed[2] == (
+            "ALTER TABLE messages_hot ATTACH PARTITION messages_hot_2025_12 "
+            "FOR VALUES FROM ('2025-12-01') TO ('2026-01-01')"
+        )
+        assert conn.execute.await_args_list[1].args[1:] == (date(2025, 12, 1), date(2026, 1, 1))
+        assert executed[5].endswith("FROM ('2026-01-01') TO ('2026-02-01')")
+        assert conn.transaction.call_count == 2
+
+    async def test_empty_default_does_nothing(self, conn):
+        conn.fetch.return_value = []
+        assert await partitions.drain_default(conn) == 0
+        conn.execute.assert_not_awaited()
+
+
+class TestMigration:
+
+    async def test_large_table_left_for_rebalance(self, conn):
+        conn.fetchval.side_effect = [False, partitions.AUTO_CONVERT_MAX_ROWS + 1]
+        with patch.object(partitions, "convert", new=AsyncMock()) as convert:
+            await migrations._m37_partition_messages(conn)
+        convert.assert_not_awaited()
+
+    async def test_small_table_converted_inline(self, conn):
+        conn.fetchval.side_effect = [False, 1_000]
+        with patch.object(partitions, "convert", new=AsyncMock(return_value=1_000)) as convert:
+            await migrations._m37_partition_messages(conn)
+        convert.assert_awaited_once_with(conn)
+        assert _sql(conn.execute)[-1] == "SELECT ensure_messages_hnsw_index()"
+
+    def test_registered(self):
+        assert (37, migrations._m37_partition_messages, "transactional") in migrations.MIGRATIONS
+
+
+def test_partition_name_and_month_rollover():
+    assert partitions.partition_name(date(2026, 10, 16)) == "messages_hot_2026_10"
+    assert partitions._next_month(date(2026, 12, 1)) == date(2027, 1, 1)
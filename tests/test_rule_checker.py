@@ -5,14 +5,20 @@ verdict-line PARSER so a small-model output format we've already accepted
 never silently regresses into ERROR (or CLEAN) after a refactor.
 """
 
+import asyncio
+
 import pytest
 
 from syne.rule_checker import (
     CheckResult,
+    DeferredCheck,
     VerdictState,
     _parse_verdict_line,
     _strip_think,
     check_response,
+    clear_cache,
+    prefetch_check,
+    rules_version,
 )
 
 
@@ -180,3 +186,86 @@ class TestCheckResponse:
         )
         assert r.state == VerdictState.ERROR
         assert "checker call failed" in r.reason
+
+
+_RULES = [{"code": "DATE_VERIFY", "name": "n", "description": "d"}]
+
+
+class TestVerdictCache:
+
+    @pytest.fixture(autouse=True)
+    def _fresh_cache(self):
+        clear_cache()
+        yield
+        clear_cache()
+
+    def _counting_ollama(self, monkeypatch, verdict="CLEAN"):
+        calls = []
+
+        async def fake_ollama(prompt, model, base_url="http://localhost:11434", timeout=30.0):
+            calls.append(prompt)
+            await asyncio.sleep(0)
+            return verdict
+        monkeypatch.setattr("syne.rule_checker._check_via_ollama", fake_ollama)
+        return calls
+
+    async def test_clean_verdict_reused(self, monkeypatch):
+        calls = self._counting_ollama(monkeypatch)
+        first = await check_response("hello", "hi", _RULES, cache_ttl=60)
+        second = await check_response("hello", "hi again", _RULES, cache_ttl=60)
+        assert first.state == second.state == VerdictState.CLEAN
+        assert (first.cached, second.cached) == (False, True)
+        assert len(calls) == 1
+
+    async def test_violated_not_cached(self, monkeypatch):
+        calls = self._counting_ollama(monkeypatch, "VIOLATED|DATE_VERIFY|wrong")
+        await check_response("today is monday", "day?", _RULES, cache_ttl=60)
+        await check_response("today is monday", "day?", _RULES, cache_ttl=60)
+        assert len(calls) == 2
+
+    async def test_rule_edit_or_tools_ran_changes_key(self, monkeypatch):
+        calls = self._counting_ollama(monkeypatch)
+        await check_response("done", "push it", _RULES, cache_ttl=60, tools_ran=True)
+        await check_response("done", "push it", _RULES, cache_ttl=60, tools_ran=False)
+        edited = [dict(_RULES[0], description="stricter")]
+        await check_response("done", "push it", edited, cache_ttl=60, tools_ran=True)
+        assert len(calls) == 3
+        assert rules_version(_RULES) != rules_version(edited)
+
+    async def test_ttl_zero_always_calls(self, monkeypatch):
+        calls = self._counting_ollama(monkeypatch)
+        await check_response("hello", "hi", _RULES)
+        await check_response("hello", "hi", _RULES)
+        assert len(calls) == 2
+
+    async def test_prefetch_is_joined(self, monkeypatch):
+        calls = self._counting_ollama(monkeypatch)
+        prefetch_check("let me check", _RULES, 60, user_message="hi")
+        r = await check_response("let me check", "hi", _RULES, cache_ttl=60)
+        assert r.state == VerdictState.CLEAN and r.cached
+        assert len(calls) == 1
+
+
+class TestDeferredCheck:
+
+    async def test_not_started_has_no_verdict(self):
+        d = DeferredCheck()
+        assert not d.started
+        assert await d.verdict() is None
+
+    async def test_verdict_from_started_check(self):
+        d = DeferredCheck()
+
+        async def _check():
+            return CheckResult(VerdictState.VIOLATED, violated=["X"])
+        d.start(_check())
+        assert d.started
+        assert (await d.verdict()).violated == ["X"]
+
+    async def test_crashed_check_leaves_reply(self):
+        d = DeferredCheck()
+
+        async def _check():
+            raise RuntimeError("boom")
+        d.start(_check())
+        assert await d.verdict() is None
@@ -1,8 +1,10 @@
 """Tests for syne.scheduler module — schedule calculation, task types."""
 
+import asyncio
+
 import pytest
 from datetime import datetime, timedelta, timezone
-from unittest.mock import patch, AsyncMock
+from unittest.mock import patch, AsyncMock, MagicMock
 
 from syne.scheduler import (
     _get_tz,
@@ -145,3 +147,188 @@ class TestSchedulerLifecycle:
             await scheduler.start()
             assert scheduler._task is not None
             await scheduler.stop()
+
+
+# ── Timer heap, claiming, worker pool ────────────────────────────────
+
+
+def _txn(conn):
+    """Give an AsyncMock connection a working conn.transaction()."""
+    tx = MagicMock()
+    tx.__aenter__ = AsyncMock(return_value=None)
+    tx.__aexit__ = AsyncMock(return_value=False)
+    conn.transaction = MagicMock(return_value=tx)
+    return conn
+
+
+def _task_row(task_id=1, schedule_type="interval", schedule_value="60", next_run=None, **kw):
+    row = {
+        "id": task_id, "name": f"t{task_id}", "schedule_type": schedule_type,
+        "schedule_value": schedule_value, "payload": "ping", "created_by": 42,
+        "end_date": None, "next_run": next_run or datetime.now(timezone.utc),
+        "target_chat_id": None, "target_chat_type": None,
+    }
+    row.update(kw)
+    return row
+
+
+def _ready(scheduler, slots=3):
+    scheduler._slots = asyncio.Semaphore(slots)
+    scheduler._running = True
+    return scheduler
+
+
+class TestTimerHeap:
+
+    async def test_only_due_entries_dispatched(self):
+        s = _ready(Scheduler(on_task_execute=AsyncMock()))
+        now = datetime.now(timezone.utc)
+        s._set_due(1, now - timedelta(seconds=1))
+        s._set_due(2, now + timedelta(hours=1))
+        with patch.object(s, "_run_task", new=AsyncMock()) as run:
+            s._dispatch_due()
+            await asyncio.gather(*s._inflight.values())
+        run.assert_awaited_once_with(1)
+        assert 2 in s._due_at
+
+    def test_stale_heap_entry_ignored(self):
+        s = _ready(Scheduler(on_task_execute=AsyncMock()))
+        now = datetime.now(timezone.utc)
+        s._set_due(1, now - timedelta(seconds=5))
+        s._set_due(1, now + timedelta(hours=1))   # rescheduled later
+        s._dispatch_due()
+        assert s._inflight == {}
+
+    async def test_notify_marks_task_changed_and_wakes(self):
+        s = Scheduler(on_task_execute=AsyncMock())
+        s._on_notify(None, 0, "syne_scheduler", "7")
+        assert s._changed == {7}
+        assert s._wake.is_set()
+
+    async def test_sync_rereads_changed_ids(self, mock_connection):
+        conn, ctx = mock_connection
+        s = Scheduler(on_task_execute=AsyncMock())
+        s._reload_needed = False
+        s._loaded_at = float("inf")
+        soon = datetime.now(timezone.utc) + timedelta(seconds=2)
+        s._set_due(3, soon)
+        s._changed = {3, 5}
+        conn.fetch.return_value = [{"id": 5, "next_run": soon}]   # 3 deleted, 5 created
+        with patch("syne.db.connection.get_connection", return_value=ctx):
+            await s._sync()
+        assert s._due_at == {5: soon}
+
+    async def test_sleep_wakes_at_next_due_time(self):
+        s = Scheduler(on_task_execute=AsyncMock())
+        s._set_due(1, datetime.now(timezone.utc) + timedelta(milliseconds=50))
+        started = asyncio.get_running_loop().time()
+        await s._sleep()
+        assert asyncio.get_running_loop().time() - started < 1.0
+
+
+class TestClaimAndRun:
+
+    async def test_claim_leases_task(self, mock_connection, mock_get_config):
+        conn, ctx = mock_connection
+        _txn(conn)
+        conn.fetchrow.return_value = _task_row()
+        s = Scheduler(on_task_execute=AsyncMock())
+        with patch("syne.db.connection.get_connection", return_value=ctx):
+            task, now = await s._claim(1)
+        assert "FOR UPDATE SKIP LOCKED" in conn.fetchrow.await_args.args[0]
+        lease = conn.execute.await_args.args[1]
+        assert lease > now + timedelta(minutes=5)
+
+    async def test_claimed_elsewhere_returns_none(self, mock_connection, mock_get_config):
+        conn, ctx = mock_connection
+        _txn(conn)
+        conn.fetchrow.return_value = None
+        s = Scheduler(on_task_execute=AsyncMock())
+        with patch("syne.db.connection.get_connection", return_value=ctx):
+            assert await s._claim(1) is None
+        conn.execute.assert_not_awaited()
+
+    async def test_misfire_advances_without_running(self, mock_connection, mock_get_config):
+        conn, ctx = mock_connection
+        _txn(conn)
+        conn.fetchrow.return_value = _task_row(next_run=datetime.now(timezone.utc) - timedelta(hours=2))
+        s = Scheduler(on_task_execute=AsyncMock())
+        with patch("syne.db.connection.get_connection", return_value=ctx):
+            assert await s._claim(1) is None
+        assert "SET next_run" in conn.execute.await_args.args[0]
+
+    async def test_once_task_disabled_after_run(self, mock_connection, mock_get_config):
+        conn, ctx = mock_connection
+        _txn(conn)
+        conn.fetchrow.return_value = _task_row(schedule_type="once", schedule_value="2026-01-01T00:00:00Z")
+        callback = AsyncMock()
+        s = _ready(Scheduler(on_task_execute=callback))
+        with patch("syne.db.connection.get_connection", return_value=ctx):
+            await s._run_task(1)
+        callback.assert_awaited_once_with(1, "ping", 42, None, None)
+        assert "enabled = false" in conn.execute.await_args.args[0]
+        assert 1 in s._changed
+
+    async def test_failed_run_retries_later(self, mock_connection, mock_get_config):
+        conn, ctx = mock_connection
+        _txn(conn)
+        conn.fetchrow.return_value = _task_row()
+        s = _ready(Scheduler(on_task_execute=AsyncMock(side_effect=RuntimeError("boom"))))
+        with patch("syne.db.connection.get_connection", return_value=ctx):
+            await s._run_task(1)
+        sql, next_run, _ = conn.execute.await_args.args
+        assert "run_count" not in sql
+        assert next_run > datetime.now(timezone.utc)
+
+    async def test_long_run_keeps_renewing_its_lease(self, mock_connection, mock_get_config):
+        conn, ctx = mock_connection
+        _txn(conn)
+        conn.fetchrow.return_value = _task_row()
+        conn.execute.return_value = "UPDATE 1"
+
+        async def _long_turn(*args):
+            await asyncio.sleep(0.05)
+
+        s = _ready(Scheduler(on_task_execute=_long_turn))
+        with patch("syne.db.connection.get_connection", return_value=ctx), \
+             patch("syne.scheduler._LEASE_RENEW", 0.01):
+            await s._run_task(1)
+        renewals = [c.args for c in conn.execute.await_args_list if "AND next_run = $3" in c.args[0]]
+        assert len(renewals) >= 2
+        claim_lease = conn.execute.await_args_list[0].args[1]
+        assert renewals[0][3] == claim_lease           # first renewal moves the claim's lease
+        assert renewals[1][3] == renewals[0][1]        # each later one the previous renewal
+        assert "run_count" in conn.execute.await_args.args[0]
+
+    async def test_renewal_stops_when_row_changed(self, mock_connection):
+        conn, ctx = mock_connection
+        conn.execute.return_value = "UPDATE 0"
+        s = Scheduler(on_task_execute=AsyncMock())
+        with patch("syne.db.connection.get_connection", return_value=ctx), \
+             patch("syne.scheduler._LEASE_RENEW", 0):
+            await asyncio.wait_for(s._renew_lease(1, datetime.now(timezone.utc)), timeout=1)
+        conn.execute.assert_awaited_once()
+
+    async def test_due_tasks_run_concurrently(self, mock_connection, mock_get_config):
+        conn, ctx = mock_connection
+        _txn(conn)
+        conn.fetchrow.side_effect = lambda sql, tid, now: _task_row(tid)
+        running, peak = 0, 0
+        gate = asyncio.Event()
+
+        async def _slow(*args):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await gate.wait()
+            running -= 1
+
+        s = _ready(Scheduler(on_task_execute=_slow), slots=2)
+        with patch("syne.db.connection.get_connection", return_value=ctx):
+            workers = [asyncio.create_task(s._run_task(i)) for i in (1, 2, 3)]
+            for _ in range(10):
+                await asyncio.sleep(0)
+            assert peak == 2          # bounded by the pool, not serial
+            gate.set()
+            await asyncio.gather(*workers)
+        assert peak == 2
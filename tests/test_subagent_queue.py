@@ -0,0 +1,157 @@
+"""Tests for the durable sub-agent job queue in syne.subagent."""
+
+import json
+
+import pytest
+from unittest.mock import patch, AsyncMock
+
+from syne.llm.provider import ChatMessage, ChatResponse
+from syne.subagent import (
+    LeaseLost,
+    SubAgentManager,
+    _dump_messages,
+    _load_messages,
+    _row_count,
+)
+
+
+def _manager() -> SubAgentManager:
+    m = SubAgentManager(provider=AsyncMock(), system_prompt="You are Syne.")
+    m.worker_id = "host-a:100"
+    return m
+
+
+@pytest.fixture
+def patched_config():
+    store = {}
+
+    async def _get_config(key, default=None):
+        return store.get(key, default)
+
+    with patch("syne.subagent.get_config", side_effect=_get_config):
+        yield store
+
+
+class TestHelpers:
+    def test_row_count(self):
+        assert _row_count("UPDATE 3") == 3
+        assert _row_count("UPDATE 0") == 0
+        assert _row_count(None) == 0
+
+    def test_messages_round_trip_through_json(self):
+        messages = [
+            ChatMessage(role="user", content="hi"),
+            ChatMessage(role="assistant", content="", metadata={"tool_calls": [{"id": "t1"}]}),
+        ]
+        restored = _load_messages(json.loads(json.dumps(_dump_messages(messages))))
+        assert [(m.role, m.content, m.metadata) for m in restored] == [
+            ("user", "hi", None),
+            ("assistant", "", {"tool_calls": [{"id": "t1"}]}),
+        ]
+
+
+class TestWorkerId:
+    def test_host_pid_and_per_process_tag(self):
+        with patch("syne.subagent.socket.gethostname", return_value="host-a"), \
+             patch("syne.subagent.os.getpid", return_value=1):
+            a = SubAgentManager(provider=AsyncMock(), system_prompt="")
+            b = SubAgentManager(provider=AsyncMock(), system_prompt="")
+        host, pid, tag = a.worker_id.split(":")
+        assert (host, pid, len(tag)) == ("host-a", "1", 8)
+        assert b.worker_id == a.worker_id
+
+
+class TestClaim:
+
+    async def test_claim_uses_skip_locked_and_decodes_checkpoint(self, mock_connection, patched_config):
+        conn, ctx = mock_connection
+        conn.fetchrow.return_value = {
+            "run_id": "r1", "task": "t", "context": None, "model": None,
+            "checkpoint": '{"round": 2}', "attempts": 2,
+        }
+        m = _manager()
+        with patch("syne.subagent.get_connection", return_value=ctx):
+            job = await m._claim_next()
+        sql, worker_id, lease, max_attempts = conn.fetchrow.await_args.args
+        assert "FOR UPDATE SKIP LOCKED" in sql
+        assert (worker_id, lease, max_attempts) == ("host-a:100", 300.0, 3)
+        assert job["checkpoint"] == {"round": 2}
+
+    async def test_empty_queue_returns_none(self, mock_connection, patched_config):
+        conn, ctx = mock_connection
+        with patch("syne.subagent.get_connection", return_value=ctx):
+            assert await _manager()._claim_next() is None
+
+    async def test_fill_slots_stops_at_max_concurrent(self, patched_config):
+        patched_config["subagents.max_concurrent"] = 2
+        m = _manager()
+        m._running = True
+        jobs = [{"run_id": f"r{i}", "model": None, "checkpoint": None, "attempts": 1} for i in range(5)]
+        m._claim_next = AsyncMock(side_effect=jobs)
+        started = []
+        m._start_job = lambda job, provider: (started.append(job["run_id"]),
+                                              m._active_runs.__setitem__(job["run_id"], AsyncMock(done=lambda: False)))
+        assert await m._fill_slots() == 2
+        assert started == ["r0", "r1"]
+
+
+class TestCheckpoint:
+
+    async def test_lost_lease_raises(self, mock_connection):
+        conn, ctx = mock_connection
+        conn.execute.return_value = "UPDATE 0"
+        state = {"messages": [], "round": 1, "tool_call_log": [], "tool_call_counts": {}, "tokens": [5, 6]}
+        with patch("syne.subagent.get_connection", return_value=ctx):
+            with pytest.raises(LeaseLost):
+                await _manager()._save_checkpoint("r1", state)
+        assert conn.execute.await_args.args[-1] == "host-a:100"
+
+    async def test_resume_continues_from_checkpoint(self, mock_connection, patched_config):
+        conn, ctx = mock_connection
+        conn.execute.return_value = "UPDATE 1"
+        m = _manager()
+        m.provider.name = "fake"
+        m.provider.chat = AsyncMock(return_value=ChatResponse(content="done", model="fake"))
+        checkpoint = {
+            "messages": _dump_messages([
+                ChatMessage(role="system", content="sys"),
+                ChatMessage(role="user", content="task"),
+                ChatMessage(role="tool", content="out", metadata={"tool_name": "exec"}),
+            ]),
+            "round": 4,
+            "tool_call_log": [{"name": "exec", "success": True}],
+            "tool_call_counts": {"exec": {"total": 1, "success": 1, "failed": 0}},
+            "tokens": [100, 20],
+        }
+        with patch("syne.subagent.get_connection", return_value=ctx):
+            result = await m._execute_task("r1", "task", None, None, checkpoint=checkpoint)
+        sent = m.provider.chat.await_args.kwargs["messages"]
+        assert [msg.content for msg in sent] == ["sys", "task", "out"]
+        assert "Tool call rounds: 4/" in result
+        assert "exec: 1 calls (1 ok)" in result
+
+
+class TestDeliveryAndRelease:
+
+    async def test_deliver_only_once(self, mock_connection):
+        conn, ctx = mock_connection
+        conn.fetchrow.side_effect = [
+            {"status": "completed", "result": "ok", "error": None, "parent_session_id": 9},
+            None,  # delivered_at already set by the first call
+        ]
+        callback = AsyncMock()
+        m = _manager()
+        m.set_completion_callback(callback)
+        with patch("syne.subagent.get_connection", return_value=ctx):
+            assert await m.deliver("r1") is True
+            assert await m.deliver("r1") is False
+        callback.assert_awaited_once_with("r1", "completed", "ok", 9)
+
+    async def test_release_requeues_without_counting_attempt(self, mock_connection):
+        conn, ctx = mock_connection
+        conn.execute.return_value = "UPDATE 2"
+        with patch("syne.subagent.get_connection", return_value=ctx):
+            assert await _manager()._release_claims() == 2
+        sql, worker_id = conn.execute.await_args.args
+        assert "status = 'queued'" in sql and "attempts - 1" in sql
+        assert worker_id == "host-a:100"
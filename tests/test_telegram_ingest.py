@@ -0,0 +1,145 @@
+"""Tests for syne.communication.telegram_ingest — update processor and webhook receiver."""
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+from telegram import Update
+
+from syne.communication.telegram_ingest import (
+    SECRET_HEADER,
+    ChatUpdateProcessor,
+    TelegramWebhookServer,
+    merge_text_updates,
+)
+
+
+def _update(update_id, text, user=7, chat=100, reply=False):
+    msg = {
+        "message_id": update_id,
+        "date": 1_700_000_000,
+        "chat": {"id": chat, "type": "private"},
+        "from": {"id": user, "is_bot": False, "first_name": "U"},
+        "text": text,
+        "entities": [{"type": "bold", "offset": 0, "length": 1}],
+    }
+    if reply:
+        msg["reply_to_message"] = {"message_id": 1, "date": 1_700_000_000, "chat": msg["chat"], "text": "q"}
+    return Update.de_json({"update_id": update_id, "message": msg}, None)
+
+
+class _Handled:
+    def __init__(self):
+        self.seen = []
+        self.gate = asyncio.Event()
+
+    async def handle(self, update):
+        self.seen.append(update.message.text if update.message else update.update_id)
+        await self.gate.wait()
+
+
+@pytest.fixture
+async def processor():
+    p = ChatUpdateProcessor(max_running=4, coalesce_window=0)
+    handled = _Handled()
+    p.application = SimpleNamespace(bot=None, process_update=handled.handle)
+    p.handled = handled
+    yield p
+    handled.gate.set()
+    await p.shutdown()
+
+
+async def _settle(rounds=10):
+    for _ in range(rounds):
+        await asyncio.sleep(0)
+
+
+class TestProcessor:
+
+    async def test_messages_serialized_and_burst_coalesced(self, processor):
+        h = processor.handled
+        for i, text in enumerate(["one", "two", "three"], start=1):
+            u = _update(i, text)
+            await processor.do_process_update(u, h.handle(u))
+            await _settle()
+        assert h.seen == ["one"]
+        h.gate.set()
+        await _settle()
+        assert h.seen == ["one", "two\nthree"]
+
+    async def test_commands_bypass_busy_chat(self, processor):
+        h = processor.handled
+        u = _update(1, "working")
+        await processor.do_process_update(u, h.handle(u))
+        await _settle()
+        cancel = _update(2, "/cancel")
+        bypass = asyncio.ensure_future(processor.do_process_update(cancel, h.handle(cancel)))
+        await _settle()
+        assert h.seen == ["working", "/cancel"]
+        h.gate.set()
+        await bypass
+
+    async def test_replies_are_not_merged(self, processor):
+        h = processor.handled
+        first = _update(1, "busy")
+        await processor.do_process_update(first, h.handle(first))
+        await _settle()
+        for i, (text, reply) in enumerate([("a", False), ("b", True)], start=2):
+            u = _update(i, text, reply=reply)
+            await processor.do_process_update(u, h.handle(u))
+        h.gate.set()
+        await _settle(20)
+        assert h.seen == ["busy", "a", "b"]
+
+
+def test_merge_keeps_first_message_and_drops_entities():
+    merged = merge_text_updates([_update(5, "hello"), _update(6, "world")], None)
+    assert merged.message.message_id == 5
+    assert merged.message.text == "hello\nworld"
+    assert not merged.message.entities
+
+
+@pytest.fixture
+async def webhook():
+    app = SimpleNamespace(bot=None, update_queue=asyncio.Queue())
+    proc = SimpleNamespace(queue=SimpleNamespace(saturated=False))
+    server = TelegramWebhookServer(app, proc, secret="s3cret", path="/tg", port=0)
+    await server.start()
+    server.port = server._server.sockets[0].getsockname()[1]
+    yield server
+    await server.stop()
+
+
+async def _post(server, body, secret="s3cret", path="/tg", method="POST"):
+    reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+    data = json.dumps(body).encode()
+    head = f"{method} {path} HTTP/1.1\r\nHost: x\r\nContent-Length: {len(data)}\r\n"
+    if secret is not None:
+        head += f"{SECRET_HEADER}: {secret}\r\n"
+    writer.write(head.encode() + b"\r\n" + data)
+    await writer.drain()
+    status_line = await reader.readline()
+    writer.close()
+    return int(status_line.split()[1])
+
+
+class TestWebhook:
+
+    async def test_accepted_update_is_queued(self, webhook):
+        assert await _post(webhook, _update(9, "hi").to_dict()) == 200
+        update = webhook.application.update_queue.get_nowait()
+        assert update.message.text == "hi"
+
+    async def test_wrong_secret_rejected(self, webhook):
+        assert await _post(webhook, {"update_id": 1}, secret="nope") == 403
+        assert await _post(webhook, {"update_id": 1}, secret=None) == 403
+        assert webhook.application.update_queue.empty()
+
+    async def test_saturated_queue_asks_telegram_to_retry(self, webhook):
+        webhook.processor.queue.saturated = True
+        assert await _post(webhook, {"update_id": 1}) == 503
+
+    async def test_wrong_path_and_method(self, webhook):
+        assert await _post(webhook, {}, path="/other") == 404
+        assert await _post(webhook, {}, method="GET") == 405
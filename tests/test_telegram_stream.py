@@ -0,0 +1,175 @@
+"""Tests for syne.communication.telegram_stream — progressive draft edits."""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+import telegram.error as tg_err
+
+from syne.communication.outbound import process_outbound
+from syne.communication.telegram_stream import TelegramDraftStream
+
+
+class _FakeBot:
+    def __init__(self):
+        self.calls = []
+        self._next_id = 100
+        self.fail_edits = []          # exceptions raised by upcoming edits, in order
+
+    async def send_message(self, chat_id, text, parse_mode=None, **kw):
+        self._next_id += 1
+        self.calls.append(("send", self._next_id, text, parse_mode))
+        return SimpleNamespace(message_id=self._next_id)
+
+    async def edit_message_text(self, chat_id, message_id, text, parse_mode=None, **kw):
+        if self.fail_edits:
+            raise self.fail_edits.pop(0)
+        self.calls.append(("edit", message_id, text, parse_mode))
+
+    async def delete_message(self, chat_id, message_id):
+        self.calls.append(("delete", message_id, None, None))
+
+    def kinds(self):
+        return [c[0] for c in self.calls]
+
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+class TestDrafts:
+
+    async def test_first_delta_sends_draft_then_edits(self):
+        bot = _FakeBot()
+        s = TelegramDraftStream(bot, 1, interval=0)
+        s.callbacks().on_text("Hello")
+        await _settle()
+        s.feed(" world")
+        await _settle()
+        assert bot.calls[0][:3] == ("send", 101, "Hello")
+        assert bot.calls[-1][:3] == ("edit", 101, "Hello world")
+        await s.finish(["<b>Hello world</b>"])
+        assert bot.calls[-1] == ("edit", 101, "<b>Hello world</b>", "HTML")
+
+    async def test_edits_are_throttled(self):
+        bot = _FakeBot()
+        s = TelegramDraftStream(bot, 1, interval=60)
+        for word in ("a", "b", "c", "d"):
+            s.feed(word)
+            await _settle()
+        # One send, then the loop sleeps out the interval; no edit storm.
+        assert bot.kinds() == ["send"]
+        await s.finish(["abcd"])
+        assert bot.kinds() == ["send", "edit"]
+
+    async def test_rollover_at_max_length(self):
+        bot = _FakeBot()
+        s = TelegramDraftStream(bot, 1, interval=0, max_length=20)
+        s.feed("first line here\nsecond line is longer\nthird")
+        await _settle()
+        sends = [c for c in bot.calls if c[0] == "send"]
+        assert len(sends) >= 2
+        assert all(len(c[2]) <= 20 for c in bot.calls)
+        assert sends[0][2] == "first line here"
+
+    async def test_finish_with_fewer_chunks_deletes_leftovers(self):
+        bot = _FakeBot()
+        s = TelegramDraftStream(bot, 1, interval=0, max_length=10)
+        s.feed("aaaa bbbb cccc dddd")
+        await _settle()
+        assert len(s.messages) == 2
+        await s.finish(["short"])
+        assert bot.calls[-2][:3] == ("edit", 101, "short")
+        assert bot.calls[-1][:2] == ("delete", 102)
+
+    async def test_finish_with_more_chunks_sends_extra(self):
+        bot = _FakeBot()
+        s = TelegramDraftStream(bot, 1, interval=0)
+        s.feed("draft")
+        await _settle()
+        last = await s.finish(["one", "two"])
+        assert bot.calls[-1] == ("send", last.message_id, "two", "HTML")
+
+    async def test_html_rejected_falls_back_to_plain(self):
+        bot = _FakeBot()
+        s = TelegramDraftStream(bot, 1, interval=0)
+        s.feed("x")
+        await _settle()
+        bot.fail_edits = [tg_err.BadRequest("Can't parse entities")]
+        await s.finish(["<b>a &amp; b</b>"])
+        assert bot.calls[-1] == ("edit", 101, "a & b", None)
+
+
+class TestOutboundFilter:
+
+    async def test_drafts_never_show_server_paths(self):
+        bot = _FakeBot()
+        s = TelegramDraftStream(bot, 1, interval=0, outbound=process_outbound)
+        for chunk in ("Saved it to /ho", "me/syne/work", "space/out.pdf", " for you"):
+            s.feed(chunk)
+            await _settle()
+        assert [c[2] for c in bot.calls] == ["Saved it to", "Saved it to  for you"]
+
+    async def test_plain_words_are_not_held_back(self):
+        bot = _FakeBot()
+        s = TelegramDraftStream(bot, 1, interval=0, outbound=process_outbound)
+        s.feed("Hello wor")
+        await _settle()
+        assert bot.calls[-1][2] == "Hello wor"
+
+
+class TestErrors:
+
+    async def test_not_modified_is_ignored(self):
+        bot = _FakeBot()
+        s = TelegramDraftStream(bot, 1, interval=0)
+        s.feed("x")
+        await _settle()
+        bot.fail_edits = [tg_err.BadRequest("Message is not modified")]
+        s.feed("y")
+        await _settle()
+        assert not s.failed
+
+    async def test_retry_after_waits_and_retries(self, monkeypatch):
+        bot = _FakeBot()
+        slept = []
+        real_sleep = asyncio.sleep
+
+        async def _sleep(d):
+            slept.append(d)
+            await real_sleep(0)
+
+        monkeypatch.setattr("syne.communication.telegram_stream.asyncio.sleep", _sleep)
+        s = TelegramDraftStream(bot, 1, interval=0)
+        s.feed("x")
+        await _settle()
+        bot.fail_edits = [tg_err.RetryAfter(5)]
+        s.feed("y")
+        for _ in range(10):
+            await real_sleep(0)
+        assert 5 in slept
+        assert bot.calls[-1][:3] == ("edit", 101, "xy")
+        await s.discard()
+
+    async def test_other_error_disables_stream(self):
+        bot = _FakeBot()
+        s = TelegramDraftStream(bot, 1, interval=0)
+        s.feed("x")
+        await _settle()
+        bot.fail_edits = [tg_err.Forbidden("bot was blocked")]
+        s.feed("y")
+        await _settle()
+        assert s.failed
+        s.feed("z")
+        await _settle()
+        assert bot.kinds() == ["send"]
+
+    async def test_exception_in_block_deletes_drafts(self):
+        bot = _FakeBot()
+        with pytest.raises(RuntimeError):
+            async with TelegramDraftStream(bot, 1, interval=0) as s:
+                s.feed("partial")
+                await _settle()
+                raise RuntimeError("llm failed")
+        assert bot.calls[-1][:2] == ("delete", 101)
@@ -0,0 +1,146 @@
+"""Tests for the WhatsApp bridge I/O — wacli store reader and per-chat outbox."""
+
+import asyncio
+import sqlite3
+import time
+
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from syne.abilities import _wacli
+from syne.abilities._wacli import WacliReader
+from syne.abilities.whatsapp import WhatsAppAbility
+
+
+def _create_store(path):
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("""
+        CREATE TABLE messages (
+            chat_jid TEXT, sender_jid TEXT, sender_name TEXT, chat_name TEXT, text TEXT,
+            from_me INTEGER, media_type TEXT, mime_type TEXT, media_caption TEXT, msg_id TEXT,
+            local_path TEXT
+        )
+    """)
+    conn.execute("INSERT INTO messages (chat_jid, text, from_me) VALUES ('old@s.whatsapp.net', 'before start', 0)")
+    conn.commit()
+    return conn
+
+
+def _insert(conn, chat, text):
+    conn.execute("INSERT INTO messages (chat_jid, text, from_me) VALUES (?, ?, 0)", (chat, text))
+    conn.commit()
+
+
+class TestReader:
+
+    @pytest.fixture
+    def store(self, tmp_path):
+        path = str(tmp_path / "wacli.db")
+        conn = _create_store(path)
+        yield path, conn
+        conn.close()
+
+    async def _first_batch(self, path, conn, **patches):
+        reader = WacliReader(path)
+        with patch.multiple(_wacli, **patches):
+            queue = await reader.start()
+            try:
+                started = time.monotonic()
+                _insert(conn, "a@s.whatsapp.net", "hello")
+                _insert(conn, "status@broadcast", "ignored")
+                rows = await asyncio.wait_for(queue.get(), timeout=3)
+                return rows, time.monotonic() - started
+            finally:
+                await reader.stop()
+
+    async def test_new_rows_arrive_without_waiting_for_rescan(self, store):
+        path, conn = store
+        rows, latency = await self._first_batch(path, conn, IDLE_RESCAN=30.0)
+        assert [r["text"] for r in rows] == ["hello"]
+        assert latency < 1.0
+
+    async def test_stat_fallback(self, store):
+        path, conn = store
+        with patch.object(_wacli, "_InotifyWatcher", side_effect=OSError("no inotify")):
+            rows, _ = await self._first_batch(path, conn, IDLE_RESCAN=30.0, STAT_INTERVAL=0.05)
+        assert rows[0]["chat_jid"] == "a@s.whatsapp.net"
+
+    async def test_existing_rows_skipped_and_stop_joins_thread(self, store):
+        path, _ = store
+        reader = WacliReader(path)
+        await reader.start()
+        assert reader.last_rowid == 1
+        await reader.stop()
+        assert reader._thread is None
+
+    async def test_missing_store_raises(self, tmp_path):
+        with pytest.raises(sqlite3.Error):
+            await WacliReader(str(tmp_path / "absent.db")).start()
+
+
+@pytest.fixture
+def bridge():
+    wa = WhatsAppAbility()
+    wa._running = True
+    wa._process = object()  # sync "running"
+    wa._stop_sync = AsyncMock(side_effect=lambda: setattr(wa, "_process", None))
+    wa._start_sync = AsyncMock(side_effect=lambda: setattr(wa, "_process", object()) or True)
+    wa.sent = []
+
+    async def send_text(jid, text):
+        wa.sent.append((jid, text))
+
+    wa._wacli_send_text = AsyncMock(side_effect=send_text)
+    wa._send_file_locked = AsyncMock()
+    with patch("syne.abilities.whatsapp._SEND_GAP", 0):
+        yield wa
+    if wa._sender_task:
+        wa._sender_task.cancel()
+
+
+class TestOutbox:
+
+    async def test_burst_merged_per_chat_with_one_sync_pause(self, bridge):
+        async with bridge._send_lock:  # a send or media download is in flight
+            sends = [
+                asyncio.create_task(bridge._send_text("a", "one")),
+                asyncio.create_task(bridge._send_text("b", "other chat")),
+                asyncio.create_task(bridge._send_text("a", "two")),
+            ]
+            await asyncio.sleep(0)
+        await asyncio.gather(*sends)
+        assert bridge.sent == [("a", "one\n\ntwo"), ("b", "other chat")]
+        bridge._stop_sync.assert_awaited_once()
+        bridge._start_sync.assert_awaited_once()
+
+    async def test_media_keeps_order_and_breaks_text_runs(self, bridge):
+        with patch("syne.abilities.whatsapp.extract_all_media",
+                   side_effect=[("before", []), ("caption", ["/tmp/a.png"]), ("after", [])]):
+            async with bridge._send_lock:
+                sends = [asyncio.create_task(bridge._send_text("a", t)) for t in ("1", "2", "3")]
+                await asyncio.sleep(0)
+            await asyncio.gather(*sends)
+        assert bridge.sent == [("a", "before"), ("a", "after")]
+        bridge._send_file_locked.assert_awaited_once_with("a", "/tmp/a.png", caption="caption")
+
+    async def test_failure_reaches_every_merged_caller(self, bridge):
+        bridge._wacli_send_text.side_effect = RuntimeError("rc=1")
+        async with bridge._send_lock:
+            sends = [asyncio.create_task(bridge._send_text("a", t)) for t in ("x", "y")]
+            await asyncio.sleep(0)
+        results = await asyncio.gather(*sends, return_exceptions=True)
+        assert all(isinstance(r, RuntimeError) for r in results)
+        bridge._start_sync.assert_awaited_once()  # sync resumed regardless
+
+    @pytest.mark.parametrize("sender_started", [False, True])
+    async def test_stop_fails_pending_sends(self, bridge, sender_started):
+        bridge._agent = None
+        bridge._process = None
+        async with bridge._send_lock:
+            send = asyncio.create_task(bridge._send_text("a", "late"))
+            for _ in range(3 if sender_started else 1):
+                await asyncio.sleep(0)
+            await bridge.stop()
+        with pytest.raises(RuntimeError, match="stopped"):
+            await send